@@ -1,18 +1,16 @@
 import time
 import requests
 import hashlib
-import pyodbc
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
-
-# =============================================
-# CONFIGURACIÓN DE BASE DE DATOS
-# =============================================
-DB_CONFIG = "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost;DATABASE=DB_CGPVP2;Trusted_Connection=yes;Encrypt=no;"
+from Conexionsql import get_connection   # pool compartido con la API
+from cache_web import invalidar          # corre dentro de la API: refresca la web
+from indice_noticias import reindexar    # y el buscador de noticias
+from almacen_media import guardar_bytes  # la foto va al almacén de media, no a la fila
 
 # =============================================
 # HELPER: Descargar imagen como bytes
@@ -95,9 +93,9 @@ def escanear_y_guardar_db():
                 except:
                     print("ℹ️ No se encontró imagen en el post.")
 
-                # ✅ Descargar imagen como bytes (antes se guardaba la URL como texto)
+                # ✅ Descargar imagen y guardarla en el almacén de media (la BD guarda el hash)
                 foto_bytes = descargar_foto_bytes(foto_url)
-                foto_varbinary = pyodbc.Binary(foto_bytes) if foto_bytes else None
+                foto_hash = guardar_bytes(foto_bytes) if foto_bytes else None
 
                 # Metadatos
                 id_pub = hashlib.md5(contenido.encode('utf-8')).hexdigest()
@@ -106,7 +104,7 @@ def escanear_y_guardar_db():
 
                 # --- GUARDAR EN BASE DE DATOS ---
                 print(f"📡 Conectando a SQL Server...")
-                conn = pyodbc.connect(DB_CONFIG)
+                conn = get_connection()
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -114,13 +112,16 @@ def escanear_y_guardar_db():
                         @idpublicacion = ?, 
                         @titulo = ?, 
                         @contenido = ?, 
-                        @foto = ?, 
+                        @foto = NULL, 
                         @fecha = ?,
-                        @creado_por = 'Facebook'
-                """, (id_pub, titulo_auto, contenido, foto_varbinary, fecha_recolecta))
+                        @creado_por = 'Facebook',
+                        @foto_hash = ?
+                """, (id_pub, titulo_auto, contenido, fecha_recolecta, foto_hash))
                 
                 conn.commit()
-                print(f"✅ Éxito: Post '{id_pub[:8]}' guardado con {'foto' if foto_varbinary else 'sin foto'}.")
+                reindexar(id_pub)
+                invalidar("noticias")
+                print(f"✅ Éxito: Post '{id_pub[:8]}' guardado con {'foto' if foto_hash else 'sin foto'}.")
 
             except Exception as e:
                 print(f"⚠️ Error al extraer datos del post: {e}")
@@ -1,10 +1,389 @@
+# Conexionsql.py
+"""
+Conexión a SQL Server con POOL de conexiones compartido.
+
+Todos los módulos (endpoints públicos, panel admin y bot de Facebook)
+piden su conexión con get_connection(). La conexión devuelta es un proxy
+que, al cerrarse o al salir del bloque `with`, vuelve al pool en lugar de
+destruirse, así evitamos el handshake TCP + TLS + login en cada request.
+
+✅ Tamaño mínimo / máximo acotado y thread-safe
+✅ Health check (SELECT 1) al prestar conexiones que llevaban rato inactivas
+✅ Vida máxima por conexión (se recicla al cumplirla)
+✅ Limpieza de conexiones inactivas sobre el mínimo
+✅ Timeout de espera cuando el pool está lleno
+✅ Métricas: metricas_pool()
+"""
+import os
+import threading
+import time
+from collections import deque
+
 import pyodbc
 
-def get_connection():
-    conn = pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=LAPTOP-VB6I49QM;"
-        "DATABASE=DB_CGPVP2;"
-        "Trusted_Connection=yes;"
-    )
-    return conn
\ No newline at end of file
+# =============================================
+# CONFIGURACIÓN
+# =============================================
+# Antes del pool, admin_perfil.py y Cargadatosfacebook.py abrían sus propias
+# conexiones a SERVER=localhost (el bot además con Encrypt=no) y el resto a
+# LAPTOP-VB6I49QM. Ahora todos usan esta cadena: donde el servidor no sea
+# LAPTOP-VB6I49QM, definir CGPVP_SQL_SERVER (p.ej. "localhost") o la cadena
+# completa en CGPVP_SQL_CADENA.
+SQL_SERVER = os.environ.get("CGPVP_SQL_SERVER", "LAPTOP-VB6I49QM")
+
+CADENA_CONEXION = os.environ.get("CGPVP_SQL_CADENA") or (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    f"SERVER={SQL_SERVER};"
+    "DATABASE=DB_CGPVP2;"
+    "Trusted_Connection=yes;"
+)
+
+POOL_MIN = 2                  # conexiones que se mantienen abiertas siempre
+POOL_MAX = 20                 # tope de conexiones abiertas a la vez
+POOL_TIMEOUT_ESPERA = 10      # seg. esperando una conexión libre antes de fallar
+POOL_VIDA_MAXIMA = 1800       # seg. de vida de una conexión antes de reciclarla
+POOL_MAX_INACTIVA = 300       # seg. inactiva antes de cerrarla (sobre el mínimo)
+POOL_VERIFICAR_TRAS = 30      # seg. inactiva a partir de los cuales se hace ping
+POOL_INTERVALO_LIMPIEZA = 60  # seg. entre pasadas del hilo de limpieza
+
+
+class PoolAgotadoError(Exception):
+    """No se obtuvo una conexión libre dentro del timeout de espera."""
+
+
+class _Entrada:
+    """Conexión física + sus tiempos de vida."""
+    __slots__ = ("conn", "creada", "ultimo_uso")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.creada = time.monotonic()
+        self.ultimo_uso = self.creada
+
+
+# =============================================
+# PROXY QUE SE ENTREGA A LOS ENDPOINTS
+# =============================================
+class ConexionPool:
+    """
+    Se comporta como una conexión pyodbc (cursor, commit, rollback, ...).
+    close() y el fin del bloque `with` devuelven la conexión al pool.
+    """
+
+    def __init__(self, pool, entrada):
+        self._pool = pool
+        self._entrada = entrada
+
+    def _conexion(self):
+        if self._entrada is None:
+            raise pyodbc.ProgrammingError("La conexión ya fue devuelta al pool")
+        return self._entrada.conn
+
+    def cursor(self):
+        return self._conexion().cursor()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion(), nombre)
+
+    def _devolver(self, sana: bool):
+        entrada, self._entrada = self._entrada, None
+        if entrada is not None:
+            self._pool._devolver(entrada, sana)
+
+    def close(self):
+        self._devolver(sana=True)
+
+    def descartar(self):
+        """Cierra la conexión física en lugar de devolverla (p.ej. tras un error de red)."""
+        self._devolver(sana=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Igual que pyodbc: commit si todo fue bien, rollback si hubo excepción
+        sana = True
+        try:
+            if self._entrada is not None:
+                if exc_type is None:
+                    self._entrada.conn.commit()
+                else:
+                    self._entrada.conn.rollback()
+        except pyodbc.Error:
+            sana = False
+            if exc_type is None:
+                self._devolver(sana)
+                raise
+        self._devolver(sana)
+        return False
+
+
+# =============================================
+# POOL
+# =============================================
+class PoolConexiones:
+
+    def __init__(
+        self,
+        cadena: str,
+        minimo: int = POOL_MIN,
+        maximo: int = POOL_MAX,
+        timeout_espera: float = POOL_TIMEOUT_ESPERA,
+        vida_maxima: float = POOL_VIDA_MAXIMA,
+        max_inactiva: float = POOL_MAX_INACTIVA,
+        verificar_tras: float = POOL_VERIFICAR_TRAS,
+    ):
+        self._cadena = cadena
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout_espera = timeout_espera
+        self.vida_maxima = vida_maxima
+        self.max_inactiva = max_inactiva
+        self.verificar_tras = verificar_tras
+
+        self._cond = threading.Condition()
+        self._libres = deque()     # LIFO: se reutilizan las más recientes
+        self._abiertas = 0         # libres + prestadas + en apertura
+        self._prestadas = 0
+        self._esperando = 0
+        self._cerrado = False
+        self._stats = {
+            "creadas": 0,
+            "cerradas": 0,
+            "prestamos": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "fallos_health_check": 0,
+            "recicladas_por_vida": 0,
+            "cerradas_por_inactividad": 0,
+        }
+
+    # ---------- helpers internos ----------
+    def _abrir(self) -> _Entrada:
+        entrada = _Entrada(pyodbc.connect(self._cadena))
+        with self._cond:
+            self._stats["creadas"] += 1
+        return entrada
+
+    @staticmethod
+    def _cerrar_fisica(entrada: _Entrada):
+        try:
+            entrada.conn.close()
+        except Exception:
+            pass
+
+    def _vencida(self, entrada: _Entrada, ahora: float) -> bool:
+        return ahora - entrada.creada >= self.vida_maxima
+
+    @staticmethod
+    def _ping(entrada: _Entrada) -> bool:
+        try:
+            cursor = entrada.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    # ---------- API ----------
+    def prestar(self) -> ConexionPool:
+        limite = time.monotonic() + self.timeout_espera
+        descartadas = []
+        entrada = None
+        abrir_nueva = False
+
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+                ahora = time.monotonic()
+                while self._libres:
+                    candidata = self._libres.pop()
+                    if self._vencida(candidata, ahora):
+                        self._abiertas -= 1
+                        self._stats["recicladas_por_vida"] += 1
+                        descartadas.append(candidata)
+                        continue
+                    entrada = candidata
+                    break
+                if entrada is not None:
+                    break
+                if self._abiertas < self.maximo:
+                    self._abiertas += 1
+                    abrir_nueva = True
+                    break
+                restante = limite - ahora
+                if restante <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolAgotadoError(
+                        f"Sin conexiones libres tras {self.timeout_espera}s "
+                        f"(máximo {self.maximo})"
+                    )
+                self._stats["esperas"] += 1
+                self._esperando += 1
+                try:
+                    self._cond.wait(restante)
+                finally:
+                    self._esperando -= 1
+            self._prestadas += 1
+            self._stats["prestamos"] += 1
+            self._stats["cerradas"] += len(descartadas)
+
+        # Todo lo que toca la red va fuera del lock
+        for d in descartadas:
+            self._cerrar_fisica(d)
+
+        try:
+            if abrir_nueva:
+                entrada = self._abrir()
+            elif time.monotonic() - entrada.ultimo_uso >= self.verificar_tras and not self._ping(entrada):
+                with self._cond:
+                    self._stats["fallos_health_check"] += 1
+                    self._stats["cerradas"] += 1
+                self._cerrar_fisica(entrada)
+                entrada = self._abrir()
+        except Exception:
+            with self._cond:
+                self._abiertas -= 1
+                self._prestadas -= 1
+                self._cond.notify()
+            raise
+
+        return ConexionPool(self, entrada)
+
+    def _devolver(self, entrada: _Entrada, sana: bool):
+        if sana:
+            # Deja la conexión sin transacción pendiente para el siguiente
+            try:
+                entrada.conn.rollback()
+            except pyodbc.Error:
+                sana = False
+
+        ahora = time.monotonic()
+        with self._cond:
+            self._prestadas -= 1
+            if sana and not self._cerrado and not self._vencida(entrada, ahora):
+                entrada.ultimo_uso = ahora
+                self._libres.append(entrada)
+                cerrar = False
+            else:
+                self._abiertas -= 1
+                self._stats["cerradas"] += 1
+                if sana and not self._cerrado:
+                    self._stats["recicladas_por_vida"] += 1
+                cerrar = True
+            self._cond.notify()
+
+        if cerrar:
+            self._cerrar_fisica(entrada)
+
+    def limpiar(self):
+        """Cierra conexiones inactivas o vencidas y repone hasta el mínimo."""
+        ahora = time.monotonic()
+        descartadas = []
+        with self._cond:
+            conservar = deque()
+            # Las más antiguas están al principio de la deque
+            for entrada in self._libres:
+                sobra = self._abiertas - len(descartadas) > self.minimo
+                if self._vencida(entrada, ahora):
+                    descartadas.append(entrada)
+                    self._stats["recicladas_por_vida"] += 1
+                elif sobra and ahora - entrada.ultimo_uso >= self.max_inactiva:
+                    descartadas.append(entrada)
+                    self._stats["cerradas_por_inactividad"] += 1
+                else:
+                    conservar.append(entrada)
+            self._libres = conservar
+            self._abiertas -= len(descartadas)
+            self._stats["cerradas"] += len(descartadas)
+            faltan = max(0, self.minimo - self._abiertas) if not self._cerrado else 0
+            self._abiertas += faltan
+
+        for entrada in descartadas:
+            self._cerrar_fisica(entrada)
+
+        for _ in range(faltan):
+            try:
+                nueva = self._abrir()
+            except Exception:
+                with self._cond:
+                    self._abiertas -= 1
+                continue
+            with self._cond:
+                nueva.ultimo_uso = time.monotonic()
+                self._libres.appendleft(nueva)
+                self._cond.notify()
+
+    def cerrar(self):
+        with self._cond:
+            self._cerrado = True
+            libres, self._libres = list(self._libres), deque()
+            self._abiertas -= len(libres)
+            self._stats["cerradas"] += len(libres)
+            self._cond.notify_all()
+        for entrada in libres:
+            self._cerrar_fisica(entrada)
+
+    def metricas(self) -> dict:
+        with self._cond:
+            return {
+                "minimo": self.minimo,
+                "maximo": self.maximo,
+                "abiertas": self._abiertas,
+                "libres": len(self._libres),
+                "prestadas": self._prestadas,
+                "esperando": self._esperando,
+                **self._stats,
+            }
+
+
+# =============================================
+# POOL GLOBAL DEL PROCESO
+# =============================================
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hilo_limpieza(pool: PoolConexiones):
+    # La primera pasada rellena el pool hasta el mínimo en segundo plano
+    while not pool._cerrado:
+        try:
+            pool.limpiar()
+        except Exception as e:
+            print(f"⚠️ Error limpiando el pool de conexiones: {e}")
+        time.sleep(POOL_INTERVALO_LIMPIEZA)
+
+
+def obtener_pool() -> PoolConexiones:
+    """Crea el pool en el primer uso (importar el módulo no abre conexiones)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = PoolConexiones(CADENA_CONEXION)
+                threading.Thread(
+                    target=_hilo_limpieza, args=(pool,),
+                    name="pool-sql-limpieza", daemon=True,
+                ).start()
+                _pool = pool
+    return _pool
+
+
+def get_connection() -> ConexionPool:
+    return obtener_pool().prestar()
+
+
+def metricas_pool() -> dict:
+    if _pool is None:
+        return {"iniciado": False}
+    return {"iniciado": True, **_pool.metricas()}
+
+
+def cerrar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
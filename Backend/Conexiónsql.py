@@ -1,10 +1,9 @@
-import pyodbc
-
-def get_connection():
-    conn = pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=LAPTOP-VB6I49QM;"
-        "DATABASE=DB_CGPVP2;"
-        "Trusted_Connection=yes;"
-    )
-    return conn
\ No newline at end of file
+# Conexiónsql.py
+# Alias del módulo Conexionsql: ambos nombres comparten el MISMO pool de conexiones.
+from Conexionsql import (  # noqa: F401
+    get_connection,
+    metricas_pool,
+    cerrar_pool,
+    obtener_pool,
+    PoolAgotadoError,
+)
@@ -1,31 +1,37 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from datetime import date
-from Conexiónsql import get_connection
+import math
+from ejecutor_sp import PoolAgotadoError
+import directorio_miembros   # búsqueda en memoria + límite por cliente + caché negativa
 
 app = FastAPI()
 
 class CriterioBusqueda(BaseModel):
     criterio: str
+    modo: str = Field("prefijo", pattern="^(exacto|prefijo)$")
 @app.post("/buscar")
-def buscar_miembro(data: CriterioBusqueda):
+def buscar_miembro(data: CriterioBusqueda, request: Request):
+    # Token bucket por cliente (IP; detrás del proxy, uvicorn --proxy-headers)
+    cliente = request.client.host if request.client else "desconocido"
+    espera = directorio_miembros.limitador.consumir(cliente)
+    if espera:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "ERROR", "mensaje": "Demasiadas búsquedas seguidas. Intenta en unos segundos."},
+            headers={"Retry-After": str(max(1, math.ceil(espera)))},
+        )
+
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                EXEC SP_BUSCAR_MIEMBRO @criterio_busqueda=?
-            """, (data.criterio,))
+        resultados = directorio_miembros.buscar(data.criterio, data.modo)
+
+        if not resultados:
+            return {"status": "No se encontraron miembros", "resultados": []}
 
-            columns = [column[0] for column in cursor.description]
-            rows = cursor.fetchall()
-            
-            if not rows:
-                return {"status": "No se encontraron miembros", "resultados": []}
-            
-            # Convertir cada fila a diccionario
-            resultados = [dict(zip(columns, row)) for row in rows]
-            
-            return {"status": "SUCCESS", "resultados": resultados}
+        return {"status": "SUCCESS", "resultados": resultados}
 
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,27 +1,10 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from Conexiónsql import get_connection
+from ejecutor_sp import sp as ejecutar_sp   # FUNCIÓN PARA EJECUTAR SP (compartida)
+from almacen_media import con_urls_media, guardar_media
 
 app = FastAPI()
 
-# ================================
-# FUNCIÓN PARA EJECUTAR SP
-# ================================
-def ejecutar_sp(sp_nombre: str, params: tuple):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(f"EXEC {sp_nombre} " + ",".join(["?"] * len(params)), params)
-
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                rows = cursor.fetchall()
-                return [dict(zip(columns, row)) for row in rows]
-            return [{"status": "SUCCESS"}]
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
 # ================================
 # 1️⃣ LOGIN ADMIN
 # ================================
@@ -31,7 +14,7 @@ class LoginAdmin(BaseModel):
 
 @app.post("/login")
 def login_admin(data: LoginAdmin):
-    return ejecutar_sp("SP_VALIDAR_LOGIN_ADMIN", (data.email, data.password))[0]
+    return con_urls_media(ejecutar_sp("SP_VALIDAR_LOGIN_ADMIN", (data.email, data.password)), "foto_perfil")[0]
 
 # ================================
 # 2️⃣ CREAR ADMIN
@@ -53,7 +36,7 @@ def crear_admin(admin: CrearAdmin):
         admin.nombre_completo,
         admin.email,
         admin.rol,
-        admin.foto_perfil,
+        guardar_media(admin.foto_perfil),   # base64 -> almacén de media, en la BD el hash
         admin.creado_por
     ))[0]
 
@@ -74,7 +57,7 @@ def actualizar_perfil(data: ActualizarPerfilAdmin):
         data.admin_id,
         data.nombre_completo,
         data.email,
-        data.foto_perfil,
+        guardar_media(data.foto_perfil),
         data.password_actual,
         data.password_nuevo
     ))[0]
@@ -101,7 +84,7 @@ def cambiar_password(data: CambiarPasswordAdmin):
 @app.get("/listar")
 def listar_admins(solo_activos: bool = True):
     resultado = ejecutar_sp("SP_LISTAR_ADMINS", (solo_activos,))
-    return {"status": "SUCCESS", "resultados": resultado}
+    return {"status": "SUCCESS", "resultados": con_urls_media(resultado, "foto_perfil")}
 
 # ================================
 # 6️⃣ ACTIVAR / DESACTIVAR ADMIN
@@ -127,4 +110,4 @@ class VerificarSesion(BaseModel):
 
 @app.post("/verificar_sesion")
 def verificar_sesion(data: VerificarSesion):
-    return ejecutar_sp("SP_VERIFICAR_SESION_ADMIN", (data.admin_id,))[0]
\ No newline at end of file
+    return con_urls_media(ejecutar_sp("SP_VERIFICAR_SESION_ADMIN", (data.admin_id,)), "foto_perfil")[0]
\ No newline at end of file
@@ -6,49 +6,132 @@ Lista cursos activos, eventos y detalles para usuarios finales
 ✅ Usa los mismos SPs del panel admin
 ✅ Solo muestra cursos con estado 'Activo'
 ✅ Datos simplificados para el frontend público
+✅ Endpoints async: las consultas corren en el executor de SQL (ejecutor_sp)
+✅ Respuestas cacheadas con ETag / 304 (cache_web); el panel admin invalida al escribir
+✅ /activos, /categorias, /modalidades y /proximo salen de UN snapshot en memoria
 """
+from bisect import bisect_left
+from datetime import date, datetime
 from fastapi import FastAPI, HTTPException, Path, Query
 from typing import Optional
-from Conexiónsql import get_connection
+from ejecutor_sp import PoolAgotadoError, ejecutar_async
+from cache_web import cacheado, cache_grupo
+from almacen_media import URL_FOTO_INSTRUCTOR, con_urls_media, url_foto
 
 app = FastAPI()
 
 # =============================================
 # Función genérica para ejecutar SP
 # =============================================
-def _sp(nombre: str, params: tuple = ()):
+def _a_json(value):
+    """Convierte tipos no serializables: datetime → ISO, Decimal → float."""
+    if value is not None:
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if hasattr(value, '__float__'):
+            return float(value)
+    return value
+
+
+async def _sp(nombre: str, params: tuple = ()):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                rows = cursor.fetchall()
-                
-                # Convertir filas a diccionarios con tipos JSON serializables
-                result = []
-                for row in rows:
-                    row_dict = {}
-                    for i, col in enumerate(cols):
-                        value = row[i]
-                        # Convertir tipos no serializables
-                        if value is not None:
-                            # Datetime a string ISO
-                            if hasattr(value, 'isoformat'):
-                                value = value.isoformat()
-                            # Decimal a float
-                            elif hasattr(value, '__float__'):
-                                value = float(value)
-                        row_dict[col] = value
-                    result.append(row_dict)
-                
-                return result
-            conn.commit()
-            return [{"status": "SUCCESS"}]
+        # Modo tupla: cada dict se arma una sola vez ya con los valores convertidos
+        res = await ejecutar_async(nombre, params, modo="tupla")
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if res is None:
+        return [{"status": "SUCCESS"}]
+    cols = res.columnas
+    return [{col: _a_json(v) for col, v in zip(cols, row)} for row in res.filas]
+
+
+# =============================================
+# SNAPSHOT DE CURSOS ACTIVOS
+# =============================================
+# /activos, /categorias, /modalidades y /proximo salen todos del mismo
+# SP_LISTAR_CURSOSWEB(estado='Activo'). Se ejecuta UNA vez, se precalculan
+# los conteos y el orden por fecha, y el snapshot vive en la caché "cursos"
+# (TTL + invalidación desde admin_cursos / admin_instructores).
+
+def _fecha_orden(curso) -> str:
+    """Clave de orden por fecha de inicio; sin fecha van al final."""
+    fecha = curso.get('fecha_inicio')
+    if fecha is None:
+        return '9999-12-31'
+    if hasattr(fecha, 'strftime'):
+        return fecha.strftime('%Y-%m-%d')
+    return str(fecha)
+
+
+def _fecha_inicio(curso) -> Optional[date]:
+    valor = curso.get('fecha_inicio')
+    if not valor:
+        return None
+    try:
+        if isinstance(valor, str):
+            return datetime.strptime(valor[:10], '%Y-%m-%d').date()
+        return valor.date() if hasattr(valor, 'date') else valor
+    except (ValueError, TypeError):
+        return None
+
+
+def _conteo(cursos, campo: str, por_defecto: str) -> list:
+    conteo = {}
+    for curso in cursos:
+        clave = curso.get(campo, por_defecto)
+        conteo[clave] = conteo.get(clave, 0) + 1
+    return [{"nombre": k, "total": n} for k, n in sorted(conteo.items())]
+
+
+def _normalizar(texto) -> str:
+    # Igual que la collation CI de SQL Server: sin mayúsculas ni espacios finales
+    return str(texto).rstrip().casefold()
+
+
+class _SnapshotCursos:
+    """Cursos activos ordenados por fecha + agregados ya armados."""
+    __slots__ = ("cursos", "activos", "categorias", "modalidades", "fechas", "futuros")
+
+    def __init__(self, cursos: list):
+        self.cursos = sorted(cursos, key=_fecha_orden)
+        self.activos = {"status": "SUCCESS", "total": len(self.cursos), "cursos": self.cursos}
+        self.categorias = {"status": "SUCCESS", "categorias": _conteo(self.cursos, 'categoria', 'Sin categoría')}
+        self.modalidades = {"status": "SUCCESS", "modalidades": _conteo(self.cursos, 'modalidad', 'Sin modalidad')}
+        # Índice por fecha de inicio para /proximo: bisect sobre `fechas`
+        indice = sorted(
+            ((f, i) for i, f in enumerate(map(_fecha_inicio, self.cursos)) if f is not None),
+            key=lambda par: par[0],
+        )
+        self.fechas = [f for f, _ in indice]
+        self.futuros = [self.cursos[i] for _, i in indice]
+
+    def filtrar(self, categoria: Optional[str], modalidad: Optional[str], busqueda: Optional[str]) -> list:
+        cursos = self.cursos
+        if categoria is not None:
+            cat = _normalizar(categoria)
+            cursos = [c for c in cursos if c.get('categoria') is not None and _normalizar(c['categoria']) == cat]
+        if modalidad is not None:
+            mod = _normalizar(modalidad)
+            cursos = [c for c in cursos if c.get('modalidad') is not None and _normalizar(c['modalidad']) == mod]
+        if busqueda is not None:
+            texto = busqueda.casefold()
+            cursos = [c for c in cursos if c.get('titulo') is not None and texto in str(c['titulo']).casefold()]
+        return cursos
+
+    def proximo(self, hoy: date):
+        i = bisect_left(self.fechas, hoy)
+        return self.futuros[i] if i < len(self.futuros) else None
+
+
+async def _construir_snapshot() -> _SnapshotCursos:
+    cursos = await _sp("SP_LISTAR_CURSOSWEB", (None, None, "Activo", None))
+    return _SnapshotCursos(con_urls_media(cursos, "imagen"))
+
+
+async def _snapshot_activos() -> _SnapshotCursos:
+    return await cache_grupo("cursos").obtener_o_calcular("snapshot_activos", _construir_snapshot)
 
 
 # =============================================
@@ -56,7 +139,8 @@ def _sp(nombre: str, params: tuple = ()):
 # =============================================
 
 @app.get("/activos", tags=["Web - Cursos"])
-def listar_cursos_activos(
+@cacheado("cursos")
+async def listar_cursos_activos(
     categoria: Optional[str] = None,
     modalidad: Optional[str] = None,
     busqueda: Optional[str] = None
@@ -79,37 +163,16 @@ def listar_cursos_activos(
     - modalidad: Virtual, Presencial, Semipresencial
     - busqueda: Búsqueda por texto en título
     
-    🔥 Usa: SP_LISTAR_CURSOSWEB con estado='Activo'
+    🔥 Usa: snapshot de SP_LISTAR_CURSOSWEB con estado='Activo' (filtros en memoria)
     
     📍 URL final: GET /api/cursos/activos
     """
-    # Siempre filtramos por estado='Activo' para mostrar solo cursos públicos
-    resultados = _sp("SP_LISTAR_CURSOSWEB", (
-        categoria,
-        modalidad,
-        "Activo",  # Solo cursos activos
-        busqueda
-    ))
-    
-    # Ordenar por fecha de inicio (más próximos primero)
-    if resultados:
-        try:
-            # Función segura para obtener fecha
-            def get_fecha_segura(curso):
-                fecha = curso.get('fecha_inicio')
-                if fecha is None:
-                    return '9999-12-31'
-                # Si es datetime, convertir a string
-                if hasattr(fecha, 'strftime'):
-                    return fecha.strftime('%Y-%m-%d')
-                # Si ya es string, retornar
-                return str(fecha)
-            
-            resultados.sort(key=get_fecha_segura)
-        except Exception as e:
-            print(f"⚠️ No se pudo ordenar por fecha: {e}")
-            # Continuar sin ordenar
-    
+    snapshot = await _snapshot_activos()
+    if categoria is None and modalidad is None and busqueda is None:
+        return snapshot.activos
+
+    # Ya vienen ordenados por fecha de inicio (más próximos primero)
+    resultados = snapshot.filtrar(categoria, modalidad, busqueda)
     return {
         "status": "SUCCESS",
         "total": len(resultados),
@@ -118,63 +181,36 @@ def listar_cursos_activos(
 
 
 @app.get("/proximo", tags=["Web - Cursos"])
-def obtener_curso_mas_proximo():
+@cacheado("cursos", variar=date.today)
+async def obtener_curso_mas_proximo():
     """
     Obtiene el curso más próximo a iniciar (para destacar en el frontend).
     
     📋 Devuelve el curso con la fecha_inicio más cercana a hoy.
     
-    🔥 Usa: SP_LISTAR_CURSOSWEB y selecciona el más próximo
+    🔥 Usa: índice por fecha del snapshot de cursos activos
     
     📍 URL final: GET /api/cursos/proximo
     """
-    from datetime import datetime
-    
-    # Obtener todos los cursos activos
-    resultados = _sp("SP_LISTAR_CURSOSWEB", (None, None, "Activo", None))
+    snapshot = await _snapshot_activos()
     
-    if not resultados:
+    if not snapshot.cursos:
         return {
             "status": "SUCCESS",
             "curso_proximo": None,
             "mensaje": "No hay cursos programados"
         }
     
-    # Filtrar solo cursos futuros y ordenar por fecha
-    hoy = datetime.now().date()
-    cursos_futuros = []
+    # "Hoy" se evalúa en cada request: el snapshot puede ser de ayer
+    curso_proximo = snapshot.proximo(datetime.now().date())
     
-    for curso in resultados:
-        fecha_inicio_str = curso.get('fecha_inicio')
-        if fecha_inicio_str:
-            try:
-                # Intentar parsear la fecha en diferentes formatos
-                if isinstance(fecha_inicio_str, str):
-                    # Formato ISO: 2025-01-10
-                    fecha_inicio = datetime.strptime(fecha_inicio_str[:10], '%Y-%m-%d').date()
-                else:
-                    # Si ya es datetime
-                    fecha_inicio = fecha_inicio_str.date() if hasattr(fecha_inicio_str, 'date') else fecha_inicio_str
-                
-                if fecha_inicio >= hoy:
-                    curso['_fecha_inicio_date'] = fecha_inicio
-                    cursos_futuros.append(curso)
-            except:
-                continue
-    
-    if not cursos_futuros:
+    if curso_proximo is None:
         return {
             "status": "SUCCESS",
             "curso_proximo": None,
             "mensaje": "No hay cursos programados próximamente"
         }
     
-    # Ordenar por fecha y tomar el más próximo
-    curso_proximo = sorted(cursos_futuros, key=lambda x: x['_fecha_inicio_date'])[0]
-    
-    # Limpiar el campo temporal
-    del curso_proximo['_fecha_inicio_date']
-    
     return {
         "status": "SUCCESS",
         "curso_proximo": curso_proximo
@@ -182,7 +218,8 @@ def obtener_curso_mas_proximo():
 
 
 @app.get("/categorias", tags=["Web - Cursos"])
-def obtener_categorias():
+@cacheado("cursos")
+async def obtener_categorias():
     """
     Lista todas las categorías disponibles con el conteo de cursos activos.
     
@@ -193,28 +230,12 @@ def obtener_categorias():
     
     📍 URL final: GET /api/cursos/categorias
     """
-    # Obtener todos los cursos activos
-    resultados = _sp("SP_LISTAR_CURSOSWEB", (None, None, "Activo", None))
-    
-    # Contar por categoría
-    categorias_count = {}
-    for curso in resultados:
-        cat = curso.get('categoria', 'Sin categoría')
-        categorias_count[cat] = categorias_count.get(cat, 0) + 1
-    
-    categorias = [
-        {"nombre": cat, "total": count}
-        for cat, count in sorted(categorias_count.items())
-    ]
-    
-    return {
-        "status": "SUCCESS",
-        "categorias": categorias
-    }
+    return (await _snapshot_activos()).categorias
 
 
 @app.get("/modalidades", tags=["Web - Cursos"])
-def obtener_modalidades():
+@cacheado("cursos")
+async def obtener_modalidades():
     """
     Lista todas las modalidades disponibles con el conteo de cursos activos.
     
@@ -225,28 +246,12 @@ def obtener_modalidades():
     
     📍 URL final: GET /api/cursos/modalidades
     """
-    # Obtener todos los cursos activos
-    resultados = _sp("SP_LISTAR_CURSOSWEB", (None, None, "Activo", None))
-    
-    # Contar por modalidad
-    modalidades_count = {}
-    for curso in resultados:
-        mod = curso.get('modalidad', 'Sin modalidad')
-        modalidades_count[mod] = modalidades_count.get(mod, 0) + 1
-    
-    modalidades = [
-        {"nombre": mod, "total": count}
-        for mod, count in sorted(modalidades_count.items())
-    ]
-    
-    return {
-        "status": "SUCCESS",
-        "modalidades": modalidades
-    }
+    return (await _snapshot_activos()).modalidades
 
 
 @app.get("/{id_curso}", tags=["Web - Cursos"])
-def obtener_detalle_curso(
+@cacheado("cursos")
+async def obtener_detalle_curso(
     id_curso: int = Path(..., description="ID del curso", gt=0)
 ):
     """
@@ -270,7 +275,7 @@ def obtener_detalle_curso(
     
     📍 URL final: GET /api/cursos/{id_curso}
     """
-    resultados = _sp("SP_OBTENER_CURSOWEB", (id_curso,))
+    resultados = await _sp("SP_OBTENER_CURSOWEB", (id_curso,))
     
     if not resultados or len(resultados) == 0:
         raise HTTPException(
@@ -278,7 +283,12 @@ def obtener_detalle_curso(
             detail=f"Curso con ID {id_curso} no encontrado"
         )
     
-    curso = resultados[0]
+    curso = con_urls_media(resultados, "imagen")[0]
+    foto_sha256 = curso.pop("instructor_foto_sha256", None)
+    if curso.get("id_instructor") is not None:
+        curso["instructor_foto_url"] = url_foto(
+            URL_FOTO_INSTRUCTOR, int(curso["id_instructor"]), foto_sha256, tiene_foto=False,
+        )
     
     # Verificar que el curso esté activo (seguridad adicional)
     if curso.get('estado') != 'Activo':
@@ -298,7 +308,8 @@ def obtener_detalle_curso(
 # =============================================
 
 @app.get("/eventos/proximos", tags=["Web - Eventos"])
-def obtener_proximos_eventos(
+@cacheado("eventos", variar=date.today)
+async def obtener_proximos_eventos(
     limite: Optional[int] = Query(default=3, ge=1, le=10, description="Número de eventos a mostrar")
 ):
     """
@@ -319,7 +330,7 @@ def obtener_proximos_eventos(
     
     📍 URL final: GET /api/cursos/eventos/proximos?limite=3
     """
-    resultados = _sp("SP_PROXIMOS_EVENTOS_WEB", (limite,))
+    resultados = await _sp("SP_PROXIMOS_EVENTOS_WEB", (limite,))
     
     return {
         "status": "SUCCESS",
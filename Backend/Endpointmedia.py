@@ -0,0 +1,34 @@
+# Endpointmedia.py
+"""
+Imágenes del almacén de media (almacen_media) por su hash SHA-256.
+
+Las filas de noticias, instructores, admins y cursos guardan solo el hash;
+la API devuelve la URL /api/media/{hash} y el navegador la pide aquí.
+
+✅ Inmutable (Cache-Control 1 año): el hash ES el contenido
+✅ ETag fuerte + 304, Range (206 / 416)
+✅ ?w=480&fmt=webp -> variante redimensionada (cacheada en disco)
+"""
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Path, Query, Request
+
+from almacen_media import servir_media
+from ejecutor_sp import PoolAgotadoError
+
+app = FastAPI(title="API de Media - CGPVP2", version="1.0")
+
+
+@app.get("/{sha256}")
+async def obtener_media(
+    request: Request,
+    sha256: str = Path(..., min_length=64, max_length=64),
+    w: Optional[int] = Query(None, ge=16, le=4096, description="Ancho máximo en px"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$", description="Formato de salida"),
+):
+    try:
+        return await servir_media(request, sha256, w, fmt)
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener imagen: {str(e)}")
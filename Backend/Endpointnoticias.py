@@ -1,9 +1,12 @@
 # Endpointnoticias.py - VERSIÓN CORREGIDA
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import FastAPI, HTTPException, Query, Request
+from datetime import date
 from typing import Optional
-import pyodbc
-from Conexiónsql import get_connection
+from ejecutor_sp import PoolAgotadoError, ejecutar_async, ejecutar_multi_async, en_hilo_db, sp_cursor
+from cursor_paginacion import pagina_en_memoria
+from cache_web import cacheado, invalida
+from almacen_media import servir_foto_publicacion
+import indice_noticias
 
 # -------------------------------
 # INSTANCIA DE FASTAPI
@@ -13,60 +16,138 @@ app = FastAPI(title="API de Noticias - CGPVP2", version="1.0")
 # -------------------------------
 # FUNCIONES AUXILIARES PARA SP
 # -------------------------------
-def execute_sp(sp_name: str, params: dict = {}, fetch_one: bool = False, fetch_all: bool = True):
-    conn = get_connection()
-    cursor = conn.cursor()
+def _sin_foto(res) -> list:
+    """
+    Filas como dicts SIN el campo "foto" (bytes) para no romper JSON.
+    La columna se descarta al armar cada dict, sin construirlo y luego hacer pop.
+    """
+    if res is None:
+        return []
+    cols = res.columnas
+    if "foto" not in cols:
+        return [dict(zip(cols, row)) for row in res.filas]
+    idx = [i for i, c in enumerate(cols) if c != "foto"]
+    nombres = [cols[i] for i in idx]
+    return [dict(zip(nombres, [row[i] for i in idx])) for row in res.filas]
+
+
+async def execute_sp(sp_name: str, params: dict = {}, fetch_one: bool = False, fetch_all: bool = True):
     try:
-        param_list = ", ".join([f"@{k} = ?" for k in params.keys()])
-        sql = f"EXEC {sp_name} {param_list}" if param_list else f"EXEC {sp_name}"
-        cursor.execute(sql, tuple(params.values()))
+        res = await ejecutar_async(sp_name, params, modo="tupla")
 
         if fetch_one:
-            row = cursor.fetchone()
-            if row and cursor.description:
-                return dict(zip([column[0] for column in cursor.description], row))
+            if res and res.filas:
+                return dict(zip(res.columnas, res.filas[0]))
             return None
         elif fetch_all:
-            if cursor.description:
-                columns = [column[0] for column in cursor.description]
-                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                # ✅ Quitar campo "foto" (bytes) para no romper JSON
-                for r in rows:
-                    r.pop("foto", None)
-                return rows
-            return []
+            return _sin_foto(res)
         else:
             return None
     except Exception as e:
         print(f"❌ Error en execute_sp({sp_name}): {str(e)}")
         raise
-    finally:
-        cursor.close()
-        conn.close()
 
 
-def execute_sp_raw(sp_name: str, params: dict = {}):
+async def execute_sp_multi(sp_name: str, params: dict = {}) -> list:
     """
-    Igual que execute_sp pero devuelve las filas SIN quitar el campo foto (bytes).
-    Usado exclusivamente por el endpoint /foto/{id}.
+    Ejecuta el SP UNA vez y devuelve TODOS sus result sets (lista de listas
+    de dicts, sin el campo foto). Para SPs que devuelven datos + totales en
+    result sets posteriores: nunca hace falta re-ejecutar para llegar a ellos.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
     try:
-        param_list = ", ".join([f"@{k} = ?" for k in params.keys()])
-        sql = f"EXEC {sp_name} {param_list}" if param_list else f"EXEC {sp_name}"
-        cursor.execute(sql, tuple(params.values()))
-
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
-        return []
+        sets = await ejecutar_multi_async(sp_name, params, modo="tupla")
+        return [_sin_foto(res) for res in sets]
     except Exception as e:
-        print(f"❌ Error en execute_sp_raw({sp_name}): {str(e)}")
+        print(f"❌ Error en execute_sp_multi({sp_name}): {str(e)}")
         raise
-    finally:
-        cursor.close()
-        conn.close()
+
+
+# -------------------------------
+# BÚSQUEDA EN MEMORIA (indice_noticias.py)
+# Mismas columnas que devuelven los SP, sin tocar la BD
+# -------------------------------
+def _fila_listado(doc: dict) -> dict:
+    """Fila como SP_LISTAR_PUBLICACIONES_CON_FILTROS."""
+    contenido = doc["contenido"]
+    return {
+        "idpublicacion": doc["idpublicacion"],
+        "titulo": doc["titulo"],
+        "contenido": contenido,
+        "foto_sha256": doc["foto_sha256"],
+        "fecha": doc["fecha"],
+        "creado_por": doc["creado_por"],
+        "destacada": doc["destacada"],
+        "fecha_creacion": doc["fecha_creacion"],
+        "activa": doc["activa"],
+        "longitud_contenido": len(contenido.rstrip(" ")),
+        "resumen": indice_noticias.resumen(contenido, 200),
+        "fecha_formateada": indice_noticias.fecha_formateada(doc["fecha"]),
+        "dias_desde_publicacion": (date.today() - doc["fecha"].date()).days,
+    }
+
+
+def _fila_busqueda(doc: dict, relevancia: float) -> dict:
+    """Fila como SP_BUSCAR_PUBLICACIONES (+ relevancia BM25)."""
+    return {
+        "idpublicacion": doc["idpublicacion"],
+        "titulo": doc["titulo"],
+        "foto_sha256": doc["foto_sha256"],
+        "fecha": doc["fecha"],
+        "fecha_formateada": indice_noticias.fecha_formateada(doc["fecha"]),
+        "resumen": indice_noticias.resumen(doc["contenido"], 150),
+        "relevancia": round(relevancia, 4),
+    }
+
+
+def _ordenar(docs: list, ordenar_por: str) -> list:
+    """Mismos criterios que el SP; "relevancia" deja el orden BM25."""
+    if ordenar_por == "reciente":
+        docs.sort(key=lambda d: d["fecha"], reverse=True)
+    elif ordenar_por in ("antiguo", "antiguas"):
+        docs.sort(key=lambda d: d["fecha"])
+    elif ordenar_por == "destacadas":
+        docs.sort(key=lambda d: d["destacada"], reverse=True)   # estable: luego relevancia
+    return docs
+
+
+# -------------------------------
+# PAGINACIÓN POR CURSOR (?after=, SP_LISTAR_PUBLICACIONES_CURSOR)
+# Claves de orden y dirección por criterio; el id desempata
+# -------------------------------
+CLAVES_CURSOR = {
+    "reciente": (("fecha", "idpublicacion"), True),
+    "antiguo": (("fecha", "idpublicacion"), False),
+    "destacadas": (("destacada", "fecha", "idpublicacion"), True),
+}
+
+
+async def _listar_por_cursor(after: str, por_pagina: int, solo_destacadas: int, solo_activas: int,
+                             busqueda: Optional[str], ordenar_por: str) -> dict:
+    """Página después del cursor, sin OFFSET ni total (el grid hace "cargar más")."""
+    orden = "antiguo" if ordenar_por == "antiguas" else ordenar_por
+    if orden not in CLAVES_CURSOR:
+        raise HTTPException(status_code=422, detail="after admite ordenar_por = reciente | antiguo | destacadas")
+    claves, descendente = CLAVES_CURSOR[orden]
+    lista = f"noticias_{orden}"
+
+    if busqueda and indice_noticias.listo():
+        docs = sorted(
+            (doc for _, doc in indice_noticias.buscar(
+                busqueda, solo_activas=bool(solo_activas), solo_destacadas=bool(solo_destacadas),
+            )),
+            key=lambda d: tuple(d[c] for c in claves), reverse=descendente,
+        )
+        pagina, siguiente = pagina_en_memoria(docs, claves, lista, after, por_pagina, descendente)
+        return {"total": None, "publicaciones": [_fila_listado(d) for d in pagina], "siguiente": siguiente}
+    indice_noticias.asegurar_indice()
+
+    publicaciones, siguiente = await en_hilo_db(sp_cursor, "SP_LISTAR_PUBLICACIONES_CURSOR", {
+        "SoloDestacadas": solo_destacadas,
+        "SoloActivas": solo_activas,
+        "busqueda": busqueda or None,
+        "ordenar_por": orden,
+    }, lista, claves, after, por_pagina)
+    return {"total": None, "publicaciones": publicaciones, "siguiente": siguiente}
 
 
 # ================================
@@ -75,40 +156,22 @@ def execute_sp_raw(sp_name: str, params: dict = {}):
 
 # ✅ FOTO - debe ir ANTES de /{idpublicacion} para no ser capturado por ese route
 @app.get("/foto/{idpublicacion}")
-def obtener_foto(idpublicacion: str):
+async def obtener_foto(
+    request: Request,
+    idpublicacion: str,
+    v: Optional[str] = None,
+    w: Optional[int] = Query(None, ge=16, le=4096, description="Ancho máximo en px"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$", description="Formato de salida"),
+):
     """
     Retorna la foto de la publicación como imagen binaria.
-    El frontend la consume directamente con <img src="...foto/ID">.
+    El frontend la consume directamente con <img src="...foto/ID?v=HASH">
+    (con ?v= igual al foto_sha256 del listado la respuesta es inmutable).
+    ?w=480&fmt=webp -> miniatura redimensionada / recodificada (cacheada en disco).
     """
     try:
-        rows = execute_sp_raw("SP_OBTENER_PUBLICACION_POR_ID", {"idpublicacion": idpublicacion})
-
-        if not rows:
-            raise HTTPException(status_code=404, detail="Publicación no encontrada")
-
-        foto_bytes = rows[0].get("foto")
-
-        if not foto_bytes:
-            raise HTTPException(status_code=404, detail="Esta publicación no tiene foto")
-
-        # Detectar tipo de imagen por magic bytes
-        content_type = "image/jpeg"  # default
-        if isinstance(foto_bytes, (bytes, bytearray)):
-            b = bytes(foto_bytes)
-            if b[:4] == b'\x89PNG':
-                content_type = "image/png"
-            elif b[:4] == b'GIF8':
-                content_type = "image/gif"
-            elif b[:2] == b'BM':
-                content_type = "image/bmp"
-
-        return Response(
-            content=bytes(foto_bytes),
-            media_type=content_type,
-            headers={"Cache-Control": "max-age=3600"}
-        )
-
-    except HTTPException:
+        return await servir_foto_publicacion(request, idpublicacion, v, w, fmt)
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener foto: {str(e)}")
@@ -116,15 +179,33 @@ def obtener_foto(idpublicacion: str):
 
 # SP1: LISTAR PUBLICACIONES CON FILTROS
 @app.get("/")
-def listar_publicaciones(
+@cacheado("noticias")
+async def listar_publicaciones(
     pagina: int = Query(1, ge=1),
     cantidad_por_pagina: int = Query(9, ge=1, le=100),
     solo_destacadas: int = Query(0, ge=0, le=1),
     solo_activas: int = Query(1, ge=0, le=1),
     busqueda: Optional[str] = Query(None),
-    ordenar_por: str = Query("reciente")
+    ordenar_por: str = Query("reciente", description="reciente | antiguo | destacadas | relevancia (con busqueda)"),
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (vacío = primera); reemplaza a pagina")
 ):
     try:
+        if after is not None:
+            return await _listar_por_cursor(
+                after, cantidad_por_pagina, solo_destacadas, solo_activas, busqueda, ordenar_por)
+
+        # Con búsqueda: índice en memoria en lugar de LIKE '%...%' sobre el contenido
+        if busqueda and indice_noticias.listo():
+            docs = _ordenar([doc for _, doc in indice_noticias.buscar(
+                busqueda, solo_activas=bool(solo_activas), solo_destacadas=bool(solo_destacadas),
+            )], ordenar_por)
+            inicio = (pagina - 1) * cantidad_por_pagina
+            return {
+                "total": len(docs),
+                "publicaciones": [_fila_listado(d) for d in docs[inicio:inicio + cantidad_por_pagina]],
+            }
+        indice_noticias.asegurar_indice()
+
         params = {
             "Pagina": pagina,
             "CantidadPorPagina": cantidad_por_pagina,
@@ -134,29 +215,18 @@ def listar_publicaciones(
             "ordenar_por": ordenar_por
         }
 
-        publicaciones = execute_sp("SP_LISTAR_PUBLICACIONES_CON_FILTROS", params)
-
-        # Obtener total desde el segundo resultset del SP
-        total = len(publicaciones)
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "EXEC SP_LISTAR_PUBLICACIONES_CON_FILTROS @Pagina=?, @CantidadPorPagina=?, @SoloDestacadas=?, @SoloActivas=?, @busqueda=?, @ordenar_por=?",
-                pagina, cantidad_por_pagina, solo_destacadas, solo_activas,
-                busqueda if busqueda else "", ordenar_por
-            )
-            cursor.nextset()
-            total_row = cursor.fetchone()
-            if total_row:
-                total = total_row[0]
-            cursor.close()
-            conn.close()
-        except:
-            pass  # Fallback: usar len()
+        # Una sola ejecución: resultset 1 = publicaciones, resultset 2 = total
+        sets = await execute_sp_multi("SP_LISTAR_PUBLICACIONES_CON_FILTROS", params)
+        publicaciones = sets[0] if sets else []
+
+        total = len(publicaciones)  # Fallback si el SP no trae el total
+        if len(sets) > 1 and sets[1]:
+            total = sets[1][0].get("total_registros", total)
 
         return {"total": total, "publicaciones": publicaciones}
 
+    except (HTTPException, PoolAgotadoError):
+        raise
     except Exception as e:
         print(f"❌ Error en listar_publicaciones: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -164,30 +234,42 @@ def listar_publicaciones(
 
 # SP2: PUBLICACIÓN DESTACADA
 @app.get("/destacada")
-def obtener_publicacion_destacada():
+@cacheado("noticias")
+async def obtener_publicacion_destacada():
     try:
-        resultado = execute_sp("SP_OBTENER_PUBLICACION_DESTACADA")
+        resultado = await execute_sp("SP_OBTENER_PUBLICACION_DESTACADA")
         return resultado if resultado else []
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # SP4: PUBLICACIONES RECIENTES
 @app.get("/recientes")
-def obtener_publicaciones_recientes(cantidad: int = Query(5, ge=1, le=50)):
-    try:
-        resultado = execute_sp("SP_OBTENER_PUBLICACIONES_RECIENTES", {"cantidad": cantidad})
-        return resultado if resultado else []
-    except Exception as e:
-        return []  # No romper el frontend si falla
+@cacheado("noticias", respaldo=[])  # No romper el frontend si falla (y no cachear el [])
+async def obtener_publicaciones_recientes(cantidad: int = Query(5, ge=1, le=50)):
+    resultado = await execute_sp("SP_OBTENER_PUBLICACIONES_RECIENTES", {"cantidad": cantidad})
+    return resultado if resultado else []
 
 
 # SP8: BUSCAR PUBLICACIONES
 @app.get("/buscar")
-def buscar_publicaciones(termino_busqueda: str = Query(..., min_length=1)):
+async def buscar_publicaciones(termino_busqueda: str = Query(..., min_length=1)):
+    """
+    Top 10 por relevancia (BM25 sobre título + contenido, sin tildes,
+    hashtags y prefijos: "capac" encuentra "capacitación").
+    """
     try:
-        resultado = execute_sp("SP_BUSCAR_PUBLICACIONES", {"termino_busqueda": termino_busqueda})
+        if indice_noticias.listo():
+            resultados = indice_noticias.buscar(termino_busqueda, solo_activas=True)[:10]
+            return [_fila_busqueda(doc, puntaje) for puntaje, doc in resultados]
+        indice_noticias.asegurar_indice()
+
+        resultado = await execute_sp("SP_BUSCAR_PUBLICACIONES", {"termino_busqueda": termino_busqueda})
         return resultado if resultado else []
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -200,43 +282,52 @@ def health_check():
 
 # Endpoints de rutas estáticas adicionales (antes del wildcard)
 @app.get("/estadisticas")
-def estadisticas_publicaciones():
+async def estadisticas_publicaciones():
     try:
-        resultado = execute_sp("SP_ESTADISTICAS_PUBLICACIONES")
+        resultado = await execute_sp("SP_ESTADISTICAS_PUBLICACIONES")
         return resultado if resultado else []
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/rango")
-def publicaciones_por_rango(fecha_inicio: str, fecha_fin: str):
+async def publicaciones_por_rango(fecha_inicio: str, fecha_fin: str):
     try:
-        return execute_sp("SP_OBTENER_PUBLICACIONES_POR_FECHAS", {
+        return await execute_sp("SP_OBTENER_PUBLICACIONES_POR_FECHAS", {
             "fecha_inicio": fecha_inicio,
             "fecha_fin": fecha_fin
         })
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/origen")
-def contar_publicaciones_por_origen():
+async def contar_publicaciones_por_origen():
     try:
-        return execute_sp("SP_CONTAR_PUBLICACIONES_POR_ORIGEN")
+        return await execute_sp("SP_CONTAR_PUBLICACIONES_POR_ORIGEN")
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/por_mes")
-def publicaciones_por_mes(anio: Optional[int] = None):
+async def publicaciones_por_mes(anio: Optional[int] = None):
     try:
-        return execute_sp("SP_PUBLICACIONES_POR_MES", {"anio": anio})
+        return await execute_sp("SP_PUBLICACIONES_POR_MES", {"anio": anio})
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/facebook/sincronizar")
-def sincronizar_publicacion_facebook(
+@invalida("noticias")
+async def sincronizar_publicacion_facebook(
     idpublicacion: str,
     titulo: str,
     contenido: str,
@@ -251,13 +342,18 @@ def sincronizar_publicacion_facebook(
             "foto": foto,
             "fecha": fecha
         }
-        return execute_sp("SP_SINCRONIZAR_PUBLICACION_FACEBOOK", params)
+        resultado = await execute_sp("SP_SINCRONIZAR_PUBLICACION_FACEBOOK", params)
+        await indice_noticias.reindexar_async(idpublicacion)
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/crear")
-def crear_publicacion_manual(
+@invalida("noticias")
+async def crear_publicacion_manual(
     titulo: str,
     contenido: str,
     foto: Optional[str] = None,
@@ -272,57 +368,79 @@ def crear_publicacion_manual(
             "fecha": fecha,
             "destacada": destacada
         }
-        return execute_sp("SP_CREAR_PUBLICACION_MANUAL", params)
+        resultado = await execute_sp("SP_CREAR_PUBLICACION_MANUAL", params)
+        if resultado:
+            await indice_noticias.reindexar_async(resultado[0].get("idpublicacion"))
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ⚠️ WILDCARD - debe ir SIEMPRE AL FINAL para no capturar rutas estáticas
 @app.get("/{idpublicacion}")
-def obtener_publicacion_por_id(idpublicacion: str):
+@cacheado("noticias")
+async def obtener_publicacion_por_id(idpublicacion: str):
     try:
-        pub = execute_sp("SP_OBTENER_PUBLICACION_POR_ID", {"idpublicacion": idpublicacion}, fetch_one=True)
+        pub = await execute_sp("SP_OBTENER_PUBLICACION_POR_ID", {"idpublicacion": idpublicacion}, fetch_one=True)
         if not pub:
             raise HTTPException(status_code=404, detail="Publicación no encontrada")
         return pub
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/{idpublicacion}/destacada")
-def marcar_publicacion_destacada(idpublicacion: str, destacada: int = Query(..., ge=0, le=1)):
+@invalida("noticias")
+async def marcar_publicacion_destacada(idpublicacion: str, destacada: int = Query(..., ge=0, le=1)):
     try:
-        return execute_sp("SP_MARCAR_PUBLICACION_DESTACADA", {
+        resultado = await execute_sp("SP_MARCAR_PUBLICACION_DESTACADA", {
             "idpublicacion": idpublicacion,
             "destacada": destacada
         })
+        await indice_noticias.reindexar_async(idpublicacion)
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/{idpublicacion}/activar")
-def activar_desactivar_publicacion(idpublicacion: str, activa: int = Query(..., ge=0, le=1)):
+@invalida("noticias")
+async def activar_desactivar_publicacion(idpublicacion: str, activa: int = Query(..., ge=0, le=1)):
     try:
-        return execute_sp("SP_ACTIVAR_DESACTIVAR_PUBLICACION", {
+        resultado = await execute_sp("SP_ACTIVAR_DESACTIVAR_PUBLICACION", {
             "idpublicacion": idpublicacion,
             "activa": activa
         })
+        await indice_noticias.reindexar_async(idpublicacion)
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/{idpublicacion}")
-def eliminar_publicacion(idpublicacion: str):
+@invalida("noticias")
+async def eliminar_publicacion(idpublicacion: str):
     try:
-        return execute_sp("SP_ELIMINAR_PUBLICACION", {"idpublicacion": idpublicacion})
+        resultado = await execute_sp("SP_ELIMINAR_PUBLICACION", {"idpublicacion": idpublicacion})
+        await indice_noticias.reindexar_async(idpublicacion)
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.put("/{idpublicacion}")
-def actualizar_publicacion_manual(
+@invalida("noticias")
+async def actualizar_publicacion_manual(
     idpublicacion: str,
     titulo: str,
     contenido: str,
@@ -339,6 +457,10 @@ def actualizar_publicacion_manual(
             "fecha": fecha,
             "destacada": destacada
         }
-        return execute_sp("SP_ACTUALIZAR_PUBLICACION_MANUAL", params)
+        resultado = await execute_sp("SP_ACTUALIZAR_PUBLICACION_MANUAL", params)
+        await indice_noticias.reindexar_async(idpublicacion)
+        return resultado
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
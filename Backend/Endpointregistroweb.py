@@ -2,7 +2,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field, EmailStr, field_validator
 from datetime import date
 import pyodbc
-from Conexiónsql import get_connection
+from ejecutor_sp import ejecutar
+from cache_web import invalida
+from bus_cambios import publicar
+from indice_usuarios import reindexar
 
 router = APIRouter()
 
@@ -50,41 +53,34 @@ class PostulanteWeb(BaseModel):
 # ENDPOINT CON SP
 # ===============================
 @router.post("/registrar", tags=["Registro Web"])
+@invalida("miembros")
 def registrar_postulante(postulante: PostulanteWeb):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Ejecutar SP
-        cursor.execute("""
-            EXEC SP_REGISTRAR_POSTULANTE_WEB 
-                @nombre=?, @apellido=?, @dni=?, @fecha_nacimiento=?, @genero=?,
-                @email=?, @telefono=?, @direccion=?, @departamento=?, @distrito=?,
-                @nivel_educativo=?, @profesion=?, @motivacion=?, @experiencia=?, @experiencia_detalle=?
-        """,
-        postulante.nombre.strip(),
-        postulante.apellido.strip(),
-        postulante.dni.strip(),
-        postulante.fecha_nacimiento,
-        postulante.genero,
-        postulante.email.lower().strip(),
-        postulante.telefono.strip(),
-        postulante.direccion.strip(),
-        postulante.departamento.strip(),
-        postulante.distrito.strip(),
-        postulante.nivel_educativo,
-        postulante.profesion.strip(),
-        postulante.motivacion.strip(),
-        int(postulante.experiencia),
-        postulante.experiencia_detalle.strip() if postulante.experiencia_detalle else None
-        )
-        
+        # Ejecutar SP (modo tupla: el resultado se lee por posición)
+        res = ejecutar("SP_REGISTRAR_POSTULANTE_WEB", {
+            "nombre":              postulante.nombre.strip(),
+            "apellido":            postulante.apellido.strip(),
+            "dni":                 postulante.dni.strip(),
+            "fecha_nacimiento":    postulante.fecha_nacimiento,
+            "genero":              postulante.genero,
+            "email":               postulante.email.lower().strip(),
+            "telefono":            postulante.telefono.strip(),
+            "direccion":           postulante.direccion.strip(),
+            "departamento":        postulante.departamento.strip(),
+            "distrito":            postulante.distrito.strip(),
+            "nivel_educativo":     postulante.nivel_educativo,
+            "profesion":           postulante.profesion.strip(),
+            "motivacion":          postulante.motivacion.strip(),
+            "experiencia":         int(postulante.experiencia),
+            "experiencia_detalle": postulante.experiencia_detalle.strip() if postulante.experiencia_detalle else None,
+        }, modo="tupla")
+
         # Obtener resultado del SP
-        row = cursor.fetchone()
-        cursor.commit()
-        conn.close()
+        row = res.filas[0] if res and res.filas else None
 
         if row and row[0] == "SUCCESS":
+            reindexar("postulante", row[1])
+            publicar("Postulante", row[2], "Nuevo postulante registrado")
             return {
                 "status": row[0],
                 "id_postulante": row[1],
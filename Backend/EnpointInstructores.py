@@ -1,88 +1,122 @@
 # EndpointInstructores.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
-from typing import List
-from Conexionsql import get_connection
+from typing import List, Optional
+from ejecutor_sp import PoolAgotadoError, sp_async
+from cache_web import cacheado
+from almacen_media import con_url_foto_instructor, servir_foto_instructor
+from roster_instructores import obtener_plantel   # búsqueda / filtros en memoria
 
 app = FastAPI()
 
 # ---------------------------
 # FunciÃ³n genÃ©rica para ejecutar SP
 # ---------------------------
-def ejecutar_sp(sp_nombre: str, params: tuple = ()):
-    """Ejecuta un SP con parÃ¡metros y devuelve resultados como lista de diccionarios."""
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(f"EXEC {sp_nombre} " + ",".join(["?"]*len(params)), params)
-            else:
-                cursor.execute(f"EXEC {sp_nombre}")
-            
-            if cursor.description:  # SP devuelve filas
-                columns = [col[0] for col in cursor.description]
-                rows = cursor.fetchall()
-                resultados = [dict(zip(columns, row)) for row in rows]
-                return resultados
-            else:  # SP solo devuelve status / mensaje
-                return [{"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}]
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def ejecutar_sp(sp_nombre: str, params: tuple = ()):
+    """Ejecuta un SP con parÃ¡metros y devuelve resultados como lista de diccionarios (async)."""
+    # Si el SP solo devuelve status / mensaje
+    resultados = await sp_async(sp_nombre, params, sin_resultado={
+        "status": "SUCCESS", "mensaje": "SP ejecutado correctamente"
+    })
+    # La foto no viaja en el JSON: cada fila lleva foto_url (/instructores/{id}/foto?v=hash)
+    return con_url_foto_instructor(resultados)
 
 # =============================================
 # ENDPOINT 1: OBTENER TODOS LOS INSTRUCTORES
 # =============================================
 @app.get("/instructores")
-def obtener_todos_instructores():
+@cacheado("instructores")
+async def obtener_todos_instructores():
     """
     Obtiene todos los instructores activos para mostrar en el grid de cards.
     """
-    resultados = ejecutar_sp("SP_ObtenerTodosInstructores")
-    return {"status": "SUCCESS", "instructores": resultados}
+    plantel = await obtener_plantel()
+    return {"status": "SUCCESS", "instructores": plantel.instructores}
+
+# =============================================
+# ENDPOINT 1b: ESPECIALIDADES CON SU CANTIDAD
+# (antes de /instructores/{id_instructor})
+# =============================================
+@app.get("/instructores/especialidades")
+@cacheado("instructores")
+async def obtener_especialidades():
+    """
+    Especialidades de los instructores activos y cuántos hay en cada una.
+    Para armar el sidebar / select sin descargar todo el plantel.
+    """
+    plantel = await obtener_plantel()
+    return {"status": "SUCCESS", "especialidades": plantel.especialidades()}
 
 # =============================================
 # ENDPOINT 2: OBTENER INSTRUCTOR POR ID
 # =============================================
 @app.get("/instructores/{id_instructor}")
-def obtener_instructor_por_id(id_instructor: int):
+@cacheado("instructores")
+async def obtener_instructor_por_id(id_instructor: int):
     """
     Obtiene los datos de un instructor especÃ­fico para el modal de biografÃ­a.
     """
-    resultados = ejecutar_sp("SP_ObtenerInstructorPorId", (id_instructor,))
+    resultados = await ejecutar_sp("SP_ObtenerInstructorPorId", (id_instructor,))
     
     if not resultados:
         raise HTTPException(status_code=404, detail="Instructor no encontrado")
     
     return {"status": "SUCCESS", "instructor": resultados[0]}
 
+# =============================================
+# ENDPOINT 2b: FOTO DEL INSTRUCTOR (binaria)
+# =============================================
+@app.get("/instructores/{id_instructor}/foto")
+async def obtener_foto_instructor(
+    request: Request,
+    id_instructor: int,
+    v: Optional[str] = None,
+    w: Optional[int] = Query(None, ge=16, le=4096, description="Ancho máximo en px"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$", description="Formato de salida"),
+):
+    """
+    Foto del instructor como imagen. El frontend usa directamente el
+    `foto_url` de los listados (con ?v=hash la respuesta es inmutable).
+    """
+    try:
+        return await servir_foto_instructor(request, id_instructor, v, w, fmt)
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener foto: {str(e)}")
+
 # =============================================
 # ENDPOINT 3: BUSCAR INSTRUCTORES
 # =============================================
 @app.get("/instructores/buscar/{termino}")
-def buscar_instructores(termino: str):
+async def buscar_instructores(termino: str, especialidad: Optional[str] = None):
     """
     Busca instructores por nombre, rango o certificaciones.
     Usado por la barra de bÃºsqueda del frontend.
+    Sin tildes ni mayúsculas y tolerando errores de tipeo (en memoria,
+    ver roster_instructores.py). ?especialidad= combina con el filtro.
     """
-    resultados = ejecutar_sp("SP_BuscarInstructores", (termino,))
-    return {"status": "SUCCESS", "instructores": resultados}
+    plantel = await obtener_plantel()
+    if especialidad and especialidad.lower() == "todos":
+        especialidad = None
+    return {"status": "SUCCESS", "instructores": plantel.buscar(termino, especialidad)}
 
 # =============================================
 # ENDPOINT 4: FILTRAR POR ESPECIALIDAD
 # =============================================
 @app.get("/instructores/especialidad/{especialidad}")
-def filtrar_por_especialidad(especialidad: str):
+@cacheado("instructores")
+async def filtrar_por_especialidad(especialidad: str):
     """
     Filtra instructores por especialidad.
     Si especialidad = 'todos', devuelve todos los instructores.
     Usado por el sidebar de especialidades.
     """
-    # Si piden "todos", pasar NULL al SP
+    # "todos" = sin filtro (lo que antes era NULL en SP_FiltrarPorEspecialidad)
     if especialidad.lower() == "todos":
         especialidad_param = None
     else:
         especialidad_param = especialidad
-    
-    resultados = ejecutar_sp("SP_FiltrarPorEspecialidad", (especialidad_param,))
-    return {"status": "SUCCESS", "instructores": resultados}
\ No newline at end of file
+
+    plantel = await obtener_plantel()
+    return {"status": "SUCCESS", "instructores": plantel.por_especialidad(especialidad_param)}
\ No newline at end of file
@@ -11,28 +11,12 @@ CRUD de cursos + gestión de inscripciones
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from Conexiónsql import get_connection
+from ejecutor_sp import sp as _sp   # ejecutor de SPs compartido
+from cache_web import invalida      # invalida la caché de la web pública
+from almacen_media import con_urls_media, guardar_media
 
 app = FastAPI()
 
-# =============================================
-# Función genérica para ejecutar SP
-# =============================================
-def _sp(nombre: str, params: tuple = ()):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
-            conn.commit()
-            return [{"status": "SUCCESS"}]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
 
 # =============================================
 # CRUD DE CURSOS
@@ -69,7 +53,7 @@ def listar_cursos(filtro: FiltroCursos):
         filtro.estado,
         filtro.busqueda
     ))
-    return {"status": "SUCCESS", "resultados": resultados}
+    return {"status": "SUCCESS", "resultados": con_urls_media(resultados, "imagen")}
 
 
 # POST /detalle – obtener curso por id
@@ -89,7 +73,7 @@ def obtener_curso_por_id(curso: CursoID):
     - estado, fecha_inicio, fecha_fin
     """
     resultados = _sp("SP_OBTENER_CURSO", (curso.id_curso,))
-    return {"status": "SUCCESS", "resultados": resultados}
+    return {"status": "SUCCESS", "resultados": con_urls_media(resultados, "imagen")}
 
 
 # POST / – crear curso
@@ -110,6 +94,7 @@ class CursoCrear(BaseModel):
     admin_id: int
 
 @app.post("/", tags=["Admin - Cursos"])
+@invalida("cursos")
 def crear_curso(curso: CursoCrear):
     """
     Crea un nuevo curso.
@@ -129,7 +114,7 @@ def crear_curso(curso: CursoCrear):
         curso.cupos,
         curso.direccion,
         curso.enlace,
-        curso.imagen,
+        guardar_media(curso.imagen),   # base64 -> almacén de media, en la BD el hash
         curso.fecha_inicio,
         curso.fecha_fin,
         curso.admin_id
@@ -157,6 +142,7 @@ class CursoActualizar(BaseModel):
     admin_id: int
 
 @app.put("/", tags=["Admin - Cursos"])
+@invalida("cursos")
 def actualizar_curso(curso: CursoActualizar):
     """
     Actualiza un curso existente.
@@ -177,7 +163,7 @@ def actualizar_curso(curso: CursoActualizar):
         curso.cupos,
         curso.direccion,
         curso.enlace,
-        curso.imagen,
+        guardar_media(curso.imagen),   # base64 -> almacén de media, en la BD el hash
         curso.estado,
         curso.fecha_inicio,
         curso.fecha_fin,
@@ -192,6 +178,7 @@ class EliminarCurso(BaseModel):
     admin_id: int
 
 @app.delete("/", tags=["Admin - Cursos"])
+@invalida("cursos")
 def eliminar_curso(curso: EliminarCurso):
     """
     Elimina un curso (soft delete o hard delete según tu lógica).
@@ -214,6 +201,7 @@ class CambioEstadoCurso(BaseModel):
     admin_id: int
 
 @app.put("/estado", tags=["Admin - Cursos"])
+@invalida("cursos")
 def cambiar_estado_curso(data: CambioEstadoCurso):
     """
     Cambia el estado de un curso (Activo, Programado, Finalizado, Cancelado).
@@ -4,29 +4,103 @@ Endpoints del Panel Admin — DASHBOARD
 KPIs, gráficos y actividad reciente
 SP usados: SP_DS_KPI_PRINCIPAL, SP_DS_GRAFICO_*,
            SP_DS_ACTIVIDAD_RECIENTE
+
+✅ GET /all -> todos los widgets en una sola petición: los SP corren en
+   paralelo, cada uno en su conexión del pool (sp_async), con el tiempo de
+   cada widget en la respuesta y en la cabecera Server-Timing.
+   Si un widget falla, los demás igual se devuelven (errores por widget).
+✅ Los conteos de miembros / postulantes salen de dashboard_resumen
+   (09_SP_DASHBOARD_RESUMEN.sql, mantenida por triggers); main.py la
+   reconcilia cada noche con reconciliar_resumen().
+✅ GET /actividad/stream -> actividad reciente en vivo (SSE): los endpoints
+   de escritura publican en bus_cambios y el panel la recibe sin polling.
 """
-from fastapi import APIRouter, HTTPException
-from Conexiónsql import get_connection
+import asyncio
+import json
+import time
+from typing import Optional
 
-router = APIRouter()
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from bus_cambios import escuchar
+from ejecutor_sp import sp as _sp, sp_async   # ejecutar SP → lista de dicts
 
+router = APIRouter()
 
-# ------------------------------------------
-# Utilidad: ejecutar SP → lista de dicts
-# ------------------------------------------
-def _sp(nombre: str, params: tuple = ()):
+# widget -> SP (mismos que los endpoints individuales de abajo)
+WIDGETS = {
+    "kpis":                  "SP_DS_RESUMEN_RANGOS",
+    "miembros_rango":        "SP_DS_GRAFICO_MIEMBROS_RANGO",
+    "miembros_estado":       "SP_DS_GRAFICO_MIEMBROS_ESTADO",
+    "postulantes_mes":       "SP_DS_GRAFICO_POSTULANTES_MES",
+    "miembros_departamento": "SP_DS_GRAFICO_MIEMBROS_DEPARTAMENTO",
+    "edades_miembros":       "SP_DS_GRAFICO_EDADES_MIEMBROS",
+    "ocupacion_cursos":      "SP_DS_GRAFICO_OCUPACION_CURSOS",
+    "actividad_reciente":    "SP_DS_ACTIVIDAD_RECIENTE",
+}
+
+
+async def _widget(nombre_sp: str, params: tuple):
+    """(filas, error, ms) — el error de un widget no corta a los demás."""
+    inicio = time.perf_counter()
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
-            return [{"status": "SUCCESS"}]
+        filas, error = await sp_async(nombre_sp, params), None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        filas, error = None, getattr(e, "detail", None) or str(e)
+    return filas, error, round((time.perf_counter() - inicio) * 1000, 1)
+
+
+async def reconciliar_resumen() -> int:
+    """Recalcula dashboard_resumen desde las tablas. Devuelve los grupos corregidos."""
+    rows = await sp_async("SP_DS_RECONCILIAR_RESUMEN")
+    return rows[0]["grupos_corregidos"] if rows else 0
+
+
+# =============================================
+# POST /resumen/reconciliar  — reconciliación manual
+# =============================================
+@router.post("/resumen/reconciliar", tags=["Admin - Dashboard"])
+async def reconciliar_resumen_manual():
+    """
+    Igual que el job nocturno: útil tras cargas masivas hechas por fuera
+    de los SP (p.ej. BULK INSERT sin FIRE_TRIGGERS).
+    """
+    return {"status": "SUCCESS", "grupos_corregidos": await reconciliar_resumen()}
+
+
+# =============================================
+# GET /all?top=15  — todo el dashboard de una vez
+# =============================================
+@router.get("/all", tags=["Admin - Dashboard"])
+async def dashboard_completo(response: Response, top: int = 15):
+    """
+    KPIs + 6 gráficos + actividad reciente en una respuesta.
+
+    Retorna: {data: {kpis: {...}, miembros_rango: [...], ...},
+              tiempos_ms: {widget: ms, ..., total: ms},
+              errores: {widget: mensaje}}   (widget con error -> data null)
+    """
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(
+        _widget(nombre_sp, (top,) if widget == "actividad_reciente" else ())
+        for widget, nombre_sp in WIDGETS.items()
+    ))
+
+    data, tiempos, errores = {}, {}, {}
+    for widget, (filas, error, ms) in zip(WIDGETS, resultados):
+        data[widget] = filas
+        tiempos[widget] = ms
+        if error is not None:
+            errores[widget] = error
+    if len(errores) == len(WIDGETS):
+        raise HTTPException(status_code=500, detail=next(iter(errores.values())))
+    if data["kpis"] is not None:
+        data["kpis"] = data["kpis"][0] if data["kpis"] else {}
+    tiempos["total"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    response.headers["Server-Timing"] = ", ".join(f"{w};dur={ms}" for w, ms in tiempos.items())
+    response.headers["Cache-Control"] = "no-store"
+    return {"status": "SUCCESS", "data": data, "tiempos_ms": tiempos, "errores": errores}
 
 
 # =============================================
@@ -135,4 +209,45 @@ def actividad_reciente(top: int = 15):
         - top: cantidad de registros a retornar (default: 15)
     Retorna: [{tipo: str, descripcion: str, detalle: str, fecha: datetime}, ...]
     """
-    return {"status": "SUCCESS", "data": _sp("SP_DS_ACTIVIDAD_RECIENTE", (top,))}
\ No newline at end of file
+    return {"status": "SUCCESS", "data": _sp("SP_DS_ACTIVIDAD_RECIENTE", (top,))}
+
+
+# =============================================
+# GET /actividad/stream  — actividad reciente en vivo (SSE)
+# =============================================
+@router.get("/actividad/stream", tags=["Admin - Dashboard"])
+async def actividad_stream(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events con cada postulante, alta / baja de miembro y cambio
+    de estado / rango / datos a medida que ocurren. Mismos campos que
+    /actividad-reciente (tipo, descripcion, detalle, fecha) + id.
+
+    event: actividad  -> un evento nuevo
+    event: resync     -> se perdieron eventos: recargar /actividad-reciente
+    EventSource reconecta solo y manda Last-Event-ID para no perder nada.
+    """
+    async def eventos():
+        suscripcion = escuchar(last_event_id)
+        try:
+            async for evento in suscripcion:
+                if await request.is_disconnected():
+                    break
+                if evento is None:
+                    # Al conectar y como keep-alive (los proxies cortan conexiones mudas)
+                    yield "retry: 5000\n\n"
+                elif evento["id"] is None:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    datos = json.dumps(evento, ensure_ascii=False)
+                    yield f"id: {evento['id']}\nevent: actividad\ndata: {datos}\n\n"
+        finally:
+            await suscripcion.aclose()   # se desuscribe ya, no cuando pase el GC
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
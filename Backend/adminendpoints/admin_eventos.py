@@ -5,39 +5,14 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import date, time
 
-# 🔥 IMPORTANTE: Si tu archivo se llama "Conexionsql.py" (sin tilde), usa:
-from Conexionsql import get_connection
-
-# 🔥 Si tu archivo se llama "Conexiónsql.py" (con tilde), renómbralo primero a "Conexionsql.py"
-# Los nombres de archivo con tildes causan problemas en Python
+# 🔥 Helper para ejecutar SP (ejecutor compartido sobre el pool de Conexionsql)
+from ejecutor_sp import sp as _sp, sp_cursor, sp_pagina
+from cache_web import invalida
 
 # 🔥 SIN PREFIX - El prefix se define en main.py
 router = APIRouter(tags=["Admin - Eventos"])
 
 
-# ============================================================
-# Helper para ejecutar SP
-# ============================================================
-
-def _sp(nombre: str, params: tuple = ()):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
-
-            conn.commit()
-            return [{"status": "SUCCESS"}]
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 # ============================================================
 # LISTAR
 # ============================================================
@@ -51,18 +26,33 @@ def listar_eventos(
     fecha_hasta: Optional[date] = None,
     pagina: int = 1,
     por_pagina: int = 10,
+    omitir_total: bool = False,   # scroll infinito: no contar
+    after: Optional[str] = None,  # cursor ("" = primera página): sin OFFSET ni total
 ):
-    rows = _sp("SP_EV_LISTAR", (
+    if after is not None:
+        rows, siguiente = sp_cursor("SP_EV_LISTAR_CURSOR", {
+            "busqueda": busqueda, "tipo": tipo, "estado": estado,
+            "desde": fecha_desde, "hasta": fecha_hasta,
+        }, "eventos", ("fecha", "id"), after, por_pagina)
+        return {
+            "status": "SUCCESS",
+            "total": None,
+            "por_pagina": por_pagina,
+            "data": rows,
+            "siguiente": siguiente,
+        }
+
+    # Página + total en una sola ejecución (COUNT(*) OVER() en el SP)
+    rows, total = sp_pagina("SP_EV_LISTAR_PAGINA", (
         busqueda, tipo, estado, fecha_desde, fecha_hasta, pagina, por_pagina,
-    ))
-
-    total = _sp("SP_EV_CONTAR", (
+        int(not omitir_total),
+    ), incluir_total=not omitir_total, contar=lambda: _sp("SP_EV_CONTAR", (
         busqueda, tipo, estado, fecha_desde, fecha_hasta
-    ))
+    ))[0].get("total", 0))
 
     return {
         "status": "SUCCESS",
-        "total": total[0]["total"] if total else 0,
+        "total": total,
         "pagina": pagina,
         "por_pagina": por_pagina,
         "data": rows,
@@ -98,6 +88,7 @@ class EventoCrear(BaseModel):
 
 
 @router.post("/")
+@invalida("eventos")
 def crear_evento(body: EventoCrear):
     rows = _sp("SP_EV_CREAR", (
         body.titulo, body.tipo, body.descripcion,
@@ -131,6 +122,7 @@ class EventoActualizar(BaseModel):
 
 
 @router.put("/{id_evento}")
+@invalida("eventos")
 def actualizar_evento(id_evento: int, body: EventoActualizar):
     rows = _sp("SP_EV_ACTUALIZAR", (
         id_evento, body.titulo, body.tipo, body.descripcion,
@@ -155,6 +147,7 @@ class CambioEstadoEvento(BaseModel):
 
 
 @router.put("/{id_evento}/estado")
+@invalida("eventos")
 def cambiar_estado_evento(id_evento: int, body: CambioEstadoEvento):
     rows = _sp("SP_EV_CAMBIAR_ESTADO", (
         id_evento, body.nuevo_estado, body.admin_id
@@ -172,6 +165,7 @@ def cambiar_estado_evento(id_evento: int, body: CambioEstadoEvento):
 # ============================================================
 
 @router.delete("/{id_evento}")
+@invalida("eventos")
 def eliminar_evento(id_evento: int, admin_id: int):
     """
     Eliminar un evento
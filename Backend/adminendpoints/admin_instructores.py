@@ -4,31 +4,18 @@ Endpoints del Panel Admin — INSTRUCTORES
 CRUD completo + asignación a cursos/eventos
 SP usados: SP_REGISTRAR_INSTRUCTOR, SP_ACTUALIZAR_INSTRUCTOR, SP_INS_*
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import Optional
-from Conexiónsql import get_connection
+from ejecutor_sp import sp as _sp, sp_multi, sql_exec
+from cache_web import invalida
+from almacen_media import (
+    URL_FOTO_INSTRUCTOR_ADMIN, con_url_foto_instructor, guardar_media, servir_foto_instructor,
+)
 
 app = FastAPI()
 
 
-def _sp(nombre: str, params: tuple = ()):
-    """Función helper para SPs simples sin fotos"""
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
-            conn.commit()
-            return [{"status": "SUCCESS"}]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 # ---------------------------
 # Función ESPECIAL para SP con fotos (parámetros largos)
 # ---------------------------
@@ -37,42 +24,23 @@ def ejecutar_sp_con_foto(sp_nombre: str, params: dict):
     Ejecuta SP usando parámetros nombrados para evitar truncamiento de strings largos.
     params debe ser un diccionario: {'@param1': valor1, '@param2': valor2, ...}
     """
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Construir el comando SQL con parámetros nombrados
-            param_names = list(params.keys())
-            param_placeholders = ", ".join([f"{name}=?" for name in param_names])
-            sql = f"EXEC {sp_nombre} {param_placeholders}"
-            
-            # Ejecutar con los valores en el mismo orden
-            valores = [params[name] for name in param_names]
-            
-            print(f"\n{'='*80}")
-            print(f"🔍 Ejecutando: {sp_nombre}")
-            print(f"SQL: {sql}")
-            for name, valor in params.items():
-                if 'foto' in name.lower() and valor:
-                    print(f"  {name}: {valor[:50]}... ({len(valor)} chars)")
-                else:
-                    print(f"  {name}: {valor}")
-            print(f"{'='*80}\n")
-            
-            cursor.execute(sql, valores)
-            
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                rows = cursor.fetchall()
-                resultados = [dict(zip(columns, row)) for row in rows]
-                return resultados
-            else:
-                conn.commit()
-                return [{"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}]
+    print(f"\n{'='*80}")
+    print(f"🔍 Ejecutando: {sp_nombre}")
+    print(f"SQL: {sql_exec(sp_nombre, tuple(params.keys()))}")
+    for name, valor in params.items():
+        if 'foto' in name.lower() and valor:
+            print(f"  {name}: {valor[:50]}... ({len(valor)} chars)")
+        else:
+            print(f"  {name}: {valor}")
+    print(f"{'='*80}\n")
 
-    except Exception as e:
-        print(f"❌ ERROR: {str(e)}\n")
-        raise HTTPException(status_code=500, detail=str(e))
+    try:
+        return _sp(sp_nombre, params, sin_resultado={
+            "status": "SUCCESS", "mensaje": "SP ejecutado correctamente"
+        })
+    except HTTPException as e:
+        print(f"❌ ERROR: {e.detail}\n")
+        raise
 
 
 # =============================================
@@ -84,10 +52,26 @@ def listar_instructores(
     especialidad: Optional[str] = None,
     estado: Optional[str] = None,
 ):
-    rows = _sp("SP_INS_LISTAR", (busqueda, especialidad, estado))
+    rows = con_url_foto_instructor(
+        _sp("SP_INS_LISTAR", (busqueda, especialidad, estado)), URL_FOTO_INSTRUCTOR_ADMIN
+    )
     return {"status": "SUCCESS", "total": len(rows), "data": rows}
 
 
+# =============================================
+# GET /{id}/foto  — foto binaria (ETag / 304 / Range)
+# =============================================
+@app.get("/{id_instructor}/foto", tags=["Admin - Instructores"])
+async def foto_instructor(
+    request: Request,
+    id_instructor: int,
+    v: Optional[str] = None,
+    w: Optional[int] = Query(None, ge=16, le=4096),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$"),
+):
+    return await servir_foto_instructor(request, id_instructor, v, w, fmt)
+
+
 # =============================================
 # GET /{id}  — ficha + cursos y eventos asignados
 # =============================================
@@ -97,39 +81,23 @@ def detalle_instructor(id_instructor: int):
     Devuelve 3 result sets: datos del instructor, cursos asignados, eventos asignados.
     El SP retorna los 3 y aquí los separamos para que el frontend los consuma fácil.
     """
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("EXEC SP_INS_DETALLE ?", (id_instructor,))
-
-            # Result set 1: datos del instructor
-            if not cursor.description:
-                raise HTTPException(status_code=404, detail="Instructor no encontrado")
-            cols = [c[0] for c in cursor.description]
-            instructor = [dict(zip(cols, r)) for r in cursor.fetchall()]
-            if not instructor:
-                raise HTTPException(status_code=404, detail="Instructor no encontrado")
-
-            # Result set 2: cursos
-            cursor.nextset()
-            cols2 = [c[0] for c in cursor.description] if cursor.description else []
-            cursos = [dict(zip(cols2, r)) for r in cursor.fetchall()] if cols2 else []
-
-            # Result set 3: eventos
-            cursor.nextset()
-            cols3 = [c[0] for c in cursor.description] if cursor.description else []
-            eventos = [dict(zip(cols3, r)) for r in cursor.fetchall()] if cols3 else []
-
-            return {
-                "status": "SUCCESS",
-                "data": instructor[0],
-                "cursos": cursos,
-                "eventos": eventos,
-            }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    sets = sp_multi("SP_INS_DETALLE", (id_instructor,))
+
+    # Result set 1: datos del instructor
+    if not sets or not sets[0]:
+        raise HTTPException(status_code=404, detail="Instructor no encontrado")
+    instructor = con_url_foto_instructor([sets[0][0]], URL_FOTO_INSTRUCTOR_ADMIN)[0]
+
+    # Result set 2: cursos / Result set 3: eventos
+    cursos = sets[1] if len(sets) > 1 else []
+    eventos = sets[2] if len(sets) > 2 else []
+
+    return {
+        "status": "SUCCESS",
+        "data": instructor,
+        "cursos": cursos,
+        "eventos": eventos,
+    }
 
 
 # =============================================
@@ -148,10 +116,11 @@ class InstructorCrear(BaseModel):
     admin_id: int
 
 @app.post("/", tags=["Admin - Instructores"])
+@invalida("instructores", "cursos", "eventos")
 def registrar_instructor(instructor: InstructorCrear):
     """
-    ✅ Usa SP_REGISTRAR_INSTRUCTOR con parámetros nombrados
-    para manejar correctamente el Base64 de la foto
+    ✅ Usa SP_REGISTRAR_INSTRUCTOR con parámetros nombrados.
+    La foto (Base64) se guarda en el almacén de media y al SP va su hash.
     """
     params = {
         '@nombre_completo': instructor.nombre_completo,
@@ -161,7 +130,7 @@ def registrar_instructor(instructor: InstructorCrear):
         '@certificaciones': instructor.certificaciones,
         '@email': instructor.email,
         '@telefono': instructor.telefono,
-        '@foto': instructor.foto,
+        '@foto': guardar_media(instructor.foto),   # base64 -> almacén de media, en la BD el hash
         '@bio': instructor.bio,
         '@admin_id': instructor.admin_id
     }
@@ -188,10 +157,12 @@ class InstructorActualizar(BaseModel):
     admin_id: int
 
 @app.put("/", tags=["Admin - Instructores"])
+@invalida("instructores", "cursos", "eventos")
 def actualizar_instructor(instr: InstructorActualizar):
     """
-    ✅ Usa SP_ACTUALIZAR_INSTRUCTOR con parámetros nombrados
-    para manejar correctamente el Base64 de la foto
+    ✅ Usa SP_ACTUALIZAR_INSTRUCTOR con parámetros nombrados.
+    La foto (Base64) se guarda en el almacén de media y al SP va su hash
+    (foto null -> el SP mantiene la actual).
     """
     params = {
         '@id_instructor': instr.id_instructor,
@@ -202,7 +173,7 @@ def actualizar_instructor(instr: InstructorActualizar):
         '@certificaciones': instr.certificaciones,
         '@email': instr.email,
         '@telefono': instr.telefono,
-        '@foto': instr.foto,
+        '@foto': guardar_media(instr.foto),   # base64 -> almacén de media, en la BD el hash
         '@bio': instr.bio,
         '@estado': instr.estado,
         '@admin_id': instr.admin_id
@@ -220,6 +191,7 @@ class EliminarInstructor(BaseModel):
     admin_id: int
 
 @app.delete("/", tags=["Admin - Instructores"])
+@invalida("instructores", "cursos", "eventos")
 def eliminar_instructor(body: EliminarInstructor):
     rows = _sp("SP_INS_ELIMINAR", (body.id_instructor, body.admin_id))
     return rows[0] if rows else {"status": "SUCCESS"}
@@ -234,6 +206,7 @@ class AsignarCurso(BaseModel):
     admin_id: int
 
 @app.post("/asignar-curso", tags=["Admin - Instructores"])
+@invalida("instructores", "cursos")
 def asignar_a_curso(body: AsignarCurso):
     rows = _sp("SP_ASIGNAR_INSTRUCTOR_A_CURSO", (
         body.id_curso, body.id_instructor, body.admin_id,
@@ -250,6 +223,7 @@ class AsignarEvento(BaseModel):
     admin_id: int
 
 @app.post("/asignar-evento", tags=["Admin - Instructores"])
+@invalida("instructores", "eventos")
 def asignar_a_evento(body: AsignarEvento):
     rows = _sp("SP_ASIGNAR_INSTRUCTOR_A_EVENTO", (
         body.id_evento, body.id_instructor, body.admin_id,
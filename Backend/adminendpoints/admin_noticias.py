@@ -3,25 +3,35 @@
 Endpoints del Panel Admin — NOTICIAS / PUBLICACIONES
 CRUD de publicaciones (creadas desde admin o sincronizadas desde Facebook)
 Tabla: publicaciones
-SP usados: SP_NOT_LISTAR, SP_NOT_CONTAR, SP_NOT_DETALLE, SP_NOT_CREAR,
+SP usados: SP_NOT_LISTAR_PAGINA, SP_NOT_CONTAR, SP_NOT_DETALLE, SP_NOT_CREAR,
            SP_NOT_EDITAR, SP_NOT_TOGGLE_DESTACADA, SP_NOT_TOGGLE_ACTIVA,
            SP_NOT_ELIMINAR, SP_NOT_ESTADISTICAS
 
 ✅ FOTO:
 - El frontend envía multipart/form-data con el archivo binario directamente.
-- Backend lee los bytes del archivo y los pasa como pyodbc.Binary a los SP.
-- En LISTAR: se elimina "foto" del result para no romper JSON (bytes no serializa).
-- En DETALLE: se devuelve foto_base64 y se elimina "foto" (bytes).
+- Backend guarda los bytes en el almacén de media (disco, por SHA-256) y
+  al SP le pasa solo el hash en @foto_hash (la fila no guarda el blob).
+- En LISTAR: SP_NOT_LISTAR_PAGINA no devuelve "foto" (bytes no serializa).
+- En DETALLE: SP_NOT_DETALLE con @incluir_foto = 0 (sin blob); se devuelve
+  foto_sha256, foto_url (/api/media/{hash}) y las dimensiones de la imagen.
 - GET /foto/{id}: endpoint dedicado para servir la imagen como respuesta binaria.
+
+✅ BÚSQUEDA: /listar?busqueda= usa el índice en memoria (indice_noticias.py)
+   en lugar de LIKE sobre el contenido; cada escritura reindexa la publicación.
+
+✅ CURSOR: /listar?after= (vacío = primera página) pagina por keyset con
+   SP_NOT_LISTAR_CURSOR: sin OFFSET ni total, "siguiente" trae el cursor.
 """
 
-from fastapi import APIRouter, HTTPException, Form, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Form, File, UploadFile, Request, Query
 from typing import Optional, Any, Dict, List
-from datetime import datetime
-from Conexiónsql import get_connection
-import base64
-import pyodbc
+from datetime import date, datetime
+from ejecutor_sp import PoolAgotadoError, ejecutar_async, en_hilo_db, sp, sp_cursor, sp_pagina
+from cursor_paginacion import pagina_en_memoria
+from cache_web import invalida
+from almacen_media import guardar_bytes, info_foto_publicacion, servir_foto_publicacion
+from starlette.concurrency import run_in_threadpool
+import indice_noticias
 
 router = APIRouter()
 
@@ -30,13 +40,6 @@ router = APIRouter()
 # HELPERS
 # ============================================================
 
-def _bytes_to_b64(b: Optional[bytes]) -> Optional[str]:
-    """Convierte bytes a base64 (sin dataURL)."""
-    if b is None:
-        return None
-    return base64.b64encode(b).decode("utf-8")
-
-
 def _parse_fecha(fecha_str: Optional[str]) -> Optional[datetime]:
     """Parsea 'YYYY-MM-DD' o ISO 8601 a datetime. Si falla, retorna None."""
     if not fecha_str:
@@ -51,22 +54,7 @@ def _parse_fecha(fecha_str: Optional[str]) -> Optional[datetime]:
 
 def _sp(nombre: str, params: tuple = ()) -> List[Dict[str, Any]]:
     """Ejecuta SP con parámetros posicionales (?)."""
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-
-            results: List[Dict[str, Any]] = []
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                results = [dict(zip(cols, row)) for row in cursor.fetchall()]
-
-            conn.commit()
-            return results if results else [{"status": "SUCCESS"}]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return sp(nombre, params) or [{"status": "SUCCESS"}]
 
 
 def ejecutar_sp_con_foto(sp_nombre: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -74,33 +62,17 @@ def ejecutar_sp_con_foto(sp_nombre: str, params: Dict[str, Any]) -> List[Dict[st
     Ejecuta SP usando parámetros nombrados: {'@param': valor, ...}
     Se ejecuta como: EXEC SP @a=?, @b=?, ...
     """
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-
-            param_names = list(params.keys())
-            param_placeholders = ", ".join([f"{name}=?" for name in param_names])
-            sql = f"EXEC {sp_nombre} {param_placeholders}"
-
-            valores = [params[name] for name in param_names]
-            cursor.execute(sql, valores)
-
-            results: List[Dict[str, Any]] = []
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                results = [dict(zip(cols, row)) for row in cursor.fetchall()]
-
-            conn.commit()
-            return results if results else [{"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}]
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    exito = {"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}
+    return sp(sp_nombre, params, sin_resultado=exito) or [exito]
 
 
 # ============================================================
 # GET /listar — Listar publicaciones con filtros y paginación
-# SP: SP_NOT_LISTAR + SP_NOT_CONTAR
+# SP: SP_NOT_LISTAR_PAGINA (página + total en una sola ejecución)
+#     SP_NOT_LISTAR_CURSOR (?after=, paginación por cursor)
 # ============================================================
+CLAVES_CURSOR = ("destacada", "fecha", "idpublicacion")   # orden del listado, todo DESC
+
 @router.get("/listar", tags=["Admin - Noticias"])
 def listar_publicaciones(
     busqueda: Optional[str] = None,
@@ -110,35 +82,49 @@ def listar_publicaciones(
     desde: Optional[str] = None,
     hasta: Optional[str] = None,
     pagina: int = 1,
-    por_pagina: int = 10
+    por_pagina: int = 10,
+    omitir_total: bool = False,  # scroll infinito: no contar
+    after: Optional[str] = None  # cursor ("" = primera página): sin OFFSET ni total
 ):
     try:
-        rows = _sp("SP_NOT_LISTAR", (
-            busqueda,
-            creado_por,
-            int(solo_activas),
-            int(solo_destacadas),
-            desde,
-            hasta,
-            pagina,
-            por_pagina
-        ))
-
-        # ✅ Quitar bytes de foto para no romper JSON
-        for r in rows:
-            r.pop("foto", None)
+        if busqueda and indice_noticias.listo():
+            return _listar_desde_indice(
+                busqueda, creado_por, solo_activas, solo_destacadas,
+                desde, hasta, pagina, por_pagina, omitir_total, after,
+            )
+        indice_noticias.asegurar_indice()
 
-        total_rows = _sp("SP_NOT_CONTAR", (
+        filtros = (
             busqueda,
             creado_por,
             int(solo_activas),
             int(solo_destacadas),
             desde,
             hasta
-        ))
+        )
+
+        if after is not None:
+            rows, siguiente = sp_cursor(
+                "SP_NOT_LISTAR_CURSOR",
+                dict(zip(("busqueda", "creado_por", "solo_activas", "solo_destacadas", "desde", "hasta"), filtros)),
+                "noticias_admin", CLAVES_CURSOR, after, por_pagina,
+            )
+            return _respuesta_cursor(rows, por_pagina, siguiente)
+
+        rows, total = sp_pagina(
+            "SP_NOT_LISTAR_PAGINA",
+            filtros + (pagina, por_pagina, int(not omitir_total)),
+            incluir_total=not omitir_total,
+            contar=lambda: _sp("SP_NOT_CONTAR", filtros)[0].get("total", 0),
+        )
 
-        total = int(total_rows[0].get("total", 0)) if total_rows else 0
-        total_paginas = (total + por_pagina - 1) // por_pagina
+        if total is None:
+            # Sin conteo: solo se sabe si hay más por si la página vino llena
+            total_paginas = None
+            tiene_siguiente = len(rows) == por_pagina
+        else:
+            total_paginas = (total + por_pagina - 1) // por_pagina
+            tiene_siguiente = pagina < total_paginas
 
         return {
             "status": "SUCCESS",
@@ -148,33 +134,100 @@ def listar_publicaciones(
                 "por_pagina": por_pagina,
                 "total_registros": total,
                 "total_paginas": total_paginas,
-                "tiene_siguiente": pagina < total_paginas,
+                "tiene_siguiente": tiene_siguiente,
                 "tiene_anterior": pagina > 1
             }
         }
+    except (HTTPException, PoolAgotadoError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar publicaciones: {str(e)}")
 
 
+def _respuesta_cursor(rows: list, por_pagina: int, siguiente: Optional[str]) -> dict:
+    return {
+        "status": "SUCCESS",
+        "data": rows,
+        "pagination": {
+            "por_pagina": por_pagina,
+            "total_registros": None,
+            "tiene_siguiente": siguiente is not None,
+            "siguiente": siguiente,
+        }
+    }
+
+
+def _listar_desde_indice(busqueda, creado_por, solo_activas, solo_destacadas,
+                         desde, hasta, pagina, por_pagina, omitir_total, after=None) -> dict:
+    """Mismo orden y columnas que SP_NOT_LISTAR_PAGINA, filtrando con el índice."""
+    try:
+        desde_d = date.fromisoformat(desde) if desde else None
+        hasta_d = date.fromisoformat(hasta) if hasta else None
+    except ValueError:
+        raise HTTPException(status_code=422, detail="desde / hasta deben ser fechas YYYY-MM-DD")
+
+    docs = [doc for _, doc in indice_noticias.buscar(
+        busqueda, solo_activas=solo_activas, solo_destacadas=solo_destacadas,
+        creado_por=creado_por, desde=desde_d, hasta=hasta_d,
+    )]
+    docs.sort(key=lambda d: tuple(d[c] for c in CLAVES_CURSOR), reverse=True)
+
+    if after is not None:
+        docs_pagina, siguiente = pagina_en_memoria(
+            docs, CLAVES_CURSOR, "noticias_admin", after, por_pagina, descendente=True)
+    else:
+        inicio = (pagina - 1) * por_pagina
+        docs_pagina = docs[inicio:inicio + por_pagina]
+    rows = [{
+        "idpublicacion": d["idpublicacion"],
+        "titulo": d["titulo"],
+        "contenido": d["contenido"],
+        "resumen": indice_noticias.resumen(d["contenido"], 200, "…"),
+        "fecha": d["fecha"],
+        "creado_por": d["creado_por"],
+        "destacada": d["destacada"],
+        "activa": d["activa"],
+        "fecha_creacion": d["fecha_creacion"],
+    } for d in docs_pagina]
+
+    if after is not None:
+        return _respuesta_cursor(rows, por_pagina, siguiente)
+
+    total = len(docs)
+    total_paginas = (total + por_pagina - 1) // por_pagina
+    return {
+        "status": "SUCCESS",
+        "data": rows,
+        "pagination": {
+            "pagina_actual": pagina,
+            "por_pagina": por_pagina,
+            # Con el índice contar no cuesta nada: el total va siempre
+            "total_registros": total,
+            "total_paginas": total_paginas,
+            "tiene_siguiente": pagina < total_paginas,
+            "tiene_anterior": pagina > 1
+        }
+    }
+
+
 # ============================================================
 # GET /detalle/{idpublicacion} — Ver publicación completa
-# SP: SP_NOT_DETALLE
+# SP: SP_NOT_DETALLE (@incluir_foto = 0)
 # ============================================================
 @router.get("/detalle/{idpublicacion}", tags=["Admin - Noticias"])
-def detalle_publicacion(idpublicacion: str):
+async def detalle_publicacion(idpublicacion: str):
     try:
-        rows = _sp("SP_NOT_DETALLE", (idpublicacion,))
+        rows = await ejecutar_async("SP_NOT_DETALLE", {"idpublicacion": idpublicacion, "incluir_foto": 0})
         if not rows:
             raise HTTPException(status_code=404, detail="Publicación no encontrada")
 
         row = rows[0]
 
-        # ✅ Convertir bytes -> base64 para JSON
-        row["foto_base64"] = _bytes_to_b64(row.get("foto"))
-        row.pop("foto", None)
+        # ✅ La imagen NO va en el JSON: hash + URL + dimensiones
+        row.update(await info_foto_publicacion(idpublicacion, row.get("foto_sha256")))
 
         return {"status": "SUCCESS", "data": row}
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener detalle: {str(e)}")
@@ -184,38 +237,22 @@ def detalle_publicacion(idpublicacion: str):
 # GET /foto/{idpublicacion} — Servir imagen binaria directamente
 # ============================================================
 @router.get("/foto/{idpublicacion}", tags=["Admin - Noticias"])
-def obtener_foto(idpublicacion: str):
+async def obtener_foto(
+    request: Request,
+    idpublicacion: str,
+    v: Optional[str] = None,
+    w: Optional[int] = Query(None, ge=16, le=4096, description="Ancho máximo en px"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$", description="Formato de salida"),
+):
     """
-    Retorna la foto de la publicación como respuesta binaria (image/jpeg).
+    Retorna la foto de la publicación como respuesta binaria.
     Usado por el frontend con <img src="..."> directamente.
+    Mismo almacén que la web pública: ETag / 304, Range, ?v=hash inmutable,
+    variantes ?w=&fmt=.
     """
     try:
-        rows = _sp("SP_NOT_DETALLE", (idpublicacion,))
-        if not rows:
-            raise HTTPException(status_code=404, detail="Publicación no encontrada")
-
-        foto_bytes = rows[0].get("foto")
-
-        if not foto_bytes:
-            raise HTTPException(status_code=404, detail="Esta publicación no tiene foto")
-
-        # Detectar tipo de imagen por magic bytes
-        content_type = "image/jpeg"  # default
-        if isinstance(foto_bytes, (bytes, bytearray)):
-            if foto_bytes[:4] == b'\x89PNG':
-                content_type = "image/png"
-            elif foto_bytes[:4] == b'GIF8':
-                content_type = "image/gif"
-            elif foto_bytes[:2] == b'BM':
-                content_type = "image/bmp"
-
-        return Response(
-            content=bytes(foto_bytes),
-            media_type=content_type,
-            headers={"Cache-Control": "max-age=3600"}
-        )
-
-    except HTTPException:
+        return await servir_foto_publicacion(request, idpublicacion, v, w, fmt)
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener foto: {str(e)}")
@@ -226,6 +263,7 @@ def obtener_foto(idpublicacion: str):
 # SP: SP_NOT_CREAR
 # ============================================================
 @router.post("/crear", tags=["Admin - Noticias"])
+@invalida("noticias")
 async def crear_publicacion(
     contenido:  str           = Form(...),
     admin_id:   int           = Form(...),
@@ -242,23 +280,24 @@ async def crear_publicacion(
 
         fecha_dt = _parse_fecha(fecha)
 
-        # Leer bytes del archivo si se envió foto
-        foto_varbinary = None
+        # Si se envió foto: al almacén de media, a la BD solo su hash
+        foto_hash = None
         if foto and foto.filename:
             foto_bytes = await foto.read()
             if foto_bytes:
-                foto_varbinary = pyodbc.Binary(foto_bytes)
+                foto_hash = await run_in_threadpool(guardar_bytes, foto_bytes)
 
         params = {
             "@titulo":    titulo,
             "@contenido": contenido,
-            "@foto":      foto_varbinary,
+            "@foto":      None,
             "@fecha":     fecha_dt,
             "@destacada": int(destacada_bool),
-            "@admin_id":  admin_id
+            "@admin_id":  admin_id,
+            "@foto_hash": foto_hash
         }
 
-        result = ejecutar_sp_con_foto("SP_NOT_CREAR", params)
+        result = await en_hilo_db(ejecutar_sp_con_foto, "SP_NOT_CREAR", params)
 
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(
@@ -266,13 +305,14 @@ async def crear_publicacion(
                 detail=result[0].get("mensaje", "Error al crear publicación")
             )
 
+        await indice_noticias.reindexar_async(result[0].get("idpublicacion"))
         return {
             "status": "SUCCESS",
             "mensaje": result[0].get("mensaje", "Publicación creada correctamente"),
             "idpublicacion": result[0].get("idpublicacion")
         }
 
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear publicación: {str(e)}")
@@ -283,6 +323,7 @@ async def crear_publicacion(
 # SP: SP_NOT_EDITAR
 # ============================================================
 @router.put("/editar", tags=["Admin - Noticias"])
+@invalida("noticias")
 async def editar_publicacion(
     idpublicacion: str            = Form(...),
     contenido:     str            = Form(...),
@@ -297,25 +338,26 @@ async def editar_publicacion(
         titulo = contenido[:200] if len(contenido) > 200 else contenido
         fecha_dt = _parse_fecha(fecha)
 
-        # Solo leer bytes si se envió un archivo real
-        foto_varbinary = None
+        # Solo si se envió un archivo real: al almacén de media
+        foto_hash = None
         if foto and foto.filename:
             foto_bytes = await foto.read()
             if foto_bytes:
-                foto_varbinary = pyodbc.Binary(foto_bytes)
-        # Si foto_varbinary queda None → el SP hace ISNULL(@foto, foto) = mantiene la imagen
+                foto_hash = await run_in_threadpool(guardar_bytes, foto_bytes)
+        # Si foto_hash queda None → el SP mantiene la imagen actual
 
         params = {
             "@idpublicacion": idpublicacion,
             "@titulo":        titulo,
             "@contenido":     contenido,
-            "@foto":          foto_varbinary,
+            "@foto":          None,
             "@fecha":         fecha_dt,
             "@destacada":     int(destacada_bool),
-            "@admin_id":      admin_id
+            "@admin_id":      admin_id,
+            "@foto_hash":     foto_hash
         }
 
-        result = ejecutar_sp_con_foto("SP_NOT_EDITAR", params)
+        result = await en_hilo_db(ejecutar_sp_con_foto, "SP_NOT_EDITAR", params)
 
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(
@@ -323,12 +365,13 @@ async def editar_publicacion(
                 detail=result[0].get("mensaje", "Error al editar publicación")
             )
 
+        await indice_noticias.reindexar_async(idpublicacion)
         return {
             "status": "SUCCESS",
             "mensaje": result[0].get("mensaje", "Publicación actualizada correctamente")
         }
 
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al editar publicación: {str(e)}")
@@ -339,6 +382,7 @@ async def editar_publicacion(
 # SP: SP_NOT_TOGGLE_DESTACADA
 # ============================================================
 @router.put("/toggle-destacada", tags=["Admin - Noticias"])
+@invalida("noticias")
 def toggle_destacada(body: dict):
     try:
         idpublicacion = body.get("idpublicacion")
@@ -349,8 +393,9 @@ def toggle_destacada(body: dict):
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
 
+        indice_noticias.reindexar(idpublicacion)
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Estado de destacada actualizado")}
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al cambiar destacada: {str(e)}")
@@ -361,6 +406,7 @@ def toggle_destacada(body: dict):
 # SP: SP_NOT_TOGGLE_ACTIVA
 # ============================================================
 @router.put("/toggle-activa", tags=["Admin - Noticias"])
+@invalida("noticias")
 def toggle_activa(body: dict):
     try:
         idpublicacion = body.get("idpublicacion")
@@ -371,8 +417,9 @@ def toggle_activa(body: dict):
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
 
+        indice_noticias.reindexar(idpublicacion)
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Estado actualizado")}
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al cambiar estado: {str(e)}")
@@ -383,6 +430,7 @@ def toggle_activa(body: dict):
 # SP: SP_NOT_ELIMINAR
 # ============================================================
 @router.delete("/eliminar", tags=["Admin - Noticias"])
+@invalida("noticias")
 def eliminar_publicacion(body: dict):
     try:
         idpublicacion = body.get("idpublicacion")
@@ -393,8 +441,9 @@ def eliminar_publicacion(body: dict):
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
 
+        indice_noticias.reindexar(idpublicacion)
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Publicación eliminada definitivamente")}
-    except HTTPException:
+    except (HTTPException, PoolAgotadoError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar publicación: {str(e)}")
@@ -423,5 +472,7 @@ def estadisticas_noticias():
                 }
             }
         return {"status": "SUCCESS", "data": result[0]}
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
\ No newline at end of file
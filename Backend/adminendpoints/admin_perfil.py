@@ -2,21 +2,11 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import pyodbc
+from ejecutor_sp import PoolAgotadoError, ejecutar   # pool + ejecutor compartidos
+from almacen_media import con_urls_media, guardar_media, url_media
 
 router = APIRouter()
 
-# =============================================
-# CONFIGURACIÓN DE CONEXIÓN
-# =============================================
-def get_connection():
-    return pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=localhost;"
-        "DATABASE=DB_CGPVP2;"
-        "Trusted_Connection=yes;"
-    )
-
 
 # =============================================
 # MODELOS
@@ -43,25 +33,16 @@ class UsernameValidation(BaseModel):
 @router.get("/{admin_id}")
 def obtener_perfil(admin_id: int):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("EXEC SP_OBTENER_PERFIL_ADMIN ?", admin_id)
-        row = cursor.fetchone()
-
-        if not row:
-            raise HTTPException(status_code=404, detail="Administrador no encontrado")
-
-        columns = [column[0] for column in cursor.description]
-        result = dict(zip(columns, row))
-
-        return result
-
+        rows = ejecutar("SP_OBTENER_PERFIL_ADMIN", (admin_id,))
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Administrador no encontrado")
+
+    return con_urls_media(rows, "foto_perfil")[0]
 
 
 # =============================================
@@ -70,30 +51,19 @@ def obtener_perfil(admin_id: int):
 # =============================================
 @router.put("/foto")
 def actualizar_foto(data: FotoUpdate):
+    # Base64 -> almacén de media; en la BD queda solo el hash
+    foto = guardar_media(data.foto_perfil)
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "EXEC SP_ACTUALIZAR_FOTO_ADMIN ?, ?",
-            data.admin_id,
-            data.foto_perfil,
-        )
-
-        row = cursor.fetchone()
-        conn.commit()
-
-        columns = [column[0] for column in cursor.description]
-        result = dict(zip(columns, row))
-
-        return result
+        rows = ejecutar("SP_ACTUALIZAR_FOTO_ADMIN", (data.admin_id, foto))
+        if rows[0].get("status") == "ERROR":
+            return rows[0]
+        return {**rows[0], "foto_perfil": foto, "foto_perfil_url": url_media(foto)}
 
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
-
 
 # =============================================
 # 3️⃣ VALIDAR EMAIL
@@ -102,27 +72,14 @@ def actualizar_foto(data: FotoUpdate):
 @router.post("/validar-email")
 def validar_email(data: EmailValidation):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "EXEC SP_VALIDAR_EMAIL_DISPONIBLE ?, ?",
-            data.email,
-            data.admin_id,
-        )
-
-        row = cursor.fetchone()
-        columns = [column[0] for column in cursor.description]
-        result = dict(zip(columns, row))
-
-        return result
+        rows = ejecutar("SP_VALIDAR_EMAIL_DISPONIBLE", (data.email, data.admin_id))
+        return rows[0]
 
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
-
 
 # =============================================
 # 4️⃣ VALIDAR USERNAME
@@ -131,23 +88,10 @@ def validar_email(data: EmailValidation):
 @router.post("/validar-username")
 def validar_username(data: UsernameValidation):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "EXEC SP_VALIDAR_USERNAME_DISPONIBLE ?, ?",
-            data.username,
-            data.admin_id,
-        )
-
-        row = cursor.fetchone()
-        columns = [column[0] for column in cursor.description]
-        result = dict(zip(columns, row))
-
-        return result
+        rows = ejecutar("SP_VALIDAR_USERNAME_DISPONIBLE", (data.username, data.admin_id))
+        return rows[0]
 
+    except PoolAgotadoError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-    finally:
-        conn.close()
@@ -4,29 +4,56 @@ Endpoints del Panel Admin — REPORTES
 Genera datos listos para exportar a CSV desde el frontend
 Cubre: miembros, postulantes, cursos, instructores, eventos, inscripciones
 SP usados: SP_GU_EXPORTAR_MIEMBROS_CSV, SP_REP_*
+
+✅ ?format=csv | ?format=ndjson -> el archivo se genera en el servidor en
+   streaming (exportacion.py): memoria constante aunque el reporte tenga
+   todo el histórico. Sin ?format= la respuesta JSON es la de siempre.
+✅ ?format=arrow | ?format=parquet -> columnas tipadas para notebooks
+   (requiere pyarrow en el servidor; si no está, 501)
+✅ POST /trabajos -> el mismo reporte en segundo plano (trabajos_reportes.py):
+   se consulta el estado y se descarga el archivo cuando está listo;
+   pedidos iguales sin escrituras de por medio reutilizan el archivo
 """
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-from Conexiónsql import get_connection
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from ejecutor_sp import Params, sp as _sp
+from exportacion import FORMATOS, PATRON_FORMATO, formato_disponible, nombre_archivo, respuesta_exportacion
+import trabajos_reportes
 
 app = FastAPI()
 
+FORMATO = Query(None, alias="format", pattern=PATRON_FORMATO,
+                description="csv | ndjson | arrow | parquet: descarga en streaming en lugar de JSON")
+
+
+class Reporte(NamedTuple):
+    sp: str
+    filtros: Tuple[str, ...]      # nombres de los parámetros, en el orden del SP
+    grupos: Tuple[str, ...]       # grupos de cache_web cuyas escrituras lo cambian
+    defectos: Dict[str, Any] = {}  # valor de los filtros no enviados (si no es None)
 
-def _sp(nombre: str, params: tuple = ()):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
-            cursor.execute(sql, params)
-            if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
-            conn.commit()
-            return [{"status": "SUCCESS"}]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+REPORTES = {
+    "miembros":              Reporte("SP_GU_EXPORTAR_MIEMBROS_CSV", ("estado", "rango", "departamento"), ("miembros",)),
+    "postulantes":           Reporte("SP_REP_EXPORTAR_POSTULANTES", ("departamento", "solo_pendientes", "fecha_desde", "fecha_hasta"), ("miembros",), {"solo_pendientes": False}),
+    "instructores":          Reporte("SP_REP_EXPORTAR_INSTRUCTORES", ("especialidad", "estado"), ("instructores",)),
+    "cursos":                Reporte("SP_REP_EXPORTAR_CURSOS", ("categoria", "estado", "fecha_desde", "fecha_hasta"), ("cursos",)),
+    "inscripciones-cursos":  Reporte("SP_REP_EXPORTAR_INSCRIPCIONES_CURSOS", ("id_curso", "estado", "fecha_desde", "fecha_hasta"), ("cursos",)),
+    "eventos":               Reporte("SP_REP_EXPORTAR_EVENTOS", ("tipo", "estado", "fecha_desde", "fecha_hasta"), ("eventos",)),
+    "inscripciones-eventos": Reporte("SP_REP_EXPORTAR_INSCRIPCIONES_EVENTOS", ("id_evento", "estado", "fecha_desde", "fecha_hasta"), ("eventos",)),
+    "departamentos":         Reporte("SP_REP_MIEMBROS_POR_DEPARTAMENTO", (), ("miembros",)),
+}
+
+
+def _reporte(request: Request, formato: Optional[str], reporte: str, params: Params = ()):
+    """JSON {status, total, data} o, con ?format=, el archivo en streaming."""
+    nombre_sp = REPORTES[reporte].sp
+    if formato:
+        return respuesta_exportacion(request, nombre_sp, params, formato, reporte.replace("-", "_"))
+    rows = _sp(nombre_sp, params)
+    return {"status": "SUCCESS", "total": len(rows), "data": rows}
 
 
 # =============================================
@@ -34,17 +61,18 @@ def _sp(nombre: str, params: tuple = ()):
 # =============================================
 @app.get("/miembros", tags=["Admin - Reportes"])
 def reporte_miembros(
+    request: Request,
     estado: Optional[str] = None,
     rango: Optional[str] = None,
     departamento: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
     """
     Todos los campos para exportar a CSV:
     nombre, apellido, dni, edad, genero, email, teléfono,
     departamento, profesión, legajo, rango, jefatura, estado, fecha_ingreso.
     """
-    rows = _sp("SP_GU_EXPORTAR_MIEMBROS_CSV", (estado, rango, departamento))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
+    return _reporte(request, formato, "miembros", (estado, rango, departamento))
 
 
 # =============================================
@@ -52,15 +80,16 @@ def reporte_miembros(
 # =============================================
 @app.get("/postulantes", tags=["Admin - Reportes"])
 def reporte_postulantes(
+    request: Request,
     departamento: Optional[str] = None,
     solo_pendientes: bool = False,
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_POSTULANTES", (
+    return _reporte(request, formato, "postulantes", (
         departamento, int(solo_pendientes), fecha_desde, fecha_hasta,
     ))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
 
 
 # =============================================
@@ -68,11 +97,12 @@ def reporte_postulantes(
 # =============================================
 @app.get("/instructores", tags=["Admin - Reportes"])
 def reporte_instructores(
+    request: Request,
     especialidad: Optional[str] = None,
     estado: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_INSTRUCTORES", (especialidad, estado))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
+    return _reporte(request, formato, "instructores", (especialidad, estado))
 
 
 # =============================================
@@ -80,13 +110,14 @@ def reporte_instructores(
 # =============================================
 @app.get("/cursos", tags=["Admin - Reportes"])
 def reporte_cursos(
+    request: Request,
     categoria: Optional[str] = None,
     estado: Optional[str] = None,
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_CURSOS", (categoria, estado, fecha_desde, fecha_hasta))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
+    return _reporte(request, formato, "cursos", (categoria, estado, fecha_desde, fecha_hasta))
 
 
 # =============================================
@@ -94,15 +125,16 @@ def reporte_cursos(
 # =============================================
 @app.get("/inscripciones-cursos", tags=["Admin - Reportes"])
 def reporte_inscripciones_cursos(
+    request: Request,
     id_curso: Optional[int] = None,
     estado: Optional[str] = None,
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_INSCRIPCIONES_CURSOS", (
+    return _reporte(request, formato, "inscripciones-cursos", (
         id_curso, estado, fecha_desde, fecha_hasta,
     ))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
 
 
 # =============================================
@@ -110,13 +142,14 @@ def reporte_inscripciones_cursos(
 # =============================================
 @app.get("/eventos", tags=["Admin - Reportes"])
 def reporte_eventos(
+    request: Request,
     tipo: Optional[str] = None,
     estado: Optional[str] = None,
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_EVENTOS", (tipo, estado, fecha_desde, fecha_hasta))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
+    return _reporte(request, formato, "eventos", (tipo, estado, fecha_desde, fecha_hasta))
 
 
 # =============================================
@@ -124,25 +157,25 @@ def reporte_eventos(
 # =============================================
 @app.get("/inscripciones-eventos", tags=["Admin - Reportes"])
 def reporte_inscripciones_eventos(
+    request: Request,
     id_evento: Optional[int] = None,
     estado: Optional[str] = None,
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
+    formato: Optional[str] = FORMATO,
 ):
-    rows = _sp("SP_REP_EXPORTAR_INSCRIPCIONES_EVENTOS", (
+    return _reporte(request, formato, "inscripciones-eventos", (
         id_evento, estado, fecha_desde, fecha_hasta,
     ))
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
 
 
 # =============================================
 # GET /departamentos  — reporte por departamento
 # =============================================
 @app.get("/departamentos", tags=["Admin - Reportes"])
-def reporte_departamentos():
+def reporte_departamentos(request: Request, formato: Optional[str] = FORMATO):
     """Distribución de miembros y postulantes por departamento."""
-    rows = _sp("SP_REP_MIEMBROS_POR_DEPARTAMENTO")
-    return {"status": "SUCCESS", "total": len(rows), "data": rows}
+    return _reporte(request, formato, "departamentos")
 
 
 # =============================================
@@ -157,3 +190,82 @@ def resumen_general():
     """
     rows = _sp("SP_DASHBOARD_KPI_PRINCIPAL")
     return {"status": "SUCCESS", "data": rows[0] if rows else {}}
+
+
+# =============================================
+# TRABAJOS EN SEGUNDO PLANO (trabajos_reportes.py)
+# POST /trabajos -> encola; GET /trabajos/{id} -> estado; GET /trabajos/{id}/archivo
+# =============================================
+URL_ARCHIVO_TRABAJO = "/api/admin/reportes/trabajos/{id}/archivo"
+
+
+class NuevoTrabajo(BaseModel):
+    reporte: str                                      # clave de REPORTES (p.ej. "inscripciones-cursos")
+    formato: str = Field("csv", pattern=PATRON_FORMATO)
+    filtros: Dict[str, Any] = {}
+
+
+def _params_trabajo(reporte: Reporte, filtros: Dict[str, Any]) -> tuple:
+    desconocidos = set(filtros) - set(reporte.filtros)
+    if desconocidos:
+        raise HTTPException(status_code=422, detail=f"Filtros desconocidos: {', '.join(sorted(desconocidos))}")
+    params = []
+    for nombre in reporte.filtros:
+        valor = filtros.get(nombre, reporte.defectos.get(nombre))
+        if valor is not None and not isinstance(valor, (str, int, float)):
+            raise HTTPException(status_code=422, detail=f"Filtro no válido: {nombre}")
+        params.append(int(valor) if isinstance(valor, bool) else valor)
+    return tuple(params)
+
+
+def _trabajo_json(trabajo: trabajos_reportes.Trabajo, reutilizado: bool = False) -> dict:
+    datos = trabajo.a_dict()
+    datos["reutilizado"] = reutilizado
+    datos["url"] = URL_ARCHIVO_TRABAJO.format(id=trabajo.id) if trabajo.estado == trabajos_reportes.LISTO else None
+    return datos
+
+
+@app.post("/trabajos", tags=["Admin - Reportes"])
+def crear_trabajo(body: NuevoTrabajo):
+    """
+    Encola la exportación (202). Si el mismo reporte con los mismos filtros
+    ya está en curso, o se generó hace poco y no hubo escrituras desde
+    entonces, devuelve ese trabajo (reutilizado=true; 200 si ya está listo).
+    """
+    reporte = REPORTES.get(body.reporte)
+    if reporte is None:
+        raise HTTPException(status_code=404, detail=f"Reporte desconocido: {body.reporte}")
+    if not formato_disponible(body.formato):
+        raise HTTPException(status_code=501, detail=f"Exportar en {body.formato} requiere pyarrow en el servidor")
+    params = _params_trabajo(reporte, body.filtros)
+
+    trabajo, reutilizado = trabajos_reportes.encolar(body.reporte, reporte.sp, params, body.formato, reporte.grupos)
+    return JSONResponse(
+        status_code=200 if trabajo.estado == trabajos_reportes.LISTO else 202,
+        content={"status": "SUCCESS", "trabajo": _trabajo_json(trabajo, reutilizado)},
+    )
+
+
+@app.get("/trabajos/{id_trabajo}", tags=["Admin - Reportes"])
+def estado_trabajo(id_trabajo: str):
+    """Estado (en_cola | procesando | listo | error), filas escritas y URL de descarga."""
+    trabajo = trabajos_reportes.obtener(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado (o ya vencido)")
+    return {"status": "SUCCESS", "trabajo": _trabajo_json(trabajo)}
+
+
+@app.get("/trabajos/{id_trabajo}/archivo", tags=["Admin - Reportes"])
+def descargar_trabajo(id_trabajo: str):
+    trabajo = trabajos_reportes.obtener(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado (o ya vencido)")
+    if trabajo.estado == trabajos_reportes.ERROR:
+        raise HTTPException(status_code=500, detail=trabajo.error or "El reporte falló")
+    if trabajo.estado != trabajos_reportes.LISTO:
+        raise HTTPException(status_code=409, detail="El reporte todavía se está generando")
+    return FileResponse(
+        trabajo.ruta,
+        media_type=FORMATOS[trabajo.formato],
+        filename=nombre_archivo(trabajo.reporte.replace("-", "_"), trabajo.formato),
+    )
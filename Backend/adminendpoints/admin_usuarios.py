@@ -1,27 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
-from Conexiónsql import get_connection   # tu función de conexión
+from ejecutor_sp import sp as ejecutar_sp, sp_cursor, sp_multi, sp_pagina   # ejecutor compartido
+from cache_web import invalida      # versión de "miembros": la usan los reportes en segundo plano
+from bus_cambios import publicar    # actividad reciente en vivo (SSE del dashboard)
+import indice_usuarios              # sugerencias del buscador en memoria
+import directorio_miembros          # buscador público de miembros en memoria
 
 app = FastAPI()
 
-def ejecutar_sp(nombre_sp: str, params: tuple = ()):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(params))
-            sql = f"EXEC {nombre_sp} {placeholders}" if params else f"EXEC {nombre_sp}"
-            cursor.execute(sql, params)
 
-            if cursor.description:
-                columnas = [col[0] for col in cursor.description]
-                return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
-            else:
-                conn.commit()
-                return [{"status": "SUCCESS"}]
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def _miembro_cambiado(id_miembro):
+    """Refresca el miembro en los buscadores en memoria (panel y web pública)."""
+    indice_usuarios.reindexar("miembro", id_miembro)
+    directorio_miembros.reindexar(id_miembro)
 
 
 @app.get("/postulantes")
@@ -30,17 +22,30 @@ def listar_postulantes(
     departamento: Optional[str] = None,
     solo_pendientes: bool = False,
     pagina: int = 1,
-    por_pagina: int = 10
+    por_pagina: int = 10,
+    omitir_total: bool = False,  # scroll infinito: no contar
+    after: Optional[str] = None  # cursor ("" = primera página): sin OFFSET ni total
 ):
-    data = ejecutar_sp("SP_GU_LISTAR_POSTULANTES",
-        (busqueda, departamento, int(solo_pendientes), pagina, por_pagina))
-
-    total = ejecutar_sp("SP_GU_CONTAR_POSTULANTES",
-        (busqueda, departamento, int(solo_pendientes)))
+    if after is not None:
+        data, siguiente = sp_cursor(
+            "SP_GU_LISTAR_POSTULANTES_CURSOR",
+            {"busqueda": busqueda, "departamento": departamento, "solo_pendientes": int(solo_pendientes)},
+            "postulantes", ("fecha_registro", "id"), after, por_pagina,
+        )
+        return {"status": "SUCCESS", "total": None, "data": data, "siguiente": siguiente}
+
+    # Página + total en una sola ejecución (COUNT(*) OVER() en el SP)
+    data, total = sp_pagina(
+        "SP_GU_LISTAR_POSTULANTES_PAGINA",
+        (busqueda, departamento, int(solo_pendientes), pagina, por_pagina, int(not omitir_total)),
+        incluir_total=not omitir_total,
+        contar=lambda: ejecutar_sp("SP_GU_CONTAR_POSTULANTES",
+            (busqueda, departamento, int(solo_pendientes)))[0].get("total", 0),
+    )
 
     return {
         "status": "SUCCESS",
-        "total": total[0]["total"] if total else 0,
+        "total": total,
         "data": data
     }
 @app.get("/postulantes/{id_postulante}")
@@ -56,7 +61,9 @@ def listar_miembros(
     rango: Optional[str] = None,
     departamento: Optional[str] = None,
     pagina: int = 1,
-    por_pagina: int = 10
+    por_pagina: int = 10,
+    omitir_total: bool = False,  # scroll infinito: no contar
+    after: Optional[str] = None  # cursor ("" = primera página): sin OFFSET ni total
 ):
     # 🔥 Convertir "" a None
     busqueda = busqueda or None
@@ -64,50 +71,42 @@ def listar_miembros(
     rango = rango or None
     departamento = departamento or None
 
-    data = ejecutar_sp(
-        "SP_GU_LISTAR_MIEMBROS",
-        (busqueda, estado, rango, departamento, pagina, por_pagina)
-    )
-
-    total = ejecutar_sp(
-        "SP_GU_CONTAR_MIEMBROS",
-        (busqueda, estado, rango, departamento)
+    if after is not None:
+        data, siguiente = sp_cursor(
+            "SP_GU_LISTAR_MIEMBROS_CURSOR",
+            {"busqueda": busqueda, "estado": estado, "rango": rango, "departamento": departamento},
+            "miembros", ("apellido", "nombre", "id"), after, por_pagina,
+        )
+        return {"status": "SUCCESS", "total": None, "data": data, "siguiente": siguiente}
+
+    # Página + total en una sola ejecución (COUNT(*) OVER() en el SP)
+    data, total = sp_pagina(
+        "SP_GU_LISTAR_MIEMBROS_PAGINA",
+        (busqueda, estado, rango, departamento, pagina, por_pagina, int(not omitir_total)),
+        incluir_total=not omitir_total,
+        contar=lambda: ejecutar_sp("SP_GU_CONTAR_MIEMBROS",
+            (busqueda, estado, rango, departamento))[0].get("total", 0),
     )
 
     return {
         "status": "SUCCESS",
-        "total": total[0]["total"] if total else 0,
+        "total": total,
         "data": data
     }
 
 @app.get("/miembros/{id_miembro}")
 def detalle_miembro(id_miembro: int):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("EXEC SP_GU_DETALLE_MIEMBRO ?", (id_miembro,))
-
-            # Result set 1 — datos del miembro
-            cols1 = [c[0] for c in cursor.description]
-            miembro = dict(zip(cols1, cursor.fetchone()))
-
-            # Result set 2 — cursos
-            cursor.nextset()
-            cursos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
-
-            # Result set 3 — eventos
-            cursor.nextset()
-            eventos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
+    # Result sets: 1 — datos del miembro, 2 — cursos, 3 — eventos
+    sets = sp_multi("SP_GU_DETALLE_MIEMBRO", (id_miembro,))
+    if not sets or not sets[0]:
+        raise HTTPException(status_code=404, detail="Miembro no encontrado")
 
-        return {
-            "status": "SUCCESS",
-            "miembro": miembro,
-            "cursos": cursos,
-            "eventos": eventos
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "SUCCESS",
+        "miembro": sets[0][0],
+        "cursos": sets[1] if len(sets) > 1 else [],
+        "eventos": sets[2] if len(sets) > 2 else []
+    }
 
 class CambioEstado(BaseModel):
     id_miembro: int
@@ -116,9 +115,14 @@ class CambioEstado(BaseModel):
     admin_id: int
 
 @app.put("/miembros/estado")
+@invalida("miembros")
 def cambiar_estado(body: CambioEstado):
-    return ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
         (body.id_miembro, body.nuevo_estado, body.motivo, body.admin_id))[0]
+    if res.get("status") == "SUCCESS":
+        _miembro_cambiado(body.id_miembro)
+        publicar("Cambio", f"Miembro ID: {body.id_miembro}", res.get("mensaje"))
+    return res
 
 class CambioRango(BaseModel):
     id_miembro: int
@@ -127,9 +131,14 @@ class CambioRango(BaseModel):
     admin_id: int
 
 @app.put("/miembros/rango")
+@invalida("miembros")
 def cambiar_rango(body: CambioRango):
-    return ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
         (body.id_miembro, body.nuevo_rango, body.motivo, body.admin_id))[0]
+    if res.get("status") == "SUCCESS":
+        _miembro_cambiado(body.id_miembro)
+        publicar("Cambio", f"Miembro ID: {body.id_miembro}", res.get("mensaje"))
+    return res
 @app.get("/miembros/{id_miembro}/historial")
 def historial_miembro(id_miembro: int):
     data = ejecutar_sp("SP_GU_HISTORIAL_MIEMBRO", (id_miembro,))
@@ -148,17 +157,30 @@ def listar_postulantes(
     departamento: Optional[str] = None,
     solo_pendientes: bool = False,
     pagina: int = 1,
-    por_pagina: int = 10
+    por_pagina: int = 10,
+    omitir_total: bool = False,  # scroll infinito: no contar
+    after: Optional[str] = None  # cursor ("" = primera página): sin OFFSET ni total
 ):
-    data = ejecutar_sp("SP_GU_LISTAR_POSTULANTES",
-        (busqueda, departamento, int(solo_pendientes), pagina, por_pagina))
-
-    total = ejecutar_sp("SP_GU_CONTAR_POSTULANTES",
-        (busqueda, departamento, int(solo_pendientes)))
+    if after is not None:
+        data, siguiente = sp_cursor(
+            "SP_GU_LISTAR_POSTULANTES_CURSOR",
+            {"busqueda": busqueda, "departamento": departamento, "solo_pendientes": int(solo_pendientes)},
+            "postulantes", ("fecha_registro", "id"), after, por_pagina,
+        )
+        return {"status": "SUCCESS", "total": None, "data": data, "siguiente": siguiente}
+
+    # Página + total en una sola ejecución (COUNT(*) OVER() en el SP)
+    data, total = sp_pagina(
+        "SP_GU_LISTAR_POSTULANTES_PAGINA",
+        (busqueda, departamento, int(solo_pendientes), pagina, por_pagina, int(not omitir_total)),
+        incluir_total=not omitir_total,
+        contar=lambda: ejecutar_sp("SP_GU_CONTAR_POSTULANTES",
+            (busqueda, departamento, int(solo_pendientes)))[0].get("total", 0),
+    )
 
     return {
         "status": "SUCCESS",
-        "total": total[0]["total"] if total else 0,
+        "total": total,
         "data": data
     }
 
@@ -192,6 +214,7 @@ class NuevoMiembro(BaseModel):
     admin_id: int
 
 @app.post("/miembros")
+@invalida("miembros")
 def crear_miembro(body: NuevoMiembro):
     resultado = ejecutar_sp("SP_GU_CREAR_MIEMBRO", (
         body.nombre,
@@ -220,6 +243,9 @@ def crear_miembro(body: NuevoMiembro):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje", "Error al crear el miembro"))
 
+    _miembro_cambiado(res.get("id_miembro"))
+    publicar("Miembro", f"{body.nombre} {body.apellido}", f"Miembro ingresado — Legajo: {res.get('legajo')}")
+
     return {
         "status": "SUCCESS",
         "mensaje": res.get("mensaje"),
@@ -239,25 +265,35 @@ def listar_miembros(
     rango: Optional[str] = None,
     departamento: Optional[str] = None,
     pagina: int = 1,
-    por_pagina: int = 10
+    por_pagina: int = 10,
+    omitir_total: bool = False,  # scroll infinito: no contar
+    after: Optional[str] = None  # cursor ("" = primera página): sin OFFSET ni total
 ):
     busqueda     = busqueda     or None
     estado       = estado       or None
     rango        = rango        or None
     departamento = departamento or None
 
-    data = ejecutar_sp(
-        "SP_GU_LISTAR_MIEMBROS",
-        (busqueda, estado, rango, departamento, pagina, por_pagina)
-    )
-    total = ejecutar_sp(
-        "SP_GU_CONTAR_MIEMBROS",
-        (busqueda, estado, rango, departamento)
+    if after is not None:
+        data, siguiente = sp_cursor(
+            "SP_GU_LISTAR_MIEMBROS_CURSOR",
+            {"busqueda": busqueda, "estado": estado, "rango": rango, "departamento": departamento},
+            "miembros", ("apellido", "nombre", "id"), after, por_pagina,
+        )
+        return {"status": "SUCCESS", "total": None, "data": data, "siguiente": siguiente}
+
+    # Página + total en una sola ejecución (COUNT(*) OVER() en el SP)
+    data, total = sp_pagina(
+        "SP_GU_LISTAR_MIEMBROS_PAGINA",
+        (busqueda, estado, rango, departamento, pagina, por_pagina, int(not omitir_total)),
+        incluir_total=not omitir_total,
+        contar=lambda: ejecutar_sp("SP_GU_CONTAR_MIEMBROS",
+            (busqueda, estado, rango, departamento))[0].get("total", 0),
     )
 
     return {
         "status": "SUCCESS",
-        "total": total[0]["total"] if total else 0,
+        "total": total,
         "data": data
     }
 
@@ -277,32 +313,17 @@ def historial_miembro(id_miembro: int):
 
 @app.get("/miembros/{id_miembro}")
 def detalle_miembro(id_miembro: int):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("EXEC SP_GU_DETALLE_MIEMBRO ?", (id_miembro,))
+    # Result sets: 1 — datos del miembro, 2 — cursos, 3 — eventos
+    sets = sp_multi("SP_GU_DETALLE_MIEMBRO", (id_miembro,))
+    if not sets or not sets[0]:
+        raise HTTPException(status_code=404, detail="Miembro no encontrado")
 
-            # Result set 1 — datos del miembro
-            cols1 = [c[0] for c in cursor.description]
-            miembro = dict(zip(cols1, cursor.fetchone()))
-
-            # Result set 2 — cursos
-            cursor.nextset()
-            cursos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
-
-            # Result set 3 — eventos
-            cursor.nextset()
-            eventos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
-
-        return {
-            "status": "SUCCESS",
-            "miembro": miembro,
-            "cursos": cursos,
-            "eventos": eventos
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "SUCCESS",
+        "miembro": sets[0][0],
+        "cursos": sets[1] if len(sets) > 1 else [],
+        "eventos": sets[2] if len(sets) > 2 else []
+    }
 
 
 # ── EDITAR MIEMBRO COMPLETO ───────────────────────────────────────
@@ -325,6 +346,7 @@ class EditarMiembro(BaseModel):
     admin_id:         int
 
 @app.put("/miembros/{id_miembro}")
+@invalida("miembros")
 def editar_miembro(id_miembro: int, body: EditarMiembro):
     resultado = ejecutar_sp("SP_GU_EDITAR_MIEMBRO", (
         id_miembro,
@@ -352,6 +374,9 @@ def editar_miembro(id_miembro: int, body: EditarMiembro):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje", "Error al editar el miembro"))
 
+    _miembro_cambiado(id_miembro)
+    publicar("Cambio", f"Miembro ID: {id_miembro}", res.get("mensaje") or "Datos del miembro editados")
+
     return {
         "status": "SUCCESS",
         "mensaje": res.get("mensaje"),
@@ -366,9 +391,14 @@ class CambioEstado(BaseModel):
     admin_id: int
 
 @app.put("/miembros/estado")
+@invalida("miembros")
 def cambiar_estado(body: CambioEstado):
-    return ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
         (body.id_miembro, body.nuevo_estado, body.motivo, body.admin_id))[0]
+    if res.get("status") == "SUCCESS":
+        _miembro_cambiado(body.id_miembro)
+        publicar("Cambio", f"Miembro ID: {body.id_miembro}", res.get("mensaje"))
+    return res
 
 
 class CambioRango(BaseModel):
@@ -378,15 +408,21 @@ class CambioRango(BaseModel):
     admin_id: int
 
 @app.put("/miembros/rango")
+@invalida("miembros")
 def cambiar_rango(body: CambioRango):
-    return ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
         (body.id_miembro, body.nuevo_rango, body.motivo, body.admin_id))[0]
+    if res.get("status") == "SUCCESS":
+        _miembro_cambiado(body.id_miembro)
+        publicar("Cambio", f"Miembro ID: {body.id_miembro}", res.get("mensaje"))
+    return res
 
 class EliminarMiembroFisico(BaseModel):
     confirmacion: bool
 
 
 @app.delete("/miembros/{id_miembro}/eliminar-fisico")
+@invalida("miembros")
 def eliminar_miembro_fisico(id_miembro: int, body: EliminarMiembroFisico):
     
     if not body.confirmacion:
@@ -406,7 +442,55 @@ def eliminar_miembro_fisico(id_miembro: int, body: EliminarMiembroFisico):
             detail="El miembro no existe o no fue eliminado"
         )
 
+    _miembro_cambiado(id_miembro)
+    publicar("Miembro", f"Miembro ID: {id_miembro}", "Miembro eliminado")
     return {
         "status": "SUCCESS",
         "data": resultado[0]
-    }
\ No newline at end of file
+    }
+
+
+# ══════════════════════════════════════════════════════════════════
+# SUGERENCIAS DEL BUSCADOR (type-ahead)
+# ══════════════════════════════════════════════════════════════════
+
+def _sugerencia_sp(fila: dict, tipo: str) -> dict:
+    """Fila de los SP de listado con la forma de indice_usuarios.sugerir()."""
+    return {
+        "tipo": tipo,
+        "id": fila.get("id"),
+        "nombre_completo": fila.get("nombre_completo"),
+        "dni": fila.get("dni"),
+        "legajo": fila.get("legajo") if tipo == "miembro" else None,
+        "email": fila.get("email"),
+        "estado": fila.get("estado") if tipo == "miembro" else None,
+        "rango": fila.get("rango") if tipo == "miembro" else None,
+        "departamento": fila.get("departamento"),
+        "coincidencia": None,
+    }
+
+@app.get("/sugerir")
+def sugerir(
+    q: str = "",
+    tipo: Optional[str] = Query(None, pattern="^(miembro|postulante)$"),
+    limite: int = Query(8, ge=1, le=indice_usuarios.LIMITE_MAXIMO),
+):
+    # Exactos por DNI / legajo primero, luego por prefijo de nombre, apellido, DNI, legajo o email
+    if len(q.strip()) < indice_usuarios.MIN_CARACTERES:
+        return {"status": "SUCCESS", "data": []}
+
+    if indice_usuarios.listo():
+        return {"status": "SUCCESS", "data": indice_usuarios.sugerir(q, tipo, limite)}
+
+    # Índice aún no construido: mismos SP del listado, sin conteo
+    indice_usuarios.asegurar_indice()
+    data = []
+    if tipo in (None, "miembro"):
+        filas, _ = sp_pagina("SP_GU_LISTAR_MIEMBROS_PAGINA",
+            (q.strip(), None, None, None, 1, limite, 0), incluir_total=False)
+        data += [_sugerencia_sp(f, "miembro") for f in filas]
+    if tipo in (None, "postulante") and len(data) < limite:
+        filas, _ = sp_pagina("SP_GU_LISTAR_POSTULANTES_PAGINA",
+            (q.strip(), None, 0, 1, limite - len(data), 0), incluir_total=False)
+        data += [_sugerencia_sp(f, "postulante") for f in filas]
+    return {"status": "SUCCESS", "data": data}
@@ -0,0 +1,617 @@
+# almacen_media.py
+"""
+Almacén de imágenes DIRECCIONADO POR CONTENIDO (SHA-256) en disco.
+
+Cada imagen se guarda una sola vez como  cache_media/ab/abcdef...  (su hash).
+Es el almacén de media de TODO el sistema (fotos de noticias, instructores,
+perfil de admins e imágenes de cursos): las filas de la BD guardan solo el
+hash y la imagen se sirve por una única URL, inmutable por 1 año:
+
+    /api/media/{hash}[?w=&fmt=]
+
+Subir dos veces la misma imagen no ocupa nada extra (mismo hash = mismo
+archivo). ⚠️ Las imágenes nuevas ya NO están en la BD: cache_media/ hay que
+respaldarlo junto con la base de datos.
+
+Compatibilidad (filas que todavía tienen el blob, ver migrar_media.py):
+
+    /api/noticias/foto/{id}            -> Cache-Control corto + ETag (revalida)
+    /api/noticias/foto/{id}?v={hash}   -> inmutable por 1 año
+    /api/instructores/instructores/{id}/foto[?v={hash}]   (ídem)
+
+✅ Solo se lee el hash en la BD (columna PERSISTED) para decidir 304 / disco
+✅ El blob se pide a la BD solo si no está en disco, EN BLOQUES que se van
+   escribiendo al archivo: nunca hay una imagen entera en memoria
+✅ Se sirve desde el archivo (FileResponse / lectura por tramos), sin copias
+✅ ETag fuerte = SHA-256, 304 con If-None-Match
+✅ Range: bytes=a-b / a- / -n  ->  206 / 416
+✅ Variantes ?w=&fmt= (webp/avif/jpeg) generadas en un pool de PROCESOS y
+   guardadas en disco por (hash, ancho, formato): variantes/ab/{hash}-w{ancho}.{fmt}
+"""
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from cache_web import cache_grupo
+from ejecutor_sp import ejecutar_async, en_hilo_db, iterar
+import variantes_imagen
+
+# =============================================
+# CONFIGURACIÓN
+# =============================================
+DIRECTORIO_MEDIA = Path(__file__).resolve().parent / "cache_media"
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"   # URL con ?v=hash
+CACHE_REVALIDAR = "public, max-age=3600"                   # URL sin versión
+
+TAM_BLOQUE_BD = 512 * 1024      # bytes por fila de SP_OBTENER_FOTO_PUBLICACION_BLOQUES
+TAM_BLOQUE_ENVIO = 64 * 1024    # bytes por chunk al responder un Range
+
+PROCESOS_VARIANTES = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_HEX64 = re.compile(r"^[0-9a-f]{64}$")
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# =============================================
+# ALMACÉN EN DISCO
+# =============================================
+def normalizar_hash(sha256: Optional[str]) -> Optional[str]:
+    if not sha256:
+        return None
+    sha256 = sha256.strip().lower()
+    return sha256 if _HEX64.match(sha256) else None
+
+
+def ruta_de(sha256: str) -> Path:
+    return DIRECTORIO_MEDIA / sha256[:2] / sha256
+
+
+def existe(sha256: str) -> bool:
+    return ruta_de(sha256).is_file()
+
+
+def guardar_bloques(bloques: Iterable[bytes]) -> Optional[str]:
+    """
+    Escribe los bloques a un archivo temporal calculando el SHA-256 al vuelo
+    y lo mueve (os.replace, atómico) a su ruta definitiva. Devuelve el hash,
+    o None si no llegó ningún byte. Si ya existía, se descarta el temporal.
+    """
+    DIRECTORIO_MEDIA.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    escritos = 0
+    fd, temporal = tempfile.mkstemp(dir=DIRECTORIO_MEDIA, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for bloque in bloques:
+                h.update(bloque)
+                escritos += f.write(bloque)
+        if escritos == 0:
+            os.unlink(temporal)
+            return None
+        sha256 = h.hexdigest()
+        destino = ruta_de(sha256)
+        if destino.is_file():
+            os.unlink(temporal)
+        else:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temporal, destino)
+        return sha256
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def guardar_bytes(datos) -> Optional[str]:
+    """Guarda un contenido que ya está en memoria (p.ej. una subida); None si viene vacío."""
+    return guardar_bloques([datos])
+
+
+def _abrir_info(ruta: Path) -> Tuple[os.stat_result, bytes]:
+    with open(ruta, "rb") as f:
+        return os.fstat(f.fileno()), f.read(12)
+
+
+def _leer_tramo(ruta: Path, inicio: int, fin: int) -> Iterator[bytes]:
+    """Bytes [inicio, fin] del archivo en chunks de TAM_BLOQUE_ENVIO."""
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            bloque = f.read(min(TAM_BLOQUE_ENVIO, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def tipo_contenido(cabecera: bytes) -> str:
+    """Tipo de imagen por magic bytes (por defecto JPEG)."""
+    if cabecera[:4] == b'\x89PNG':
+        return "image/png"
+    if cabecera[:4] == b'GIF8':
+        return "image/gif"
+    if cabecera[:2] == b'BM':
+        return "image/bmp"
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return "image/webp"
+    return "image/jpeg"
+
+
+@functools.lru_cache(maxsize=4096)
+def _info_archivo(sha256: str) -> dict:
+    # El contenido de un hash no cambia: se puede cachear sin invalidar
+    ruta = ruta_de(sha256)
+    st, cabecera = _abrir_info(ruta)
+    ancho, alto = variantes_imagen.dimensiones(str(ruta)) or (None, None)
+    return {"bytes": st.st_size, "tipo": tipo_contenido(cabecera), "ancho": ancho, "alto": alto}
+
+
+def info_media(sha256: Optional[str]) -> Optional[dict]:
+    """Tamaño, tipo y dimensiones de una imagen del almacén (None si no está en disco)."""
+    sha256 = normalizar_hash(sha256)
+    if not sha256 or not existe(sha256):
+        return None
+    return _info_archivo(sha256)
+
+
+# =============================================
+# RESPUESTA HTTP
+# =============================================
+def _etag_coincide(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    etags = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+    return "*" in etags or etag in etags
+
+
+def _rango(cabecera: Optional[str], tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    (inicio, fin) inclusivo para un Range de un solo tramo, None si no aplica.
+    Lanza HTTPException 416 si el rango no se puede satisfacer.
+    """
+    if not cabecera:
+        return None
+    m = _RANGO.match(cabecera.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None   # multi-rango o sintaxis rara: se ignora y va completo
+    if m.group(1):
+        inicio = int(m.group(1))
+        fin = min(int(m.group(2)), tamano - 1) if m.group(2) else tamano - 1
+        if m.group(2) and int(m.group(2)) < inicio:
+            return None
+    else:
+        sufijo = int(m.group(2))
+        if sufijo == 0:
+            inicio = tamano   # -> 416
+        else:
+            inicio, fin = max(0, tamano - sufijo), tamano - 1
+    if inicio >= tamano:
+        raise HTTPException(
+            status_code=416, detail="Rango no satisfacible",
+            headers={"Content-Range": f"bytes */{tamano}"},
+        )
+    return inicio, fin
+
+
+def _headers(etag: str, inmutable: bool) -> dict:
+    return {
+        "ETag": f'"{etag}"',
+        "Cache-Control": CACHE_INMUTABLE if inmutable else CACHE_REVALIDAR,
+        "Accept-Ranges": "bytes",
+    }
+
+
+async def responder_archivo(
+    request: Request, ruta: Path, etag: str, inmutable: bool = False, tipo: Optional[str] = None,
+) -> Response:
+    """
+    Sirve un archivo del almacén con ETag fuerte, 304 y Range.
+    El contenido nunca se carga entero: archivo completo con FileResponse
+    (sendfile / pathsend si el servidor lo soporta) y los rangos por tramos.
+    """
+    headers = _headers(etag, inmutable)
+    if _etag_coincide(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    estado, cabecera = await run_in_threadpool(_abrir_info, ruta)
+    tipo = tipo or tipo_contenido(cabecera)
+
+    # If-Range: el rango solo vale si el cliente tiene esta misma versión
+    if_range = request.headers.get("if-range")
+    rango = None
+    if if_range is None or if_range.strip() == headers["ETag"]:
+        rango = _rango(request.headers.get("range"), estado.st_size)
+    if rango is None:
+        return FileResponse(ruta, media_type=tipo, headers=headers, stat_result=estado)
+
+    inicio, fin = rango
+    headers["Content-Range"] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    headers["Content-Length"] = str(fin - inicio + 1)
+    return StreamingResponse(
+        _leer_tramo(ruta, inicio, fin),
+        status_code=206, media_type=tipo, headers=headers,
+    )
+
+
+async def responder_imagen(request: Request, sha256: str, inmutable: bool = False) -> Response:
+    """Sirve la imagen original `sha256` (ETag = su hash)."""
+    return await responder_archivo(request, ruta_de(sha256), sha256, inmutable)
+
+
+# =============================================
+# VARIANTES (ancho / formato)
+# =============================================
+_procesos: Optional[ProcessPoolExecutor] = None
+_procesos_lock = threading.Lock()
+_en_proceso: Dict[Path, asyncio.Future] = {}
+
+
+def _pool_procesos() -> ProcessPoolExecutor:
+    """Pool de procesos para redimensionar: el trabajo de CPU no frena el event loop ni el GIL."""
+    global _procesos
+    if _procesos is None:
+        with _procesos_lock:
+            if _procesos is None:
+                _procesos = ProcessPoolExecutor(max_workers=PROCESOS_VARIANTES)
+    return _procesos
+
+
+def cerrar_variantes():
+    global _procesos
+    with _procesos_lock:
+        if _procesos is not None:
+            _procesos.shutdown(wait=False, cancel_futures=True)
+            _procesos = None
+
+
+def elegir_variante(ancho: Optional[int], fmt: Optional[str]) -> Optional[Tuple[int, str]]:
+    """(ancho normalizado, formato) a generar, o None si se debe servir el original."""
+    if not (ancho or fmt) or not variantes_imagen.disponible():
+        return None
+    if not fmt or not variantes_imagen.soporta(fmt):
+        fmt = "webp" if variantes_imagen.soporta("webp") else "jpeg"
+    return (variantes_imagen.ancho_normalizado(ancho) if ancho else 0), fmt
+
+
+def ruta_variante(sha256: str, ancho: int, fmt: str) -> Path:
+    return DIRECTORIO_MEDIA / "variantes" / sha256[:2] / f"{sha256}-w{ancho}.{fmt}"
+
+
+async def obtener_variante(sha256: str, ancho: int, fmt: str) -> Optional[Path]:
+    """
+    Ruta de la variante en disco; la genera en el pool de procesos si falta.
+    Peticiones simultáneas de la misma variante comparten una sola generación.
+    None si no se pudo generar (imagen corrupta, formato no soportado...).
+    """
+    ruta = ruta_variante(sha256, ancho, fmt)
+    if ruta.is_file():
+        return ruta
+
+    pendiente = _en_proceso.get(ruta)
+    if pendiente is None:
+        loop = asyncio.get_running_loop()
+        pendiente = loop.run_in_executor(
+            _pool_procesos(), variantes_imagen.generar_variante,
+            str(ruta_de(sha256)), str(ruta), ancho, fmt,
+        )
+        _en_proceso[ruta] = pendiente
+        pendiente.add_done_callback(lambda _f: _en_proceso.pop(ruta, None))
+    try:
+        await asyncio.shield(pendiente)
+    except Exception as e:
+        print(f"⚠️ No se pudo generar la variante {ruta.name}: {e}")
+        return None
+    return ruta
+
+
+async def responder_variante(
+    request: Request, sha256: str, ancho: Optional[int], fmt: Optional[str], inmutable: bool = False,
+) -> Response:
+    """Variante pedida con ?w=&fmt=, o el original si no aplica / no se pudo generar."""
+    eleccion = elegir_variante(ancho, fmt)
+    if eleccion is not None:
+        ancho_final, fmt_final = eleccion
+        ruta = await obtener_variante(sha256, ancho_final, fmt_final)
+        if ruta is not None:
+            return await responder_archivo(
+                request, ruta, f"{sha256}-w{ancho_final}.{fmt_final}", inmutable,
+                variantes_imagen.FORMATOS[fmt_final][1],
+            )
+    return await responder_imagen(request, sha256, inmutable)
+
+
+# =============================================
+# COLUMNAS DE MEDIA EN LA BD (solo el hash)
+# =============================================
+URL_MEDIA = "/api/media/{sha256}"
+
+
+def es_hash(valor) -> bool:
+    return isinstance(valor, str) and _HEX64.match(valor.strip().lower()) is not None
+
+
+def decodificar_base64(texto: Optional[str]) -> Optional[bytes]:
+    """'data:image/...;base64,AAAA' (o solo el base64) -> bytes. None si no es válido."""
+    if not texto:
+        return None
+    if texto.startswith("data:"):
+        texto = texto.partition(",")[2]
+    try:
+        return base64.b64decode("".join(texto.split()), validate=True) or None
+    except (binascii.Error, ValueError):
+        return None
+
+
+def guardar_media(valor) -> Optional[str]:
+    """
+    Valor de imagen recibido por la API -> lo que se guarda en la BD.
+    bytes / data URL / base64 se guardan en el almacén y se devuelve el hash.
+    Un hash, una URL externa (http...) o None se devuelven tal cual.
+    """
+    if valor is None or valor == "":
+        return valor
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return guardar_bytes(bytes(valor))
+    if es_hash(valor):
+        return valor.strip().lower()
+    if valor.startswith(("http://", "https://")):
+        return valor
+    datos = decodificar_base64(valor)
+    if not datos:
+        raise HTTPException(status_code=400, detail="La imagen no es un base64 válido")
+    return guardar_bytes(datos)
+
+
+def url_media(valor) -> Optional[str]:
+    """
+    URL para el frontend del valor de una columna de media.
+    None para el base64 legado (sin migrar): el frontend usa la columna tal cual
+    y así no viaja dos veces en la respuesta.
+    """
+    if es_hash(valor):
+        return URL_MEDIA.format(sha256=valor.strip().lower())
+    if isinstance(valor, str) and valor.startswith(("http://", "https://")):
+        return valor
+    return None
+
+
+def con_urls_media(filas: list, *campos: str) -> list:
+    """Agrega `{campo}_url` a cada fila que trae alguna de las columnas de media `campos`."""
+    for fila in filas:
+        for campo in campos:
+            if campo in fila:
+                fila[campo + "_url"] = url_media(fila[campo])
+    return filas
+
+
+# =============================================
+# FLUJO COMÚN DE /foto
+# =============================================
+async def servir_foto(
+    request: Request,
+    grupo: str,
+    clave: tuple,
+    consultar_hash: Callable[[], Awaitable[Optional[str]]],
+    traer: Callable[[], Awaitable[Optional[str]]],
+    v: Optional[str] = None,
+    w: Optional[int] = None,
+    fmt: Optional[str] = None,
+    sin_foto: str = "No hay foto",
+) -> Response:
+    """
+    hash (caché `grupo` en memoria o BD)  ->  304 / disco  ->  BD solo si
+    falta (`traer` lo copia al almacén)  ->  variante ?w=&fmt= si se pidió.
+    """
+    async def calcular():
+        return await consultar_hash() or ""
+    sha256 = await cache_grupo(grupo).obtener_o_calcular(clave, calcular)
+    if not sha256:
+        raise HTTPException(status_code=404, detail=sin_foto)
+
+    if not existe(sha256):
+        guardado = await traer()
+        if not guardado:
+            raise HTTPException(status_code=404, detail=sin_foto)
+        sha256 = guardado
+
+    return await responder_variante(request, sha256, w, fmt, inmutable=(normalizar_hash(v) == sha256))
+
+
+# =============================================
+# FOTOS DE PUBLICACIONES (noticias)
+# =============================================
+async def _hash_foto_publicacion(idpublicacion: str) -> Optional[str]:
+    """SHA-256 de la foto (sin leer el blob)."""
+    filas = await ejecutar_async(
+        "SP_OBTENER_FOTO_PUBLICACION",
+        {"idpublicacion": idpublicacion, "incluir_foto": 0},
+    )
+    if not filas:
+        raise HTTPException(status_code=404, detail="Publicación no encontrada")
+    return normalizar_hash(filas[0].get("foto_sha256"))
+
+
+def _descargar_foto_publicacion(idpublicacion: str) -> Optional[str]:
+    """Copia el blob de la BD al almacén bloque a bloque y devuelve su hash."""
+    lotes = iterar(
+        "SP_OBTENER_FOTO_PUBLICACION_BLOQUES",
+        {"idpublicacion": idpublicacion, "tam_bloque": TAM_BLOQUE_BD},
+        lote=1,
+    )
+    try:
+        return guardar_bloques(fila[1] for lote in lotes for fila in lote.filas)
+    finally:
+        lotes.close()   # devuelve la conexión al pool aunque falle la escritura
+
+
+async def _traer_foto_publicacion(idpublicacion: str) -> Optional[str]:
+    # Un solo hilo del executor de SQL: la conexión y el archivo van juntos
+    return await en_hilo_db(_descargar_foto_publicacion, idpublicacion)
+
+
+async def servir_foto_publicacion(
+    request: Request,
+    idpublicacion: str,
+    v: Optional[str] = None,
+    w: Optional[int] = None,
+    fmt: Optional[str] = None,
+) -> Response:
+    """Flujo de /foto/{idpublicacion} (público y admin)."""
+    return await servir_foto(
+        request, "noticias", ("foto", idpublicacion),
+        lambda: _hash_foto_publicacion(idpublicacion),
+        lambda: _traer_foto_publicacion(idpublicacion),
+        v, w, fmt, sin_foto="Esta publicación no tiene foto",
+    )
+
+
+async def info_foto_publicacion(idpublicacion: str, sha256: Optional[str]) -> dict:
+    """
+    Campos de la foto para el JSON de detalle, en lugar del blob: hash, URL
+    (/api/media/{hash}) y dimensiones. Un blob que todavía no está en disco
+    se copia una vez (el <img> lo iba a pedir igual y lo encuentra ahí).
+    """
+    sha256 = normalizar_hash(sha256)
+    if not sha256:
+        return {"foto_sha256": None, "foto_url": None, "foto_ancho": None, "foto_alto": None, "foto_bytes": None}
+    if not existe(sha256):
+        await _traer_foto_publicacion(idpublicacion)
+    info = await run_in_threadpool(info_media, sha256) or {}
+    return {
+        "foto_sha256": sha256,
+        "foto_url": URL_MEDIA.format(sha256=sha256),
+        "foto_ancho": info.get("ancho"),
+        "foto_alto": info.get("alto"),
+        "foto_bytes": info.get("bytes"),
+    }
+
+
+# =============================================
+# FOTOS DE INSTRUCTORES
+# =============================================
+URL_FOTO_INSTRUCTOR = "/api/instructores/instructores/{id}/foto"
+URL_FOTO_INSTRUCTOR_ADMIN = "/api/admin/instructores/{id}/foto"
+
+_COLUMNAS_FOTO_INSTRUCTOR = ("foto_sha256", "tiene_foto", "foto_externa")
+
+
+def url_foto(plantilla: str, id_registro, sha256: Optional[str], tiene_foto=True, externa: Optional[str] = None) -> Optional[str]:
+    """
+    URL de la foto para los listados: /api/media/{hash} si se conoce el hash,
+    el endpoint propio de la fila si aún es base64 sin migrar, la URL externa
+    tal cual o None si no tiene foto.
+    """
+    if externa:
+        return externa
+    sha256 = normalizar_hash(sha256)
+    if sha256:
+        return URL_MEDIA.format(sha256=sha256)
+    return plantilla.format(id=id_registro) if tiene_foto else None
+
+
+def con_url_foto_instructor(filas: list, plantilla: str = URL_FOTO_INSTRUCTOR, columna_id: str = "id") -> list:
+    """Reemplaza foto_sha256 / tiene_foto / foto_externa de cada fila por `foto_url`."""
+    for fila in filas:
+        if "tiene_foto" not in fila:
+            continue
+        sha256, tiene_foto, externa = (fila.pop(c, None) for c in _COLUMNAS_FOTO_INSTRUCTOR)
+        fila["foto_url"] = url_foto(plantilla, fila.get(columna_id), sha256, tiene_foto, externa)
+    return filas
+
+
+async def _hash_foto_instructor(id_instructor: int) -> Optional[str]:
+    filas = await ejecutar_async(
+        "SP_OBTENER_FOTO_INSTRUCTOR",
+        {"id_instructor": id_instructor, "incluir_foto": 0},
+    )
+    if not filas:
+        raise HTTPException(status_code=404, detail="Instructor no encontrado")
+    fila = filas[0]
+    sha256 = normalizar_hash(fila.get("foto_sha256"))
+    if sha256:
+        return sha256
+    if fila.get("tiene_foto") and not fila.get("foto_externa"):
+        # Base64 todavía sin migrar a foto_bin: el hash sale al guardarlo
+        return await _traer_foto_instructor(id_instructor)
+    return None
+
+
+async def _traer_foto_instructor(id_instructor: int) -> Optional[str]:
+    filas = await ejecutar_async(
+        "SP_OBTENER_FOTO_INSTRUCTOR",
+        {"id_instructor": id_instructor, "incluir_foto": 1},
+    )
+    if not filas:
+        return None
+    datos = filas[0].get("foto_bin") or decodificar_base64(filas[0].get("foto_texto"))
+    if not datos:
+        return None
+    return await run_in_threadpool(guardar_bytes, datos)
+
+
+async def servir_foto_instructor(
+    request: Request,
+    id_instructor: int,
+    v: Optional[str] = None,
+    w: Optional[int] = None,
+    fmt: Optional[str] = None,
+) -> Response:
+    """Flujo de /instructores/{id}/foto (público y admin)."""
+    return await servir_foto(
+        request, "instructores", ("foto", id_instructor),
+        lambda: _hash_foto_instructor(id_instructor),
+        lambda: _traer_foto_instructor(id_instructor),
+        v, w, fmt, sin_foto="Este instructor no tiene foto",
+    )
+
+
+# =============================================
+# /api/media/{hash}
+# =============================================
+async def _traer_legado(sha256: str) -> Optional[str]:
+    """Copia al almacén un blob que todavía está en la BD (fila sin migrar)."""
+    filas = await ejecutar_async("SP_MEDIA_UBICAR", {"sha256": sha256})
+    if not filas:
+        return None
+    origen, id_registro = filas[0]["origen"], filas[0]["id"]
+    if origen == "publicaciones":
+        return await _traer_foto_publicacion(id_registro)
+    if origen == "instructores":
+        return await _traer_foto_instructor(int(id_registro))
+    return None
+
+
+async def servir_media(
+    request: Request,
+    sha256: str,
+    w: Optional[int] = None,
+    fmt: Optional[str] = None,
+) -> Response:
+    """
+    Cualquier imagen del almacén por su hash. La URL identifica el contenido,
+    así que siempre es inmutable; solo va a la BD si el archivo no está.
+    """
+    sha256 = normalizar_hash(sha256)
+    if not sha256:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    if not existe(sha256) and await _traer_legado(sha256) != sha256:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    return await responder_variante(request, sha256, w, fmt, inmutable=True)
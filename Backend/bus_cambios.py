@@ -0,0 +1,117 @@
+# bus_cambios.py
+"""
+Bus de cambios en memoria para la actividad reciente del dashboard.
+
+Los endpoints de escritura (registro web, alta / edición / estado / rango /
+baja de miembros) publican un evento con la misma forma que una fila de
+SP_DS_ACTIVIDAD_RECIENTE; GET /api/admin/dashboard/actividad/stream lo
+empuja por SSE a los paneles abiertos. Nadie consulta la BD para enterarse.
+
+✅ publicar() se puede llamar desde endpoints sync (threadpool) o async
+✅ Cada suscriptor tiene su cola acotada: uno lento no frena a los demás;
+   si se llena, recibe "resync" y vuelve a pedir la actividad por HTTP
+✅ Últimos HISTORIAL eventos en memoria: al reconectar con Last-Event-ID
+   el navegador recibe lo que se perdió (o "resync" si ya no está)
+
+Un solo proceso uvicorn (como el resto de cachés en memoria).
+"""
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+
+HISTORIAL = 200        # eventos recientes guardados para reconexiones
+COLA_SUSCRIPTOR = 100  # eventos pendientes por conexión antes de forzar resync
+
+RESYNC = {"id": None, "tipo": "resync"}
+
+
+class _Suscriptor:
+    __slots__ = ("loop", "cola")
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=COLA_SUSCRIPTOR)
+
+    def entregar(self, evento: dict):
+        """Corre en el loop del suscriptor."""
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Se perdió el orden: descartar lo pendiente y pedir recarga
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(RESYNC)
+
+
+_lock = threading.Lock()
+_suscriptores: Set[_Suscriptor] = set()
+_recientes: Deque[dict] = deque(maxlen=HISTORIAL)
+_ultimo_id = 0
+
+
+def publicar(tipo: str, descripcion: str, detalle: Optional[str] = None):
+    """
+    Publica un evento de actividad (tipo: Postulante | Miembro | Cambio).
+    La fecha va en UTC sin zona, igual que las columnas DATETIME2 de la BD.
+    """
+    global _ultimo_id
+    with _lock:
+        _ultimo_id += 1
+        evento = {
+            "id": _ultimo_id,
+            "tipo": tipo,
+            "descripcion": descripcion,
+            "detalle": detalle,
+            "fecha": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        }
+        _recientes.append(evento)
+        suscriptores = list(_suscriptores)
+
+    for suscriptor in suscriptores:
+        try:
+            suscriptor.loop.call_soon_threadsafe(suscriptor.entregar, evento)
+        except RuntimeError:   # loop cerrado: la conexión ya no existe
+            with _lock:
+                _suscriptores.discard(suscriptor)
+
+
+def _pendientes(desde_id: Optional[int]) -> list:
+    """Eventos posteriores a desde_id, o [RESYNC] si ya no están en memoria. Llamar con _lock."""
+    if desde_id is None or desde_id == _ultimo_id:
+        return []
+    if desde_id > _ultimo_id or not _recientes or _recientes[0]["id"] > desde_id + 1:
+        return [RESYNC]   # reinicio del servidor o demasiado atrás
+    return [e for e in _recientes if e["id"] > desde_id]
+
+
+async def escuchar(desde_id: Optional[int] = None, espera: float = 15.0) -> AsyncIterator[Optional[dict]]:
+    """
+    Eventos a medida que se publican. Entrega None apenas queda suscripto y
+    luego cada `espera` segundos sin eventos (el endpoint manda un keep-alive).
+    """
+    suscriptor = _Suscriptor()
+    with _lock:
+        _suscriptores.add(suscriptor)
+        atrasados = _pendientes(desde_id)
+    try:
+        yield None
+        for evento in atrasados:
+            yield evento
+        while True:
+            try:
+                yield await asyncio.wait_for(suscriptor.cola.get(), timeout=espera)
+            except asyncio.TimeoutError:
+                yield None
+    finally:
+        with _lock:
+            _suscriptores.discard(suscriptor)
+
+
+def metricas_bus() -> Dict[str, int]:
+    with _lock:
+        return {
+            "suscriptores": len(_suscriptores),
+            "publicados": _ultimo_id,
+        }
@@ -0,0 +1,308 @@
+# cache_web.py
+"""
+Caché en memoria (TTL + LRU) para los endpoints PÚBLICOS de lectura.
+
+Los datos de la web (cursos, noticias, instructores, eventos) solo cambian
+cuando un admin los edita, así que cada grupo guarda las respuestas ya
+armadas y los endpoints de escritura del panel admin invalidan el grupo.
+
+Uso en un endpoint público (async):
+
+    @app.get("/categorias")
+    @cacheado("cursos")
+    async def obtener_categorias(): ...
+
+@cacheado guarda el JSON YA serializado junto con su ETag (hash del
+contenido). Mientras la entrada siga en caché (la versión
+del grupo no cambió y no venció el TTL), un `If-None-Match` que coincide se
+responde 304 sin consultar SQL Server ni volver a serializar.
+
+Uso en un endpoint de escritura del admin:
+
+    @app.put("/")
+    @invalida("cursos")
+    def actualizar_curso(...): ...
+
+✅ TTL por grupo + tope de entradas (se expulsa la menos usada)
+✅ Peticiones simultáneas con la misma clave comparten UNA consulta
+✅ ETag + 304 en los endpoints @cacheado
+✅ Contadores hits / misses / invalidaciones / 304: metricas_cache()
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+# =============================================
+# CONFIGURACIÓN
+# =============================================
+TTL_POR_DEFECTO = 300        # seg. que vive una respuesta cacheada
+MAX_ENTRADAS_POR_DEFECTO = 256
+
+_CANCELADO = object()         # resultado de un cálculo en vuelo cuyo dueño fue cancelado
+
+GRUPOS = {
+    # grupo          (ttl, max_entradas)
+    "cursos":       (300, 256),
+    "eventos":      (300, 64),
+    "noticias":     (120, 256),
+    "instructores": (600, 128),
+    "miembros":     (60, 1024),   # búsquedas públicas sin resultados (directorio_miembros)
+}
+
+
+class CacheTTL:
+    """Diccionario LRU con vencimiento por entrada. Thread-safe."""
+
+    def __init__(self, nombre: str, ttl: float = TTL_POR_DEFECTO, max_entradas: int = MAX_ENTRADAS_POR_DEFECTO):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._en_vuelo: Dict[Hashable, asyncio.Future] = {}
+        self.version = 0              # sube en cada invalidación
+        self.hits = 0
+        self.misses = 0
+        self.expiradas = 0
+        self.expulsadas = 0
+        self.invalidaciones = 0
+        self.no_modificados = 0       # respuestas 304
+
+    # ---------- acceso directo ----------
+    def obtener(self, clave: Hashable) -> Tuple[bool, Any]:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                vence, valor = entrada
+                if vence > ahora:
+                    self._datos.move_to_end(clave)
+                    self.hits += 1
+                    return True, valor
+                del self._datos[clave]
+                self.expiradas += 1
+            self.misses += 1
+            return False, None
+
+    def guardar(self, clave: Hashable, valor: Any, ttl: Optional[float] = None, version: Optional[int] = None):
+        """Guarda el valor. Si se pasa `version` y hubo una invalidación desde entonces, no se guarda."""
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._datos[clave] = (time.monotonic() + (ttl or self.ttl), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsadas += 1
+
+    def invalidar(self):
+        with self._lock:
+            self._datos.clear()
+            self.version += 1
+            self.invalidaciones += 1
+
+    # ---------- uso desde endpoints async ----------
+    async def obtener_o_calcular(self, clave: Hashable, calcular: Callable[[], Any], ttl: Optional[float] = None):
+        """
+        Devuelve el valor cacheado o lo calcula con `await calcular()`.
+        Si ya hay un cálculo en curso para la misma clave, se espera ese
+        en lugar de lanzar otra consulta a SQL Server.
+        """
+        while True:
+            hit, valor = self.obtener(clave)
+            if hit:
+                return valor
+
+            pendiente = self._en_vuelo.get(clave)
+            if pendiente is None:
+                break
+            valor = await asyncio.shield(pendiente)
+            if valor is not _CANCELADO:
+                return valor
+            # El que calculaba fue cancelado (cliente desconectado): se vuelve a intentar
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_vuelo[clave] = futuro
+        version = self.version
+        try:
+            valor = await calcular()
+        except asyncio.CancelledError:
+            # La cancelación es de esta petición, no de las que esperan: que recalculen
+            self._en_vuelo.pop(clave, None)
+            futuro.set_result(_CANCELADO)
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()   # evita el aviso de "exception never retrieved"
+            raise
+        else:
+            self.guardar(clave, valor, ttl, version)
+            futuro.set_result(valor)
+            return valor
+        finally:
+            if self._en_vuelo.get(clave) is futuro:
+                del self._en_vuelo[clave]
+
+    def metricas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "ttl": self.ttl,
+                "max_entradas": self.max_entradas,
+                "entradas": len(self._datos),
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else None,
+                "expiradas": self.expiradas,
+                "expulsadas": self.expulsadas,
+                "invalidaciones": self.invalidaciones,
+                "no_modificados": self.no_modificados,
+            }
+
+
+# =============================================
+# REGISTRO DE GRUPOS
+# =============================================
+_caches: Dict[str, CacheTTL] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_grupo(nombre: str) -> CacheTTL:
+    cache = _caches.get(nombre)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(nombre)
+            if cache is None:
+                ttl, max_entradas = GRUPOS.get(nombre, (TTL_POR_DEFECTO, MAX_ENTRADAS_POR_DEFECTO))
+                cache = _caches[nombre] = CacheTTL(nombre, ttl, max_entradas)
+    return cache
+
+
+def invalidar(*grupos: str):
+    """Hook para los endpoints de escritura: descarta las respuestas cacheadas del grupo."""
+    for grupo in grupos:
+        cache_grupo(grupo).invalidar()
+
+
+def metricas_cache() -> dict:
+    with _caches_lock:
+        caches = dict(_caches)
+    return {nombre: cache.metricas() for nombre, cache in caches.items()}
+
+
+# =============================================
+# RESPUESTAS HTTP CACHEADAS
+# =============================================
+class RespuestaJSON:
+    """Cuerpo JSON ya serializado + sus validadores HTTP."""
+    __slots__ = ("cuerpo", "etag", "headers")
+
+    def __init__(self, valor: Any):
+        # Mismo formato que JSONResponse de FastAPI
+        self.cuerpo = json.dumps(
+            jsonable_encoder(valor), ensure_ascii=False, allow_nan=False,
+            indent=None, separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = '"' + hashlib.blake2b(self.cuerpo, digest_size=16).hexdigest() + '"'
+        # Sin Last-Modified: la hora de llenado del caché no es la del dato,
+        # y un If-Modified-Since contra ella daría 304 con contenido viejo.
+        self.headers = {
+            "ETag": self.etag,
+            # El navegador guarda la respuesta pero revalida siempre (barato: 304)
+            "Cache-Control": "no-cache",
+        }
+
+    def no_modificada(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        etags = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        return "*" in etags or self.etag in etags
+
+    def responder(self, request: Request, cache: CacheTTL) -> Response:
+        if self.no_modificada(request):
+            cache.no_modificados += 1
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.cuerpo, media_type="application/json", headers=self.headers)
+
+
+# =============================================
+# DECORADORES
+# =============================================
+_SIN_RESPALDO = object()
+
+
+def cacheado(
+    grupo: str,
+    ttl: Optional[float] = None,
+    variar: Optional[Callable[[], Hashable]] = None,
+    respaldo: Any = _SIN_RESPALDO,
+):
+    """
+    Cachea la respuesta de un endpoint async como RespuestaJSON. La clave es
+    el nombre de la función + sus parámetros (FastAPI siempre llama con
+    kwargs) + `variar()` si se indica (p.ej. la fecha de hoy).
+    Si se pasa `respaldo`, un error devuelve ese valor SIN cachearlo.
+    """
+    def decorador(fn):
+        if not inspect.iscoroutinefunction(fn):
+            raise TypeError(f"@cacheado requiere un endpoint async: {fn.__name__}")
+
+        @wraps(fn)
+        async def envoltura(*args, _request: Request, **kwargs):
+            cache = cache_grupo(grupo)
+            clave = (fn.__qualname__, args, tuple(sorted(kwargs.items())), variar() if variar else None)
+
+            async def calcular():
+                return RespuestaJSON(await fn(*args, **kwargs))
+
+            try:
+                respuesta = await cache.obtener_o_calcular(clave, calcular, ttl)
+            except Exception:
+                if respaldo is _SIN_RESPALDO:
+                    raise
+                return Response(
+                    json.dumps(respaldo).encode("utf-8"), media_type="application/json",
+                    headers={"Cache-Control": "no-store"},
+                )
+            return respuesta.responder(_request, cache)
+
+        # FastAPI lee la firma: se agrega el Request para poder ver los headers
+        firma = inspect.signature(fn)
+        envoltura.__signature__ = firma.replace(parameters=[
+            *firma.parameters.values(),
+            inspect.Parameter("_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return envoltura
+    return decorador
+
+
+def invalida(*grupos: str):
+    """Invalida los grupos indicados cuando el endpoint termina sin excepción."""
+    def decorador(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def envoltura_async(*args, **kwargs):
+                resultado = await fn(*args, **kwargs)
+                invalidar(*grupos)
+                return resultado
+            return envoltura_async
+
+        @wraps(fn)
+        def envoltura(*args, **kwargs):
+            resultado = fn(*args, **kwargs)
+            invalidar(*grupos)
+            return resultado
+        return envoltura
+    return decorador
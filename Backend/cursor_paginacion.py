@@ -0,0 +1,132 @@
+# cursor_paginacion.py
+"""
+Paginación por CURSOR (keyset) para los listados largos.
+
+Con ?pagina=N el SP hace OFFSET (N-1)*por_pagina: SQL Server lee y descarta
+todas las filas anteriores, así que la página 500 cuesta 500 veces la 1.
+Con ?after=<cursor> el SP arranca justo después de la última fila ya vista
+(predicado sobre las columnas del ORDER BY, que tienen índice): cualquier
+página cuesta lo mismo que la primera.
+
+    GET /api/admin/usuarios/miembros?after=              -> primera página
+    GET /api/admin/usuarios/miembros?after=eyJsIjoi...   -> la siguiente
+
+✅ El cursor es opaco para el cliente: base64url de las claves de orden de
+   la última fila (+ el nombre del listado, para no mezclar cursores)
+✅ La respuesta trae "siguiente" (None = no hay más); sin COUNT(*): el
+   scroll infinito no necesita el total
+✅ Mismo cursor para el SP (sp_cursor en ejecutor_sp) y para los listados
+   que salen del índice en memoria (pagina_en_memoria)
+
+Cada listado ordena todas sus claves en la MISMA dirección (todas ASC o
+todas DESC) y termina en la clave primaria, así la comparación de tuplas
+alcanza y no hay empates.
+
+Fechas DATETIME2(7): pyodbc las devuelve truncadas a microsegundos. Los SP
+devuelven además la clave completa como texto (cursor_fecha =
+CONVERT(VARCHAR(27), fecha, 121)) y el cursor guarda ese texto; si no, el
+predicado compararía contra un valor menor que el real (ASC repetiría la
+última fila, DESC saltaría las que comparten ese microsegundo).
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+
+PREFIJO_CURSOR = "cursor_"   # columnas con la clave de orden completa (ver sp_cursor)
+
+
+def _a_json(valor: Any):
+    if isinstance(valor, datetime):
+        return {"f": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"d": valor.isoformat()}
+    raise TypeError(f"Valor no admitido en un cursor: {type(valor).__name__}")
+
+
+def _desde_json(obj: dict):
+    if "f" in obj:
+        return datetime.fromisoformat(obj["f"])
+    if "d" in obj:
+        return date.fromisoformat(obj["d"])
+    return obj
+
+
+def codificar_cursor(lista: str, valores: Sequence[Any]) -> str:
+    """Cursor opaco con las claves de orden de la última fila entregada."""
+    datos = json.dumps({"l": lista, "k": list(valores)}, default=_a_json, separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(lista: str, cursor: Optional[str], n_claves: int) -> Optional[tuple]:
+    """
+    Claves de orden del cursor, o None si viene vacío (primera página).
+    Un cursor mal formado o de otro listado -> HTTPException 400.
+    """
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        datos = json.loads(crudo, object_hook=_desde_json)
+        valores = datos["k"]
+        if datos["l"] != lista or len(valores) != n_claves:
+            raise ValueError
+        return tuple(valores)
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def valor_sql(valor: Any):
+    """
+    Clave del cursor como parámetro del SP: las fechas con hora van como
+    texto estilo 121 (los @despues_ de fecha son VARCHAR(27)).
+    """
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    return valor
+
+
+def _como_en_memoria(valor: Any, referencia: Any):
+    """Texto estilo 121 de un cursor del SP -> datetime (truncado como el resto)."""
+    if isinstance(referencia, datetime) and isinstance(valor, str):
+        return datetime.fromisoformat(valor)
+    return valor
+
+
+def validar_por_pagina(por_pagina: int):
+    if por_pagina < 1:
+        raise HTTPException(status_code=422, detail="por_pagina debe ser mayor que 0")
+
+
+def pagina_en_memoria(
+    docs: List[dict],
+    claves: Sequence[str],
+    lista: str,
+    despues: Optional[str],
+    por_pagina: int,
+    descendente: bool,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Página después del cursor sobre `docs` YA ordenados por `claves` en la
+    dirección indicada. Devuelve (docs_de_la_pagina, siguiente_cursor).
+    """
+    validar_por_pagina(por_pagina)
+    clave = lambda d: tuple(d[c] for c in claves)
+    valores = decodificar_cursor(lista, despues, len(claves))
+    if valores is not None:
+        try:
+            if docs:
+                valores = tuple(_como_en_memoria(v, r) for v, r in zip(valores, clave(docs[0])))
+            if descendente:
+                docs = [d for d in docs if clave(d) < valores]
+            else:
+                docs = [d for d in docs if clave(d) > valores]
+        except (TypeError, ValueError):     # claves de otro tipo: cursor armado a mano
+            raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    pagina = docs[:por_pagina]
+    siguiente = codificar_cursor(lista, clave(pagina[-1])) if len(docs) > por_pagina else None
+    return pagina, siguiente
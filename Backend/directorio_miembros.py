@@ -0,0 +1,348 @@
+# directorio_miembros.py
+"""
+Buscador PÚBLICO de miembros (POST /api/miembros/buscar) servido desde memoria.
+
+Antes cada búsqueda era un SP_BUSCAR_MIEMBRO (LIKE '%x%' sobre nombre y
+apellido, sin límite de filas ni de peticiones): un script repitiendo
+búsquedas era carga 1:1 sobre la BD.
+
+✅ Directorio compacto: solo los campos públicos de la credencial (legajo,
+   DNI, nombre, rango, jefatura, estado, certificaciones, fechas); nada de
+   contacto ni foto
+✅ modo "exacto": DNI, legajo o nombre completo idénticos
+   modo "prefijo" (por defecto): además, palabras del nombre / legajo a
+   medio escribir ("per ju" -> "Pérez, Juan"). El DNI siempre es exacto:
+   no se puede recorrer el padrón por prefijos de DNI
+✅ Límite de peticiones por cliente (token bucket): RAFAGA seguidas y
+   luego RECARGA_POR_SEG; excedido -> 429 con Retry-After
+✅ Caché negativa: un criterio sin resultados se recuerda (grupo "miembros"
+   de cache_web, lo vacían las escrituras del admin)
+✅ Se construye al arrancar (SP_MIEMBROS_DIRECTORIO) y las escrituras de
+   miembros del admin refrescan solo esa fila con reindexar(id)
+
+Mientras el directorio no está listo se usa SP_BUSCAR_MIEMBRO (con los
+mismos campos públicos y el mismo límite).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from cache_web import cache_grupo
+from ejecutor_sp import ejecutar, en_hilo_db, iterar
+from indice_noticias import normalizar
+from indice_usuarios import IndiceUsuarios
+
+LIMITE = 10               # resultados por búsqueda (la web muestra 10)
+MIN_CARACTERES = 2
+
+RAFAGA = 20               # búsquedas seguidas por cliente
+RECARGA_POR_SEG = 1.0     # ... y luego una por segundo
+MAX_CLIENTES = 10_000     # buckets en memoria (se olvidan los más viejos)
+
+GRUPO_NEGATIVO = "miembros"
+
+_PALABRA = re.compile(r"\w+")
+
+
+class MiembroPublico(NamedTuple):
+    id: int
+    nombre: str
+    apellido: str
+    dni: str
+    legajo: Optional[str]
+    rango: Optional[str]
+    jefatura: Optional[str]
+    estado: Optional[str]
+    cursos_certificaciones: Optional[str]
+    fecha_ingreso: Optional[datetime]
+    fecha_ultimo_cambio: Optional[datetime]
+
+    def a_dict(self) -> dict:
+        datos = self._asdict()
+        datos["nombre_completo"] = f"{self.apellido} {self.nombre}"   # igual que SP_BUSCAR_MIEMBRO
+        return datos
+
+
+# =============================================
+# LÍMITE DE PETICIONES (token bucket por cliente)
+# =============================================
+class LimitadorPeticiones:
+    def __init__(self, rafaga: int = RAFAGA, recarga: float = RECARGA_POR_SEG, max_clientes: int = MAX_CLIENTES):
+        self.rafaga = rafaga
+        self.recarga = recarga
+        self.max_clientes = max_clientes
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()   # cliente -> (tokens, instante)
+        self._lock = threading.Lock()
+        self.rechazadas = 0
+
+    def consumir(self, cliente: str) -> float:
+        """0 si la petición pasa; si no, segundos hasta que haya un token."""
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, instante = self._buckets.pop(cliente, (self.rafaga, ahora))
+            tokens = min(self.rafaga, tokens + (ahora - instante) * self.recarga)
+            espera = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                espera = (1 - tokens) / self.recarga
+                self.rechazadas += 1
+            self._buckets[cliente] = (tokens, ahora)
+            while len(self._buckets) > self.max_clientes:
+                self._buckets.popitem(last=False)
+            return espera
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {"clientes": len(self._buckets), "rechazadas": self.rechazadas}
+
+
+limitador = LimitadorPeticiones()
+
+
+# =============================================
+# DIRECTORIO
+# =============================================
+class Directorio:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.miembros: Dict[int, MiembroPublico] = {}
+        self._por_dni: Dict[str, int] = {}
+        self._por_legajo: Dict[str, int] = {}
+        self._por_nombre: Dict[str, Set[int]] = {}     # "apellido nombre" y "nombre apellido"
+        self._nombres = IndiceUsuarios()               # prefijos de nombre / legajo (sin DNI)
+        self.construido: Optional[float] = None
+
+    @staticmethod
+    def _nombres_completos(m: MiembroPublico) -> Tuple[str, str]:
+        return (
+            " ".join(normalizar(f"{m.apellido} {m.nombre}").split()),
+            " ".join(normalizar(f"{m.nombre} {m.apellido}").split()),
+        )
+
+    @staticmethod
+    def _terminos(m: MiembroPublico) -> Set[str]:
+        """Lo que se busca por prefijo (igual que en IndiceUsuarios): palabras del nombre y legajo."""
+        terminos = set(_PALABRA.findall(normalizar(f"{m.nombre or ''} {m.apellido or ''}")))
+        if m.legajo and m.legajo.strip():
+            terminos.add(normalizar(m.legajo.strip()))
+        return terminos
+
+    def _quitar(self, id_miembro: int):
+        m = self.miembros.pop(id_miembro, None)
+        if m is None:
+            return
+        if self._por_dni.get((m.dni or "").strip()) == id_miembro:
+            del self._por_dni[m.dni.strip()]
+        if self._por_legajo.get(normalizar((m.legajo or "").strip())) == id_miembro:
+            del self._por_legajo[normalizar(m.legajo.strip())]
+        for nombre in self._nombres_completos(m):
+            ids = self._por_nombre.get(nombre)
+            if ids is not None:
+                ids.discard(id_miembro)
+                if not ids:
+                    del self._por_nombre[nombre]
+        self._nombres.quitar(("miembro", id_miembro))
+
+    def poner(self, fila: dict, carga: bool = False):
+        m = MiembroPublico(**{campo: fila.get(campo) for campo in MiembroPublico._fields})
+        with self._lock:
+            self._quitar(m.id)
+            self.miembros[m.id] = m
+            if m.dni:
+                self._por_dni[m.dni.strip()] = m.id
+            if m.legajo:
+                self._por_legajo[normalizar(m.legajo.strip())] = m.id
+            for nombre in self._nombres_completos(m):
+                self._por_nombre.setdefault(nombre, set()).add(m.id)
+            self._nombres.poner(
+                {"tipo": "miembro", "id": m.id, "nombre": m.nombre, "apellido": m.apellido, "legajo": m.legajo},
+                carga=carga,
+            )
+
+    def ordenar(self):
+        self._nombres.ordenar()
+
+    def quitar(self, id_miembro: int):
+        with self._lock:
+            self._quitar(id_miembro)
+
+    def buscar(self, criterio: str, modo: str = "prefijo", limite: int = LIMITE) -> List[dict]:
+        """DNI exacto primero (como SP_BUSCAR_MIEMBRO), luego legajo y nombre."""
+        criterio = criterio.strip()
+        with self._lock:
+            ids: List[int] = []
+            por_dni = self._por_dni.get(criterio)
+            if por_dni is not None:
+                ids.append(por_dni)
+            if modo == "exacto":
+                por_legajo = self._por_legajo.get(normalizar(criterio))
+                if por_legajo is not None:
+                    ids.append(por_legajo)
+                nombre = " ".join(normalizar(criterio).split())
+                ids.extend(sorted(
+                    self._por_nombre.get(nombre, ()),
+                    key=lambda i: self._nombres_completos(self.miembros[i])[0],
+                ))
+            else:
+                ids.extend(s["id"] for s in self._nombres.sugerir(criterio, "miembro", limite))
+            vistos = set()
+            salida = []
+            for id_miembro in ids:
+                if id_miembro not in vistos and len(salida) < limite:
+                    vistos.add(id_miembro)
+                    salida.append(self.miembros[id_miembro].a_dict())
+            return salida
+
+
+_directorio = Directorio()
+_estado_lock = threading.Lock()
+_construyendo = False
+_tocados: set = set()      # reindexados mientras se construía: se repiten sobre el nuevo
+
+
+def construir():
+    """Carga los campos públicos de todos los miembros en un directorio nuevo."""
+    global _directorio, _construyendo
+    with _estado_lock:
+        if _construyendo:
+            return
+        _construyendo = True
+        _tocados.clear()
+    try:
+        inicio = time.perf_counter()
+        nuevo = Directorio()
+        for lote in iterar("SP_MIEMBROS_DIRECTORIO", lote=1000):
+            for fila in lote.filas:
+                nuevo.poner(dict(zip(lote.columnas, fila)), carga=True)
+        nuevo.ordenar()
+        nuevo.construido = time.time()
+        with _estado_lock:
+            _directorio = nuevo
+            pendientes = list(_tocados)
+        for id_miembro in pendientes:
+            reindexar(id_miembro)
+        print(f"🔎 Directorio público de miembros: {len(nuevo.miembros)} miembros "
+              f"en {time.perf_counter() - inicio:.2f}s")
+    finally:
+        with _estado_lock:
+            _construyendo = False
+
+
+async def construir_async():
+    try:
+        await en_hilo_db(construir)
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el directorio de miembros (se usará el SP): {e}")
+
+
+def asegurar_directorio():
+    """Si el directorio no está (falló al arrancar), lo construye en segundo plano."""
+    if _directorio.construido is None and not _construyendo:
+        threading.Thread(target=_construir_seguro, name="directorio-miembros", daemon=True).start()
+
+
+def _construir_seguro():
+    try:
+        construir()
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el directorio de miembros: {e}")
+
+
+def listo() -> bool:
+    return _directorio.construido is not None
+
+
+def reindexar(id_miembro: Optional[int]):
+    """Tras escribir un miembro: vuelve a leerlo (o lo quita si ya no existe)."""
+    if not id_miembro:
+        return
+    try:
+        filas = ejecutar("SP_MIEMBROS_DIRECTORIO", {"id": id_miembro}, commit=False) or []
+    except Exception as e:
+        print(f"⚠️ No se pudo reindexar el miembro {id_miembro} en el directorio: {e}")
+        _directorio.construido = None
+        asegurar_directorio()
+        return
+    with _estado_lock:
+        if _construyendo:
+            _tocados.add(id_miembro)
+        directorio = _directorio
+    if filas:
+        directorio.poner(filas[0])
+    else:
+        directorio.quitar(id_miembro)
+
+
+# =============================================
+# BÚSQUEDA
+# =============================================
+def _desde_sp(criterio: str, modo: str) -> List[dict]:
+    """Sin directorio: SP_BUSCAR_MIEMBRO recortado a los campos públicos."""
+    filas = ejecutar("SP_BUSCAR_MIEMBRO", {"criterio_busqueda": criterio}) or []
+    miembros = [MiembroPublico(**{c: f.get(c) for c in MiembroPublico._fields}) for f in filas]
+    if modo == "exacto":
+        nombre = " ".join(normalizar(criterio).split())
+        miembros = [
+            m for m in miembros
+            if (m.dni or "").strip() == criterio
+            or normalizar((m.legajo or "").strip()) == normalizar(criterio)
+            or nombre in Directorio._nombres_completos(m)
+        ]
+    else:
+        # El SP busca LIKE '%x%': se deja lo mismo que devolvería el directorio
+        # (DNI exacto, legajo exacto y luego prefijos, por apellido y nombre)
+        palabras = normalizar(criterio).split()
+        legajo = normalizar(criterio)
+
+        def orden(m: MiembroPublico):
+            if (m.dni or "").strip() == criterio:
+                return (0, "", m.id)
+            if normalizar((m.legajo or "").strip()) == legajo:
+                return (1, "", m.id)
+            return (2, normalizar(f"{m.apellido or ''} {m.nombre or ''}"), m.id)
+
+        miembros = sorted(
+            (
+                m for m in miembros
+                if (m.dni or "").strip() == criterio
+                or all(any(t.startswith(p) for t in Directorio._terminos(m)) for p in palabras)
+            ),
+            key=orden,
+        )
+    return [m.a_dict() for m in miembros[:LIMITE]]
+
+
+def buscar(criterio: str, modo: str = "prefijo") -> List[dict]:
+    """Miembros que coinciden con el criterio, con caché negativa."""
+    criterio = criterio.strip()
+    if len(criterio) < MIN_CARACTERES:
+        return []
+    cache = cache_grupo(GRUPO_NEGATIVO)
+    clave = ("sin_resultados", normalizar(criterio), modo)
+    vacio, _ = cache.obtener(clave)
+    if vacio:
+        return []
+
+    version = cache.version
+    if listo():
+        resultados = _directorio.buscar(criterio, modo)
+    else:
+        asegurar_directorio()
+        resultados = _desde_sp(criterio, modo)
+    if not resultados:
+        cache.guardar(clave, True, version=version)
+    return resultados
+
+
+def metricas_directorio() -> dict:
+    return {
+        "miembros": len(_directorio.miembros),
+        "construido": _directorio.construido,
+        "construyendo": _construyendo,
+        "limite_peticiones": limitador.metricas(),
+    }
+
@@ -0,0 +1,388 @@
+# ejecutor_sp.py
+"""
+Capa ÚNICA para ejecutar Stored Procedures sobre el pool de conexiones.
+
+Reemplaza las copias de _sp / ejecutar_sp / execute_sp que tenía cada módulo:
+
+✅ El texto "EXEC nombre ?,?,..." se arma una sola vez por (SP, firma)
+✅ La tupla de nombres de columnas se arma una vez por result set y se reutiliza
+✅ Modos de fila: "dict" (lista de dicts) o "tupla" (ResultSet con filas pyodbc)
+✅ SPs con varios result sets: ejecutar_multi()
+✅ Lectura por lotes sin cargar todo en memoria: iterar()
+✅ Página + total en una sola ejecución: sp_pagina()
+✅ Paginación por cursor (keyset, sin OFFSET): sp_cursor()
+✅ Versiones async (ejecutar_async, sp_async, ...) para endpoints `async def`:
+   corren en un pool de hilos propio del tamaño del pool de conexiones y con
+   un semáforo por event loop, así las consultas lentas esperan en el loop
+   en lugar de ocupar los hilos del threadpool de FastAPI
+✅ Pool / semáforo saturados (PoolAgotadoError) -> 503 con Retry-After,
+   no un 500 como un error de SQL: manejar_pool_agotado(app) en cada app
+
+Parámetros: tupla posicional  -> EXEC SP ?,?,?
+            dict con nombres  -> EXEC SP @a=?, @b=?   (con o sin '@' en la clave)
+"""
+import asyncio
+import threading
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from Conexionsql import get_connection, POOL_MAX, POOL_TIMEOUT_ESPERA, PoolAgotadoError
+from cursor_paginacion import PREFIJO_CURSOR, codificar_cursor, decodificar_cursor, validar_por_pagina, valor_sql
+
+Params = Union[Tuple[Any, ...], List[Any], Dict[str, Any]]
+
+# tipos (solo iterar): por columna (type_code, precision, scale) del cursor
+ResultSet = namedtuple("ResultSet", ["columnas", "filas", "tipos"], defaults=(None,))
+
+RESPUESTA_SUCCESS = {"status": "SUCCESS"}
+
+COLUMNA_TOTAL = "total_registros"
+
+
+# =============================================
+# CACHÉS DE SQL Y COLUMNAS
+# =============================================
+@lru_cache(maxsize=1024)
+def sql_exec(nombre: str, firma: Union[int, Tuple[str, ...]]) -> str:
+    """
+    Texto EXEC para un SP. `firma` es la cantidad de parámetros posicionales
+    o la tupla de nombres de parámetros.
+    """
+    if isinstance(firma, int):
+        return f"EXEC {nombre} " + ",".join(["?"] * firma) if firma else f"EXEC {nombre}"
+    if not firma:
+        return f"EXEC {nombre}"
+    return f"EXEC {nombre} " + ", ".join(
+        f"{p if p.startswith('@') else '@' + p}=?" for p in firma
+    )
+
+
+def _preparar(nombre: str, params: Optional[Params]) -> Tuple[str, tuple]:
+    if not params:
+        return sql_exec(nombre, 0), ()
+    if isinstance(params, dict):
+        return sql_exec(nombre, tuple(params.keys())), tuple(params.values())
+    return sql_exec(nombre, len(params)), tuple(params)
+
+
+_columnas_internadas: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _columnas(cursor) -> Tuple[str, ...]:
+    """Tupla de columnas del result set actual, compartida entre ejecuciones."""
+    cols = tuple(c[0] for c in cursor.description)
+    existente = _columnas_internadas.get(cols)
+    if existente is not None:
+        return existente
+    if len(_columnas_internadas) < 4096:
+        _columnas_internadas[cols] = cols
+    return cols
+
+
+# =============================================
+# LECTURA DE RESULT SETS
+# =============================================
+def _leer(cursor, modo: str):
+    cols = _columnas(cursor)
+    filas = cursor.fetchall()
+    if modo == "tupla":
+        return ResultSet(cols, filas)
+    return [dict(zip(cols, fila)) for fila in filas]
+
+
+def _avanzar_a_filas(cursor) -> bool:
+    """Salta los resultados sin columnas (conteos de filas). False si no queda ninguno."""
+    while cursor.description is None:
+        if not cursor.nextset():
+            return False
+    return True
+
+
+def _con_conexion(nombre: str, params: Optional[Params], commit: bool, lector):
+    sql, valores = _preparar(nombre, params)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, valores)
+        resultado = lector(cursor)
+        if commit:
+            conn.commit()
+        cursor.close()
+        return resultado
+    finally:
+        conn.close()
+
+
+# =============================================
+# API
+# =============================================
+def ejecutar(nombre: str, params: Optional[Params] = (), modo: str = "dict", commit: bool = True):
+    """
+    Ejecuta el SP y devuelve su PRIMER result set con filas.
+    modo="dict"  -> lista de dicts
+    modo="tupla" -> ResultSet(columnas, filas)
+    Devuelve None si el SP no devuelve ningún result set.
+    """
+    def lector(cursor):
+        return _leer(cursor, modo) if _avanzar_a_filas(cursor) else None
+    return _con_conexion(nombre, params, commit, lector)
+
+
+def ejecutar_multi(nombre: str, params: Optional[Params] = (), modo: str = "dict", commit: bool = True) -> list:
+    """
+    Ejecuta el SP y devuelve TODOS sus result sets en orden
+    (p.ej. SP_GU_DETALLE_MIEMBRO: miembro, cursos, eventos).
+    """
+    def lector(cursor):
+        sets = []
+        while _avanzar_a_filas(cursor):
+            sets.append(_leer(cursor, modo))
+            if not cursor.nextset():
+                break
+        return sets
+    return _con_conexion(nombre, params, commit, lector)
+
+
+def iterar(nombre: str, params: Optional[Params] = (), lote: int = 1000, commit: bool = False) -> Iterator[ResultSet]:
+    """
+    Generador: recorre el primer result set en lotes de `lote` filas con
+    fetchmany, sin cargar todo el resultado en memoria. Cada elemento es un
+    ResultSet(columnas, filas_del_lote, tipos); si el result set viene
+    vacío sale UN lote sin filas, para que quien escribe tenga las columnas.
+    La conexión se devuelve al pool al agotar (o cerrar) el generador.
+    """
+    sql, valores = _preparar(nombre, params)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, valores)
+        if _avanzar_a_filas(cursor):
+            cols = _columnas(cursor)
+            tipos = tuple((c[1], c[4], c[5]) for c in cursor.description)
+            vacio = True
+            while True:
+                filas = cursor.fetchmany(lote)
+                if not filas:
+                    break
+                vacio = False
+                yield ResultSet(cols, filas, tipos)
+            if vacio:
+                yield ResultSet(cols, [], tipos)
+        if commit:
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def sp(nombre: str, params: Optional[Params] = (), sin_resultado: Optional[dict] = None) -> List[Dict[str, Any]]:
+    """
+    Contrato clásico de los endpoints: lista de dicts, o [sin_resultado]
+    (por defecto {"status": "SUCCESS"}) si el SP no devuelve filas.
+    Cualquier error se traduce a HTTPException 500 (salvo PoolAgotadoError,
+    que sigue de largo hasta el manejador 503).
+    """
+    try:
+        filas = ejecutar(nombre, params)
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if filas is None:
+        return [dict(sin_resultado or RESPUESTA_SUCCESS)]
+    return filas
+
+
+def sp_pagina(
+    nombre: str,
+    params: Optional[Params] = (),
+    incluir_total: bool = True,
+    contar: Optional[Callable[[], int]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Para los SP *_PAGINA que devuelven la página con la columna
+    `total_registros` (COUNT(*) OVER()): una sola ejecución trae filas y total.
+
+    Devuelve (filas_sin_total_registros, total). Con incluir_total=False el
+    total es None. Si la página viene vacía (p.ej. se pidió una página más
+    allá del final) no hay fila de donde leer el total: se usa contar() si
+    se pasó, o 0.
+    Errores → HTTPException 500.
+    """
+    try:
+        res = ejecutar(nombre, params, modo="tupla")
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if res is None:
+        return [], (0 if incluir_total else None)
+
+    cols = res.columnas
+    if COLUMNA_TOTAL in cols:
+        i_total = cols.index(COLUMNA_TOTAL)
+        idx = [i for i in range(len(cols)) if i != i_total]
+        nombres = [cols[i] for i in idx]
+        filas = [dict(zip(nombres, [fila[i] for i in idx])) for fila in res.filas]
+        total = res.filas[0][i_total] if res.filas else None
+    else:
+        filas = [dict(zip(cols, fila)) for fila in res.filas]
+        total = None
+
+    if not incluir_total:
+        return filas, None
+    if total is None:
+        total = contar() if contar else 0
+    return filas, int(total)
+
+
+def sp_cursor(
+    nombre: str,
+    params: Dict[str, Any],
+    lista: str,
+    claves: Tuple[str, ...],
+    despues: Optional[str],
+    por_pagina: int,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Para los SP *_CURSOR (paginación keyset, ver cursor_paginacion.py).
+    Reciben los filtros de `params`, @por_pagina y un @despues_<clave> por
+    cada clave de orden (NULL = primera página), y devuelven hasta
+    @por_pagina + 1 filas: la de más solo indica que hay siguiente.
+
+    Si el SP devuelve una columna cursor_<clave> el cursor guarda ese valor
+    en lugar de <clave>: DATETIME2(7) como texto estilo 121, porque pyodbc
+    lo trunca a microsegundos y el predicado compararía contra otro valor.
+    Las columnas cursor_* no se devuelven.
+
+    Devuelve (filas, siguiente_cursor); siguiente_cursor es None en la última.
+    Errores → HTTPException 500 (cursor inválido → 400).
+    """
+    validar_por_pagina(por_pagina)
+    valores = decodificar_cursor(lista, despues, len(claves)) or (None,) * len(claves)
+    argumentos = dict(params, por_pagina=por_pagina)
+    argumentos.update((f"despues_{c}", valor_sql(v)) for c, v in zip(claves, valores))
+    try:
+        res = ejecutar(nombre, argumentos, modo="tupla")
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if res is None:
+        return [], None
+
+    cols = res.columnas
+    idx_claves = [
+        cols.index(PREFIJO_CURSOR + c) if PREFIJO_CURSOR + c in cols else cols.index(c)
+        for c in claves
+    ]
+    idx = [i for i, c in enumerate(cols) if not c.startswith(PREFIJO_CURSOR)]
+    nombres = [cols[i] for i in idx]
+    siguiente = None
+    filas = res.filas
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        siguiente = codificar_cursor(lista, [filas[-1][i] for i in idx_claves])
+    return [dict(zip(nombres, [fila[i] for i in idx])) for fila in filas], siguiente
+
+
+def sp_multi(nombre: str, params: Optional[Params] = ()) -> List[List[Dict[str, Any]]]:
+    """ejecutar_multi() con errores traducidos a HTTPException 500."""
+    try:
+        return ejecutar_multi(nombre, params)
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# =============================================
+# MODO ASYNC
+# =============================================
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaforos: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _executor_db() -> ThreadPoolExecutor:
+    """Hilos dedicados a SQL: uno por conexión del pool, separados del threadpool de FastAPI."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=POOL_MAX, thread_name_prefix="sql")
+    return _executor
+
+
+def _semaforo() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaforos.get(loop)
+    if sem is None:
+        sem = _semaforos[loop] = asyncio.Semaphore(POOL_MAX)
+    return sem
+
+
+async def en_hilo_db(fn, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante de base de datos sin bloquear el event loop.
+    Backpressure: como mucho POOL_MAX en vuelo; el resto espera su turno en el
+    loop y, si no lo consigue en POOL_TIMEOUT_ESPERA segundos, falla con
+    PoolAgotadoError en lugar de encolarse sin límite.
+    """
+    sem = _semaforo()
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout=POOL_TIMEOUT_ESPERA)
+    except asyncio.TimeoutError:
+        raise PoolAgotadoError(
+            f"Sin capacidad para nuevas consultas tras {POOL_TIMEOUT_ESPERA}s"
+        ) from None
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor_db(), partial(fn, *args, **kwargs))
+    finally:
+        sem.release()
+
+
+async def ejecutar_async(nombre: str, params: Optional[Params] = (), modo: str = "dict", commit: bool = True):
+    return await en_hilo_db(ejecutar, nombre, params, modo, commit)
+
+
+async def ejecutar_multi_async(nombre: str, params: Optional[Params] = (), modo: str = "dict", commit: bool = True) -> list:
+    return await en_hilo_db(ejecutar_multi, nombre, params, modo, commit)
+
+
+async def sp_async(nombre: str, params: Optional[Params] = (), sin_resultado: Optional[dict] = None) -> List[Dict[str, Any]]:
+    return await en_hilo_db(sp, nombre, params, sin_resultado)
+
+
+# =============================================
+# BACKPRESSURE -> 503
+# =============================================
+RESPUESTA_POOL_AGOTADO = {
+    "status": "ERROR",
+    "mensaje": "El servidor está ocupado. Intenta de nuevo en unos segundos.",
+}
+
+
+async def respuesta_pool_agotado(request, exc: PoolAgotadoError) -> JSONResponse:
+    """Sin conexión / turno libre a tiempo: saturación, no un error de la BD."""
+    print(f"⚠️ Pool de conexiones saturado en {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content=RESPUESTA_POOL_AGOTADO,
+        headers={"Retry-After": str(POOL_TIMEOUT_ESPERA)},
+    )
+
+
+def manejar_pool_agotado(*apps):
+    """
+    Registra el manejador 503 en cada app. Las sub-apps montadas con
+    app.mount() necesitan el suyo: no heredan los de la app principal.
+    """
+    for app in apps:
+        app.add_exception_handler(PoolAgotadoError, respuesta_pool_agotado)
@@ -0,0 +1,319 @@
+# exportacion.py
+"""
+Exportación de reportes en STREAMING directo desde el SP.
+
+    GET /api/admin/reportes/miembros?format=csv
+    GET /api/admin/reportes/cursos?format=ndjson
+    GET /api/admin/reportes/eventos?format=arrow     (Arrow IPC stream)
+    GET /api/admin/reportes/eventos?format=parquet
+
+✅ Las filas se leen con iterar() (fetchmany por lotes) y se escriben a la
+   respuesta a medida que llegan: la memoria no depende de cuántas filas
+   tenga el reporte
+✅ CSV con BOM (Excel lo abre con tildes) o NDJSON (un objeto JSON por línea)
+✅ gzip en streaming si el cliente manda Accept-Encoding: gzip (csv / ndjson)
+✅ Arrow / Parquet: columnas tipadas (fechas, decimales, enteros) armadas
+   desde los tipos del cursor, un record batch / row group por lote.
+   Para notebooks: pd.read_parquet(url) / pa.ipc.open_stream(...)
+   pyarrow es opcional: sin él esos dos formatos responden 501
+✅ El SP se ejecuta ANTES de empezar a responder: un error del SP sigue
+   siendo un 500, no un archivo cortado
+"""
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from ejecutor_sp import Params, PoolAgotadoError, ResultSet, iterar
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow no instalado: solo csv / ndjson
+    pa = pq = None
+
+LOTE_EXPORTACION = 1000   # filas por fetchmany (csv / ndjson)
+LOTE_COLUMNAR = {"arrow": 10_000, "parquet": 50_000}   # filas por batch / row group
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FORMATOS_TEXTO = ("csv", "ndjson")
+PATRON_FORMATO = "^(csv|ndjson|arrow|parquet)$"
+
+
+# =============================================
+# VALORES
+# =============================================
+def _a_json(valor: Any):
+    """default= de json.dumps: mismos tipos que devuelve la API en JSON."""
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(valor)).decode("ascii")
+    raise TypeError(f"Tipo no exportable: {type(valor).__name__}")
+
+
+def _a_csv(valor: Any):
+    if valor is None:
+        return ""
+    if isinstance(valor, (str, int, float)):
+        return valor
+    return _a_json(valor)
+
+
+# =============================================
+# SERIALIZACIÓN POR LOTES
+# =============================================
+def lineas_csv(lotes: Iterable[ResultSet]) -> Iterator[bytes]:
+    """
+    Un bloque de bytes por lote; la cabecera sale con el primero (un reporte
+    sin filas llega como un lote vacío: queda el CSV con solo la cabecera).
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    cabecera = False
+    for lote in lotes:
+        if not cabecera:
+            buffer.write("\ufeff")   # BOM: Excel detecta UTF-8
+            escritor.writerow(lote.columnas)
+            cabecera = True
+        escritor.writerows([_a_csv(v) for v in fila] for fila in lote.filas)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def lineas_ndjson(lotes: Iterable[ResultSet]) -> Iterator[bytes]:
+    for lote in lotes:
+        cols = lote.columnas
+        yield "".join(
+            json.dumps(dict(zip(cols, fila)), default=_a_json, ensure_ascii=False) + "\n"
+            for fila in lote.filas
+        ).encode("utf-8")
+
+
+# =============================================
+# ARROW / PARQUET
+# =============================================
+def _tipo_arrow(tipo_codigo, precision, escala):
+    """Tipo Arrow para un type_code de pyodbc (None -> se infiere de los valores)."""
+    if tipo_codigo is bool:
+        return pa.bool_()
+    if tipo_codigo is int:
+        return pa.int64()
+    if tipo_codigo is float:
+        return pa.float64()
+    if tipo_codigo is Decimal:
+        return pa.decimal128(min(precision or 38, 38), escala or 0)
+    if tipo_codigo is datetime:
+        return pa.timestamp("us")
+    if tipo_codigo is date:
+        return pa.date32()
+    if tipo_codigo is time:
+        return pa.time64("us")
+    if tipo_codigo in (bytes, bytearray):
+        return pa.binary()
+    if tipo_codigo is str:
+        return pa.string()
+    return None
+
+
+def _batch(lote: ResultSet, esquema):
+    """Filas pyodbc -> RecordBatch (transpuesto a columnas)."""
+    columnas = list(zip(*lote.filas)) or [()] * len(lote.columnas)   # lote vacío: solo el esquema
+    if esquema is None:
+        tipos = lote.tipos or [(None, None, None)] * len(columnas)
+        arrays = []
+        for valores, tipo in zip(columnas, tipos):
+            array = pa.array(valores, type=_tipo_arrow(*tipo))
+            if pa.types.is_null(array.type):   # primer lote todo NULL: texto
+                array = array.cast(pa.string())
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, names=list(lote.columnas))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+        schema=esquema,
+    )
+
+
+class _Tramos:
+    """Destino de solo escritura para pyarrow: acumula bytes hasta retirarlos."""
+    closed = False
+
+    def __init__(self):
+        self.tramos = []
+        self.posicion = 0
+
+    def write(self, datos) -> int:
+        datos = bytes(datos)
+        self.tramos.append(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self.tramos)
+        self.tramos.clear()
+        return datos
+
+
+def _columnar(lotes: Iterable[ResultSet], abrir, escribir) -> Iterator[bytes]:
+    """El esquema sale del primer lote; cada lote se escribe y se envía."""
+    destino = _Tramos()
+    escritor = esquema = None
+    try:
+        for lote in lotes:
+            batch = _batch(lote, esquema)
+            if escritor is None:
+                esquema = batch.schema
+                escritor = abrir(pa.PythonFile(destino, mode="w"), esquema)
+            escribir(escritor, batch)
+            yield destino.retirar()
+    finally:
+        if escritor is not None:
+            escritor.close()   # fin del stream IPC / footer de Parquet
+    yield destino.retirar()
+
+
+def bloques_arrow(lotes: Iterable[ResultSet]) -> Iterator[bytes]:
+    """Arrow IPC stream: un record batch por lote (comprimido con zstd si se puede)."""
+    opciones = pa.ipc.IpcWriteOptions(compression="zstd" if pa.Codec.is_available("zstd") else None)
+    return _columnar(
+        lotes,
+        lambda destino, esquema: pa.ipc.new_stream(destino, esquema, options=opciones),
+        lambda escritor, batch: escritor.write_batch(batch),
+    )
+
+
+def bloques_parquet(lotes: Iterable[ResultSet]) -> Iterator[bytes]:
+    """Parquet: un row group por lote; el footer sale al final."""
+    return _columnar(
+        lotes,
+        lambda destino, esquema: pq.ParquetWriter(destino, esquema, compression="zstd"),
+        lambda escritor, batch: escritor.write_table(pa.Table.from_batches([batch])),
+    )
+
+
+def comprimir_gzip(trozos: Iterable[bytes]) -> Iterator[bytes]:
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits 31 = formato gzip
+    for trozo in trozos:
+        salida = compresor.compress(trozo)
+        if salida:
+            yield salida
+    yield compresor.flush()
+
+
+SERIALIZADORES = {
+    "csv": lineas_csv,
+    "ndjson": lineas_ndjson,
+    "arrow": bloques_arrow,
+    "parquet": bloques_parquet,
+}
+
+
+# =============================================
+# RESPUESTA
+# =============================================
+def _acepta_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def _lotes(nombre: str, params: Optional[Params], lote: int) -> Iterator[ResultSet]:
+    """
+    Ejecuta el SP y lee el primer lote YA (errores -> HTTPException 500);
+    el resto se lee mientras se envía la respuesta.
+    """
+    lotes = iterar(nombre, params, lote=lote)
+    try:
+        primero = next(lotes, None)
+    except (HTTPException, PoolAgotadoError):
+        raise
+    except Exception as e:
+        lotes.close()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def encadenar():
+        try:
+            if primero is not None:
+                yield primero
+                yield from lotes
+        finally:
+            lotes.close()   # devuelve la conexión al pool aunque el cliente corte
+
+    return encadenar()
+
+
+def formato_disponible(formato: str) -> bool:
+    return formato in FORMATOS_TEXTO or pa is not None
+
+
+def _contando(lotes: Iterable[ResultSet], progreso: Callable[[int], None]) -> Iterator[ResultSet]:
+    for lote in lotes:
+        progreso(len(lote.filas))
+        yield lote
+
+
+def bloques_exportacion(
+    nombre: str,
+    params: Optional[Params],
+    formato: str,
+    lote: Optional[int] = None,
+    progreso: Optional[Callable[[int], None]] = None,
+) -> Iterator[bytes]:
+    """
+    Bytes del archivo `formato` con el resultado del SP, lote a lote (sin
+    comprimir). `progreso(n)` se llama con las filas de cada lote leído.
+    """
+    if not formato_disponible(formato):
+        raise HTTPException(status_code=501, detail=f"Exportar en {formato} requiere pyarrow en el servidor")
+    lotes = _lotes(nombre, params, lote or LOTE_COLUMNAR.get(formato, LOTE_EXPORTACION))
+    if progreso is not None:
+        lotes = _contando(lotes, progreso)
+    return SERIALIZADORES[formato](lotes)
+
+
+def nombre_archivo(archivo: str, formato: str) -> str:
+    return f"{archivo}_{date.today().isoformat()}.{formato}"
+
+
+def respuesta_exportacion(
+    request: Request,
+    nombre: str,
+    params: Optional[Params],
+    formato: str,
+    archivo: str,
+    lote: Optional[int] = None,
+) -> StreamingResponse:
+    """StreamingResponse con el resultado del SP en `formato` (csv | ndjson | arrow | parquet)."""
+    cuerpo = bloques_exportacion(nombre, params, formato, lote)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{nombre_archivo(archivo, formato)}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    # Arrow / Parquet ya van comprimidos por columna
+    if formato in FORMATOS_TEXTO and _acepta_gzip(request):
+        cuerpo = comprimir_gzip(cuerpo)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(cuerpo, media_type=FORMATOS[formato], headers=headers)
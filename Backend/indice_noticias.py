@@ -0,0 +1,329 @@
+# indice_noticias.py
+"""
+Búsqueda de noticias con un índice invertido EN MEMORIA.
+
+Reemplaza a titulo / contenido LIKE '%termino%' (recorrer el NVARCHAR(MAX)
+de todas las publicaciones) en /api/noticias/buscar, /api/noticias/?busqueda=
+y /api/admin/noticias/listar?busqueda=.
+
+✅ Tildes y mayúsculas plegadas: "Rescate ACUÁTICO" = "rescate acuatico"
+✅ Hashtags: "#RescateUrbano" indexa "#rescateurbano" y "rescateurbano";
+   buscar "#rescateurbano" encuentra solo el hashtag
+✅ Ranking BM25 (el título pesa PESO_TITULO veces el contenido)
+✅ Prefijos: "capac" encuentra "capacitacion", "capacitados"...
+   (pesan PESO_PREFIJO frente a la palabra exacta)
+✅ Todas las palabras de la búsqueda deben aparecer (AND)
+✅ Se construye al arrancar (SP_NOT_INDICE) y cada escritura (admin,
+   endpoints públicos, sincronización de Facebook) reindexa solo esa
+   publicación con reindexar(id)
+
+Mientras el índice no está listo, los endpoints usan los SP de siempre.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from ejecutor_sp import ejecutar, en_hilo_db, iterar
+
+K1 = 1.2
+B = 0.75
+PESO_TITULO = 2
+PESO_PREFIJO = 0.5
+MIN_PREFIJO = 2           # "ca" ya expande; una sola letra no
+MAX_EXPANSIONES = 50      # términos por prefijo (los primeros en orden alfabético)
+
+STOPWORDS = frozenset(
+    "a al con de del e el en es la las lo los o para por que se su sus un una y".split()
+)
+
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+
+_PALABRA = re.compile(r"#?\w+")
+
+
+# =============================================
+# TEXTO
+# =============================================
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes (ñ -> n): igual para documentos y búsquedas."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def terminos_documento(texto: Optional[str]) -> List[str]:
+    salida = []
+    for palabra in _PALABRA.findall(normalizar(texto or "")):
+        if palabra.startswith("#"):
+            salida.append(palabra)
+            palabra = palabra[1:]
+        if palabra not in STOPWORDS:
+            salida.append(palabra)
+    return salida
+
+
+def terminos_busqueda(texto: str) -> List[str]:
+    """
+    Sin repetir y en orden. La última palabra se conserva aunque sea
+    stopword: quien escribe "la" puede estar por escribir "lanzamiento".
+    """
+    palabras = _PALABRA.findall(normalizar(texto or ""))
+    salida = []
+    for i, palabra in enumerate(palabras):
+        if (palabra not in STOPWORDS or i == len(palabras) - 1) and palabra not in salida:
+            salida.append(palabra)
+    return salida
+
+
+def fecha_formateada(fecha: datetime) -> str:
+    """Igual que FORMAT(fecha, 'dd ''de'' MMMM, yyyy', 'es-ES')."""
+    return f"{fecha.day:02d} de {MESES[fecha.month - 1]}, {fecha.year}"
+
+
+def resumen(contenido: str, largo: int, sufijo: str = "...") -> str:
+    """Igual que LEFT(contenido, largo) + sufijo cuando LEN(contenido) > largo."""
+    return contenido[:largo] + sufijo if len(contenido.rstrip(" ")) > largo else contenido
+
+
+# =============================================
+# ÍNDICE
+# =============================================
+class IndiceNoticias:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.docs: Dict[str, dict] = {}
+        self._terminos: Dict[str, Counter] = {}               # doc -> {termino: tf}
+        self._postings: Dict[str, Dict[str, int]] = {}        # termino -> {doc: tf}
+        self._longitud: Dict[str, int] = {}
+        self._longitud_total = 0
+        self._vocabulario: Optional[List[str]] = None         # ordenado, para prefijos
+        self.construido: Optional[float] = None
+
+    # ---------- escritura ----------
+    def _quitar(self, id_pub: str):
+        terminos = self._terminos.pop(id_pub, None)
+        if terminos is None:
+            return
+        for termino in terminos:
+            posting = self._postings[termino]
+            del posting[id_pub]
+            if not posting:
+                del self._postings[termino]
+                self._vocabulario = None
+        self._longitud_total -= self._longitud.pop(id_pub)
+        del self.docs[id_pub]
+
+    def poner(self, doc: dict):
+        """Agrega o reemplaza una publicación (fila de SP_NOT_INDICE)."""
+        id_pub = doc["idpublicacion"]
+        tf = Counter()
+        for termino in terminos_documento(doc.get("titulo")):
+            tf[termino] += PESO_TITULO
+        tf.update(terminos_documento(doc.get("contenido")))
+
+        with self._lock:
+            self._quitar(id_pub)
+            for termino, n in tf.items():
+                posting = self._postings.get(termino)
+                if posting is None:
+                    posting = self._postings[termino] = {}
+                    self._vocabulario = None
+                posting[id_pub] = n
+            self._terminos[id_pub] = tf
+            self._longitud[id_pub] = sum(tf.values())
+            self._longitud_total += self._longitud[id_pub]
+            self.docs[id_pub] = doc
+            if doc.get("destacada"):
+                # TR_UNICO_DESTACADO: solo una destacada a la vez
+                for otro_id, otro in self.docs.items():
+                    if otro_id != id_pub and otro.get("destacada"):
+                        self.docs[otro_id] = {**otro, "destacada": False}
+
+    def quitar(self, id_pub: str):
+        with self._lock:
+            self._quitar(id_pub)
+
+    # ---------- lectura ----------
+    def _expandir(self, termino: str) -> List[Tuple[str, float]]:
+        """[(termino_del_indice, peso)]: la palabra exacta y las que empiezan con ella."""
+        expansiones = [(termino, 1.0)] if termino in self._postings else []
+        if len(termino.lstrip("#")) < MIN_PREFIJO:
+            return expansiones
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self._postings)
+        vocabulario = self._vocabulario
+        i = bisect_left(vocabulario, termino)
+        while i < len(vocabulario) and len(expansiones) <= MAX_EXPANSIONES:
+            candidato = vocabulario[i]
+            if not candidato.startswith(termino):
+                break
+            if candidato != termino:
+                expansiones.append((candidato, PESO_PREFIJO))
+            i += 1
+        return expansiones
+
+    def buscar(self, texto: str, filtro=None) -> List[Tuple[float, dict]]:
+        """[(puntaje, doc)] por relevancia (a igual puntaje, la más reciente primero)."""
+        terminos = terminos_busqueda(texto)
+        if not terminos:
+            return []
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            promedio = self._longitud_total / n_docs
+            puntajes: Optional[Dict[str, float]] = None
+
+            for termino in terminos:
+                parcial = defaultdict(float)
+                for indexado, peso in self._expandir(termino):
+                    posting = self._postings[indexado]
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for id_pub, tf in posting.items():
+                        norma = K1 * (1 - B + B * self._longitud[id_pub] / promedio)
+                        parcial[id_pub] += peso * idf * tf * (K1 + 1) / (tf + norma)
+                # AND: solo siguen los documentos que tienen todas las palabras
+                if puntajes is None:
+                    puntajes = parcial
+                else:
+                    puntajes = {i: p + parcial[i] for i, p in puntajes.items() if i in parcial}
+                if not puntajes:
+                    return []
+
+            resultados = [
+                (puntaje, self.docs[id_pub]) for id_pub, puntaje in puntajes.items()
+                if filtro is None or filtro(self.docs[id_pub])
+            ]
+        resultados.sort(key=lambda r: r[1]["fecha"] or datetime.min, reverse=True)
+        resultados.sort(key=lambda r: r[0], reverse=True)   # estable: desempata por fecha
+        return resultados
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "publicaciones": len(self.docs),
+                "terminos": len(self._postings),
+                "construido": self.construido,
+            }
+
+
+# =============================================
+# INSTANCIA DEL PROCESO
+# =============================================
+_indice = IndiceNoticias()
+_estado_lock = threading.Lock()
+_construyendo = False
+_tocados: set = set()      # reindexados mientras se construía: se repiten sobre el nuevo
+
+
+def construir():
+    """Carga todas las publicaciones en un índice nuevo y lo publica de una vez."""
+    global _indice, _construyendo
+    with _estado_lock:
+        if _construyendo:
+            return
+        _construyendo = True
+        _tocados.clear()
+    try:
+        inicio = time.perf_counter()
+        nuevo = IndiceNoticias()
+        for lote in iterar("SP_NOT_INDICE", lote=500):
+            for fila in lote.filas:
+                nuevo.poner(dict(zip(lote.columnas, fila)))
+        nuevo.construido = time.time()
+        with _estado_lock:
+            _indice = nuevo
+            pendientes = list(_tocados)
+        for id_pub in pendientes:
+            reindexar(id_pub)
+        print(f"🔎 Índice de noticias: {len(nuevo.docs)} publicaciones "
+              f"en {time.perf_counter() - inicio:.2f}s")
+    finally:
+        with _estado_lock:
+            _construyendo = False
+
+
+async def construir_async():
+    try:
+        await en_hilo_db(construir)
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el índice de noticias (se usarán los SP): {e}")
+
+
+def asegurar_indice():
+    """Si el índice no está (falló al arrancar), lo construye en segundo plano."""
+    if _indice.construido is None and not _construyendo:
+        threading.Thread(target=_construir_seguro, name="indice-noticias", daemon=True).start()
+
+
+def _construir_seguro():
+    try:
+        construir()
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el índice de noticias: {e}")
+
+
+def listo() -> bool:
+    return _indice.construido is not None
+
+
+def reindexar(id_pub: Optional[str]):
+    """Tras escribir una publicación: vuelve a leerla (o la quita si ya no existe)."""
+    if not id_pub:
+        return
+    try:
+        filas = ejecutar("SP_NOT_INDICE", {"idpublicacion": id_pub}, commit=False) or []
+    except Exception as e:
+        # El índice quedaría desactualizado: reconstruir entero
+        print(f"⚠️ No se pudo reindexar la publicación {id_pub}: {e}")
+        _indice.construido = None
+        asegurar_indice()
+        return
+    with _estado_lock:
+        if _construyendo:
+            _tocados.add(id_pub)
+        indice = _indice
+    if filas:
+        indice.poner(filas[0])
+    else:
+        indice.quitar(id_pub)
+
+
+async def reindexar_async(id_pub: Optional[str]):
+    await en_hilo_db(reindexar, id_pub)
+
+
+def buscar(
+    texto: str,
+    solo_activas: bool = False,
+    solo_destacadas: bool = False,
+    creado_por: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+) -> List[Tuple[float, dict]]:
+    """Publicaciones que coinciden con `texto` y los filtros, por relevancia."""
+    def filtro(doc: dict) -> bool:
+        if solo_activas and not doc["activa"]:
+            return False
+        if solo_destacadas and not doc["destacada"]:
+            return False
+        if creado_por is not None and doc["creado_por"] != creado_por:
+            return False
+        dia = doc["fecha"].date() if doc["fecha"] else None
+        if desde is not None and (dia is None or dia < desde):
+            return False
+        if hasta is not None and (dia is None or dia > hasta):
+            return False
+        return True
+
+    return _indice.buscar(texto, filtro)
+
+
+def metricas_indice() -> dict:
+    return {**_indice.metricas(), "construyendo": _construyendo}
@@ -0,0 +1,296 @@
+# indice_usuarios.py
+"""
+Sugerencias del buscador de Gestión de Usuarios con un índice EN MEMORIA.
+
+    GET /api/admin/usuarios/sugerir?q=perez&tipo=miembro&limite=8
+
+Reemplaza, para el type-ahead, a SP_GU_LISTAR_MIEMBROS_PAGINA /
+SP_GU_LISTAR_POSTULANTES_PAGINA con busqueda (LIKE '%x%' sobre nombre,
+apellido, dni, email y legajo = recorrer la tabla en cada tecla).
+
+✅ DNI y legajo exactos: diccionario, salen primero
+✅ Nombre, apellido, DNI, legajo y email por PREFIJO sobre un arreglo
+   ordenado (bisect): "per ju" encuentra "Pérez, Juan" (tildes y
+   mayúsculas plegadas, todas las palabras deben coincidir). Salen por
+   apellido y nombre y la búsqueda se corta al llenar el límite
+✅ Se construye al arrancar (SP_GU_INDICE_USUARIOS) y cada escritura de
+   miembros / postulantes refresca solo esa fila con reindexar(tipo, id)
+
+Mientras el índice no está listo, el endpoint usa los SP de siempre.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ejecutor_sp import ejecutar, en_hilo_db, iterar
+from indice_noticias import normalizar
+
+MIN_CARACTERES = 2
+LIMITE_MAXIMO = 20
+MAX_TRAMOS = 32           # términos distintos que se mezclan por apellido (ver _candidatos)
+
+_PALABRA = re.compile(r"\w+")
+
+Clave = Tuple[str, int]   # (tipo, id)
+
+
+def _terminos(doc: dict) -> Set[str]:
+    """Palabras del nombre y apellido + dni, legajo y email completos."""
+    terminos = set(_PALABRA.findall(normalizar(f"{doc.get('nombre') or ''} {doc.get('apellido') or ''}")))
+    for campo in ("dni", "legajo", "email"):
+        if doc.get(campo):
+            terminos.add(normalizar(doc[campo].strip()))
+    return terminos
+
+
+def _orden(doc: dict) -> str:
+    """Mismo orden que los listados: apellido, nombre."""
+    return normalizar(f"{doc.get('apellido') or ''} {doc.get('nombre') or ''}")
+
+
+def _sugerencia(doc: dict, coincidencia: str) -> dict:
+    return {
+        "tipo": doc["tipo"],
+        "id": doc["id"],
+        "nombre_completo": f"{doc.get('apellido')}, {doc.get('nombre')}",
+        "dni": doc.get("dni"),
+        "legajo": doc.get("legajo"),
+        "email": doc.get("email"),
+        "estado": doc.get("estado"),
+        "rango": doc.get("rango"),
+        "departamento": doc.get("departamento"),
+        "coincidencia": coincidencia,
+    }
+
+
+# =============================================
+# ÍNDICE
+# =============================================
+class IndiceUsuarios:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.docs: Dict[Clave, dict] = {}
+        self._terminos: Dict[Clave, Set[str]] = {}
+        self._orden: Dict[Clave, str] = {}
+        self._entradas: List[Tuple[str, str, Clave]] = []   # (termino, apellido nombre, clave) ordenado
+        self._por_dni: Dict[str, Set[Clave]] = {}          # miembro y postulante pueden compartir DNI
+        self._por_legajo: Dict[str, Clave] = {}
+        self.construido: Optional[float] = None
+
+    # ---------- escritura ----------
+    def _quitar(self, clave: Clave):
+        doc = self.docs.pop(clave, None)
+        if doc is None:
+            return
+        orden = self._orden.pop(clave)
+        for termino in self._terminos.pop(clave):
+            del self._entradas[bisect_left(self._entradas, (termino, orden, clave))]
+        dni = (doc.get("dni") or "").strip()
+        if dni:
+            self._por_dni[dni].discard(clave)
+            if not self._por_dni[dni]:
+                del self._por_dni[dni]
+        legajo = normalizar((doc.get("legajo") or "").strip())
+        if legajo and self._por_legajo.get(legajo) == clave:
+            del self._por_legajo[legajo]
+
+    def poner(self, doc: dict, carga: bool = False):
+        """
+        Agrega o reemplaza una fila de SP_GU_INDICE_USUARIOS. `carga=True`
+        (construcción inicial) agrega al final sin ordenar: llamar a ordenar().
+        """
+        clave = (doc["tipo"], doc["id"])
+        terminos = _terminos(doc)
+        with self._lock:
+            self._quitar(clave)
+            self.docs[clave] = doc
+            self._terminos[clave] = terminos
+            orden = self._orden[clave] = _orden(doc)
+            for termino in terminos:
+                if carga:
+                    self._entradas.append((termino, orden, clave))
+                else:
+                    insort(self._entradas, (termino, orden, clave))
+            dni = (doc.get("dni") or "").strip()
+            if dni:
+                self._por_dni.setdefault(dni, set()).add(clave)
+            legajo = normalizar((doc.get("legajo") or "").strip())
+            if legajo:
+                self._por_legajo[legajo] = clave
+
+    def ordenar(self):
+        with self._lock:
+            self._entradas.sort()
+
+    def quitar(self, clave: Clave):
+        with self._lock:
+            self._quitar(clave)
+
+    # ---------- lectura ----------
+    def _rango(self, prefijo: str) -> Tuple[int, int]:
+        return (
+            bisect_left(self._entradas, (prefijo,)),
+            bisect_left(self._entradas, (prefijo + "\uffff",)),
+        )
+
+    def _candidatos(self, inicio: int, fin: int) -> Iterator[Clave]:
+        """
+        Claves de _entradas[inicio:fin] por apellido y nombre: dentro de cada
+        término ya están así ordenadas, basta mezclar los términos del prefijo.
+        Un prefijo con más de MAX_TRAMOS términos distintos es un DNI / legajo
+        a medio escribir (un término por persona): esas salen en el orden del
+        propio término.
+        """
+        tramos = []
+        i = inicio
+        while i < fin:
+            if len(tramos) == MAX_TRAMOS:
+                for j in range(inicio, fin):
+                    yield self._entradas[j][2]
+                return
+            corte = bisect_left(self._entradas, (self._entradas[i][0] + "\0",), i, fin)
+            tramos.append(self._entradas[j] for j in range(i, corte))
+            i = corte
+        # Mezclar por (orden, clave): las tuplas enteras saldrían por término
+        for _, _, clave in heapq.merge(*tramos, key=lambda e: (e[1], e[2])):
+            yield clave
+
+    def sugerir(self, texto: str, tipo: Optional[str] = None, limite: int = 8) -> List[dict]:
+        """Exactos por DNI / legajo primero; luego por prefijo, por apellido y nombre."""
+        texto = (texto or "").strip()
+        palabras = normalizar(texto).split()
+        if len(texto) < MIN_CARACTERES or not palabras:
+            return []
+
+        with self._lock:
+            exactos: List[Tuple[Clave, str]] = []
+            for clave in sorted(self._por_dni.get(texto, ())):
+                exactos.append((clave, "dni"))
+            por_legajo = self._por_legajo.get(normalizar(texto))
+            if por_legajo is not None:
+                exactos.append((por_legajo, "legajo"))
+            salida = [
+                _sugerencia(self.docs[clave], coincidencia)
+                for clave, coincidencia in exactos
+                if tipo is None or clave[0] == tipo
+            ][:limite]
+            vistos = {clave for clave, _ in exactos}
+
+            # La palabra con menos entradas define los candidatos; el resto se verifica.
+            # Salen ya por apellido: se corta apenas se completa el límite
+            rangos = sorted(((self._rango(p), p) for p in palabras), key=lambda r: r[0][1] - r[0][0])
+            (inicio, fin), _ = rangos[0]
+            otras = [p for _, p in rangos[1:]]
+            for clave in self._candidatos(inicio, fin):
+                if len(salida) >= limite:
+                    break
+                if clave in vistos or (tipo is not None and clave[0] != tipo):
+                    continue
+                terminos = self._terminos[clave]
+                if all(any(t.startswith(p) for t in terminos) for p in otras):
+                    vistos.add(clave)
+                    salida.append(_sugerencia(self.docs[clave], "prefijo"))
+        return salida
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "miembros": sum(1 for tipo, _ in self.docs if tipo == "miembro"),
+                "postulantes": sum(1 for tipo, _ in self.docs if tipo == "postulante"),
+                "terminos": len(self._entradas),
+                "construido": self.construido,
+            }
+
+
+# =============================================
+# INSTANCIA DEL PROCESO
+# =============================================
+_indice = IndiceUsuarios()
+_estado_lock = threading.Lock()
+_construyendo = False
+_tocados: set = set()      # reindexados mientras se construía: se repiten sobre el nuevo
+
+
+def construir():
+    """Carga miembros y postulantes en un índice nuevo y lo publica de una vez."""
+    global _indice, _construyendo
+    with _estado_lock:
+        if _construyendo:
+            return
+        _construyendo = True
+        _tocados.clear()
+    try:
+        inicio = time.perf_counter()
+        nuevo = IndiceUsuarios()
+        for lote in iterar("SP_GU_INDICE_USUARIOS", lote=1000):
+            for fila in lote.filas:
+                nuevo.poner(dict(zip(lote.columnas, fila)), carga=True)
+        nuevo.ordenar()
+        nuevo.construido = time.time()
+        with _estado_lock:
+            _indice = nuevo
+            pendientes = list(_tocados)
+        for tipo, id_ in pendientes:
+            reindexar(tipo, id_)
+        print(f"🔎 Índice de usuarios: {len(nuevo.docs)} miembros / postulantes "
+              f"en {time.perf_counter() - inicio:.2f}s")
+    finally:
+        with _estado_lock:
+            _construyendo = False
+
+
+async def construir_async():
+    try:
+        await en_hilo_db(construir)
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el índice de usuarios (se usarán los SP): {e}")
+
+
+def asegurar_indice():
+    """Si el índice no está (falló al arrancar), lo construye en segundo plano."""
+    if _indice.construido is None and not _construyendo:
+        threading.Thread(target=_construir_seguro, name="indice-usuarios", daemon=True).start()
+
+
+def _construir_seguro():
+    try:
+        construir()
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el índice de usuarios: {e}")
+
+
+def listo() -> bool:
+    return _indice.construido is not None
+
+
+def reindexar(tipo: str, id_: Optional[int]):
+    """Tras escribir un miembro / postulante: vuelve a leerlo (o lo quita si ya no existe)."""
+    if not id_:
+        return
+    try:
+        filas = ejecutar("SP_GU_INDICE_USUARIOS", {"tipo": tipo, "id": id_}, commit=False) or []
+    except Exception as e:
+        # El índice quedaría desactualizado: reconstruir entero
+        print(f"⚠️ No se pudo reindexar {tipo} {id_}: {e}")
+        _indice.construido = None
+        asegurar_indice()
+        return
+    with _estado_lock:
+        if _construyendo:
+            _tocados.add((tipo, id_))
+        indice = _indice
+    if filas:
+        indice.poner(filas[0])
+    else:
+        indice.quitar((tipo, id_))
+
+
+def sugerir(texto: str, tipo: Optional[str] = None, limite: int = 8) -> List[dict]:
+    return _indice.sugerir(texto, tipo, min(limite, LIMITE_MAXIMO))
+
+
+def metricas_indice() -> dict:
+    return {**_indice.metricas(), "construyendo": _construyendo}
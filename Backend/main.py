@@ -9,18 +9,29 @@ from fastapi.responses import JSONResponse
 import uvicorn
 import asyncio
 from Cargadatosfacebook import escanear_y_guardar_db
+from Conexionsql import metricas_pool, cerrar_pool
+from ejecutor_sp import manejar_pool_agotado
+from cache_web import metricas_cache
+from almacen_media import cerrar_variantes
+from trabajos_reportes import cerrar_trabajos, metricas_trabajos
+from bus_cambios import metricas_bus
+from indice_noticias import construir_async as construir_indice_noticias, metricas_indice
+from indice_usuarios import construir_async as construir_indice_usuarios, metricas_indice as metricas_indice_usuarios
+from roster_instructores import metricas_plantel
+from directorio_miembros import construir_async as construir_directorio_miembros, metricas_directorio
 from datetime import datetime
 
 # ── Módulos públicos / existentes ──────────────────────────────────────────────
 from Endpointcursos       import app as cursos_app
 from Endpointnoticias     import app as noticias_app
+from Endpointmedia        import app as media_app
 from Endpointregistroweb  import router as registro_router
 from EnpointInstructores  import app as instructores_app
 from Endpoint             import app as miembros_app
 from EndpointLoginAdmin   import app as login_admin_app
 
 # ── Módulos del Panel Admin (carpeta adminendpoints) ───────────────────────────
-from adminendpoints.admin_dashboard    import router as admin_dashboard_router
+from adminendpoints.admin_dashboard    import router as admin_dashboard_router, reconciliar_resumen
 from adminendpoints.admin_usuarios     import app as admin_usuarios_app
 from adminendpoints.admin_instructores import app as admin_instructores_app
 from adminendpoints.admin_cursos       import app as admin_cursos_app
@@ -67,6 +78,7 @@ def home():
             "instructores":  "/api/instructores",
             "miembros":      "/api/miembros",
             "registro_web":  "/api/registro",
+            "media":         "/api/media/{sha256}",
         },
         "endpoints_admin": {
             "login":         "/api/admin",
@@ -87,7 +99,43 @@ def home():
 
 @app.get("/health", tags=["Sistema"])
 def health_check():
-    return {"status": "healthy", "database": "connected"}
+    return {"status": "healthy", "database": "connected", "pool": metricas_pool()}
+
+
+@app.get("/health/pool", tags=["Sistema"])
+def metricas_pool_conexiones():
+    """Estado y contadores del pool de conexiones a SQL Server."""
+    return {"status": "SUCCESS", "pool": metricas_pool()}
+
+
+@app.get("/health/cache", tags=["Sistema"])
+def metricas_cache_web():
+    """Hits / misses / invalidaciones de la caché de los endpoints públicos."""
+    return {"status": "SUCCESS", "cache": metricas_cache()}
+
+
+@app.get("/health/reportes", tags=["Sistema"])
+def metricas_reportes():
+    """Trabajos de reportes en segundo plano por estado."""
+    return {"status": "SUCCESS", "trabajos": metricas_trabajos()}
+
+
+@app.get("/health/actividad", tags=["Sistema"])
+def metricas_actividad():
+    """Paneles conectados al stream de actividad y eventos publicados."""
+    return {"status": "SUCCESS", "actividad": metricas_bus()}
+
+
+@app.get("/health/busqueda", tags=["Sistema"])
+def metricas_busqueda():
+    """Tamaño de los índices en memoria (noticias, usuarios, instructores, buscador de miembros)."""
+    return {
+        "status": "SUCCESS",
+        "noticias": metricas_indice(),
+        "usuarios": metricas_indice_usuarios(),
+        "instructores": metricas_plantel(),
+        "miembros": metricas_directorio(),
+    }
 
 
 # =============================================
@@ -97,6 +145,7 @@ app.mount("/api/cursos",       cursos_app)
 app.mount("/api/noticias",     noticias_app)
 app.mount("/api/instructores", instructores_app)
 app.mount("/api/miembros",     miembros_app)
+app.mount("/api/media",        media_app)
 app.include_router(registro_router, prefix="/api/registro", tags=["Registro Web"])
 
 
@@ -145,6 +194,16 @@ async def internal_error_handler(request, exc):
         },
     )
 
+# Pool de conexiones saturado -> 503 + Retry-After (no 500).
+# Las apps montadas con mount() no usan los manejadores de esta app:
+# cada una registra el suyo.
+manejar_pool_agotado(
+    app,
+    cursos_app, noticias_app, instructores_app, miembros_app, media_app,
+    admin_usuarios_app, admin_instructores_app, admin_cursos_app, admin_reportes_app,
+    login_admin_app,
+)
+
 # =============================================
 # PROGRAMADOR DE TAREAS (MODO SEGURO)
 # =============================================
@@ -164,14 +223,35 @@ async def reloj_programador_fb():
                 print(f"❌ Error en la tarea programada: {e}")
             
             await asyncio.sleep(61)
+
+        # 03:00 AM: recalcula los agregados del dashboard (dashboard_resumen)
+        if ahora.hour == 3 and ahora.minute == 0:
+            try:
+                corregidos = await reconciliar_resumen()
+                print(f"📊 {ahora} - Agregados del dashboard reconciliados ({corregidos} grupos corregidos)")
+            except Exception as e:
+                print(f"❌ Error reconciliando el dashboard: {e}")
+
+            await asyncio.sleep(61)
         
         await asyncio.sleep(30)
 
 @app.on_event("startup")
 async def startup_event():
     asyncio.create_task(reloj_programador_fb())
+    asyncio.create_task(construir_indice_noticias())   # buscador de noticias en memoria
+    asyncio.create_task(construir_indice_usuarios())   # sugerencias de gestión de usuarios
+    asyncio.create_task(construir_directorio_miembros())   # buscador público de miembros
     print("🚀 Programador iniciado: El bot correrá a la 01:00 AM diariamente.")
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+    cerrar_pool()
+    cerrar_variantes()
+    cerrar_trabajos()
+    print("🔌 Pool de conexiones cerrado.")
+
 # =============================================
 # ARRANQUE DEL SERVIDOR
 # =============================================
@@ -0,0 +1,65 @@
+# migrar_media.py
+"""
+Migra las imágenes guardadas en la BD al almacén de media (almacen_media).
+
+Recorre por lotes (SP_MEDIA_PENDIENTES, keyset por id) las filas que todavía
+tienen el blob o el base64 en la tabla, guarda la imagen en disco por su
+SHA-256 y deja solo el hash en la fila (SP_MEDIA_ASIGNAR).
+
+Se puede cortar y volver a correr: solo procesa lo que falta.
+
+Uso:
+    python migrar_media.py                      # todos los orígenes
+    python migrar_media.py instructores cursos  # solo algunos
+"""
+import sys
+
+from almacen_media import decodificar_base64, guardar_bytes
+from ejecutor_sp import ejecutar
+
+ORIGENES = ("publicaciones", "instructores", "admin_users", "cursos")
+LOTE = 20   # filas por lote: cada una puede traer varios MB de imagen
+
+
+def migrar_origen(origen: str, lote: int = LOTE) -> tuple:
+    """Migra un origen completo. Devuelve (migradas, fallidas)."""
+    migradas = fallidas = 0
+    despues = None
+    while True:
+        filas = ejecutar("SP_MEDIA_PENDIENTES", {
+            "@origen": origen, "@despues": despues, "@lote": lote,
+        }, commit=False) or []
+        if not filas:
+            break
+
+        for fila in filas:
+            despues = fila["id"]
+            datos = fila["datos"] or decodificar_base64(fila["texto"])
+            if not datos:
+                print(f"⚠️ {origen} {fila['id']}: la imagen no es un base64 válido, se deja como está")
+                fallidas += 1
+                continue
+
+            sha256 = guardar_bytes(datos)
+            ejecutar("SP_MEDIA_ASIGNAR", {"@origen": origen, "@id": fila["id"], "@sha256": sha256})
+            migradas += 1
+
+        print(f"   {origen}: {migradas} migradas (último id {despues})")
+    return migradas, fallidas
+
+
+def main(origenes) -> int:
+    total_fallidas = 0
+    for origen in origenes:
+        if origen not in ORIGENES:
+            print(f"❌ Origen desconocido: {origen} (válidos: {', '.join(ORIGENES)})")
+            return 2
+        print(f"📦 Migrando {origen}...")
+        migradas, fallidas = migrar_origen(origen)
+        total_fallidas += fallidas
+        print(f"✅ {origen}: {migradas} migradas, {fallidas} con error")
+    return 1 if total_fallidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or ORIGENES))
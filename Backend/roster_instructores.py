@@ -0,0 +1,193 @@
+# roster_instructores.py
+"""
+Plantel de instructores activos EN MEMORIA para la página pública.
+
+Son pocos y casi no cambian: en lugar de SP_BuscarInstructores (tres
+LIKE '%termino%' por tecla) y SP_FiltrarPorEspecialidad (una consulta por
+clic en el sidebar), se lee SP_ObtenerTodosInstructores una vez y la
+búsqueda y los filtros se resuelven acá.
+
+✅ Facetas por especialidad: filtro directo y conteos para el sidebar
+✅ Búsqueda en nombre, rango y certificaciones sin tildes ni mayúsculas
+✅ Tolera errores de tipeo: "paramedco", "rescatsta" (distancia de edición
+   1 desde 4 letras, 2 desde 8) y palabras a medio escribir ("param")
+✅ Se recarga cuando el admin escribe instructores (versión del grupo
+   "instructores" de cache_web, que suben los @invalida) o al vencer el TTL
+   del grupo; si la recarga falla se sigue sirviendo el plantel anterior
+"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from almacen_media import con_url_foto_instructor
+from cache_web import cache_grupo
+from ejecutor_sp import sp_async
+from indice_noticias import normalizar
+
+GRUPO = "instructores"
+CAMPOS_BUSQUEDA = ("nombre_completo", "rango", "certificaciones")
+
+_PALABRA = re.compile(r"\w+")
+
+
+# =============================================
+# COINCIDENCIA
+# =============================================
+def _tolerancia(palabra: str) -> int:
+    """Errores de tipeo admitidos según el largo de la palabra buscada."""
+    if len(palabra) >= 8:
+        return 2
+    if len(palabra) >= 4:
+        return 1
+    return 0
+
+
+def _distancia(a: str, b: str, maximo: int) -> int:
+    """Damerau-Levenshtein (transposiciones adyacentes); corta apenas supera `maximo`."""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+def _puntaje_palabra(palabra: str, terminos: Tuple[str, ...]) -> int:
+    """3 exacta, 2 prefijo / contenida, 1 con errores de tipeo, 0 no aparece."""
+    mejor = 0
+    tolerancia = _tolerancia(palabra)
+    for termino in terminos:
+        if termino == palabra:
+            return 3
+        if palabra in termino:
+            mejor = 2
+        elif mejor < 1 and tolerancia:
+            # Contra la palabra entera y contra su comienzo (se está escribiendo)
+            if (_distancia(palabra, termino, tolerancia) <= tolerancia
+                    or _distancia(palabra, termino[:len(palabra)], tolerancia) <= tolerancia):
+                mejor = 1
+    return mejor
+
+
+# =============================================
+# PLANTEL
+# =============================================
+class Plantel:
+    def __init__(self, instructores: List[dict], version: int):
+        self.instructores = instructores          # orden del SP: experiencia_anios DESC
+        self.version = version
+        self.cargado = time.monotonic()
+        self._textos: List[str] = []
+        self._terminos: List[Tuple[str, ...]] = []
+        self._por_especialidad: Dict[str, List[dict]] = {}
+        self._nombres_especialidad: Dict[str, str] = {}
+        for instructor in instructores:
+            texto = " ".join(normalizar(str(instructor.get(c) or "")) for c in CAMPOS_BUSQUEDA)
+            self._textos.append(texto)
+            self._terminos.append(tuple(dict.fromkeys(_PALABRA.findall(texto))))
+            especialidad = instructor.get("especialidad")
+            if especialidad:
+                clave = normalizar(especialidad.strip())
+                self._por_especialidad.setdefault(clave, []).append(instructor)
+                self._nombres_especialidad.setdefault(clave, especialidad.strip())
+
+    def por_especialidad(self, especialidad: Optional[str]) -> List[dict]:
+        """Mismo resultado que SP_FiltrarPorEspecialidad (None = todos)."""
+        if especialidad is None:
+            return self.instructores
+        return self._por_especialidad.get(normalizar(especialidad.strip()), [])
+
+    def especialidades(self) -> List[dict]:
+        return sorted(
+            ({"especialidad": self._nombres_especialidad[clave], "total": len(lista)}
+             for clave, lista in self._por_especialidad.items()),
+            key=lambda e: normalizar(e["especialidad"]),
+        )
+
+    def buscar(self, termino: str, especialidad: Optional[str] = None) -> List[dict]:
+        """
+        Todas las palabras deben aparecer (exactas, a medio escribir o con
+        errores de tipeo). Más coincidencias exactas primero; a igual puntaje,
+        el orden del SP (más experiencia primero).
+        """
+        frase = normalizar(termino.strip())
+        palabras = _PALABRA.findall(frase)
+        if not palabras:
+            return []
+        permitidos = None
+        if especialidad is not None:
+            permitidos = {id(i) for i in self.por_especialidad(especialidad)}
+
+        resultados = []
+        for posicion, instructor in enumerate(self.instructores):
+            if permitidos is not None and id(instructor) not in permitidos:
+                continue
+            if frase in self._textos[posicion]:
+                # Lo mismo que encontraba el LIKE '%termino%'
+                puntaje = 3 * len(palabras) + 1
+            else:
+                puntajes = [_puntaje_palabra(p, self._terminos[posicion]) for p in palabras]
+                if not all(puntajes):
+                    continue
+                puntaje = sum(puntajes)
+            resultados.append((-puntaje, posicion, instructor))
+        resultados.sort(key=lambda r: r[:2])
+        return [instructor for _, _, instructor in resultados]
+
+
+_plantel: Optional[Plantel] = None
+_carga_lock = asyncio.Lock()
+
+
+def _vigente(plantel: Optional[Plantel]) -> bool:
+    cache = cache_grupo(GRUPO)
+    return (
+        plantel is not None
+        and plantel.version == cache.version
+        and time.monotonic() - plantel.cargado < cache.ttl
+    )
+
+
+async def obtener_plantel() -> Plantel:
+    """El plantel en memoria; lo (re)carga si un admin escribió o venció el TTL."""
+    global _plantel
+    if _vigente(_plantel):
+        return _plantel
+    async with _carga_lock:          # una sola recarga aunque lleguen muchas peticiones
+        if _vigente(_plantel):
+            return _plantel
+        version = cache_grupo(GRUPO).version
+        try:
+            filas = await sp_async("SP_ObtenerTodosInstructores")
+        except Exception as e:
+            if _plantel is None:
+                raise
+            print(f"⚠️ No se pudo recargar el plantel de instructores (se sigue con el anterior): {e}")
+            _plantel.version, _plantel.cargado = version, time.monotonic()   # reintenta al vencer el TTL
+            return _plantel
+        # Foto como URL (/instructores/{id}/foto?v=hash), igual que los endpoints
+        _plantel = Plantel(con_url_foto_instructor(filas or []), version)
+        return _plantel
+
+
+def metricas_plantel() -> dict:
+    plantel = _plantel
+    if plantel is None:
+        return {"instructores": 0, "especialidades": 0, "version": None}
+    return {
+        "instructores": len(plantel.instructores),
+        "especialidades": len(plantel._por_especialidad),
+        "version": plantel.version,
+        "vigente": _vigente(plantel),
+    }
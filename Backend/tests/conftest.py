@@ -0,0 +1,15 @@
+# tests/conftest.py
+"""
+Pruebas unitarias de la lógica en Python puro (índices, cachés, pool,
+cursores...). No hace falta SQL Server: donde se necesita una conexión,
+cada prueba reemplaza pyodbc.connect con monkeypatch.
+
+    cd Backend && python -m pytest
+"""
+import os
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for ruta in (BACKEND, os.path.join(BACKEND, "adminendpoints")):
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
@@ -0,0 +1,28 @@
+# tests/test_admin_reportes.py
+import pytest
+from fastapi import HTTPException
+
+from admin_reportes import REPORTES, _params_trabajo
+
+
+def test_params_en_el_orden_del_sp_con_defectos():
+    reporte = REPORTES["postulantes"]
+    assert _params_trabajo(reporte, {}) == (None, False, None, None)
+    assert _params_trabajo(reporte, {"fecha_hasta": "2024-12-31", "departamento": "Lima"}) == (
+        "Lima", False, None, "2024-12-31")
+
+
+def test_booleanos_como_bit():
+    assert _params_trabajo(REPORTES["postulantes"], {"solo_pendientes": True})[1] == 1
+    assert type(_params_trabajo(REPORTES["postulantes"], {"solo_pendientes": True})[1]) is int
+
+
+@pytest.mark.parametrize("filtros", [{"otro": 1}, {"estado": ["a", "b"]}, {"estado": {"x": 1}}])
+def test_filtros_invalidos(filtros):
+    with pytest.raises(HTTPException) as error:
+        _params_trabajo(REPORTES["miembros"], filtros)
+    assert error.value.status_code == 422
+
+
+def test_reporte_sin_filtros():
+    assert _params_trabajo(REPORTES["departamentos"], {}) == ()
@@ -0,0 +1,31 @@
+# tests/test_almacen_media.py
+import pytest
+from fastapi import HTTPException
+
+from almacen_media import _rango
+
+
+@pytest.mark.parametrize("cabecera, esperado", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),      # el fin se recorta al tamaño
+    ("bytes=-200", (800, 999)),          # los últimos 200 bytes
+    ("bytes=-5000", (0, 999)),
+    (" bytes=10-20 ", (10, 20)),
+    ("bytes=0-10,20-30", None),          # multi-rango: se responde completo
+    ("bytes=-", None),
+    ("bytes=50-10", None),               # fin antes del inicio: se ignora
+    ("items=0-10", None),
+])
+def test_rango(cabecera, esperado):
+    assert _rango(cabecera, 1000) == esperado
+
+
+@pytest.mark.parametrize("cabecera", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_rango_no_satisfacible(cabecera):
+    with pytest.raises(HTTPException) as error:
+        _rango(cabecera, 1000)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */1000"
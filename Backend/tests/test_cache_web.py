@@ -0,0 +1,104 @@
+# tests/test_cache_web.py
+import asyncio
+
+import pytest
+
+from cache_web import CacheTTL, RespuestaJSON
+
+
+def _calculo(resultado="valor", demora=0.02):
+    """Cálculo async que cuenta cuántas veces se ejecutó."""
+    llamadas = []
+
+    async def calcular():
+        llamadas.append(1)
+        await asyncio.sleep(demora)
+        return f"{resultado}{len(llamadas)}"
+
+    return calcular, llamadas
+
+
+def test_una_sola_consulta_para_pedidos_simultaneos():
+    cache = CacheTTL("prueba")
+    calcular, llamadas = _calculo()
+
+    async def principal():
+        return await asyncio.gather(*(cache.obtener_o_calcular("k", calcular) for _ in range(5)))
+
+    assert asyncio.run(principal()) == ["valor1"] * 5
+    assert len(llamadas) == 1 and not cache._en_vuelo
+    assert cache.obtener("k") == (True, "valor1")
+
+
+def test_error_del_calculo_llega_a_todos_y_no_se_guarda():
+    cache = CacheTTL("prueba")
+
+    async def calcular():
+        await asyncio.sleep(0.01)
+        raise ValueError("SP caído")
+
+    async def principal():
+        return await asyncio.gather(
+            *(cache.obtener_o_calcular("k", calcular) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(principal()))
+    assert cache.obtener("k") == (False, None) and not cache._en_vuelo
+
+
+def test_cancelar_al_que_calcula_no_cancela_a_los_que_esperan():
+    cache = CacheTTL("prueba")
+    calcular, llamadas = _calculo()
+
+    async def principal():
+        lider = asyncio.create_task(cache.obtener_o_calcular("k", calcular))
+        await asyncio.sleep(0)
+        esperando = asyncio.create_task(cache.obtener_o_calcular("k", calcular))
+        await asyncio.sleep(0)
+        lider.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+        return await esperando
+
+    assert asyncio.run(principal()) == "valor2"   # recalculó en lugar de heredar la cancelación
+    assert len(llamadas) == 2 and not cache._en_vuelo
+
+
+def test_invalidar_durante_el_calculo_no_guarda_el_valor_viejo():
+    cache = CacheTTL("prueba")
+    calcular, _ = _calculo()
+
+    async def principal():
+        tarea = asyncio.create_task(cache.obtener_o_calcular("k", calcular))
+        await asyncio.sleep(0)
+        cache.invalidar()
+        return await tarea
+
+    assert asyncio.run(principal()) == "valor1"
+    assert cache.obtener("k") == (False, None)
+
+
+def test_vencimiento_y_expulsion_lru():
+    cache = CacheTTL("prueba", ttl=60, max_entradas=2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.obtener("a")             # "a" pasa a ser la más reciente
+    cache.guardar("c", 3)
+    assert cache.obtener("b") == (False, None) and cache.expulsadas == 1
+    cache.guardar("d", 4, ttl=-1)
+    assert cache.obtener("d") == (False, None) and cache.expiradas == 1
+
+
+class _Pedido:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+def test_etag_responde_304():
+    respuesta = RespuestaJSON({"nombre": "Ñandú", "total": 2})
+    assert respuesta.cuerpo == '{"nombre":"Ñandú","total":2}'.encode("utf-8")
+    assert "Last-Modified" not in respuesta.headers
+    assert respuesta.no_modificada(_Pedido(**{"if-none-match": f'W/{respuesta.etag}, "otro"'}))
+    assert respuesta.no_modificada(_Pedido(**{"if-none-match": "*"}))
+    assert not respuesta.no_modificada(_Pedido(**{"if-none-match": '"otro"'}))
+    assert not respuesta.no_modificada(_Pedido(**{"if-modified-since": "Wed, 01 Jan 2031 00:00:00 GMT"}))
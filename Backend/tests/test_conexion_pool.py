@@ -0,0 +1,154 @@
+# tests/test_conexion_pool.py
+import pytest
+
+import Conexionsql
+from Conexionsql import PoolAgotadoError, PoolConexiones
+
+
+class _Conexion:
+    """Conexión pyodbc simulada: registra commit / rollback / close."""
+
+    def __init__(self, fallar_rollback=False):
+        self.commits = 0
+        self.rollbacks = 0
+        self.cerrada = False
+        self.fallar_rollback = fallar_rollback
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.fallar_rollback:
+            raise Conexionsql.pyodbc.Error("conexión caída")
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def abiertas(monkeypatch):
+    conexiones = []
+
+    def connect(cadena):
+        conexiones.append(_Conexion())
+        return conexiones[-1]
+
+    monkeypatch.setattr(Conexionsql.pyodbc, "connect", connect)
+    return conexiones
+
+
+def _pool(**opciones):
+    opciones.setdefault("timeout_espera", 0.05)
+    return PoolConexiones("DSN=prueba", minimo=0, **opciones)
+
+
+def test_prestar_y_devolver_reutiliza_la_conexion(abiertas):
+    pool = _pool(maximo=2)
+    conn = pool.prestar()
+    fisica = conn._entrada.conn
+    conn.close()
+    assert fisica.rollbacks == 1 and not fisica.cerrada   # vuelve limpia al pool
+
+    otra = pool.prestar()
+    assert otra._entrada.conn is fisica and len(abiertas) == 1
+    otra.close()
+    m = pool.metricas()
+    assert (m["abiertas"], m["libres"], m["prestadas"], m["prestamos"]) == (1, 1, 0, 2)
+
+
+def test_conexion_devuelta_no_se_puede_usar(abiertas):
+    pool = _pool()
+    conn = pool.prestar()
+    conn.close()
+    conn.close()   # dos close() no la devuelven dos veces
+    assert pool.metricas()["libres"] == 1
+    with pytest.raises(Conexionsql.pyodbc.ProgrammingError):
+        conn.cursor()
+
+
+def test_with_hace_commit_o_rollback(abiertas):
+    pool = _pool()
+    with pool.prestar():
+        pass
+    assert abiertas[0].commits == 1
+
+    with pytest.raises(RuntimeError):
+        with pool.prestar():
+            raise RuntimeError
+    assert abiertas[0].commits == 1 and abiertas[0].rollbacks >= 2
+    assert len(abiertas) == 1 and pool.metricas()["prestadas"] == 0
+
+
+def test_pool_agotado_espera_y_falla(abiertas):
+    pool = _pool(maximo=1)
+    conn = pool.prestar()
+    with pytest.raises(PoolAgotadoError):
+        pool.prestar()
+    assert pool.metricas()["timeouts"] == 1
+    conn.close()
+    pool.prestar().close()
+
+
+def test_conexion_rota_o_descartada_se_cierra(abiertas):
+    pool = _pool()
+    conn = pool.prestar()
+    conn.descartar()
+    assert abiertas[0].cerrada and pool.metricas()["abiertas"] == 0
+
+    conn = pool.prestar()
+    conn._entrada.conn.fallar_rollback = True
+    conn.close()
+    assert abiertas[1].cerrada and pool.metricas()["libres"] == 0
+
+
+def test_conexion_vencida_se_recicla(abiertas):
+    pool = _pool(vida_maxima=0)
+    pool.prestar().close()
+    pool.prestar().close()
+    assert len(abiertas) == 2 and all(c.cerrada for c in abiertas)
+
+
+def test_error_al_abrir_libera_el_lugar(monkeypatch):
+    def connect(cadena):
+        raise Conexionsql.pyodbc.Error("sin servidor")
+
+    monkeypatch.setattr(Conexionsql.pyodbc, "connect", connect)
+    pool = _pool(maximo=1)
+    with pytest.raises(Conexionsql.pyodbc.Error):
+        pool.prestar()
+    assert pool.metricas()["abiertas"] == 0 and pool.metricas()["prestadas"] == 0
+
+
+def test_pool_agotado_responde_503_en_una_app_montada(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import ejecutor_sp
+
+    def sin_conexion():
+        raise PoolAgotadoError("sin conexiones libres")
+
+    monkeypatch.setattr(ejecutor_sp, "get_connection", sin_conexion)
+    sub_app = FastAPI()
+
+    @sub_app.get("/datos")
+    def datos():
+        return ejecutor_sp.sp("SP_X")
+
+    @sub_app.get("/datos-async")
+    async def datos_async():
+        return await ejecutor_sp.sp_async("SP_X")
+
+    app = FastAPI()
+    app.mount("/api", sub_app)
+    ejecutor_sp.manejar_pool_agotado(app, sub_app)
+
+    cliente = TestClient(app)
+    for ruta in ("/api/datos", "/api/datos-async"):
+        respuesta = cliente.get(ruta)
+        assert respuesta.status_code == 503
+        assert respuesta.headers["Retry-After"] == str(Conexionsql.POOL_TIMEOUT_ESPERA)
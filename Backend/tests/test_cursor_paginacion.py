@@ -0,0 +1,108 @@
+# tests/test_cursor_paginacion.py
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+import ejecutor_sp
+from cursor_paginacion import codificar_cursor, decodificar_cursor, pagina_en_memoria
+
+
+def test_codificar_y_decodificar_conservan_los_tipos():
+    valores = [True, datetime(2024, 5, 1, 10, 30, 0, 123456), date(2024, 5, 1), "p01", 7, None]
+    cursor = codificar_cursor("noticias", valores)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decodificar_cursor("noticias", cursor, len(valores)) == tuple(valores)
+
+
+def test_cursor_vacio_es_la_primera_pagina():
+    assert decodificar_cursor("noticias", "", 2) is None
+    assert decodificar_cursor("noticias", None, 2) is None
+
+
+@pytest.mark.parametrize("cursor", ["basura", "e30", codificar_cursor("otra_lista", [1, 2]),
+                                    codificar_cursor("noticias", [1])])
+def test_cursor_invalido_o_de_otro_listado(cursor):
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor("noticias", cursor, 2)
+    assert error.value.status_code == 400
+
+
+def _recorrer(docs, claves, descendente, por_pagina):
+    vistos, despues = [], ""
+    while True:
+        pagina, despues = pagina_en_memoria(docs, claves, "l", despues, por_pagina, descendente)
+        vistos += [d["id"] for d in pagina]
+        if despues is None:
+            return vistos
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+def test_pagina_en_memoria_recorre_todo_una_vez(descendente):
+    # Fechas repetidas: el id desempata
+    docs = [{"fecha": datetime(2024, 1, 1 + i % 3), "id": i} for i in range(10)]
+    docs.sort(key=lambda d: (d["fecha"], d["id"]), reverse=descendente)
+    esperado = [d["id"] for d in docs]
+    for por_pagina in (1, 3, 10, 20):
+        assert _recorrer(docs, ("fecha", "id"), descendente, por_pagina) == esperado
+
+
+def test_pagina_en_memoria_acepta_el_texto_de_un_cursor_del_sp():
+    docs = [{"fecha": datetime(2024, 1, 1, 10, 0, 0, 123456), "id": i} for i in range(3)]
+    cursor = codificar_cursor("l", ["2024-01-01 10:00:00.1234567", 0])
+    pagina, _ = pagina_en_memoria(docs, ("fecha", "id"), "l", cursor, 10, False)
+    assert [d["id"] for d in pagina] == [1, 2]
+
+
+def test_pagina_en_memoria_valida():
+    docs = [{"fecha": datetime(2024, 1, 1), "id": 1}]
+    with pytest.raises(HTTPException) as error:
+        pagina_en_memoria(docs, ("fecha", "id"), "l", codificar_cursor("l", [5, 1]), 10, False)
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        pagina_en_memoria(docs, ("fecha", "id"), "l", "", 0, False)
+    assert error.value.status_code == 422
+
+
+# ---------- sp_cursor contra un SP simulado con DATETIME2(7) ----------
+# Tres filas en el mismo microsegundo que solo difieren en el 7.º decimal
+FECHAS = ["2024-01-01 10:00:00.1234561", "2024-01-01 10:00:00.1234565",
+          "2024-01-01 10:00:00.1234569", "2024-01-01 10:00:01.0000000"]
+FILAS = [(i, texto) for i, texto in enumerate(FECHAS)]
+
+
+def _sp_simulado(descendente):
+    def ejecutar(nombre, params, modo="dict", commit=True):
+        # Como SQL Server: compara con el DATETIME2 completo (texto estilo 121)
+        despues = params["despues_fecha"]
+        filas = sorted(FILAS, key=lambda f: (f[1], f[0]), reverse=descendente)
+        if params["despues_id"] is not None:
+            assert isinstance(despues, str) and len(despues) == 27
+            clave = (despues, params["despues_id"])
+            filas = [f for f in filas if ((f[1], f[0]) < clave if descendente else (f[1], f[0]) > clave)]
+        filas = filas[:params["por_pagina"] + 1]
+        # El driver devuelve la fecha truncada a microsegundos
+        return ejecutor_sp.ResultSet(
+            ("id", "fecha", "cursor_fecha"),
+            [(i, datetime.fromisoformat(texto), texto) for i, texto in filas],
+        )
+    return ejecutar
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+def test_sp_cursor_usa_la_fecha_completa(monkeypatch, descendente):
+    monkeypatch.setattr(ejecutor_sp, "ejecutar", _sp_simulado(descendente))
+    vistos, despues = [], ""
+    while True:
+        filas, despues = ejecutor_sp.sp_cursor("SP_X_CURSOR", {}, "x", ("fecha", "id"), despues, 1)
+        assert all("cursor_fecha" not in f for f in filas)
+        vistos += [f["id"] for f in filas]
+        if despues is None:
+            break
+    esperado = [0, 1, 2, 3]
+    assert vistos == (esperado[::-1] if descendente else esperado)
+
+
+def test_sp_cursor_sin_resultado(monkeypatch):
+    monkeypatch.setattr(ejecutor_sp, "ejecutar", lambda *a, **k: None)
+    assert ejecutor_sp.sp_cursor("SP_X_CURSOR", {}, "x", ("id",), "", 10) == ([], None)
@@ -0,0 +1,106 @@
+# tests/test_directorio_miembros.py
+import pytest
+
+import directorio_miembros
+from directorio_miembros import Directorio, LimitadorPeticiones
+
+
+def _fila(id_, nombre, apellido, dni, legajo=None):
+    return {"id": id_, "nombre": nombre, "apellido": apellido, "dni": dni, "legajo": legajo}
+
+
+def _directorio(*filas):
+    directorio = Directorio()
+    for fila in filas:
+        directorio.poner(fila)
+    return directorio
+
+
+def _ids(resultados):
+    return [r["id"] for r in resultados]
+
+
+def test_prefijo_por_apellido_y_limite():
+    # Regresión: "mario" < "martinez" como término; debe salir Martinez primero
+    directorio = _directorio(
+        _fila(1, "Mario", "Zapata", "11111111"),
+        _fila(2, "Ana", "Martinez", "22222222"),
+    )
+    assert _ids(directorio.buscar("ma")) == [2, 1]
+    assert _ids(directorio.buscar("ma", limite=1)) == [2]
+
+
+def test_top_10_sobre_el_orden_por_apellido():
+    filas = [_fila(i, "Mario", f"Zapata{i}", f"1{i:07d}") for i in range(1, 11)]
+    filas.append(_fila(99, "Ana", "Martinez", "99999999"))
+    directorio = _directorio(*filas)
+    resultados = directorio.buscar("ma")
+    assert len(resultados) == 10 and resultados[0]["id"] == 99
+
+
+def test_dni_exacto_primero_y_sin_prefijo_de_dni():
+    directorio = _directorio(
+        _fila(1, "Ana", "Abad", "12345678"),
+        _fila(2, "Luis", "Ramos", "12340000", "L-1"),
+    )
+    assert _ids(directorio.buscar("12345678")) == [1]
+    assert directorio.buscar("1234") == []
+
+
+def test_modo_exacto():
+    directorio = _directorio(
+        _fila(1, "Juan", "Pérez", "12345678", "L-7"),
+        _fila(2, "Juana", "Pérez", "87654321"),
+    )
+    assert _ids(directorio.buscar("perez juan", modo="exacto")) == [1]
+    assert _ids(directorio.buscar("juan perez", modo="exacto")) == [1]
+    assert _ids(directorio.buscar("l-7", modo="exacto")) == [1]
+    assert directorio.buscar("per", modo="exacto") == []
+
+
+def test_solo_campos_publicos():
+    directorio = _directorio(dict(_fila(1, "Ana", "Abad", "12345678"), email="a@b.c", telefono="999"))
+    resultado = directorio.buscar("abad")[0]
+    assert "email" not in resultado and "telefono" not in resultado
+    assert resultado["nombre_completo"] == "Abad Ana"
+
+
+def test_quitar():
+    directorio = _directorio(_fila(1, "Ana", "Abad", "12345678"))
+    directorio.quitar(1)
+    assert directorio.buscar("abad") == [] and directorio.buscar("12345678") == []
+
+
+FILAS_SP = [
+    _fila(1, "Juan", "Pérez", "12345678"),
+    _fila(2, "Ezequiel", "Zapata", "87654321", "L-12"),
+    _fila(3, "Ana", "Abad", "11112222"),
+    _fila(4, "Luis", "Ramos", "33334444", "EZ-1"),
+]
+
+
+@pytest.mark.parametrize("criterio", ["ez", "per", "juan per", "12345678", "1234", "l-12", "l-1", "abad ana"])
+def test_sp_sin_directorio_da_lo_mismo_que_el_directorio(monkeypatch, criterio):
+    # SP_BUSCAR_MIEMBRO hace LIKE '%x%': el simulado devuelve todo y se filtra en Python
+    monkeypatch.setattr(directorio_miembros, "ejecutar", lambda *a, **k: list(reversed(FILAS_SP)))
+    assert directorio_miembros._desde_sp(criterio, "prefijo") == _directorio(*FILAS_SP).buscar(criterio)
+
+
+def test_limitador_rafaga_y_recarga(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr("directorio_miembros.time.monotonic", lambda: ahora[0])
+    limitador = LimitadorPeticiones(rafaga=3, recarga=1.0)
+    assert [limitador.consumir("ip") for _ in range(3)] == [0, 0, 0]
+    assert limitador.consumir("ip") == 1.0
+    assert limitador.consumir("otra-ip") == 0
+    ahora[0] += 1.0
+    assert limitador.consumir("ip") == 0
+    assert limitador.metricas()["rechazadas"] == 1
+
+
+def test_limitador_olvida_los_clientes_mas_viejos():
+    limitador = LimitadorPeticiones(rafaga=1, recarga=0.001, max_clientes=2)
+    for cliente in ("a", "b", "c"):
+        limitador.consumir(cliente)
+    assert limitador.metricas()["clientes"] == 2
+    assert limitador.consumir("a") == 0      # "a" fue olvidado: ráfaga nueva
@@ -0,0 +1,80 @@
+# tests/test_ejecutor_sp.py
+import ejecutor_sp
+from ejecutor_sp import _preparar, sql_exec
+
+
+def test_sql_exec_posicional_y_con_nombres():
+    assert sql_exec("SP_X", 0) == "EXEC SP_X"
+    assert sql_exec("SP_X", 3) == "EXEC SP_X ?,?,?"
+    assert sql_exec("SP_X", ("a", "@b")) == "EXEC SP_X @a=?, @b=?"
+    assert sql_exec("SP_X", ()) == "EXEC SP_X"
+    assert sql_exec("SP_X", 2) is sql_exec("SP_X", 2)   # se arma una sola vez
+
+
+def test_preparar():
+    assert _preparar("SP_X", None) == ("EXEC SP_X", ())
+    assert _preparar("SP_X", ()) == ("EXEC SP_X", ())
+    assert _preparar("SP_X", [1, None]) == ("EXEC SP_X ?,?", (1, None))
+    assert _preparar("SP_X", {"id": 7, "@nombre": "Ana"}) == ("EXEC SP_X @id=?, @nombre=?", (7, "Ana"))
+
+
+class _Cursor:
+    """Un SP con un conteo de filas y luego un result set."""
+
+    def __init__(self, filas):
+        self._sets = [None, ("id", "nombre")]
+        self._filas = list(filas)
+        self.ejecutado = None
+
+    @property
+    def description(self):
+        cols = self._sets[0]
+        return None if cols is None else [(c, int, None, None, 10, 0, True) for c in cols]
+
+    def execute(self, sql, valores):
+        self.ejecutado = (sql, valores)
+
+    def nextset(self):
+        self._sets.pop(0)
+        return bool(self._sets)
+
+    def fetchmany(self, n):
+        lote, self._filas = self._filas[:n], self._filas[n:]
+        return lote
+
+    def close(self):
+        pass
+
+
+class _Conexion:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.cerrada = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.cerrada = True
+
+
+def _iterar(monkeypatch, filas, lote):
+    conn = _Conexion(_Cursor(filas))
+    monkeypatch.setattr(ejecutor_sp, "get_connection", lambda: conn)
+    return list(ejecutor_sp.iterar("SP_X", (1,), lote=lote)), conn
+
+
+def test_iterar_por_lotes(monkeypatch):
+    lotes, conn = _iterar(monkeypatch, [(i, f"n{i}") for i in range(5)], lote=2)
+    assert [len(l.filas) for l in lotes] == [2, 2, 1]
+    assert lotes[0].columnas == ("id", "nombre") and lotes[0].tipos[0] == (int, 10, 0)
+    assert conn._cursor.ejecutado == ("EXEC SP_X ?", (1,)) and conn.cerrada
+
+
+def test_iterar_sin_filas_entrega_las_columnas(monkeypatch):
+    lotes, conn = _iterar(monkeypatch, [], lote=2)
+    assert len(lotes) == 1 and lotes[0].filas == [] and lotes[0].columnas == ("id", "nombre")
+    assert conn.cerrada
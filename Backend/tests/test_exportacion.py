@@ -0,0 +1,45 @@
+# tests/test_exportacion.py
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from ejecutor_sp import ResultSet
+from exportacion import lineas_csv, lineas_ndjson
+
+COLUMNAS = ("id", "fecha", "monto")
+TIPOS = ((int, 10, 0), (datetime, 27, 7), (Decimal, 10, 2))
+
+
+def _lotes(*filas_por_lote):
+    return [ResultSet(COLUMNAS, list(filas), TIPOS) for filas in filas_por_lote]
+
+
+def test_csv_cabecera_una_vez_y_valores():
+    lotes = _lotes([(1, datetime(2024, 5, 1, 8, 30), Decimal("10.50"))], [(2, None, Decimal("0"))])
+    texto = b"".join(lineas_csv(lotes)).decode("utf-8")
+    assert texto == "\ufeffid,fecha,monto\n1,2024-05-01T08:30:00,10.5\n2,,0.0\n"
+
+
+def test_csv_vacio_conserva_la_cabecera():
+    assert b"".join(lineas_csv(_lotes([]))).decode("utf-8") == "\ufeffid,fecha,monto\n"
+
+
+def test_ndjson():
+    texto = b"".join(lineas_ndjson(_lotes([(1, None, Decimal("2.5"))]))).decode("utf-8")
+    assert texto == '{"id": 1, "fecha": null, "monto": 2.5}\n'
+
+
+@pytest.mark.parametrize("formato", ["arrow", "parquet"])
+def test_columnar_vacio_conserva_el_esquema(formato):
+    pa = pytest.importorskip("pyarrow")
+    import exportacion
+
+    datos = b"".join(exportacion.SERIALIZADORES[formato](_lotes([])))
+    if formato == "arrow":
+        tabla = pa.ipc.open_stream(datos).read_all()
+    else:
+        tabla = pytest.importorskip("pyarrow.parquet").read_table(io.BytesIO(datos))
+    assert tabla.num_rows == 0 and tabla.column_names == list(COLUMNAS)
+    assert tabla.schema.field("id").type == pa.int64()
@@ -0,0 +1,62 @@
+# tests/test_indice_noticias.py
+from datetime import datetime
+
+from indice_noticias import IndiceNoticias, terminos_busqueda, terminos_documento
+
+
+def _indice(*docs):
+    indice = IndiceNoticias()
+    for id_pub, titulo, contenido, dia in docs:
+        indice.poner({"idpublicacion": id_pub, "titulo": titulo, "contenido": contenido,
+                      "fecha": datetime(2024, 1, dia)})
+    return indice
+
+
+def _ids(resultados):
+    return [doc["idpublicacion"] for _, doc in resultados]
+
+
+INDICE = _indice(
+    ("p1", "Rescate acuático en el río", "Los bomberos realizaron un rescate.", 1),
+    ("p2", "Capacitación de bomberos", "Curso de rescate urbano #RescateUrbano", 2),
+    ("p3", "Campaña de donación", "Se recibieron donaciones para la compañía.", 3),
+)
+
+
+def test_terminos_sin_tildes_stopwords_y_hashtags():
+    assert terminos_documento("El Rescate ACUÁTICO #RescateUrbano") == [
+        "rescate", "acuatico", "#rescateurbano", "rescateurbano"]
+    assert terminos_busqueda("rescate de la") == ["rescate", "la"]   # la última se conserva
+
+
+def test_bm25_titulo_pesa_mas_que_el_contenido():
+    assert _ids(INDICE.buscar("acuatico")) == ["p1"]
+    indice = _indice(("a", "Simulacro", "incendio forestal", 2), ("b", "Incendio", "simulacro forestal", 1))
+    assert _ids(indice.buscar("incendio")) == ["b", "a"]
+    assert _ids(indice.buscar("simulacro")) == ["a", "b"]
+
+
+def test_todas_las_palabras_deben_aparecer():
+    assert set(_ids(INDICE.buscar("rescate bomberos"))) == {"p1", "p2"}
+    assert _ids(INDICE.buscar("rescate donacion")) == []
+
+
+def test_prefijos_y_hashtags():
+    assert _ids(INDICE.buscar("capac")) == ["p2"]
+    assert set(_ids(INDICE.buscar("don"))) == {"p3"}
+    assert _ids(INDICE.buscar("#rescateurbano")) == ["p2"]
+    assert _ids(INDICE.buscar("c")) == []     # una sola letra no expande
+
+
+def test_a_igual_puntaje_la_mas_reciente_primero():
+    indice = _indice(("a", "Simulacro", "", 1), ("b", "Simulacro", "", 5))
+    assert _ids(indice.buscar("simulacro")) == ["b", "a"]
+
+
+def test_reemplazar_quitar_y_filtro():
+    indice = _indice(("a", "Simulacro", "", 1), ("b", "Simulacro", "", 5))
+    indice.poner({"idpublicacion": "a", "titulo": "Incendio", "contenido": "", "fecha": datetime(2024, 1, 1)})
+    assert _ids(indice.buscar("simulacro")) == ["b"] and _ids(indice.buscar("incendio")) == ["a"]
+    indice.quitar("b")
+    assert indice.buscar("simulacro") == [] and indice.metricas()["publicaciones"] == 1
+    assert indice.buscar("incendio", filtro=lambda d: d["idpublicacion"] != "a") == []
@@ -0,0 +1,76 @@
+# tests/test_indice_usuarios.py
+from indice_usuarios import MAX_TRAMOS, IndiceUsuarios
+
+
+def _indice(*personas):
+    indice = IndiceUsuarios()
+    for i, (nombre, apellido, *resto) in enumerate(personas, start=1):
+        doc = {"tipo": "miembro", "id": i, "nombre": nombre, "apellido": apellido}
+        doc.update(resto[0] if resto else {})
+        indice.poner(doc)
+    return indice
+
+
+def _nombres(sugerencias):
+    return [s["nombre_completo"] for s in sugerencias]
+
+
+def test_prefijo_sale_por_apellido_y_nombre_aunque_el_termino_difiera():
+    # "mario" < "martinez" como término, pero Martinez va antes que Zapata
+    indice = _indice(("Mario", "Zapata"), ("Ana", "Martinez"))
+    assert _nombres(indice.sugerir("ma")) == ["Martinez, Ana", "Zapata, Mario"]
+
+
+def test_limite_corta_sobre_el_orden_por_apellido():
+    indice = _indice(("Mario", "Zapata"), ("Ana", "Martinez"), ("Marta", "Alvarez"))
+    assert _nombres(indice.sugerir("ma", limite=1)) == ["Alvarez, Marta"]
+    assert _nombres(indice.sugerir("ma", limite=2)) == ["Alvarez, Marta", "Martinez, Ana"]
+
+
+def test_todas_las_palabras_deben_coincidir_sin_tildes():
+    indice = _indice(("Juan", "Pérez"), ("Juana", "Paz"), ("Pedro", "Pérez"))
+    assert _nombres(indice.sugerir("per ju")) == ["Pérez, Juan"]
+
+
+def test_dni_y_legajo_exactos_primero():
+    indice = _indice(
+        ("Ana", "Abad", {"dni": "12345678"}),
+        ("Luis", "Ramos", {"dni": "87654321", "legajo": "L-12"}),
+    )
+    primero = indice.sugerir("87654321")[0]
+    assert (primero["id"], primero["coincidencia"]) == (2, "dni")
+    primero = indice.sugerir("l-12")[0]
+    assert (primero["id"], primero["coincidencia"]) == (2, "legajo")
+
+
+def test_filtro_por_tipo_y_minimo_de_caracteres():
+    indice = _indice(("Ana", "Abad"))
+    indice.poner({"tipo": "postulante", "id": 1, "nombre": "Ana", "apellido": "Acosta"})
+    assert _nombres(indice.sugerir("an", tipo="postulante")) == ["Acosta, Ana"]
+    assert indice.sugerir("a") == []
+
+
+def test_poner_reemplaza_y_quitar_borra_las_entradas():
+    indice = _indice(("Ana", "Abad"))
+    indice.poner({"tipo": "miembro", "id": 1, "nombre": "Ana", "apellido": "Zuñiga"})
+    assert indice.sugerir("abad") == []
+    assert _nombres(indice.sugerir("zun")) == ["Zuñiga, Ana"]
+    indice.quitar(("miembro", 1))
+    assert indice.sugerir("zun") == [] and indice.metricas()["miembros"] == 0
+
+
+def test_carga_inicial_con_ordenar():
+    indice = IndiceUsuarios()
+    for i, apellido in enumerate(("Mora", "Luna", "Maza")):
+        indice.poner({"tipo": "miembro", "id": i, "nombre": "X", "apellido": apellido}, carga=True)
+    indice.ordenar()
+    assert indice.sugerir("m") == []   # 1 carácter: no sugiere
+    assert _nombres(indice.sugerir("ma")) == ["Maza, X"]
+    assert _nombres(indice.sugerir("mo")) == ["Mora, X"]
+
+
+def test_prefijo_numerico_con_muchos_terminos():
+    # Más de MAX_TRAMOS DNIs distintos con el mismo prefijo: todos aparecen
+    n = MAX_TRAMOS + 8
+    indice = _indice(*[("Ana", f"A{i:03d}", {"dni": f"4000{i:04d}"}) for i in range(n)])
+    assert len(indice.sugerir("4000", limite=20)) == 20
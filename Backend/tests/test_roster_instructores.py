@@ -0,0 +1,43 @@
+# tests/test_roster_instructores.py
+from roster_instructores import Plantel, _distancia
+
+INSTRUCTORES = [
+    {"id": 1, "nombre_completo": "José Ramírez", "rango": "Teniente", "certificaciones": "Rescate vehicular", "especialidad": "Rescate"},
+    {"id": 2, "nombre_completo": "María Gutiérrez", "rango": "Capitán", "certificaciones": "Materiales peligrosos", "especialidad": "HAZMAT"},
+    {"id": 3, "nombre_completo": "Jorge Ramos", "rango": "Seccionario", "certificaciones": None, "especialidad": "rescate "},
+]
+PLANTEL = Plantel(INSTRUCTORES, version=0)
+
+
+def _ids(instructores):
+    return [i["id"] for i in instructores]
+
+
+def test_distancia_con_transposiciones_y_corte():
+    assert _distancia("ramirez", "ramirez", 2) == 0
+    assert _distancia("ramriez", "ramirez", 2) == 1       # transposición adyacente
+    assert _distancia("gutierez", "gutierrez", 2) == 1
+    assert _distancia("abc", "xyzabc", 2) == 3            # largo distinto: corta sin calcular
+    assert _distancia("teniente", "capitanx", 2) == 3
+
+
+def test_buscar_exacto_con_errores_y_a_medio_escribir():
+    assert _ids(PLANTEL.buscar("ramirez")) == [1]
+    assert _ids(PLANTEL.buscar("Ramriez")) == [1]          # error de tipeo
+    assert _ids(PLANTEL.buscar("gutierez capitan")) == [2]
+    assert _ids(PLANTEL.buscar("mater")) == [2]            # prefijo
+    assert _ids(PLANTEL.buscar("ram")) == [1, 3]           # orden del SP a igual puntaje
+    assert PLANTEL.buscar("ramirez hazmat") == []          # todas las palabras deben aparecer
+    assert PLANTEL.buscar("  ") == []
+
+
+def test_exacto_antes_que_aproximado():
+    # "ramos" exacto en 3; en 1 solo se parece a "ramirez" por el comienzo
+    assert _ids(PLANTEL.buscar("ramos"))[0] == 3
+
+
+def test_especialidad():
+    assert _ids(PLANTEL.por_especialidad(" RESCATE")) == [1, 3]
+    assert _ids(PLANTEL.buscar("ram", especialidad="hazmat")) == []
+    assert PLANTEL.especialidades() == [
+        {"especialidad": "HAZMAT", "total": 1}, {"especialidad": "Rescate", "total": 2}]
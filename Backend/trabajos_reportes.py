@@ -0,0 +1,216 @@
+# trabajos_reportes.py
+"""
+Cola de trabajos de exportación de reportes en SEGUNDO PLANO.
+
+    POST /api/admin/reportes/trabajos               -> 202 {trabajo}
+    GET  /api/admin/reportes/trabajos/{id}          -> estado / progreso
+    GET  /api/admin/reportes/trabajos/{id}/archivo  -> descarga
+
+El request solo encola: el SP se ejecuta en un pool de hilos propio
+(TRABAJADORES) y el archivo se escribe en disco lote a lote
+(exportacion.bloques_exportacion), así que memoria y tiempo del request
+no dependen del tamaño del reporte.
+
+✅ Mismo reporte + formato + filtros ya en cola / procesando -> se devuelve
+   ese trabajo (no se lanza otro igual)
+✅ Ya generado hace menos de REUSO_SEG y sin escrituras desde entonces ->
+   se reutiliza el archivo. "Sin escrituras" = la versión de los grupos de
+   cache_web del reporte no cambió (los endpoints @invalida la suben)
+✅ Progreso: filas escritas hasta el momento
+✅ Trabajos terminados y sus archivos se borran a los RETENCION_SEG
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+from cache_web import cache_grupo
+from ejecutor_sp import Params
+from exportacion import bloques_exportacion
+
+# =============================================
+# CONFIGURACIÓN
+# =============================================
+DIRECTORIO_REPORTES = Path(__file__).resolve().parent / "cache_reportes"
+
+TRABAJADORES = 2          # exportaciones simultáneas (cada una usa 1 conexión del pool)
+REUSO_SEG = 15 * 60       # un archivo se reutiliza hasta 15 min si no hubo escrituras
+RETENCION_SEG = 60 * 60   # trabajos terminados (y sus archivos) se borran a la hora
+
+EN_COLA, PROCESANDO, LISTO, ERROR = "en_cola", "procesando", "listo", "error"
+
+
+@dataclass
+class Trabajo:
+    id: str
+    reporte: str
+    formato: str
+    clave: Hashable
+    grupos: Tuple[str, ...]
+    estado: str = EN_COLA
+    filas: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+    creado: float = field(default_factory=time.time)
+    terminado: Optional[float] = None
+    versiones: Tuple[int, ...] = ()
+    ruta: Optional[Path] = None
+
+    def a_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "reporte": self.reporte,
+            "formato": self.formato,
+            "estado": self.estado,
+            "filas": self.filas,
+            "bytes": self.bytes if self.estado == LISTO else None,
+            "error": self.error,
+            "creado": self.creado,
+            "terminado": self.terminado,
+        }
+
+
+_trabajos: Dict[str, Trabajo] = {}
+_por_clave: Dict[Hashable, str] = {}   # clave -> último trabajo con esos filtros
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+# =============================================
+# POOL DE TRABAJADORES
+# =============================================
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                # Archivos de una ejecución anterior: el registro en memoria ya no existe
+                shutil.rmtree(DIRECTORIO_REPORTES, ignore_errors=True)
+                DIRECTORIO_REPORTES.mkdir(parents=True, exist_ok=True)
+                _executor = ThreadPoolExecutor(max_workers=TRABAJADORES, thread_name_prefix="reporte")
+    return _executor
+
+
+def cerrar_trabajos():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _versiones(grupos: Tuple[str, ...]) -> Tuple[int, ...]:
+    return tuple(cache_grupo(g).version for g in grupos)
+
+
+# =============================================
+# EJECUCIÓN
+# =============================================
+def _ejecutar(trabajo: Trabajo, nombre_sp: str, params: Params):
+    # Versión ANTES de leer: una escritura durante la exportación invalida el archivo
+    trabajo.versiones = _versiones(trabajo.grupos)
+    trabajo.estado = PROCESANDO
+    destino = DIRECTORIO_REPORTES / f"{trabajo.id}.{trabajo.formato}"
+    fd, temporal = tempfile.mkstemp(dir=DIRECTORIO_REPORTES, prefix=".tmp-")
+
+    def progreso(n: int):
+        trabajo.filas += n
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            bloques = bloques_exportacion(
+                nombre_sp, params, trabajo.formato,
+                progreso=progreso,
+            )
+            for bloque in bloques:
+                f.write(bloque)
+        os.replace(temporal, destino)
+        trabajo.ruta = destino
+        trabajo.bytes = destino.stat().st_size
+        trabajo.estado = LISTO
+    except Exception as e:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        trabajo.error = getattr(e, "detail", None) or str(e)
+        trabajo.estado = ERROR
+        print(f"❌ Error en trabajo de reporte {trabajo.id} ({trabajo.reporte}): {trabajo.error}")
+    finally:
+        trabajo.terminado = time.time()
+
+
+# =============================================
+# API
+# =============================================
+def _reutilizable(trabajo: Trabajo, ahora: float) -> bool:
+    if trabajo.estado == EN_COLA:
+        return True
+    if trabajo.estado == PROCESANDO:
+        return trabajo.versiones == _versiones(trabajo.grupos)
+    return (
+        trabajo.estado == LISTO
+        and ahora - trabajo.terminado < REUSO_SEG
+        and trabajo.versiones == _versiones(trabajo.grupos)
+        and trabajo.ruta is not None and trabajo.ruta.exists()
+    )
+
+
+def _limpiar(ahora: float):
+    """Borra trabajos terminados hace más de RETENCION_SEG. Llamar con _lock."""
+    for id_trabajo, trabajo in list(_trabajos.items()):
+        if trabajo.terminado is not None and ahora - trabajo.terminado > RETENCION_SEG:
+            del _trabajos[id_trabajo]
+            if _por_clave.get(trabajo.clave) == id_trabajo:
+                del _por_clave[trabajo.clave]
+            if trabajo.ruta is not None:
+                try:
+                    trabajo.ruta.unlink()
+                except OSError:
+                    pass
+
+
+def encolar(
+    reporte: str,
+    nombre_sp: str,
+    params: Params,
+    formato: str,
+    grupos: Tuple[str, ...] = (),
+) -> Tuple[Trabajo, bool]:
+    """
+    Encola la exportación o devuelve un trabajo equivalente en curso /
+    reutilizable. Devuelve (trabajo, reutilizado).
+    """
+    clave = (reporte, formato, tuple(params.items()) if isinstance(params, dict) else tuple(params))
+    pool = _pool()
+    ahora = time.time()
+    with _lock:
+        _limpiar(ahora)
+        existente = _trabajos.get(_por_clave.get(clave))
+        if existente is not None and _reutilizable(existente, ahora):
+            return existente, True
+
+        trabajo = Trabajo(
+            id=uuid.uuid4().hex,
+            reporte=reporte, formato=formato, clave=clave, grupos=tuple(grupos),
+        )
+        _trabajos[trabajo.id] = trabajo
+        _por_clave[clave] = trabajo.id
+    pool.submit(_ejecutar, trabajo, nombre_sp, params)
+    return trabajo, False
+
+
+def obtener(id_trabajo: str) -> Optional[Trabajo]:
+    with _lock:
+        return _trabajos.get(id_trabajo)
+
+
+def metricas_trabajos() -> dict:
+    with _lock:
+        estados = [t.estado for t in _trabajos.values()]
+    return {estado: estados.count(estado) for estado in (EN_COLA, PROCESANDO, LISTO, ERROR)}
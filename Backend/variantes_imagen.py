@@ -0,0 +1,97 @@
+# variantes_imagen.py
+"""
+Generación de variantes (miniaturas / WebP / AVIF) de las imágenes del almacén.
+
+Este módulo corre DENTRO de los procesos del ProcessPoolExecutor de
+almacen_media, por eso solo importa Pillow (y no FastAPI ni pyodbc).
+
+Pillow es opcional: sin él, disponible() es False y la API sirve el original.
+"""
+import os
+import tempfile
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow no instalado
+    Image = ImageOps = features = None
+
+# fmt (parámetro de la URL) -> (formato Pillow, media type)
+FORMATOS = {
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+# Anchos servidos: el pedido se redondea al siguiente para no llenar el disco
+ANCHOS = (160, 320, 480, 640, 800, 1024, 1280, 1600)
+
+CALIDAD = {"WEBP": 80, "AVIF": 60, "JPEG": 82}
+
+
+def disponible() -> bool:
+    return Image is not None
+
+
+def soporta(fmt: str) -> bool:
+    if Image is None or fmt not in FORMATOS:
+        return False
+    if fmt == "avif":
+        return bool(features.check("avif"))
+    if fmt == "webp":
+        return bool(features.check("webp"))
+    return True
+
+
+def ancho_normalizado(ancho: int) -> int:
+    for a in ANCHOS:
+        if ancho <= a:
+            return a
+    return ANCHOS[-1]
+
+
+def dimensiones(ruta: str):
+    """
+    (ancho, alto) tal como se muestra (respeta la orientación EXIF), leyendo
+    solo la cabecera. None sin Pillow o si el archivo no es una imagen.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(ruta) as img:
+            ancho, alto = img.size
+            if img.getexif().get(0x0112) in (5, 6, 7, 8):   # rotada 90°
+                ancho, alto = alto, ancho
+            return ancho, alto
+    except (OSError, ValueError):
+        return None
+
+
+def generar_variante(origen: str, destino: str, ancho: int, fmt: str) -> str:
+    """
+    Redimensiona `origen` a `ancho` px (sin agrandar) y lo guarda como `fmt`
+    en `destino` (escritura atómica). Devuelve `destino`.
+    """
+    formato = FORMATOS[fmt][0]
+    with Image.open(origen) as img:
+        img = ImageOps.exif_transpose(img)
+        if ancho and img.width > ancho:
+            alto = max(1, round(img.height * ancho / img.width))
+            img = img.resize((ancho, alto), Image.LANCZOS)
+        if formato == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, format=formato, quality=CALIDAD[formato])
+            os.replace(temporal, destino)
+        except BaseException:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+    return destino
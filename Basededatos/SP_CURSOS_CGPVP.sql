@@ -99,7 +99,7 @@ BEGIN
         i.certificaciones AS instructor_certificaciones,
         i.email AS instructor_email,
         i.telefono AS instructor_telefono,
-        i.foto AS instructor_foto,
+        dbo.FN_HASH_MEDIA(i.foto, i.foto_sha256) AS instructor_foto_sha256,  -- /api/media/{hash}
         i.bio AS instructor_bio
     FROM 
         cursos c
@@ -7,7 +7,95 @@
 USE DB_CGPVP2;
 GO
 
-CREATE PROCEDURE SP_ObtenerTodosInstructores
+-- =============================================
+-- MIGRACIÓN: FOTO DEL INSTRUCTOR EN BINARIO
+-- La foto llegaba como base64 (data URL) en foto NVARCHAR(MAX) y viajaba
+-- en cada card del listado. Ahora se guarda decodificada en foto_bin, con
+-- su SHA-256 PERSISTED: los listados devuelven solo el hash y la imagen se
+-- sirve aparte en /instructores/{id}/foto?v={hash}.
+-- =============================================
+IF COL_LENGTH('dbo.instructores', 'foto_bin') IS NULL
+BEGIN
+    ALTER TABLE dbo.instructores ADD foto_bin VARBINARY(MAX) NULL;
+END
+GO
+
+IF COL_LENGTH('dbo.instructores', 'foto_sha256') IS NULL
+BEGIN
+    ALTER TABLE dbo.instructores
+        ADD foto_sha256 AS CONVERT(BINARY(32), HASHBYTES('SHA2_256', foto_bin)) PERSISTED;
+END
+GO
+
+-- 'data:image/png;base64,AAAA...' (o solo el base64) -> VARBINARY.
+-- NULL si el texto no es base64 válido.
+CREATE OR ALTER FUNCTION dbo.FN_BASE64_A_BINARIO (@texto NVARCHAR(MAX))
+RETURNS VARBINARY(MAX)
+AS
+BEGIN
+    DECLARE @b64 VARCHAR(MAX) = CAST(
+        CASE WHEN @texto LIKE 'data:%,%'
+             THEN SUBSTRING(@texto, CHARINDEX(',', @texto) + 1, LEN(@texto))
+             ELSE @texto
+        END AS VARCHAR(MAX));
+    RETURN CAST('' AS XML).value('xs:base64Binary(sql:variable("@b64"))', 'VARBINARY(MAX)');
+END;
+GO
+
+-- Hash (CHAR(64) hex) de una columna de media: el SHA-256 que ya guarda
+-- la columna (almacén de media) o, si no, el del blob legado @sha256.
+CREATE OR ALTER FUNCTION dbo.FN_HASH_MEDIA (@valor NVARCHAR(MAX), @sha256 BINARY(32))
+RETURNS CHAR(64)
+AS
+BEGIN
+    IF @sha256 IS NOT NULL
+        RETURN CONVERT(CHAR(64), @sha256, 2);
+    IF LEN(@valor) = 64 AND @valor NOT LIKE '%[^0-9a-fA-F]%'
+        RETURN LOWER(@valor);
+    RETURN NULL;
+END;
+GO
+
+-- La API guarda las fotos nuevas en el almacén de media y manda el hash
+-- en @foto. Si todavía llega base64, el trigger la pasa a foto_bin y vacía
+-- la columna de texto. Las URL externas (http...) y los hash se dejan igual.
+CREATE OR ALTER TRIGGER TR_instructores_foto_binaria
+ON dbo.instructores
+AFTER INSERT, UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    IF NOT UPDATE(foto) RETURN;
+
+    UPDATE i SET
+        foto_bin = d.bin,
+        foto     = NULL
+    FROM dbo.instructores i
+    JOIN inserted ins ON ins.id = i.id
+    CROSS APPLY (SELECT dbo.FN_BASE64_A_BINARIO(ins.foto) AS bin) d
+    WHERE ins.foto IS NOT NULL
+      AND ins.foto <> ''
+      AND ins.foto NOT LIKE 'http%'
+      AND dbo.FN_HASH_MEDIA(ins.foto, NULL) IS NULL
+      AND d.bin IS NOT NULL;
+END;
+GO
+
+-- Migración de las fotos existentes
+UPDATE i SET
+    foto_bin = d.bin,
+    foto     = NULL
+FROM dbo.instructores i
+CROSS APPLY (SELECT dbo.FN_BASE64_A_BINARIO(i.foto) AS bin) d
+WHERE i.foto_bin IS NULL
+  AND i.foto IS NOT NULL
+  AND i.foto <> ''
+  AND i.foto NOT LIKE 'http%'
+  AND dbo.FN_HASH_MEDIA(i.foto, NULL) IS NULL
+  AND d.bin IS NOT NULL;
+GO
+
+CREATE OR ALTER PROCEDURE SP_ObtenerTodosInstructores
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -20,7 +108,9 @@ BEGIN
         experiencia_anios,
         certificaciones,
         email,
-        foto,
+        dbo.FN_HASH_MEDIA(foto, foto_sha256) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
+        CAST(CASE WHEN foto_bin IS NOT NULL OR foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN foto LIKE 'http%' THEN foto END AS foto_externa,
         bio
     FROM instructores
     WHERE estado = 'Activo'
@@ -28,7 +118,7 @@ BEGIN
 END;
 GO
 
-CREATE PROCEDURE SP_ObtenerInstructorPorId
+CREATE OR ALTER PROCEDURE SP_ObtenerInstructorPorId
     @id INT
 AS
 BEGIN
@@ -41,14 +131,16 @@ BEGIN
         experiencia_anios,
         certificaciones,
         email,
-        foto,
+        dbo.FN_HASH_MEDIA(foto, foto_sha256) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
+        CAST(CASE WHEN foto_bin IS NOT NULL OR foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN foto LIKE 'http%' THEN foto END AS foto_externa,
         bio
     FROM instructores
     WHERE id = @id AND estado = 'Activo';
 END;
 GO
 
-CREATE PROCEDURE SP_BuscarInstructores
+CREATE OR ALTER PROCEDURE SP_BuscarInstructores
     @termino NVARCHAR(150)
 AS
 BEGIN
@@ -62,7 +154,9 @@ BEGIN
         experiencia_anios,
         certificaciones,
         email,
-        foto,
+        dbo.FN_HASH_MEDIA(foto, foto_sha256) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
+        CAST(CASE WHEN foto_bin IS NOT NULL OR foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN foto LIKE 'http%' THEN foto END AS foto_externa,
         bio
     FROM instructores
     WHERE estado = 'Activo'
@@ -75,7 +169,7 @@ BEGIN
 END;
 GO
 
-CREATE PROCEDURE SP_FiltrarPorEspecialidad
+CREATE OR ALTER PROCEDURE SP_FiltrarPorEspecialidad
     @especialidad NVARCHAR(100) = NULL
 AS
 BEGIN
@@ -89,11 +183,39 @@ BEGIN
         experiencia_anios,
         certificaciones,
         email,
-        foto,
+        dbo.FN_HASH_MEDIA(foto, foto_sha256) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
+        CAST(CASE WHEN foto_bin IS NOT NULL OR foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN foto LIKE 'http%' THEN foto END AS foto_externa,
         bio
     FROM instructores
     WHERE estado = 'Activo'
         AND (@especialidad IS NULL OR especialidad = @especialidad)
     ORDER BY experiencia_anios DESC;
 END;
-GO
\ No newline at end of file
+GO
+
+-- =============================================
+-- FOTO DE UN INSTRUCTOR
+-- Uso en: GET /instructores/{id}/foto (público y admin)
+-- Con @incluir_foto = 0 solo devuelve el hash (para ETag / 304 / disco).
+-- foto_texto: valor que todavía no pasó a binario (base64 sin migrar)
+-- =============================================
+CREATE OR ALTER PROCEDURE SP_OBTENER_FOTO_INSTRUCTOR
+    @id_instructor INT,
+    @incluir_foto BIT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT
+        id,
+        dbo.FN_HASH_MEDIA(foto, foto_sha256) AS foto_sha256,
+        CAST(CASE WHEN foto_bin IS NOT NULL OR foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN foto LIKE 'http%' THEN foto END AS foto_externa,
+        CASE WHEN @incluir_foto = 1 THEN foto_bin END AS foto_bin,
+        CASE WHEN @incluir_foto = 1 AND foto NOT LIKE 'http%'
+              AND dbo.FN_HASH_MEDIA(foto, NULL) IS NULL THEN foto END AS foto_texto
+    FROM instructores
+    WHERE id = @id_instructor;
+END;
+GO
@@ -7,6 +7,32 @@
 USE DB_CGPVP2;
 GO
 
+-- =============================================
+-- HASH DE LA FOTO (SHA-256)
+-- Descripción: columna calculada PERSISTED, se calcula al escribir la foto.
+-- Permite que los listados devuelvan el hash en lugar del blob y que
+-- /foto/{id} responda ETag / 304 sin leer la imagen.
+-- =============================================
+IF COL_LENGTH('dbo.publicaciones', 'foto_sha256') IS NULL
+BEGIN
+    ALTER TABLE dbo.publicaciones
+        ADD foto_sha256 AS CONVERT(BINARY(32), HASHBYTES('SHA2_256', foto)) PERSISTED;
+END
+GO
+
+-- =============================================
+-- FOTO EN EL ALMACÉN DE MEDIA
+-- Descripción: las fotos nuevas (y las migradas con migrar_media.py) se
+-- guardan en el disco del backend por su SHA-256; la fila guarda solo el
+-- hash en foto_hash y foto (el blob) queda NULL.
+-- Hash efectivo de la foto: COALESCE(foto_hash, foto_sha256)
+-- =============================================
+IF COL_LENGTH('dbo.publicaciones', 'foto_hash') IS NULL
+BEGIN
+    ALTER TABLE dbo.publicaciones ADD foto_hash CHAR(64) NULL;
+END
+GO
+
 -- =============================================
 -- SP1: LISTAR PUBLICACIONES PAGINADO (CON FILTROS)
 -- Descripción: Obtener publicaciones con paginación y filtros
@@ -30,7 +56,7 @@ BEGIN
         p.idpublicacion,
         p.titulo,
         p.contenido,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         p.creado_por,
         p.destacada,
@@ -78,6 +104,124 @@ BEGIN
 END
 GO
 
+-- =============================================
+-- SP1b: LISTAR PUBLICACIONES POR CURSOR (keyset)
+-- Descripción: Misma grilla que SP1 con ?after= en lugar de ?pagina=.
+-- Sin OFFSET: cada rama arranca después de la última fila vista
+-- (@despues_*; NULL = primera página) sobre un índice con su orden,
+-- así la página 50 cuesta lo mismo que la 1. El id desempata:
+--   'reciente'   -> fecha DESC, idpublicacion DESC
+--   'antiguo'    -> fecha ASC,  idpublicacion ASC   (IDX_publicaciones_fecha)
+--   'destacadas' -> destacada DESC, fecha DESC, idpublicacion DESC
+--                   (IX_publicaciones_destacada_fecha)
+-- Devuelve @por_pagina + 1 filas: la extra indica que hay siguiente.
+-- Sin total (scroll infinito). cursor_fecha lleva la fecha con sus 7
+-- decimales: el driver la trunca a microsegundos y el cursor debe
+-- compararse contra el valor exacto.
+-- Uso en: Grid de noticias en la web ("cargar más")
+-- =============================================
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_publicaciones_destacada_fecha')
+    CREATE INDEX IX_publicaciones_destacada_fecha
+        ON dbo.publicaciones(destacada DESC, fecha DESC, idpublicacion DESC);
+GO
+
+CREATE OR ALTER PROCEDURE SP_LISTAR_PUBLICACIONES_CURSOR
+    @por_pagina INT = 9,
+    @SoloDestacadas BIT = 0,
+    @SoloActivas BIT = 1,
+    @busqueda NVARCHAR(200) = NULL,
+    @ordenar_por NVARCHAR(20) = 'reciente', -- 'reciente', 'antiguo', 'destacadas'
+    @despues_destacada BIT = NULL,
+    @despues_fecha VARCHAR(27) = NULL,   -- cursor_fecha: DATETIME2(7) completo, estilo 121
+    @despues_idpublicacion NVARCHAR(100) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @fecha_cursor DATETIME2 = CONVERT(DATETIME2, @despues_fecha, 121);
+
+    -- Primero solo las claves de la página (búsqueda en el índice),
+    -- después las columnas de esas filas
+    DECLARE @pagina TABLE (orden INT IDENTITY(1,1) PRIMARY KEY, idpublicacion NVARCHAR(100) NOT NULL);
+
+    IF @ordenar_por = 'antiguo'
+        INSERT INTO @pagina (idpublicacion)
+        SELECT TOP (@por_pagina + 1) p.idpublicacion
+        FROM publicaciones p
+        WHERE
+            (@despues_idpublicacion IS NULL OR
+                (p.fecha >= @fecha_cursor AND
+                 (p.fecha > @fecha_cursor OR p.idpublicacion > @despues_idpublicacion)))
+        AND (@SoloActivas = 0 OR p.activa = 1)
+        AND (@SoloDestacadas = 0 OR p.destacada = 1)
+        AND (
+            @busqueda IS NULL
+            OR p.titulo LIKE '%' + @busqueda + '%'
+            OR p.contenido LIKE '%' + @busqueda + '%'
+        )
+        ORDER BY p.fecha, p.idpublicacion
+        OPTION (RECOMPILE);
+    ELSE IF @ordenar_por = 'destacadas'
+        INSERT INTO @pagina (idpublicacion)
+        SELECT TOP (@por_pagina + 1) p.idpublicacion
+        FROM publicaciones p
+        WHERE
+            (@despues_idpublicacion IS NULL OR
+                (p.destacada <= @despues_destacada AND
+                 (p.destacada < @despues_destacada OR
+                  p.fecha < @fecha_cursor OR
+                  (p.fecha = @fecha_cursor AND p.idpublicacion < @despues_idpublicacion))))
+        AND (@SoloActivas = 0 OR p.activa = 1)
+        AND (@SoloDestacadas = 0 OR p.destacada = 1)
+        AND (
+            @busqueda IS NULL
+            OR p.titulo LIKE '%' + @busqueda + '%'
+            OR p.contenido LIKE '%' + @busqueda + '%'
+        )
+        ORDER BY p.destacada DESC, p.fecha DESC, p.idpublicacion DESC
+        OPTION (RECOMPILE);
+    ELSE
+        INSERT INTO @pagina (idpublicacion)
+        SELECT TOP (@por_pagina + 1) p.idpublicacion
+        FROM publicaciones p
+        WHERE
+            (@despues_idpublicacion IS NULL OR
+                (p.fecha <= @fecha_cursor AND
+                 (p.fecha < @fecha_cursor OR p.idpublicacion < @despues_idpublicacion)))
+        AND (@SoloActivas = 0 OR p.activa = 1)
+        AND (@SoloDestacadas = 0 OR p.destacada = 1)
+        AND (
+            @busqueda IS NULL
+            OR p.titulo LIKE '%' + @busqueda + '%'
+            OR p.contenido LIKE '%' + @busqueda + '%'
+        )
+        ORDER BY p.fecha DESC, p.idpublicacion DESC
+        OPTION (RECOMPILE);
+
+    SELECT
+        p.idpublicacion,
+        p.titulo,
+        p.contenido,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,
+        p.fecha,
+        p.creado_por,
+        p.destacada,
+        p.fecha_creacion,
+        p.activa,
+        LEN(p.contenido) AS longitud_contenido,
+        CASE
+            WHEN LEN(p.contenido) > 200 THEN LEFT(p.contenido, 200) + '...'
+            ELSE p.contenido
+        END AS resumen,
+        FORMAT(p.fecha, 'dd ''de'' MMMM, yyyy', 'es-ES') AS fecha_formateada,
+        DATEDIFF(DAY, p.fecha, GETDATE()) AS dias_desde_publicacion,
+        CONVERT(VARCHAR(27), p.fecha, 121) AS cursor_fecha   -- clave completa para el cursor
+    FROM @pagina k
+    JOIN publicaciones p ON p.idpublicacion = k.idpublicacion
+    ORDER BY k.orden;
+END
+GO
+
 -- =============================================
 -- SP2: OBTENER PUBLICACIÓN DESTACADA
 -- Descripción: Obtener la publicación más reciente marcada como destacada
@@ -92,7 +236,7 @@ BEGIN
         p.idpublicacion,
         p.titulo,
         p.contenido,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         p.creado_por,
         p.destacada,
@@ -119,7 +263,7 @@ BEGIN
         p.idpublicacion,
         p.titulo,
         p.contenido,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         p.creado_por,
         p.destacada,
@@ -146,7 +290,7 @@ BEGIN
     SELECT TOP (@cantidad)
         p.idpublicacion,
         p.titulo,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         p.contenido,  -- ✅ Agregado contenido completo
         FORMAT(p.fecha, 'dd ''de'' MMMM, yyyy', 'es-ES') AS fecha_formateada,
@@ -302,7 +446,7 @@ BEGIN
     SELECT TOP 10
         p.idpublicacion,
         p.titulo,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         FORMAT(p.fecha, 'dd ''de'' MMMM, yyyy', 'es-ES') AS fecha_formateada,
         CASE 
@@ -368,10 +512,13 @@ BEGIN
             WHERE idpublicacion != @idpublicacion;
         END
         
+        -- @foto reemplaza la imagen: el hash del almacén de media
+        -- (foto_hash) ya no corresponde, se vuelve al hash del blob
         UPDATE publicaciones
         SET titulo = @titulo,
             contenido = @contenido,
             foto = @foto,
+            foto_hash = NULL,
             fecha = @fecha,
             destacada = @destacada
         WHERE idpublicacion = @idpublicacion;
@@ -492,7 +639,7 @@ BEGIN
         p.idpublicacion,
         p.titulo,
         p.contenido,
-        p.foto,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,  -- la imagen se sirve aparte (/api/media/{hash})
         p.fecha,
         p.creado_por,
         p.destacada,
@@ -578,6 +725,7 @@ BEGIN
             SET titulo = @titulo,
                 contenido = @contenido, 
                 foto = @foto,
+                foto_hash = NULL,   -- la foto nueva reemplaza a la del almacén de media
                 fecha = @fecha
             WHERE idpublicacion = @idpublicacion 
               AND creado_por = 'Facebook';
@@ -607,14 +755,74 @@ BEGIN
 END
 GO
 
+-- =============================================
+-- SP16: OBTENER SOLO LA FOTO DE UNA PUBLICACIÓN
+-- Descripción: hash + tamaño, y el blob solo si @incluir_foto = 1
+-- Uso en: /api/noticias/foto/{id} y /api/admin/noticias/foto/{id}
+--         (sin leer contenido NVARCHAR(MAX) ni el resto de la fila)
+-- =============================================
+CREATE OR ALTER PROCEDURE SP_OBTENER_FOTO_PUBLICACION
+    @idpublicacion NVARCHAR(100),
+    @incluir_foto BIT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT
+        p.idpublicacion,
+        COALESCE(p.foto_hash, CONVERT(CHAR(64), p.foto_sha256, 2)) AS foto_sha256,
+        DATALENGTH(p.foto) AS foto_bytes,
+        CASE WHEN @incluir_foto = 1 THEN p.foto END AS foto
+    FROM publicaciones p
+    WHERE p.idpublicacion = @idpublicacion;
+END
+GO
+
+-- =============================================
+-- SP17: FOTO DE UNA PUBLICACIÓN EN BLOQUES
+-- Descripción: el blob partido en filas de @tam_bloque bytes (SUBSTRING
+--              sobre el LOB), para escribirlo a disco bloque a bloque sin
+--              tener la imagen entera en memoria en la API
+-- Uso en: almacen_media (cuando la foto no está en el disco local)
+-- =============================================
+CREATE OR ALTER PROCEDURE SP_OBTENER_FOTO_PUBLICACION_BLOQUES
+    @idpublicacion NVARCHAR(100),
+    @tam_bloque INT = 524288
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @total BIGINT = (
+        SELECT DATALENGTH(foto) FROM publicaciones WHERE idpublicacion = @idpublicacion
+    );
+
+    IF @total IS NULL OR @total = 0
+        RETURN;
+
+    WITH bloques AS (
+        SELECT TOP ((@total + @tam_bloque - 1) / @tam_bloque)
+            ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS nro_bloque
+        FROM sys.all_objects a CROSS JOIN sys.all_objects b
+    )
+    SELECT
+        b.nro_bloque,
+        SUBSTRING(p.foto, b.nro_bloque * @tam_bloque + 1, @tam_bloque) AS bloque
+    FROM bloques b
+    CROSS JOIN publicaciones p
+    WHERE p.idpublicacion = @idpublicacion
+    ORDER BY b.nro_bloque;
+END
+GO
+
 PRINT '========================================';
 PRINT 'STORED PROCEDURES DE NOTICIAS';
 PRINT 'CREADOS EXITOSAMENTE';
 PRINT '========================================';
 PRINT '';
-PRINT 'Total de SPs creados: 15';
+PRINT 'Total de SPs creados: 18';
 PRINT '';
 PRINT 'SP1:  SP_LISTAR_PUBLICACIONES_CON_FILTROS';
+PRINT 'SP1b: SP_LISTAR_PUBLICACIONES_CURSOR';
 PRINT 'SP2:  SP_OBTENER_PUBLICACION_DESTACADA';
 PRINT 'SP3:  SP_OBTENER_PUBLICACION_POR_ID';
 PRINT 'SP4:  SP_OBTENER_PUBLICACIONES_RECIENTES';
@@ -629,23 +837,26 @@ PRINT 'SP12: SP_OBTENER_PUBLICACIONES_POR_FECHAS';
 PRINT 'SP13: SP_CONTAR_PUBLICACIONES_POR_ORIGEN';
 PRINT 'SP14: SP_PUBLICACIONES_POR_MES';
 PRINT 'SP15: SP_SINCRONIZAR_PUBLICACION_FACEBOOK';
+PRINT 'SP16: SP_OBTENER_FOTO_PUBLICACION';
+PRINT 'SP17: SP_OBTENER_FOTO_PUBLICACION_BLOQUES';
 PRINT '========================================';
 GO
 CREATE or ALTER PROCEDURE SP_INSERTAR_ACTUALIZAR_PUBLICACION
     @idpublicacion VARCHAR(255),
     @titulo NVARCHAR(MAX),
     @contenido NVARCHAR(MAX),
-    @foto NVARCHAR(MAX),
+    @foto VARBINARY(MAX),
     @fecha DATETIME,
-    @creado_por VARCHAR(50)
+    @creado_por VARCHAR(50),
+    @foto_hash CHAR(64) = NULL   -- foto ya guardada en el almacén de media
 AS
 BEGIN
     -- 1. Verificamos si el ID ya existe en la tabla
     IF NOT EXISTS (SELECT 1 FROM publicaciones WHERE idpublicacion = @idpublicacion)
     BEGIN
         -- 2. Si no existe, lo insertamos normal
-        INSERT INTO publicaciones (idpublicacion, titulo, contenido, foto, fecha, creado_por)
-        VALUES (@idpublicacion, @titulo, @contenido, @foto, @fecha, @creado_por);
+        INSERT INTO publicaciones (idpublicacion, titulo, contenido, foto, foto_hash, fecha, creado_por)
+        VALUES (@idpublicacion, @titulo, @contenido, @foto, @foto_hash, @fecha, @creado_por);
         
         PRINT '✅ Nueva publicación guardada correctamente.';
     END
@@ -140,7 +140,9 @@ CREATE TABLE instructores (
     certificaciones NVARCHAR(500) NULL,
     email NVARCHAR(100) NULL,
     telefono CHAR(9) NULL,
-    foto NVARCHAR(MAX) NULL,
+    foto NVARCHAR(MAX) NULL,            -- SHA-256 en el almacén de media (legado: base64)
+    foto_bin VARBINARY(MAX) NULL,
+    foto_sha256 AS CONVERT(BINARY(32), HASHBYTES('SHA2_256', foto_bin)) PERSISTED,
     bio NVARCHAR(1000) NULL,
     estado NVARCHAR(20) NOT NULL DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Inactivo')),
     fecha_registro DATETIME2 DEFAULT SYSUTCDATETIME(),
@@ -248,6 +250,8 @@ CREATE TABLE publicaciones (
     titulo NVARCHAR(200) NOT NULL,
     contenido NVARCHAR(MAX) NOT NULL,
     foto VARBINARY(MAX) NULL,
+    foto_sha256 AS CONVERT(BINARY(32), HASHBYTES('SHA2_256', foto)) PERSISTED,
+    foto_hash CHAR(64) NULL,            -- foto en el almacén de media (foto queda NULL)
     fecha DATETIME2 NOT NULL,
     creado_por NVARCHAR(20) DEFAULT 'Facebook' CHECK (creado_por IN ('Facebook', 'Admin')),
     destacada BIT DEFAULT 0 NOT NULL,
@@ -692,7 +696,8 @@ CREATE OR ALTER PROCEDURE SP_INSERTAR_ACTUALIZAR_PUBLICACION
     @contenido NVARCHAR(MAX),  
     @foto VARBINARY(MAX),  
     @fecha DATETIME,  
-    @creado_por VARCHAR(50)  
+    @creado_por VARCHAR(50),
+    @foto_hash CHAR(64) = NULL   -- foto ya guardada en el almacén de media
 AS  
 BEGIN  
     SET NOCOUNT ON;
@@ -707,9 +712,9 @@ BEGIN
         )  
         BEGIN  
             INSERT INTO publicaciones 
-            (idpublicacion, titulo, contenido, foto, fecha, creado_por)  
+            (idpublicacion, titulo, contenido, foto, foto_hash, fecha, creado_por)  
             VALUES 
-            (@idpublicacion, @titulo, @contenido, @foto, @fecha, @creado_por);  
+            (@idpublicacion, @titulo, @contenido, @foto, @foto_hash, @fecha, @creado_por);  
         END  
 
         COMMIT TRANSACTION;
@@ -3,6 +3,10 @@
 -- Archivo : 01_SP_DASHBOARD.sql
 -- DB      : DB_CGPVP2
 -- Desc    : KPIs principales, graficos y actividad reciente
+--           Los conteos de miembros / postulantes salen de
+--           dashboard_resumen (09_SP_DASHBOARD_RESUMEN.sql), que los
+--           triggers mantienen al dia: se leen O(grupos) filas, no
+--           las tablas completas.
 -- ============================================================
 USE DB_CGPVP2;
 GO
@@ -15,16 +19,17 @@ AS
 BEGIN
     SET NOCOUNT ON;
     SELECT
-        -- Postulantes
-        (SELECT COUNT(*)   FROM postulantes)                                        AS total_postulantes,
-        (SELECT COUNT(*)   FROM postulantes
-         WHERE MONTH(fecha_registro)=MONTH(GETDATE())
-           AND YEAR(fecha_registro) =YEAR(GETDATE()))                               AS postulantes_este_mes,
-        -- Miembros
-        (SELECT COUNT(*)   FROM miembros)                                           AS total_miembros,
-        (SELECT COUNT(*)   FROM miembros WHERE estado='Activo')                     AS miembros_activos,
-        (SELECT COUNT(*)   FROM miembros WHERE estado='Suspendido')                 AS miembros_suspendidos,
-        (SELECT COUNT(*)   FROM miembros WHERE estado='Baja')                       AS miembros_baja,
+        -- Postulantes  (dashboard_resumen)
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen
+         WHERE dimension='postulantes_mes')                                         AS total_postulantes,
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen
+         WHERE dimension='postulantes_mes'
+           AND clave=CONVERT(NVARCHAR(7),GETDATE(),126))                            AS postulantes_este_mes,
+        -- Miembros  (dashboard_resumen)
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen WHERE dimension='estado')                     AS total_miembros,
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen WHERE dimension='estado' AND clave='Activo')     AS miembros_activos,
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen WHERE dimension='estado' AND clave='Suspendido') AS miembros_suspendidos,
+        (SELECT ISNULL(SUM(cantidad),0) FROM dashboard_resumen WHERE dimension='estado' AND clave='Baja')       AS miembros_baja,
         -- Instructores
         (SELECT COUNT(*)   FROM instructores WHERE estado='Activo')                 AS instructores_activos,
         -- Cursos
@@ -48,12 +53,14 @@ CREATE OR ALTER PROCEDURE SP_DS_GRAFICO_MIEMBROS_ESTADO
 AS
 BEGIN
     SET NOCOUNT ON;
-    SELECT estado,
-           COUNT(*) AS cantidad,
-           CAST(ROUND(COUNT(*)*100.0 / NULLIF((SELECT COUNT(*) FROM miembros),0),2)
+    DECLARE @total INT = (SELECT SUM(cantidad) FROM dashboard_resumen WHERE dimension = 'estado');
+
+    SELECT clave AS estado,
+           cantidad,
+           CAST(ROUND(cantidad*100.0 / NULLIF(@total,0),2)
                 AS DECIMAL(5,2)) AS porcentaje
-    FROM miembros
-    GROUP BY estado
+    FROM dashboard_resumen
+    WHERE dimension = 'estado' AND cantidad > 0
     ORDER BY cantidad DESC;
 END
 GO
@@ -65,9 +72,9 @@ CREATE OR ALTER PROCEDURE SP_DS_GRAFICO_MIEMBROS_RANGO
 AS
 BEGIN
     SET NOCOUNT ON;
-    SELECT rango, COUNT(*) AS cantidad
-    FROM miembros
-    GROUP BY rango
+    SELECT clave AS rango, cantidad
+    FROM dashboard_resumen
+    WHERE dimension = 'rango' AND cantidad > 0
     ORDER BY cantidad DESC;
 END
 GO
@@ -79,16 +86,19 @@ CREATE OR ALTER PROCEDURE SP_DS_GRAFICO_POSTULANTES_MES
 AS
 BEGIN
     SET NOCOUNT ON;
+    -- Meses completos: desde el mes de hace un año hasta el actual
+    DECLARE @desde NVARCHAR(7) = CONVERT(NVARCHAR(7), DATEADD(MONTH,-12,GETDATE()), 126);
+
     SELECT
-        YEAR(fecha_registro)            AS anio,
-        MONTH(fecha_registro)           AS mes_num,
-        FORMAT(fecha_registro,'MMM yyyy') AS mes_label,
-        COUNT(*)                        AS total
-    FROM postulantes
-    WHERE fecha_registro >= DATEADD(MONTH,-12,GETDATE())
-    GROUP BY YEAR(fecha_registro), MONTH(fecha_registro),
-             FORMAT(fecha_registro,'MMM yyyy')
-    ORDER BY anio, mes_num;
+        CAST(LEFT(clave,4)  AS INT)                        AS anio,
+        CAST(RIGHT(clave,2) AS INT)                        AS mes_num,
+        FORMAT(CONVERT(DATE, clave + '-01'),'MMM yyyy')    AS mes_label,
+        cantidad                                           AS total
+    FROM dashboard_resumen
+    WHERE dimension = 'postulantes_mes'
+      AND clave >= @desde
+      AND cantidad > 0
+    ORDER BY clave;
 END
 GO
 
@@ -99,10 +109,10 @@ CREATE OR ALTER PROCEDURE SP_DS_GRAFICO_MIEMBROS_DEPARTAMENTO
 AS
 BEGIN
     SET NOCOUNT ON;
-    SELECT ISNULL(departamento,'Sin registrar') AS departamento,
-           COUNT(*) AS cantidad
-    FROM miembros
-    GROUP BY departamento
+    SELECT clave AS departamento,   -- NULL ya viene como 'Sin registrar'
+           cantidad
+    FROM dashboard_resumen
+    WHERE dimension = 'departamento' AND cantidad > 0
     ORDER BY cantidad DESC;
 END
 GO
@@ -114,28 +124,23 @@ CREATE OR ALTER PROCEDURE SP_DS_GRAFICO_EDADES_MIEMBROS
 AS
 BEGIN
     SET NOCOUNT ON;
-    SELECT
-        CASE
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 18 AND 25 THEN '18-25'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 26 AND 35 THEN '26-35'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 36 AND 45 THEN '36-45'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 46 AND 55 THEN '46-55'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) >= 56             THEN '56+'
-            ELSE 'Sin dato'
-        END AS rango_edad,
-        COUNT(*) AS cantidad
-    FROM miembros
-    WHERE fecha_nacimiento IS NOT NULL
-    GROUP BY
+    -- DATEDIFF(YEAR, fecha_nacimiento, GETDATE()) = año actual - año de nacimiento:
+    -- con el conteo por año de nacimiento los rangos salen exactos
+    SELECT e.rango_edad, SUM(r.cantidad) AS cantidad
+    FROM dashboard_resumen r
+    CROSS APPLY (SELECT YEAR(GETDATE()) - CAST(r.clave AS INT) AS edad) a
+    CROSS APPLY (SELECT
         CASE
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 18 AND 25 THEN '18-25'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 26 AND 35 THEN '26-35'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 36 AND 45 THEN '36-45'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) BETWEEN 46 AND 55 THEN '46-55'
-            WHEN DATEDIFF(YEAR,fecha_nacimiento,GETDATE()) >= 56             THEN '56+'
+            WHEN a.edad BETWEEN 18 AND 25 THEN '18-25'
+            WHEN a.edad BETWEEN 26 AND 35 THEN '26-35'
+            WHEN a.edad BETWEEN 36 AND 45 THEN '36-45'
+            WHEN a.edad BETWEEN 46 AND 55 THEN '46-55'
+            WHEN a.edad >= 56             THEN '56+'
             ELSE 'Sin dato'
-        END
-    ORDER BY rango_edad;
+        END AS rango_edad) e
+    WHERE r.dimension = 'nacimiento' AND r.cantidad > 0
+    GROUP BY e.rango_edad
+    ORDER BY e.rango_edad;
 END
 GO
 
@@ -202,13 +207,15 @@ AS
 BEGIN
     SET NOCOUNT ON;
     SELECT
-        (SELECT COUNT(*) FROM miembros)                                              AS total_miembros,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'Director General')             AS total_director_general,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'EMGRA')                        AS total_emgra,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'Instructor')                   AS total_instructores_rango,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'BIRED')                        AS total_bired,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'Alumno')                       AS total_alumnos,
-        (SELECT COUNT(*) FROM miembros WHERE rango = 'Aspirante')                    AS total_aspirantes;
+        ISNULL(SUM(cantidad),0)                                                      AS total_miembros,
+        ISNULL(SUM(CASE WHEN clave = 'Director General' THEN cantidad END),0)        AS total_director_general,
+        ISNULL(SUM(CASE WHEN clave = 'EMGRA'            THEN cantidad END),0)        AS total_emgra,
+        ISNULL(SUM(CASE WHEN clave = 'Instructor'       THEN cantidad END),0)        AS total_instructores_rango,
+        ISNULL(SUM(CASE WHEN clave = 'BIRED'            THEN cantidad END),0)        AS total_bired,
+        ISNULL(SUM(CASE WHEN clave = 'Alumno'           THEN cantidad END),0)        AS total_alumnos,
+        ISNULL(SUM(CASE WHEN clave = 'Aspirante'        THEN cantidad END),0)        AS total_aspirantes
+    FROM dashboard_resumen
+    WHERE dimension = 'rango';
 END
 GO
 
@@ -220,13 +227,14 @@ AS
 BEGIN
     SET NOCOUNT ON;
     SELECT
-        COUNT(*)                                                                     AS total_miembros,
-        SUM(CASE WHEN rango = 'Director General' THEN 1 ELSE 0 END)                 AS director_general,
-        SUM(CASE WHEN rango = 'EMGRA'            THEN 1 ELSE 0 END)                 AS emgra,
-        SUM(CASE WHEN rango = 'Instructor'       THEN 1 ELSE 0 END)                 AS instructor,
-        SUM(CASE WHEN rango = 'BIRED'            THEN 1 ELSE 0 END)                 AS bired,
-        SUM(CASE WHEN rango = 'Alumno'           THEN 1 ELSE 0 END)                 AS alumno,
-        SUM(CASE WHEN rango = 'Aspirante'        THEN 1 ELSE 0 END)                 AS aspirante
-    FROM miembros;
+        ISNULL(SUM(cantidad),0)                                                      AS total_miembros,
+        ISNULL(SUM(CASE WHEN clave = 'Director General' THEN cantidad END),0)        AS director_general,
+        ISNULL(SUM(CASE WHEN clave = 'EMGRA'            THEN cantidad END),0)        AS emgra,
+        ISNULL(SUM(CASE WHEN clave = 'Instructor'       THEN cantidad END),0)        AS instructor,
+        ISNULL(SUM(CASE WHEN clave = 'BIRED'            THEN cantidad END),0)        AS bired,
+        ISNULL(SUM(CASE WHEN clave = 'Alumno'           THEN cantidad END),0)        AS alumno,
+        ISNULL(SUM(CASE WHEN clave = 'Aspirante'        THEN cantidad END),0)        AS aspirante
+    FROM dashboard_resumen
+    WHERE dimension = 'rango';
 END
 GO
\ No newline at end of file
@@ -76,6 +76,111 @@ BEGIN
 END
 GO
 
+-- ------------------------------------------------------------
+-- A2b. Listar postulantes + total en UNA sola ejecucion
+--      total_registros = COUNT(*) OVER() sobre el mismo filtro
+--      (un solo recorrido en lugar de LISTAR + CONTAR).
+--      @incluir_total = 0 → omite el conteo (scroll infinito).
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_GU_LISTAR_POSTULANTES_PAGINA
+    @busqueda        NVARCHAR(100) = NULL,
+    @departamento    NVARCHAR(50)  = NULL,
+    @solo_pendientes BIT           = 0,
+    @pagina          INT           = 1,
+    @por_pagina      INT           = 10,
+    @incluir_total   BIT           = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @offset INT = (@pagina-1)*@por_pagina;
+    SELECT
+        p.id,
+        p.nombre, p.apellido,
+        CONCAT(p.apellido,', ',p.nombre)             AS nombre_completo,
+        p.dni, p.email, p.telefono,
+        p.departamento, p.distrito, p.profesion,
+        p.nivel_educativo, p.genero,
+        p.experiencia, p.motivacion,
+        p.fecha_registro,
+        DATEDIFF(DAY,p.fecha_registro,GETDATE())     AS dias_espera,
+        CASE WHEN m.id IS NOT NULL THEN 1 ELSE 0 END AS ya_es_miembro,
+        m.legajo, m.rango, m.estado                  AS estado_miembro,
+        CASE WHEN @incluir_total = 1 THEN COUNT(*) OVER() END AS total_registros
+    FROM postulantes p
+    LEFT JOIN miembros m ON m.id_postulante = p.id
+    WHERE
+        (@busqueda IS NULL OR
+            p.nombre   LIKE '%'+@busqueda+'%' OR
+            p.apellido LIKE '%'+@busqueda+'%' OR
+            p.dni      LIKE '%'+@busqueda+'%' OR
+            p.email    LIKE '%'+@busqueda+'%')
+        AND (@departamento    IS NULL OR p.departamento = @departamento)
+        AND (@solo_pendientes = 0     OR m.id IS NULL)
+    ORDER BY p.fecha_registro DESC
+    OFFSET @offset ROWS FETCH NEXT @por_pagina ROWS ONLY
+    OPTION (RECOMPILE);   -- descarta el conteo y los filtros NULL en el plan
+END
+GO
+
+-- ------------------------------------------------------------
+-- A2c. Listar postulantes por CURSOR (keyset, ?after= del API)
+--      Sin OFFSET: arranca despues de la ultima fila vista
+--      (@despues_fecha_registro, @despues_id; NULL = primera
+--      pagina), asi la pagina 500 cuesta lo mismo que la 1.
+--      Orden: fecha_registro DESC, id DESC (id desempata).
+--      Devuelve @por_pagina + 1 filas: la extra indica que
+--      hay siguiente. Sin total (scroll infinito).
+--      fecha_registro siempre tiene valor (DEFAULT).
+--      cursor_fecha_registro = la fecha con sus 7 decimales
+--      (SYSUTCDATETIME()): el driver la trunca a microsegundos
+--      y el cursor debe compararse contra el valor exacto.
+-- ------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_postulantes_fecha_registro_id')
+    CREATE INDEX IX_postulantes_fecha_registro_id ON dbo.postulantes(fecha_registro DESC, id DESC);
+GO
+
+CREATE OR ALTER PROCEDURE SP_GU_LISTAR_POSTULANTES_CURSOR
+    @busqueda               NVARCHAR(100) = NULL,
+    @departamento           NVARCHAR(50)  = NULL,
+    @solo_pendientes        BIT           = 0,
+    @por_pagina             INT           = 10,
+    @despues_fecha_registro VARCHAR(27)   = NULL,   -- cursor_fecha_registro (estilo 121)
+    @despues_id             INT           = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @fecha_cursor DATETIME2 = CONVERT(DATETIME2, @despues_fecha_registro, 121);
+    SELECT TOP (@por_pagina + 1)
+        p.id,
+        p.nombre, p.apellido,
+        CONCAT(p.apellido,', ',p.nombre)             AS nombre_completo,
+        p.dni, p.email, p.telefono,
+        p.departamento, p.distrito, p.profesion,
+        p.nivel_educativo, p.genero,
+        p.experiencia, p.motivacion,
+        p.fecha_registro,
+        DATEDIFF(DAY,p.fecha_registro,GETDATE())     AS dias_espera,
+        CASE WHEN m.id IS NOT NULL THEN 1 ELSE 0 END AS ya_es_miembro,
+        m.legajo, m.rango, m.estado                  AS estado_miembro,
+        CONVERT(VARCHAR(27), p.fecha_registro, 121)  AS cursor_fecha_registro
+    FROM postulantes p
+    LEFT JOIN miembros m ON m.id_postulante = p.id
+    WHERE
+        (@despues_id IS NULL OR
+            (p.fecha_registro <= @fecha_cursor AND
+             (p.fecha_registro < @fecha_cursor OR p.id < @despues_id)))
+        AND (@busqueda IS NULL OR
+            p.nombre   LIKE '%'+@busqueda+'%' OR
+            p.apellido LIKE '%'+@busqueda+'%' OR
+            p.dni      LIKE '%'+@busqueda+'%' OR
+            p.email    LIKE '%'+@busqueda+'%')
+        AND (@departamento    IS NULL OR p.departamento = @departamento)
+        AND (@solo_pendientes = 0     OR m.id IS NULL)
+    ORDER BY p.fecha_registro DESC, p.id DESC
+    OPTION (RECOMPILE);   -- primera pagina: sin predicado de cursor en el plan
+END
+GO
+
 -- ------------------------------------------------------------
 -- A3. Ver ficha completa de un postulante
 -- ------------------------------------------------------------
@@ -168,6 +273,111 @@ BEGIN
 END
 GO
 
+-- ------------------------------------------------------------
+-- B2b. Listar miembros + total en UNA sola ejecucion
+--      (ver A2b)
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_GU_LISTAR_MIEMBROS_PAGINA
+    @busqueda      NVARCHAR(100) = NULL,
+    @estado        NVARCHAR(20)  = NULL,
+    @rango         NVARCHAR(50)  = NULL,
+    @departamento  NVARCHAR(50)  = NULL,
+    @pagina        INT           = 1,
+    @por_pagina    INT           = 10,
+    @incluir_total BIT           = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @offset INT = (@pagina-1)*@por_pagina;
+    SELECT
+        m.id,
+        m.nombre, m.apellido,
+        CONCAT(m.apellido,', ',m.nombre)         AS nombre_completo,
+        m.dni,
+        DATEDIFF(YEAR,m.fecha_nacimiento,GETDATE()) AS edad,
+        m.genero, m.email, m.telefono,
+        m.departamento, m.distrito, m.profesion,
+        m.legajo, m.rango, m.jefatura,
+        m.estado, m.cursos_certificaciones,
+        m.fecha_ingreso, m.fecha_ultimo_cambio,
+        DATEDIFF(YEAR,m.fecha_ingreso,GETDATE()) AS anios_en_cuerpo,
+        au.nombre_completo AS modificado_por_nombre,
+        CASE WHEN m.foto_perfil IS NOT NULL AND m.foto_perfil <> '' THEN 1 ELSE 0 END AS tiene_foto,
+        CASE WHEN @incluir_total = 1 THEN COUNT(*) OVER() END AS total_registros
+    FROM miembros m
+    LEFT JOIN admin_users au ON au.id = m.modificado_por
+    WHERE
+        (@busqueda IS NULL OR
+            m.nombre   LIKE '%'+@busqueda+'%' OR
+            m.apellido LIKE '%'+@busqueda+'%' OR
+            m.dni      LIKE '%'+@busqueda+'%' OR
+            m.legajo   LIKE '%'+@busqueda+'%')
+        AND (@estado      IS NULL OR m.estado      = @estado)
+        AND (@rango       IS NULL OR m.rango        = @rango)
+        AND (@departamento IS NULL OR m.departamento = @departamento)
+    ORDER BY m.apellido, m.nombre
+    OFFSET @offset ROWS FETCH NEXT @por_pagina ROWS ONLY
+    OPTION (RECOMPILE);
+END
+GO
+
+-- ------------------------------------------------------------
+-- B2c. Listar miembros por CURSOR (ver A2c)
+--      Orden: apellido, nombre, id (id desempata).
+--      El primer termino del predicado (apellido >=) es el
+--      que busca en el indice; el resto descarta los empates.
+-- ------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_miembros_apellido_nombre_id')
+    CREATE INDEX IX_miembros_apellido_nombre_id ON dbo.miembros(apellido, nombre, id);
+GO
+
+CREATE OR ALTER PROCEDURE SP_GU_LISTAR_MIEMBROS_CURSOR
+    @busqueda         NVARCHAR(100) = NULL,
+    @estado           NVARCHAR(20)  = NULL,
+    @rango            NVARCHAR(50)  = NULL,
+    @departamento     NVARCHAR(50)  = NULL,
+    @por_pagina       INT           = 10,
+    @despues_apellido NVARCHAR(50)  = NULL,
+    @despues_nombre   NVARCHAR(50)  = NULL,
+    @despues_id       INT           = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SELECT TOP (@por_pagina + 1)
+        m.id,
+        m.nombre, m.apellido,
+        CONCAT(m.apellido,', ',m.nombre)         AS nombre_completo,
+        m.dni,
+        DATEDIFF(YEAR,m.fecha_nacimiento,GETDATE()) AS edad,
+        m.genero, m.email, m.telefono,
+        m.departamento, m.distrito, m.profesion,
+        m.legajo, m.rango, m.jefatura,
+        m.estado, m.cursos_certificaciones,
+        m.fecha_ingreso, m.fecha_ultimo_cambio,
+        DATEDIFF(YEAR,m.fecha_ingreso,GETDATE()) AS anios_en_cuerpo,
+        au.nombre_completo AS modificado_por_nombre,
+        CASE WHEN m.foto_perfil IS NOT NULL AND m.foto_perfil <> '' THEN 1 ELSE 0 END AS tiene_foto
+    FROM miembros m
+    LEFT JOIN admin_users au ON au.id = m.modificado_por
+    WHERE
+        (@despues_id IS NULL OR
+            (m.apellido >= @despues_apellido AND
+             (m.apellido > @despues_apellido OR
+              m.nombre   > @despues_nombre   OR
+              (m.nombre = @despues_nombre AND m.id > @despues_id))))
+        AND (@busqueda IS NULL OR
+            m.nombre   LIKE '%'+@busqueda+'%' OR
+            m.apellido LIKE '%'+@busqueda+'%' OR
+            m.dni      LIKE '%'+@busqueda+'%' OR
+            m.legajo   LIKE '%'+@busqueda+'%')
+        AND (@estado      IS NULL OR m.estado      = @estado)
+        AND (@rango       IS NULL OR m.rango        = @rango)
+        AND (@departamento IS NULL OR m.departamento = @departamento)
+    ORDER BY m.apellido, m.nombre, m.id
+    OPTION (RECOMPILE);
+END
+GO
+
 -- ------------------------------------------------------------
 -- B3. Ver ficha completa de un miembro
 -- ------------------------------------------------------------
@@ -601,4 +811,57 @@ BEGIN
         RETURN -99;
     END CATCH
 END
-GO
\ No newline at end of file
+GO
+-- ============================================================
+-- ▌ BLOQUE C — INDICES EN MEMORIA (buscadores)
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- C1. Datos minimos para el indice de sugerencias en memoria
+--     del backend (indice_usuarios.py). Sin filtros devuelve
+--     todo (carga inicial); con @tipo + @id solo esa fila
+--     (refresco tras una escritura; vacio = fue eliminado).
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_GU_INDICE_USUARIOS
+    @tipo NVARCHAR(10) = NULL,   -- miembro | postulante | NULL = ambos
+    @id   INT          = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SELECT N'miembro' AS tipo, m.id,
+           m.nombre, m.apellido, m.dni, m.email, m.legajo,
+           m.estado, m.rango, m.departamento
+    FROM miembros m
+    WHERE (@tipo IS NULL OR @tipo = N'miembro')
+      AND (@id   IS NULL OR m.id = @id)
+    UNION ALL
+    SELECT N'postulante', p.id,
+           p.nombre, p.apellido, p.dni, p.email, NULL,
+           NULL, NULL, p.departamento
+    FROM postulantes p
+    WHERE (@tipo IS NULL OR @tipo = N'postulante')
+      AND (@id   IS NULL OR p.id = @id);
+END
+GO
+
+-- ------------------------------------------------------------
+-- C2. Campos PUBLICOS de los miembros para el buscador de la
+--     web (/api/miembros/buscar, directorio_miembros.py). Sin
+--     datos de contacto ni foto. Sin @id devuelve todos; con
+--     @id solo ese (vacio = fue eliminado).
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_MIEMBROS_DIRECTORIO
+    @id INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SELECT m.id,
+           m.nombre, m.apellido,
+           m.dni, m.legajo,
+           m.rango, m.jefatura, m.estado,
+           m.cursos_certificaciones,
+           m.fecha_ingreso, m.fecha_ultimo_cambio
+    FROM miembros m
+    WHERE @id IS NULL OR m.id = @id;
+END
+GO
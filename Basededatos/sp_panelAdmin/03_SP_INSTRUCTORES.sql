@@ -23,7 +23,11 @@ BEGIN
         i.id,
         i.nombre_completo, i.especialidad, i.rango,
         i.experiencia_anios, i.certificaciones,
-        i.email, i.telefono, i.foto, i.bio,
+        i.email, i.telefono, i.bio,
+        -- La foto se sirve aparte: /api/media/{hash}
+        dbo.FN_HASH_MEDIA(i.foto, i.foto_sha256) AS foto_sha256,
+        CAST(CASE WHEN i.foto_bin IS NOT NULL OR i.foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+        CASE WHEN i.foto LIKE 'http%' THEN i.foto END AS foto_externa,
         i.estado, i.fecha_registro,
         -- Carga activa
         (SELECT COUNT(*) FROM cursos c
@@ -52,7 +56,13 @@ CREATE OR ALTER PROCEDURE SP_INS_DETALLE
 AS
 BEGIN
     SET NOCOUNT ON;
-    SELECT i.*,
+    -- Sin i.*: foto / foto_bin no viajan en el JSON (ver /{id}/foto)
+    SELECT i.id, i.nombre_completo, i.especialidad, i.rango,
+           i.experiencia_anios, i.certificaciones, i.email, i.telefono,
+           i.bio, i.estado, i.fecha_registro, i.modificado_por,
+           dbo.FN_HASH_MEDIA(i.foto, i.foto_sha256) AS foto_sha256,
+           CAST(CASE WHEN i.foto_bin IS NOT NULL OR i.foto IS NOT NULL THEN 1 ELSE 0 END AS BIT) AS tiene_foto,
+           CASE WHEN i.foto LIKE 'http%' THEN i.foto END AS foto_externa,
            (SELECT COUNT(*) FROM cursos         WHERE id_instructor=i.id) AS total_cursos,
            (SELECT COUNT(*) FROM eventos_talleres WHERE id_instructor=i.id) AS total_eventos
     FROM instructores i WHERE i.id=@id_instructor;
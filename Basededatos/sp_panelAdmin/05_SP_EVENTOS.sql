@@ -67,6 +67,92 @@ BEGIN
 END
 GO
 
+-- ------------------------------------------------------------
+-- 2b. Listar eventos + total en UNA sola ejecucion
+--     total_registros = COUNT(*) OVER() sobre el mismo filtro.
+--     @incluir_total = 0 → omite el conteo (scroll infinito).
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_EV_LISTAR_PAGINA
+    @busqueda      NVARCHAR(100) = NULL,
+    @tipo          NVARCHAR(30)  = NULL,
+    @estado        NVARCHAR(20)  = NULL,
+    @desde         DATE          = NULL,
+    @hasta         DATE          = NULL,
+    @pagina        INT           = 1,
+    @por_pagina    INT           = 10,
+    @incluir_total BIT           = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @offset INT = (@pagina-1)*@por_pagina;
+    SELECT
+        e.id, e.titulo, e.tipo, e.descripcion,
+        e.fecha, e.hora_inicio, e.hora_fin, e.ubicacion,
+        e.estado, e.imagen, e.fecha_creacion,
+        i.nombre_completo                                                     AS instructor_nombre,
+        au.nombre_completo                                                    AS modificado_por_nombre,
+        CASE WHEN @incluir_total = 1 THEN COUNT(*) OVER() END                 AS total_registros
+    FROM eventos_talleres e
+    LEFT JOIN instructores i  ON i.id  = e.id_instructor
+    LEFT JOIN admin_users  au ON au.id = e.modificado_por
+    WHERE
+        (@busqueda IS NULL OR e.titulo LIKE '%'+@busqueda+'%' OR
+                              e.ubicacion LIKE '%'+@busqueda+'%')
+        AND (@tipo   IS NULL OR e.tipo   = @tipo)
+        AND (@estado IS NULL OR e.estado = @estado)
+        AND (@desde  IS NULL OR e.fecha >= @desde)
+        AND (@hasta  IS NULL OR e.fecha <= @hasta)
+    ORDER BY e.fecha DESC
+    OFFSET @offset ROWS FETCH NEXT @por_pagina ROWS ONLY
+    OPTION (RECOMPILE);
+END
+GO
+
+-- ------------------------------------------------------------
+-- 2c. Listar eventos por CURSOR (keyset, ?after= del API)
+--     Sin OFFSET: arranca despues de la ultima fila vista
+--     (@despues_fecha, @despues_id; NULL = primera pagina).
+--     Orden: fecha DESC, id DESC (id desempata). Lo cubre
+--     IDX_eventos_fecha (fecha + la clave del cluster, id).
+--     Devuelve @por_pagina + 1 filas: la extra indica que hay
+--     siguiente. Sin total (scroll infinito).
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_EV_LISTAR_CURSOR
+    @busqueda      NVARCHAR(100) = NULL,
+    @tipo          NVARCHAR(30)  = NULL,
+    @estado        NVARCHAR(20)  = NULL,
+    @desde         DATE          = NULL,
+    @hasta         DATE          = NULL,
+    @por_pagina    INT           = 10,
+    @despues_fecha DATE          = NULL,
+    @despues_id    INT           = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SELECT TOP (@por_pagina + 1)
+        e.id, e.titulo, e.tipo, e.descripcion,
+        e.fecha, e.hora_inicio, e.hora_fin, e.ubicacion,
+        e.estado, e.imagen, e.fecha_creacion,
+        i.nombre_completo                                                     AS instructor_nombre,
+        au.nombre_completo                                                    AS modificado_por_nombre
+    FROM eventos_talleres e
+    LEFT JOIN instructores i  ON i.id  = e.id_instructor
+    LEFT JOIN admin_users  au ON au.id = e.modificado_por
+    WHERE
+        (@despues_id IS NULL OR
+            (e.fecha <= @despues_fecha AND
+             (e.fecha < @despues_fecha OR e.id < @despues_id)))
+        AND (@busqueda IS NULL OR e.titulo LIKE '%'+@busqueda+'%' OR
+                              e.ubicacion LIKE '%'+@busqueda+'%')
+        AND (@tipo   IS NULL OR e.tipo   = @tipo)
+        AND (@estado IS NULL OR e.estado = @estado)
+        AND (@desde  IS NULL OR e.fecha >= @desde)
+        AND (@hasta  IS NULL OR e.fecha <= @hasta)
+    ORDER BY e.fecha DESC, e.id DESC
+    OPTION (RECOMPILE);
+END
+GO
+
 -- ------------------------------------------------------------
 -- 3. Detalle de evento
 -- ------------------------------------------------------------
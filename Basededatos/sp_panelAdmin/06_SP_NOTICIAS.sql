@@ -3,6 +3,7 @@
 -- Base de datos: DB_CGPVP2
 -- Tabla: publicaciones
 -- Descripción: CRUD completo para gestión de noticias
+-- Requiere   : SP_NOTICIAS_CGPVP.sql (columnas foto_sha256 / foto_hash)
 -- ============================================================
 
 USE DB_CGPVP2;
@@ -87,26 +88,160 @@ END
 GO
 
 -- ============================================================
--- SP 3: OBTENER DETALLE DE UNA PUBLICACIÓN
+-- SP 2b: LISTAR + TOTAL EN UNA SOLA EJECUCIÓN
+-- total_registros = COUNT(*) OVER() sobre el mismo filtro
+-- (un solo recorrido en lugar de SP_NOT_LISTAR + SP_NOT_CONTAR).
+-- No devuelve la foto: el listado la pide por /foto/{id}.
+-- @incluir_total = 0 → omite el conteo (scroll infinito).
 -- ============================================================
-CREATE OR ALTER PROCEDURE SP_NOT_DETALLE
-    @idpublicacion NVARCHAR(100)
+CREATE OR ALTER PROCEDURE SP_NOT_LISTAR_PAGINA
+    @busqueda        NVARCHAR(200) = NULL,
+    @creado_por      NVARCHAR(20)  = NULL,
+    @solo_activas    BIT           = 1,
+    @solo_destacadas BIT           = 0,
+    @desde           DATE          = NULL,
+    @hasta           DATE          = NULL,
+    @pagina          INT           = 1,
+    @por_pagina      INT           = 10,
+    @incluir_total   BIT           = 1
 AS
 BEGIN
     SET NOCOUNT ON;
-    
-    SELECT 
+
+    DECLARE @offset INT = (@pagina - 1) * @por_pagina;
+
+    SELECT
         idpublicacion,
         titulo,
         contenido,
-        foto,
+        LEFT(contenido, 200) + (CASE WHEN LEN(contenido) > 200 THEN '…' ELSE '' END) AS resumen,
         fecha,
         creado_por,
         destacada,
         activa,
-        fecha_creacion
+        fecha_creacion,
+        CASE WHEN @incluir_total = 1 THEN COUNT(*) OVER() END AS total_registros
+    FROM publicaciones
+    WHERE
+        (@solo_activas = 0 OR activa = 1)
+        AND (@solo_destacadas = 0 OR destacada = 1)
+        AND (@creado_por IS NULL OR creado_por = @creado_por)
+        AND (@busqueda IS NULL
+             OR titulo LIKE '%' + @busqueda + '%'
+             OR contenido LIKE '%' + @busqueda + '%')
+        AND (@desde IS NULL OR CAST(fecha AS DATE) >= @desde)
+        AND (@hasta IS NULL OR CAST(fecha AS DATE) <= @hasta)
+    ORDER BY
+        destacada DESC,
+        fecha DESC
+    OFFSET @offset ROWS
+    FETCH NEXT @por_pagina ROWS ONLY
+    OPTION (RECOMPILE);
+END
+GO
+
+-- ============================================================
+-- SP 2c: LISTAR NOTICIAS POR CURSOR (keyset, ?after= del API)
+-- Sin OFFSET: arranca después de la última fila vista
+-- (@despues_*; NULL = primera página) sobre
+-- IX_publicaciones_destacada_fecha (SP_NOTICIAS_CGPVP.sql).
+-- Orden: destacada DESC, fecha DESC, idpublicacion DESC.
+-- Devuelve @por_pagina + 1 filas: la extra indica que hay
+-- siguiente. Sin total (scroll infinito).
+-- cursor_fecha = fecha con sus 7 decimales (SYSUTCDATETIME()):
+-- el driver la trunca a microsegundos y el cursor debe
+-- compararse contra el valor exacto.
+-- ============================================================
+CREATE OR ALTER PROCEDURE SP_NOT_LISTAR_CURSOR
+    @busqueda              NVARCHAR(200) = NULL,
+    @creado_por            NVARCHAR(20)  = NULL,
+    @solo_activas          BIT           = 1,
+    @solo_destacadas       BIT           = 0,
+    @desde                 DATE          = NULL,
+    @hasta                 DATE          = NULL,
+    @por_pagina            INT           = 10,
+    @despues_destacada     BIT           = NULL,
+    @despues_fecha         VARCHAR(27)   = NULL,   -- cursor_fecha (estilo 121)
+    @despues_idpublicacion NVARCHAR(100) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @fecha_cursor DATETIME2 = CONVERT(DATETIME2, @despues_fecha, 121);
+
+    SELECT TOP (@por_pagina + 1)
+        idpublicacion,
+        titulo,
+        contenido,
+        LEFT(contenido, 200) + (CASE WHEN LEN(contenido) > 200 THEN '…' ELSE '' END) AS resumen,
+        fecha,
+        creado_por,
+        destacada,
+        activa,
+        fecha_creacion,
+        CONVERT(VARCHAR(27), fecha, 121) AS cursor_fecha   -- clave completa para el cursor
     FROM publicaciones
-    WHERE idpublicacion = @idpublicacion;
+    WHERE
+        (@despues_idpublicacion IS NULL OR
+            (destacada <= @despues_destacada AND
+             (destacada < @despues_destacada OR
+              fecha < @fecha_cursor OR
+              (fecha = @fecha_cursor AND idpublicacion < @despues_idpublicacion))))
+        AND (@solo_activas = 0 OR activa = 1)
+        AND (@solo_destacadas = 0 OR destacada = 1)
+        AND (@creado_por IS NULL OR creado_por = @creado_por)
+        AND (@busqueda IS NULL
+             OR titulo LIKE '%' + @busqueda + '%'
+             OR contenido LIKE '%' + @busqueda + '%')
+        AND (@desde IS NULL OR CAST(fecha AS DATE) >= @desde)
+        AND (@hasta IS NULL OR CAST(fecha AS DATE) <= @hasta)
+    ORDER BY
+        destacada DESC,
+        fecha DESC,
+        idpublicacion DESC
+    OPTION (RECOMPILE);
+END
+GO
+
+-- ============================================================
+-- SP 3: OBTENER DETALLE DE UNA PUBLICACIÓN
+-- @incluir_foto = 0 -> sin el blob (el editor muestra la imagen
+-- con <img src="/api/media/{foto_sha256}">, no dentro del JSON)
+-- ============================================================
+CREATE OR ALTER PROCEDURE SP_NOT_DETALLE
+    @idpublicacion NVARCHAR(100),
+    @incluir_foto  BIT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF @incluir_foto = 1
+        SELECT 
+            idpublicacion,
+            titulo,
+            contenido,
+            foto,
+            COALESCE(foto_hash, CONVERT(CHAR(64), foto_sha256, 2)) AS foto_sha256,
+            fecha,
+            creado_por,
+            destacada,
+            activa,
+            fecha_creacion
+        FROM publicaciones
+        WHERE idpublicacion = @idpublicacion;
+    ELSE
+        SELECT 
+            idpublicacion,
+            titulo,
+            contenido,
+            COALESCE(foto_hash, CONVERT(CHAR(64), foto_sha256, 2)) AS foto_sha256,
+            fecha,
+            creado_por,
+            destacada,
+            activa,
+            fecha_creacion
+        FROM publicaciones
+        WHERE idpublicacion = @idpublicacion;
 END
 GO
 
@@ -119,7 +254,8 @@ CREATE OR ALTER PROCEDURE SP_NOT_CREAR
     @foto      VARBINARY(MAX) = NULL,   -- Ahora es VARBINARY
     @fecha     DATETIME2     = NULL,
     @destacada BIT           = 0,
-    @admin_id  INT
+    @admin_id  INT,
+    @foto_hash CHAR(64)      = NULL     -- foto ya guardada en el almacén de media
 AS
 BEGIN
     SET NOCOUNT ON;
@@ -158,6 +294,7 @@ BEGIN
             titulo,
             contenido,
             foto,           -- VARBINARY ahora
+            foto_hash,
             fecha,
             creado_por,
             destacada,
@@ -169,6 +306,7 @@ BEGIN
             LTRIM(RTRIM(@titulo)),
             @contenido,
             @foto,
+            @foto_hash,
             @fecha,
             'Admin',
             @destacada,
@@ -206,7 +344,8 @@ CREATE OR ALTER PROCEDURE SP_NOT_EDITAR
     @foto          VARBINARY(MAX) = NULL,   -- 🔥 CAMBIO AQUÍ
     @fecha         DATETIME2     = NULL,  
     @destacada     BIT           = 0,  
-    @admin_id      INT  
+    @admin_id      INT,
+    @foto_hash     CHAR(64)      = NULL   -- foto nueva ya guardada en el almacén de media
 AS  
 BEGIN  
     SET NOCOUNT ON;  
@@ -239,7 +378,8 @@ BEGIN
         SET   
             titulo = LTRIM(RTRIM(@titulo)),  
             contenido = @contenido,  
-            foto = ISNULL(@foto, foto),  -- 🔥 Mantiene imagen si viene NULL  
+            foto = CASE WHEN @foto_hash IS NOT NULL THEN NULL ELSE ISNULL(@foto, foto) END,  -- 🔥 Mantiene imagen si viene NULL  
+            foto_hash = CASE WHEN @foto IS NOT NULL THEN NULL ELSE ISNULL(@foto_hash, foto_hash) END,  
             fecha = ISNULL(@fecha, fecha),  
             destacada = @destacada  
         WHERE idpublicacion = @idpublicacion;  
@@ -446,6 +586,33 @@ BEGIN
 END
 GO
 
+-- ============================================================
+-- SP 10: TEXTO PARA EL ÍNDICE DE BÚSQUEDA (indice_noticias.py)
+-- Sin @idpublicacion -> todas (carga al arrancar la API);
+-- con @idpublicacion -> solo esa (reindexar tras una escritura).
+-- El backend busca en memoria: nada de LIKE '%...%' sobre NVARCHAR(MAX)
+-- ============================================================
+CREATE OR ALTER PROCEDURE SP_NOT_INDICE
+    @idpublicacion NVARCHAR(100) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT
+        idpublicacion,
+        titulo,
+        contenido,
+        COALESCE(foto_hash, CONVERT(CHAR(64), foto_sha256, 2)) AS foto_sha256,
+        fecha,
+        creado_por,
+        destacada,
+        activa,
+        fecha_creacion
+    FROM publicaciones
+    WHERE @idpublicacion IS NULL OR idpublicacion = @idpublicacion;
+END
+GO
+
 -- ============================================================
 -- VERIFICACIÓN Y MENSAJES
 -- ============================================================
@@ -458,13 +625,16 @@ PRINT '📋 PROCEDIMIENTOS CREADOS:';
 PRINT '';
 PRINT '  1. SP_NOT_LISTAR         - Listar con paginación y filtros';
 PRINT '  2. SP_NOT_CONTAR         - Contar registros (paginación)';
-PRINT '  3. SP_NOT_DETALLE        - Obtener detalle de publicación';
+PRINT '  2b. SP_NOT_LISTAR_PAGINA - Listar + total en una ejecución';
+PRINT '  2c. SP_NOT_LISTAR_CURSOR - Listar por cursor (keyset, sin OFFSET)';
+PRINT '  3. SP_NOT_DETALLE        - Obtener detalle de publicación (@incluir_foto = 0: sin blob)';
 PRINT '  4. SP_NOT_CREAR          - Crear publicación (Admin)';
 PRINT '  5. SP_NOT_EDITAR         - Editar publicación (Admin)';
 PRINT '  6. SP_NOT_TOGGLE_DESTACADA - Marcar/desmarcar destacada';
 PRINT '  7. SP_NOT_TOGGLE_ACTIVA  - Activar/desactivar';
 PRINT '  8. SP_NOT_ELIMINAR       - Eliminar definitivamente';
 PRINT '  9. SP_NOT_ESTADISTICAS   - Obtener estadísticas';
+PRINT '  10. SP_NOT_INDICE        - Texto para el índice de búsqueda en memoria';
 PRINT '';
 PRINT '🔧 CARACTERÍSTICAS:';
 PRINT '  ✓ Manejo de errores con TRY/CATCH';
@@ -0,0 +1,147 @@
+-- ============================================================
+-- PANEL ADMIN CGPVP  |  SECCION: ALMACEN DE MEDIA
+-- Archivo : 08_SP_MEDIA.sql
+-- DB      : DB_CGPVP2
+-- Tablas  : publicaciones, instructores, admin_users, cursos
+-- Desc    : Las imagenes se guardan en el disco del backend por su
+--           SHA-256 (almacen_media.py) y se sirven en /api/media/{hash}.
+--           Cada fila guarda solo el hash (CHAR(64) hex):
+--             publicaciones.foto_hash   (foto VARBINARY queda NULL)
+--             instructores.foto         (foto_bin queda NULL)
+--             admin_users.foto_perfil
+--             cursos.imagen
+--           Estos SP sirven para migrar los blobs / base64 existentes
+--           (migrar_media.py) y para ubicar un blob legado por su hash.
+-- Requiere: SP_NOTICIAS_CGPVP.sql y SP_INSTRUCTORES_CGPVP.sql
+--           (columnas foto_sha256 / foto_hash / foto_bin, FN_HASH_MEDIA)
+-- ============================================================
+USE DB_CGPVP2;
+GO
+
+-- Busqueda por hash de los blobs que todavia no migraron
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_publicaciones_foto_sha256')
+    CREATE INDEX IX_publicaciones_foto_sha256 ON dbo.publicaciones(foto_sha256);
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_instructores_foto_sha256')
+    CREATE INDEX IX_instructores_foto_sha256 ON dbo.instructores(foto_sha256);
+GO
+
+-- ------------------------------------------------------------
+-- 1. Ubicar un blob legado por su hash
+--    /api/media/{hash} lo usa cuando el archivo no esta en disco
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_MEDIA_UBICAR
+    @sha256 CHAR(64)
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @bin BINARY(32) = CONVERT(BINARY(32), @sha256, 2);
+
+    SELECT TOP 1 origen, id
+    FROM (
+        SELECT 'publicaciones' AS origen, CAST(idpublicacion AS NVARCHAR(255)) AS id
+        FROM publicaciones WHERE foto_sha256 = @bin
+        UNION ALL
+        SELECT 'instructores', CAST(id AS NVARCHAR(255))
+        FROM instructores WHERE foto_sha256 = @bin
+    ) t;
+END
+GO
+
+-- ------------------------------------------------------------
+-- 2. Filas con imagen todavia fuera del almacen (por lotes, keyset)
+--    datos: blob binario | texto: data URL / base64
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_MEDIA_PENDIENTES
+    @origen  NVARCHAR(30),              -- publicaciones | instructores | admin_users | cursos
+    @despues NVARCHAR(255) = NULL,      -- ultimo id procesado
+    @lote    INT           = 20
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @origen = 'publicaciones'
+        SELECT TOP (@lote)
+            CAST(idpublicacion AS NVARCHAR(255)) AS id,
+            foto AS datos,
+            CAST(NULL AS NVARCHAR(MAX)) AS texto
+        FROM publicaciones
+        WHERE foto IS NOT NULL AND foto_hash IS NULL
+          AND (@despues IS NULL OR idpublicacion > @despues)
+        ORDER BY idpublicacion;
+
+    ELSE IF @origen = 'instructores'
+        SELECT TOP (@lote)
+            CAST(id AS NVARCHAR(255)) AS id,
+            foto_bin AS datos,
+            CASE WHEN foto_bin IS NULL THEN foto END AS texto
+        FROM instructores
+        WHERE (foto_bin IS NOT NULL
+               OR (foto <> '' AND foto NOT LIKE 'http%' AND dbo.FN_HASH_MEDIA(foto, NULL) IS NULL))
+          AND (@despues IS NULL OR id > CAST(@despues AS INT))
+        ORDER BY id;
+
+    ELSE IF @origen = 'admin_users'
+        SELECT TOP (@lote)
+            CAST(id AS NVARCHAR(255)) AS id,
+            CAST(NULL AS VARBINARY(MAX)) AS datos,
+            foto_perfil AS texto
+        FROM admin_users
+        WHERE foto_perfil <> '' AND foto_perfil NOT LIKE 'http%'
+          AND dbo.FN_HASH_MEDIA(foto_perfil, NULL) IS NULL
+          AND (@despues IS NULL OR id > CAST(@despues AS INT))
+        ORDER BY id;
+
+    ELSE IF @origen = 'cursos'
+        SELECT TOP (@lote)
+            CAST(id AS NVARCHAR(255)) AS id,
+            CAST(NULL AS VARBINARY(MAX)) AS datos,
+            imagen AS texto
+        FROM cursos
+        WHERE imagen <> '' AND imagen NOT LIKE 'http%'
+          AND dbo.FN_HASH_MEDIA(imagen, NULL) IS NULL
+          AND (@despues IS NULL OR id > CAST(@despues AS INT))
+        ORDER BY id;
+
+    ELSE
+        THROW 50090, 'Origen de media no valido', 1;
+END
+GO
+
+-- ------------------------------------------------------------
+-- 3. Dejar solo el hash en la fila (la imagen ya esta en disco)
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_MEDIA_ASIGNAR
+    @origen NVARCHAR(30),
+    @id     NVARCHAR(255),
+    @sha256 CHAR(64)
+AS
+BEGIN
+    SET NOCOUNT ON; SET XACT_ABORT ON;
+
+    IF LEN(@sha256) <> 64 OR @sha256 LIKE '%[^0-9a-fA-F]%'
+        THROW 50091, 'Hash de media no valido', 1;
+    SET @sha256 = LOWER(@sha256);
+
+    IF @origen = 'publicaciones'
+        UPDATE publicaciones SET foto_hash = @sha256, foto = NULL
+        WHERE idpublicacion = @id;
+    ELSE IF @origen = 'instructores'
+        UPDATE instructores SET foto = @sha256, foto_bin = NULL
+        WHERE id = CAST(@id AS INT);
+    ELSE IF @origen = 'admin_users'
+        UPDATE admin_users SET foto_perfil = @sha256
+        WHERE id = CAST(@id AS INT);
+    ELSE IF @origen = 'cursos'
+        UPDATE cursos SET imagen = @sha256
+        WHERE id = CAST(@id AS INT);
+    ELSE
+        THROW 50090, 'Origen de media no valido', 1;
+
+    SELECT 'SUCCESS' AS status, @origen AS origen, @id AS id;
+END
+GO
+
+PRINT '== 08_SP_MEDIA.sql ejecutado OK ==';
+PRINT '  SP_MEDIA_UBICAR  SP_MEDIA_PENDIENTES  SP_MEDIA_ASIGNAR';
+GO
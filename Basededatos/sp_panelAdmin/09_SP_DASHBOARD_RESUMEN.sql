@@ -0,0 +1,190 @@
+-- ============================================================
+-- PANEL ADMIN CGPVP  |  SECCION: DASHBOARD (AGREGADOS)
+-- Archivo : 09_SP_DASHBOARD_RESUMEN.sql
+-- DB      : DB_CGPVP2
+-- Tablas  : dashboard_resumen  (miembros, postulantes)
+-- Desc    : Conteos del dashboard mantenidos de forma incremental.
+--           Los triggers de miembros / postulantes suman y restan
+--           en dashboard_resumen en la misma transaccion de la
+--           escritura (cualquier SP: SP_GU_*, registro web,
+--           eliminacion fisica...). Los SP_DS_* de 01_SP_DASHBOARD.sql
+--           leen una fila por grupo en lugar de recorrer las tablas.
+--
+--           dimension          clave
+--           -----------------  ----------------------------------
+--           estado             Activo / Suspendido / Baja
+--           rango              rango del miembro
+--           departamento       departamento ('Sin registrar' si NULL)
+--           nacimiento         año de nacimiento (los rangos de
+--                              edad se calculan al leer)
+--           postulantes_mes    'yyyy-MM' de fecha_registro
+--
+--           SP_DS_RECONCILIAR_RESUMEN recalcula todo desde cero
+--           (carga inicial y job nocturno del backend).
+-- Requiere: Creaciónbasededatosperfecta.sql
+-- Orden   : ejecutar despues de crear las tablas; los SP_DS_* de
+--           01_SP_DASHBOARD.sql leen dashboard_resumen
+-- ============================================================
+USE DB_CGPVP2;
+GO
+
+IF OBJECT_ID('dbo.dashboard_resumen', 'U') IS NULL
+    CREATE TABLE dbo.dashboard_resumen (
+        dimension   NVARCHAR(20)  NOT NULL,
+        clave       NVARCHAR(100) NOT NULL,
+        cantidad    INT           NOT NULL,
+        CONSTRAINT PK_dashboard_resumen PRIMARY KEY (dimension, clave)
+    );
+GO
+
+-- ------------------------------------------------------------
+-- 1. Triggers: aplican el delta (+1 inserted / -1 deleted)
+--    Un UPDATE que mueve una fila de grupo resta en el viejo y
+--    suma en el nuevo; si no cambia el grupo el delta es 0.
+-- ------------------------------------------------------------
+CREATE OR ALTER TRIGGER TR_MIEMBROS_RESUMEN
+ON miembros
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- UPDATE que no toca columnas agregadas: nada que hacer
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(estado) OR UPDATE(rango) OR UPDATE(departamento) OR UPDATE(fecha_nacimiento))
+        RETURN;
+
+    WITH delta AS (
+        SELECT g.dimension, g.clave, SUM(f.signo) AS cambio
+        FROM (
+            SELECT  1 AS signo, estado, rango, departamento, fecha_nacimiento FROM inserted
+            UNION ALL
+            SELECT -1,          estado, rango, departamento, fecha_nacimiento FROM deleted
+        ) f
+        CROSS APPLY (VALUES
+            (N'estado',       f.estado),
+            (N'rango',        f.rango),
+            (N'departamento', ISNULL(f.departamento, N'Sin registrar')),
+            (N'nacimiento',   CAST(YEAR(f.fecha_nacimiento) AS NVARCHAR(4)))
+        ) g(dimension, clave)
+        WHERE g.clave IS NOT NULL
+        GROUP BY g.dimension, g.clave
+        HAVING SUM(f.signo) <> 0
+    )
+    MERGE dbo.dashboard_resumen WITH (HOLDLOCK) AS r
+    USING delta AS d
+       ON r.dimension = d.dimension AND r.clave = d.clave
+    WHEN MATCHED THEN
+        UPDATE SET cantidad = r.cantidad + d.cambio
+    WHEN NOT MATCHED THEN
+        INSERT (dimension, clave, cantidad) VALUES (d.dimension, d.clave, d.cambio);
+END
+GO
+
+CREATE OR ALTER TRIGGER TR_POSTULANTES_RESUMEN
+ON postulantes
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT UPDATE(fecha_registro)
+        RETURN;
+
+    WITH delta AS (
+        SELECT CONVERT(NVARCHAR(7), f.fecha_registro, 126) AS clave, SUM(f.signo) AS cambio
+        FROM (
+            SELECT  1 AS signo, fecha_registro FROM inserted
+            UNION ALL
+            SELECT -1,          fecha_registro FROM deleted
+        ) f
+        WHERE f.fecha_registro IS NOT NULL
+        GROUP BY CONVERT(NVARCHAR(7), f.fecha_registro, 126)
+        HAVING SUM(f.signo) <> 0
+    )
+    MERGE dbo.dashboard_resumen WITH (HOLDLOCK) AS r
+    USING delta AS d
+       ON r.dimension = N'postulantes_mes' AND r.clave = d.clave
+    WHEN MATCHED THEN
+        UPDATE SET cantidad = r.cantidad + d.cambio
+    WHEN NOT MATCHED THEN
+        INSERT (dimension, clave, cantidad) VALUES (N'postulantes_mes', d.clave, d.cambio);
+END
+GO
+
+-- ------------------------------------------------------------
+-- 2. Reconciliacion: recalcula todo y corrige las diferencias
+--    (carga inicial, y job nocturno por si alguien escribio con
+--    los triggers deshabilitados o hubo un bulk insert sin
+--    FIRE_TRIGGERS). Devuelve cuantos grupos corrigio.
+-- ------------------------------------------------------------
+CREATE OR ALTER PROCEDURE SP_DS_RECONCILIAR_RESUMEN
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRY
+        BEGIN TRANSACTION;
+
+        -- Bloquea escrituras en ambas tablas mientras se recalcula:
+        -- ningun trigger puede aplicar un delta sobre un conteo a medio armar
+        DECLARE @bloqueo INT;
+        SELECT @bloqueo = COUNT(*) FROM miembros    WITH (TABLOCK, HOLDLOCK);
+        SELECT @bloqueo = COUNT(*) FROM postulantes WITH (TABLOCK, HOLDLOCK);
+
+        DECLARE @real TABLE (
+            dimension NVARCHAR(20)  NOT NULL,
+            clave     NVARCHAR(100) NOT NULL,
+            cantidad  INT           NOT NULL,
+            PRIMARY KEY (dimension, clave)
+        );
+
+        INSERT INTO @real (dimension, clave, cantidad)
+        SELECT g.dimension, g.clave, COUNT(*)
+        FROM miembros m
+        CROSS APPLY (VALUES
+            (N'estado',       m.estado),
+            (N'rango',        m.rango),
+            (N'departamento', ISNULL(m.departamento, N'Sin registrar')),
+            (N'nacimiento',   CAST(YEAR(m.fecha_nacimiento) AS NVARCHAR(4)))
+        ) g(dimension, clave)
+        WHERE g.clave IS NOT NULL
+        GROUP BY g.dimension, g.clave;
+
+        INSERT INTO @real (dimension, clave, cantidad)
+        SELECT N'postulantes_mes', CONVERT(NVARCHAR(7), fecha_registro, 126), COUNT(*)
+        FROM postulantes
+        WHERE fecha_registro IS NOT NULL
+        GROUP BY CONVERT(NVARCHAR(7), fecha_registro, 126);
+
+        DECLARE @cambios TABLE (accion NVARCHAR(10), anterior INT NULL);
+
+        MERGE dbo.dashboard_resumen AS r
+        USING @real AS x
+           ON r.dimension = x.dimension AND r.clave = x.clave
+        WHEN MATCHED AND r.cantidad <> x.cantidad THEN
+            UPDATE SET cantidad = x.cantidad
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT (dimension, clave, cantidad) VALUES (x.dimension, x.clave, x.cantidad)
+        WHEN NOT MATCHED BY SOURCE THEN   -- grupos vacios o sobrantes
+            DELETE
+        OUTPUT $action, deleted.cantidad INTO @cambios;
+
+        COMMIT TRANSACTION;
+
+        SELECT 'SUCCESS' AS status,
+               (SELECT COUNT(*) FROM @cambios
+                WHERE NOT (accion = 'DELETE' AND anterior = 0)) AS grupos_corregidos;
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0 ROLLBACK TRANSACTION;
+        THROW;
+    END CATCH
+END
+GO
+
+-- Carga inicial
+EXEC SP_DS_RECONCILIAR_RESUMEN;
+GO
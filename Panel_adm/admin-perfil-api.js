@@ -8,6 +8,17 @@
 const _adminData = JSON.parse(localStorage.getItem('admin_data') || '{}');
 const ADMIN_ID = _adminData.admin_id;
 const API_PERFIL_BASE = 'https://paramedicosdelperu.org/api/admin/perfil';
+const API_MEDIA_BASE  = 'https://paramedicosdelperu.org/api/media';
+
+// URL de la foto de perfil: la BD guarda el hash del almacén de media
+// (la API también manda foto_perfil_url); las fotos viejas son base64 / URL
+function urlFotoPerfil(datos) {
+    if (!datos) return null;
+    if (datos.foto_perfil_url) return new URL(datos.foto_perfil_url, API_PERFIL_BASE).href;
+    const foto = datos.foto_perfil;
+    if (foto && /^[0-9a-f]{64}$/i.test(foto)) return `${API_MEDIA_BASE}/${foto.toLowerCase()}`;
+    return foto || null;
+}
 
 // Variables globales
 let perfilActual = null;
@@ -47,17 +58,18 @@ function actualizarUIConPerfil(perfil) {
 
     // Foto sidebar
     const avatarSidebar = document.querySelector('.sidebar-footer .profile-avatar img');
-    if (avatarSidebar && perfil.foto_perfil) {
-        avatarSidebar.src = perfil.foto_perfil;
+    const fotoPerfil = urlFotoPerfil(perfil);
+    if (avatarSidebar && fotoPerfil) {
+        avatarSidebar.src = fotoPerfil;
         if (typeof window.originalPhoto !== 'undefined') {
-            window.originalPhoto = perfil.foto_perfil;
+            window.originalPhoto = fotoPerfil;
         }
     }
 
     // Foto topbar
     const avatarTopbar = document.querySelector('.topbar-right .admin-avatar img');
-    if (avatarTopbar && perfil.foto_perfil) {
-        avatarTopbar.src = perfil.foto_perfil;
+    if (avatarTopbar && fotoPerfil) {
+        avatarTopbar.src = fotoPerfil;
     }
 
     // Nombre sidebar
@@ -137,9 +149,10 @@ function llenarModalConDatos(datos) {
     if (cargoInput)    cargoInput.value    = datos.cargo || 'Administrador Principal';
 
     // 🔥 Foto: solo desde la BD. Si no tiene, mostrar placeholder con iniciales
+    const fotoPerfil = urlFotoPerfil(datos);
     if (fotoPreview) {
-        if (datos.foto_perfil) {
-            fotoPreview.src = datos.foto_perfil;
+        if (fotoPerfil) {
+            fotoPreview.src = fotoPerfil;
         } else {
             fotoPreview.src = generarAvatarPlaceholder(datos.nombre_completo || datos.username || 'A');
         }
@@ -148,7 +161,7 @@ function llenarModalConDatos(datos) {
     // También actualizar sidebar y topbar
     const sidebarAvatar = document.querySelector('.sidebar-footer .profile-avatar img');
     const topbarAvatar  = document.querySelector('.topbar-right .admin-avatar img');
-    const fotoSrc = datos.foto_perfil || generarAvatarPlaceholder(datos.nombre_completo || datos.username || 'A');
+    const fotoSrc = fotoPerfil || generarAvatarPlaceholder(datos.nombre_completo || datos.username || 'A');
     if (sidebarAvatar) sidebarAvatar.src = fotoSrc;
     if (topbarAvatar)  topbarAvatar.src  = fotoSrc;
 
@@ -233,7 +246,7 @@ window.restoreOriginalPhoto = function() {
     const adminLocal = JSON.parse(localStorage.getItem('admin_data') || '{}');
     const original = (typeof window.originalPhoto !== 'undefined' && window.originalPhoto)
         ? window.originalPhoto
-        : (adminLocal.foto_perfil || null);
+        : urlFotoPerfil(adminLocal);
     
     if (profilePreview) profilePreview.src = original || generarAvatarPlaceholder(_adminData.nombre_completo || 'A');
     if (sidebarAvatar)  sidebarAvatar.src  = original || generarAvatarPlaceholder(_adminData.nombre_completo || 'A');
@@ -267,12 +280,13 @@ async function actualizarFotoPerfil(fotoBase64) {
         console.log('✅ Foto actualizada en la API:', result);
         
         if (typeof window.originalPhoto !== 'undefined') {
-            window.originalPhoto = fotoBase64;
+            window.originalPhoto = urlFotoPerfil(result) || fotoBase64;
         }
         
-        // Actualizar también en localStorage
+        // Actualizar también en localStorage (solo el hash, no el base64)
         const adminLocal = JSON.parse(localStorage.getItem('admin_data') || '{}');
-        adminLocal.foto_perfil = fotoBase64;
+        adminLocal.foto_perfil = result.foto_perfil || fotoBase64;
+        delete adminLocal.foto_perfil_url;
         localStorage.setItem('admin_data', JSON.stringify(adminLocal));
         
         mostrarNotificacionPerfil('Foto de perfil actualizada correctamente', 'success');
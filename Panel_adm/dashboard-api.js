@@ -24,8 +24,8 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
     
-    // Auto-refresh cada 5 minutos (opcional)
-    // setInterval(cargarDashboardCompleto, 300000);
+    // Actividad en vivo (SSE): reemplaza al auto-refresh por intervalo
+    conectarActividadEnVivo();
 });
 
 // ══════════════════════════════════════════════════════════════════
@@ -37,16 +37,32 @@ async function cargarDashboardCompleto() {
         
         mostrarLoaderDashboard();
         
-        await cargarKPIs();
-        await cargarGraficoMiembrosRango();
+        // Una sola petición con todos los widgets (los SP corren en paralelo en el servidor)
+        let w = {};
+        try {
+            const response = await fetch(`${DASHBOARD_API}/all`);
+            const result = await response.json();
+            if (result.status === "SUCCESS" && result.data) {
+                w = result.data;
+                console.log("⏱️ Tiempos por widget (ms):", result.tiempos_ms);
+                if (result.errores && Object.keys(result.errores).length) {
+                    console.warn("⚠️ Widgets con error (se reintentan por separado):", result.errores);
+                }
+            }
+        } catch (error) {
+            console.warn("⚠️ /all no disponible, se cargan los widgets por separado:", error);
+        }
         
+        // Widget sin datos (null / ausente) -> su endpoint individual
         await Promise.all([
-            cargarGraficoMiembrosEstado(),
-            cargarGraficoPostulantesMes(),
-            cargarGraficoMiembrosDepartamento(),
-            cargarGraficoEdadesMiembros(),
-            cargarGraficoOcupacionCursos(),
-            cargarActividadReciente()
+            cargarKPIs(w.kpis ?? undefined),
+            cargarGraficoMiembrosRango(w.miembros_rango ?? undefined),
+            cargarGraficoMiembrosEstado(w.miembros_estado ?? undefined),
+            cargarGraficoPostulantesMes(w.postulantes_mes ?? undefined),
+            cargarGraficoMiembrosDepartamento(w.miembros_departamento ?? undefined),
+            cargarGraficoEdadesMiembros(w.edades_miembros ?? undefined),
+            cargarGraficoOcupacionCursos(w.ocupacion_cursos ?? undefined),
+            cargarActividadReciente(15, w.actividad_reciente ?? undefined)
         ]);
         
         console.log("✅ Dashboard cargado exitosamente");
@@ -59,13 +75,19 @@ async function cargarDashboardCompleto() {
     }
 }
 
+// Datos de un widget: los que ya llegaron con /all, o su endpoint individual
+async function obtenerWidget(ruta, datos) {
+    if (datos !== undefined) return { status: "SUCCESS", data: datos };
+    const response = await fetch(`${DASHBOARD_API}${ruta}`);
+    return response.json();
+}
+
 // ══════════════════════════════════════════════════════════════════
 // 1. CARGAR KPIs PRINCIPALES
 // ══════════════════════════════════════════════════════════════════
-async function cargarKPIs() {
+async function cargarKPIs(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/`, datos);
 
         console.log("📦 KPIs recibidos:", result);
 
@@ -139,10 +161,9 @@ function animarContador(elemento, desde, hasta, duracion) {
 // ══════════════════════════════════════════════════════════════════
 // 2. GRÁFICO: MIEMBROS POR RANGO
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoMiembrosRango() {
+async function cargarGraficoMiembrosRango(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/miembros-rango`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/miembros-rango`, datos);
         
         console.log("📊 Miembros por rango:", result);
         
@@ -233,10 +254,9 @@ function crearGraficoMiembrosRango(labels, valores) {
 // ══════════════════════════════════════════════════════════════════
 // 3. GRÁFICO: MIEMBROS POR ESTADO (DONUT)
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoMiembrosEstado() {
+async function cargarGraficoMiembrosEstado(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/miembros-estado`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/miembros-estado`, datos);
         if (result.status === "SUCCESS" && result.data) {
             crearGraficoMiembrosEstado(
                 result.data.map(i => i.estado   || 'Sin estado'),
@@ -278,10 +298,9 @@ function crearGraficoMiembrosEstado(labels, valores) {
 // ══════════════════════════════════════════════════════════════════
 // 4. GRÁFICO: POSTULANTES POR MES (LÍNEA)
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoPostulantesMes() {
+async function cargarGraficoPostulantesMes(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/postulantes-mes`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/postulantes-mes`, datos);
         if (result.status === "SUCCESS" && result.data) {
             crearGraficoPostulantesMes(
                 result.data.map(i => i.mes_label || ''),
@@ -322,10 +341,9 @@ function crearGraficoPostulantesMes(labels, valores) {
 // ══════════════════════════════════════════════════════════════════
 // 5. GRÁFICO: MIEMBROS POR DEPARTAMENTO
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoMiembrosDepartamento() {
+async function cargarGraficoMiembrosDepartamento(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/miembros-departamento`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/miembros-departamento`, datos);
         if (result.status === "SUCCESS" && result.data) {
             crearGraficoMiembrosDepartamento(
                 result.data.map(i => i.departamento || 'Sin departamento'),
@@ -357,10 +375,9 @@ function crearGraficoMiembrosDepartamento(labels, valores) {
 // ══════════════════════════════════════════════════════════════════
 // 6. GRÁFICO: EDADES DE MIEMBROS
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoEdadesMiembros() {
+async function cargarGraficoEdadesMiembros(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/edades-miembros`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/edades-miembros`, datos);
         if (result.status === "SUCCESS" && result.data) {
             crearGraficoEdadesMiembros(
                 result.data.map(i => i.rango_edad || ''),
@@ -392,10 +409,9 @@ function crearGraficoEdadesMiembros(labels, valores) {
 // ══════════════════════════════════════════════════════════════════
 // 7. GRÁFICO: OCUPACIÓN DE CURSOS
 // ══════════════════════════════════════════════════════════════════
-async function cargarGraficoOcupacionCursos() {
+async function cargarGraficoOcupacionCursos(datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/graficos/ocupacion-cursos`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/graficos/ocupacion-cursos`, datos);
         if (result.status === "SUCCESS" && result.data) {
             crearGraficoOcupacionCursos(
                 result.data.map(i => i.titulo        || 'Sin título'),
@@ -429,15 +445,39 @@ function crearGraficoOcupacionCursos(labels, ocupacion) {
 // ══════════════════════════════════════════════════════════════════
 // 8. ACTIVIDAD RECIENTE
 // ══════════════════════════════════════════════════════════════════
-async function cargarActividadReciente(top = 15) {
+async function cargarActividadReciente(top = 15, datos) {
     try {
-        const response = await fetch(`${DASHBOARD_API}/actividad-reciente?top=${top}`);
-        const result = await response.json();
+        const result = await obtenerWidget(`/actividad-reciente?top=${top}`, datos);
         if (result.status === "SUCCESS" && result.data) renderActividadReciente(result.data);
     } catch (error) { console.error("❌ Error actividad reciente:", error); }
 }
 
+// ══════════════════════════════════════════════════════════════════
+// 8b. ACTIVIDAD EN VIVO (Server-Sent Events)
+// ══════════════════════════════════════════════════════════════════
+const ACTIVIDAD_MAX = 15;
+let actividadActual = [];
+let timerKPIsEnVivo = null;
+
+function conectarActividadEnVivo() {
+    if (typeof EventSource === 'undefined') return;
+    // EventSource reconecta solo y manda Last-Event-ID: no se pierden eventos
+    const fuente = new EventSource(`${DASHBOARD_API}/actividad/stream`);
+
+    fuente.addEventListener('actividad', (e) => {
+        const act = JSON.parse(e.data);
+        renderActividadReciente([act, ...actividadActual].slice(0, ACTIVIDAD_MAX));
+        // Los conteos salen de dashboard_resumen (barato); agrupar ráfagas
+        clearTimeout(timerKPIsEnVivo);
+        timerKPIsEnVivo = setTimeout(() => cargarKPIs(), 2000);
+    });
+
+    // El servidor perdió el hilo (reinicio o conexión muy lenta): recargar de la BD
+    fuente.addEventListener('resync', () => cargarActividadReciente(ACTIVIDAD_MAX));
+}
+
 function renderActividadReciente(actividades) {
+    actividadActual = actividades || [];
     const container = document.getElementById('actividadReciente');
     if (!container) return;
     
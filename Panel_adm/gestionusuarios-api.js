@@ -19,6 +19,10 @@ let paginaActual      = 1;
 let totalRegistros    = 0;
 const registrosPorPagina = 10;
 
+// ── Buscador ──────────────────────────────────────────────────────
+let _temporizadorBusqueda = null;
+let _consultaSugerencias  = 0;   // descarta respuestas de teclas anteriores
+
 // ── Estado foto ──────────────────────────────────────────────────
 let _idMiembroEdicion = null;
 const PLACEHOLDER_FOTO = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='90' height='90'%3E%3Crect width='90' height='90' fill='%23e0e0e0' rx='45'/%3E%3Ctext x='50%25' y='55%25' text-anchor='middle' dy='.1em' font-size='38' fill='%23aaa'%3E%F0%9F%91%A4%3C/text%3E%3C/svg%3E";
@@ -29,7 +33,15 @@ const PLACEHOLDER_FOTO = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/200
 document.addEventListener("DOMContentLoaded", () => {
     cargarUsuarios();
 
-    searchInput?.addEventListener("input",  () => { paginaActual = 1; cargarUsuarios(); });
+    searchInput?.addEventListener("input",  () => {
+        paginaActual = 1;
+        sugerirUsuarios();
+        // La tabla espera a que se deje de escribir; las sugerencias salen al instante
+        clearTimeout(_temporizadorBusqueda);
+        _temporizadorBusqueda = setTimeout(cargarUsuarios, 300);
+    });
+    searchInput?.addEventListener("keydown", e => { if (e.key === "Escape") ocultarSugerencias(); });
+    searchInput?.addEventListener("blur", () => setTimeout(ocultarSugerencias, 150));
     filterEstado?.addEventListener("change", () => { paginaActual = 1; cargarUsuarios(); });
     filterRango?.addEventListener("change",  () => { paginaActual = 1; cargarUsuarios(); });
     filterDepartamento?.addEventListener("change", () => { paginaActual = 1; cargarUsuarios(); });
@@ -87,6 +99,52 @@ async function cargarUsuarios() {
     }
 }
 
+// ══════════════════════════════════════════════════════════════════
+// SUGERENCIAS DEL BUSCADOR (índice en memoria del backend)
+// ══════════════════════════════════════════════════════════════════
+async function sugerirUsuarios() {
+    const q = (searchInput?.value || "").trim();
+    const consulta = ++_consultaSugerencias;
+    if (q.length < 2) { ocultarSugerencias(); return; }
+
+    try {
+        const params   = new URLSearchParams({ q, tipo: "miembro", limite: 8 });
+        const response = await fetch(`${API_BASE}/sugerir?${params.toString()}`);
+        const result   = await response.json();
+        if (consulta !== _consultaSugerencias) return;   // ya se escribió otra cosa
+        renderSugerencias(result.status === "SUCCESS" ? result.data || [] : []);
+    } catch (error) {
+        console.error("Error cargando sugerencias:", error);
+        ocultarSugerencias();
+    }
+}
+
+function renderSugerencias(lista) {
+    let caja = document.getElementById("sugerenciasUsuarios");
+    if (!caja) {
+        caja = document.createElement("div");
+        caja.id = "sugerenciasUsuarios";
+        caja.style.cssText = "position:absolute;top:100%;left:0;right:0;z-index:1000;background:white;border-radius:8px;box-shadow:0 8px 24px rgba(0,0,0,0.15);max-height:320px;overflow-y:auto;";
+        const contenedor = searchInput.parentElement;
+        if (getComputedStyle(contenedor).position === "static") contenedor.style.position = "relative";
+        contenedor.appendChild(caja);
+    }
+    if (!lista.length) { ocultarSugerencias(); return; }
+
+    caja.innerHTML = lista.map(x => `
+        <div onmousedown="ocultarSugerencias(); viewUsuario(${x.id})"
+             style="padding:8px 12px;cursor:pointer;border-bottom:1px solid #f0f0f0;font-size:14px;">
+            <strong>${x.nombre_completo}</strong>
+            <span style="color:#888;font-size:12px;"> · DNI ${x.dni || '-'} · ${x.legajo || ''} · ${x.rango || ''}</span>
+        </div>`).join("");
+    caja.style.display = "block";
+}
+
+function ocultarSugerencias() {
+    const caja = document.getElementById("sugerenciasUsuarios");
+    if (caja) caja.style.display = "none";
+}
+
 // ══════════════════════════════════════════════════════════════════
 // RENDERIZAR TABLA
 // ══════════════════════════════════════════════════════════════════
@@ -12,6 +12,21 @@ const INSTRUCTORES_API = {
     }
 };
 
+// URL de la foto: la API devuelve foto_url (/api/admin/instructores/{id}/foto?v=hash)
+// en lugar del base64; `ancho` pide una miniatura WebP
+function fotoInstructor(instructor, ancho) {
+    const fotoUrl = instructor?.foto_url ?? instructor?.Foto_Url;
+    if (fotoUrl) {
+        const url = new URL(fotoUrl, INSTRUCTORES_API.BASE_URL);
+        if (url.origin === new URL(INSTRUCTORES_API.BASE_URL).origin && ancho) {
+            url.searchParams.set('w', ancho);
+            url.searchParams.set('fmt', 'webp');
+        }
+        return url.href;
+    }
+    return instructor?.foto ?? instructor?.Foto ?? '';
+}
+
 // Estado global de instructores
 const INSTRUCTORES_STATE = {
     data: [],
@@ -143,7 +158,7 @@ function renderInstructoresAPI() {
         const certs        = instructor.certificaciones   ?? instructor.Certificaciones    ?? 'Sin certificaciones';
         const email        = instructor.email             ?? instructor.Email              ?? 'Sin email';
         const estado       = instructor.estado            ?? instructor.Estado             ?? 'Inactivo';
-        const foto         = instructor.foto              ?? instructor.Foto               ?? '';
+        const foto         = fotoInstructor(instructor, 160);
         const estadoClass  = estado === 'Activo' ? 'programado' : 'cancelado';
 
         return `
@@ -252,7 +267,7 @@ function verDetalleInstructorAPI(idInstructor) {
     const tel      = instructor.telefono          ?? instructor.Telefono         ?? '—';
     const estado   = instructor.estado            ?? instructor.Estado           ?? '—';
     const bio      = instructor.bio               ?? instructor.Bio              ?? '';
-    const foto     = instructor.foto              ?? instructor.Foto             ?? '';
+    const foto     = fotoInstructor(instructor, 320);
 
     showDynModal('Detalles del Instructor', `
         ${foto ? `
@@ -488,10 +503,10 @@ async function editarInstructorAPI(idInstructor) {
                     <input type="file" id="editInstFoto" accept="image/*" onchange="previsualizarFoto('editInstFoto', 'editInstFotoPreview')">
                     <small class="form-text">Formatos: JPG, PNG, GIF. Dejar vacío para mantener la foto actual</small>
                 </div>
-                ${(ins.foto ?? ins.Foto) ? `
+                ${fotoInstructor(ins) ? `
                 <div class="form-group">
                     <label>Foto actual:</label>
-                    <img id="editInstFotoActual" src="${ins.foto ?? ins.Foto}" style="max-width: 200px; max-height: 200px; border-radius: 10px; margin-top: 10px; display: block;">
+                    <img id="editInstFotoActual" src="${fotoInstructor(ins, 480)}" style="max-width: 200px; max-height: 200px; border-radius: 10px; margin-top: 10px; display: block;">
                 </div>
                 ` : ''}
                 <div class="form-group" id="editInstFotoPreviewContainer" style="display:none;">
@@ -593,7 +608,7 @@ function eliminarInstructorAPI(idInstructor) {
     // Rellenar contenido dinámico del modal
     const msgEl = document.querySelector('#deleteInstructorModal .del-inst-message');
     if (msgEl) {
-        const foto = instructor?.foto ?? instructor?.Foto ?? '';
+        const foto = fotoInstructor(instructor, 160);
         msgEl.innerHTML = `
             <div style="text-align:center;">
                 ${foto
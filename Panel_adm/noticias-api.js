@@ -10,6 +10,25 @@ console.log('🚀 Cargando noticias-api.js COMPLETO...');
 
 const API_BASE_URL = 'https://paramedicosdelperu.org/api/admin/noticias';
 
+// URL de la foto que devuelve /detalle (foto_url = /api/media/{hash}).
+// `ancho` pide una versión reducida en WebP. null si la noticia no tiene foto.
+function urlFotoDetalle(noticia, ancho) {
+    if (!noticia.foto_url) return null;
+    const url = new URL(noticia.foto_url, API_BASE_URL);
+    if (ancho) {
+        url.searchParams.set('w', ancho);
+        url.searchParams.set('fmt', 'webp');
+    }
+    return url.href;
+}
+
+// Reserva el alto de la imagen antes de que cargue (no salta el modal)
+function reservarProporcion(img, noticia) {
+    img.style.aspectRatio = (noticia.foto_ancho && noticia.foto_alto)
+        ? `${noticia.foto_ancho} / ${noticia.foto_alto}`
+        : '';
+}
+
 // Variables locales (NO colisionan con otros módulos)
 let paginaActual = 1;
 let totalPaginas = 1;
@@ -519,7 +538,8 @@ async function verDetalleNoticia(id) {
             // Cargar datos en el modal de vista
             const placeholder = 'data:image/svg+xml,%3Csvg xmlns="http://www.w3.org/2000/svg" width="400" height="250"%3E%3Crect width="400" height="250" fill="%2300093C"/%3E%3Ctext x="50%25" y="50%25" font-size="20" fill="white" text-anchor="middle" dy=".3em"%3ESin Imagen%3C/text%3E%3C/svg%3E';
             const imgEl = document.getElementById('viewNewsImage');
-            imgEl.src = `${API_BASE_URL}/foto/${id}`;
+            reservarProporcion(imgEl, noticia);
+            imgEl.src = urlFotoDetalle(noticia, 800) || placeholder;
             imgEl.onerror = function() { this.src = placeholder; };
             
             const fecha = new Date(noticia.fecha).toLocaleDateString('es-PE', {
@@ -569,13 +589,18 @@ async function editarNoticia(id) {
             // Cargar datos en el formulario de edición
             document.getElementById('editNewsDescription').value = noticia.contenido || '';
             
-            // Mostrar imagen actual desde el endpoint de foto (ahora es binario)
-            const editPlaceholder = 'data:image/svg+xml,%3Csvg xmlns="http://www.w3.org/2000/svg" width="400" height="250"%3E%3Crect width="400" height="250" fill="%2300093C"/%3E%3Ctext x="50%25" y="50%25" font-size="20" fill="white" text-anchor="middle" dy=".3em"%3ESin Imagen%3C/text%3E%3C/svg%3E';
+            // Mostrar imagen actual: la URL viene en el detalle (la imagen no viaja en el JSON)
             const currentImgContainer = document.getElementById('editNewsCurrentImage');
             const currentImg = document.getElementById('editNewsImagePreviewImg');
-            currentImg.src = `${API_BASE_URL}/foto/${id}`;
+            const fotoActual = urlFotoDetalle(noticia, 480);
             currentImg.onload = function() { if (currentImgContainer) currentImgContainer.style.display = 'block'; };
             currentImg.onerror = function() { if (currentImgContainer) currentImgContainer.style.display = 'none'; };
+            if (fotoActual) {
+                reservarProporcion(currentImg, noticia);
+                currentImg.src = fotoActual;
+            } else if (currentImgContainer) {
+                currentImgContainer.style.display = 'none';
+            }
             // Limpiar selección de nueva imagen
             const fileInput = document.getElementById('editNewsImageFile');
             if (fileInput) fileInput.value = '';
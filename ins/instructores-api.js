@@ -15,6 +15,27 @@ const API_CONFIG = {
     RETRY_DELAY: 1000
 };
 
+/**
+ * URL de la foto del instructor. La API ya no manda el base64 en el listado:
+ * cada instructor trae foto_url (/api/instructores/instructores/{id}/foto?v=hash),
+ * que se pide redimensionada a `ancho` px en WebP.
+ */
+function urlFotoInstructor(instructor, ancho) {
+    if (instructor.foto_url) {
+        const url = new URL(instructor.foto_url, API_CONFIG.BASE_URL);
+        if (url.origin === new URL(API_CONFIG.BASE_URL).origin && ancho) {
+            url.searchParams.set('w', ancho);
+            url.searchParams.set('fmt', 'webp');
+        }
+        return url.href;
+    }
+    // Respuestas antiguas con la foto embebida
+    if (instructor.foto && (instructor.foto.startsWith('data:image') || instructor.foto.startsWith('http'))) {
+        return instructor.foto;
+    }
+    return null;
+}
+
 async function fetchWithTimeout(url, options = {}) {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), API_CONFIG.TIMEOUT);
@@ -345,9 +366,6 @@ const InstructoresUI = {
             
             // Renderizar instructores
             instructores.forEach((instructor, index) => {
-                if (instructor.foto) {
-                    console.log(`    Primeros 80 caracteres:`, instructor.foto.substring(0, 80));
-                }
                 const card = this.crearCardInstructor(instructor);
                 grid.appendChild(card);
             });
@@ -398,13 +416,8 @@ const InstructoresUI = {
         // SVG con iniciales como fallback
         const imagenPorDefecto = `data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='400' height='300' viewBox='0 0 400 300'%3E%3Crect fill='%2300093C' width='400' height='300'/%3E%3Ccircle cx='200' cy='120' r='50' fill='%23c5a059'/%3E%3Cpath d='M 140 220 Q 140 170 200 170 Q 260 170 260 220 L 260 300 L 140 300 Z' fill='%23c5a059'/%3E%3Ctext fill='%2300093C' font-family='Arial, sans-serif' font-size='28' font-weight='bold' x='200' y='130' text-anchor='middle' dominant-baseline='middle'%3E${iniciales}%3C/text%3E%3C/svg%3E`;
         
-        // Procesar la imagen - buscar en campo 'foto'
-        let imagenSrc = imagenPorDefecto;
-        if (instructor.foto && instructor.foto.startsWith('data:image')) {
-            imagenSrc = instructor.foto;
-        } else if (instructor.foto && instructor.foto.startsWith('http')) {
-            imagenSrc = instructor.foto;
-        }
+        // Procesar la imagen - foto_url de la API (miniatura de la card)
+        const imagenSrc = urlFotoInstructor(instructor, 480) || imagenPorDefecto;
         
         //  ESTRUCTURA EXACTA COMO LAS CARDS ORIGINALES
         card.innerHTML = `
@@ -658,13 +671,8 @@ async function abrirModalAPI(idInstructor) {
         const iniciales = obtenerIniciales(instructor.nombre_completo);
         const imagenPorDefecto = `data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='200' height='200' viewBox='0 0 200 200'%3E%3Crect fill='%2300093C' width='200' height='200'/%3E%3Ccircle cx='100' cy='80' r='35' fill='%23c5a059'/%3E%3Cpath d='M 55 150 Q 55 110 100 110 Q 145 110 145 150 L 145 200 L 55 200 Z' fill='%23c5a059'/%3E%3Ctext fill='%2300093C' font-family='Arial, sans-serif' font-size='22' font-weight='bold' x='100' y='88' text-anchor='middle' dominant-baseline='middle'%3E${iniciales}%3C/text%3E%3C/svg%3E`;
         
-        // Procesar imagen - campo 'foto' de la BD
-        let imagenSrc = imagenPorDefecto;
-        if (instructor.foto && instructor.foto.startsWith('data:image')) {
-            imagenSrc = instructor.foto;
-        } else if (instructor.foto && instructor.foto.startsWith('http')) {
-            imagenSrc = instructor.foto;
-        }
+        // Procesar imagen - foto_url de la API
+        const imagenSrc = urlFotoInstructor(instructor, 320) || imagenPorDefecto;
         
         modalBody.innerHTML = `
             <div class="bio-header">
@@ -234,6 +234,12 @@
                 body: JSON.stringify({ criterio })
             });
             
+            // Límite de búsquedas por cliente (token bucket en el backend)
+            if (response.status === 429) {
+                const espera = response.headers.get('Retry-After') || 'unos';
+                mostrarError(`Demasiadas búsquedas seguidas. Intenta en ${espera} segundos.`);
+                return;
+            }
             if (!response.ok) throw new Error(`HTTP ${response.status}`);
             
             const data = await response.json();
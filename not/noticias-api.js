@@ -3,6 +3,7 @@
 // ============================================
 const API_BASE_URL = 'https://paramedicosdelperu.org/api/noticias';
 const FOTO_BASE_URL = 'https://paramedicosdelperu.org/api/noticias/foto';
+const MEDIA_BASE_URL = 'https://paramedicosdelperu.org/api/media';
 
 // ============================================
 // FUNCIONES PARA CONSUMIR EL BACKEND
@@ -150,6 +151,25 @@ function formatearFecha(fechaString) {
     return fecha.toLocaleDateString('es-ES', opciones);
 }
 
+/**
+ * URL de la foto de una publicación.
+ * Con el hash (foto_sha256) la URL es inmutable y el navegador la cachea 1 año.
+ * `ancho` pide una versión reducida en WebP (el backend la genera y la cachea).
+ */
+function urlFotoPublicacion(publicacion, ancho) {
+    const params = new URLSearchParams();
+    if (ancho) {
+        params.set('w', ancho);
+        params.set('fmt', 'webp');
+    }
+    const query = params.toString();
+    // Con hash: almacén de media (URL inmutable, compartida entre publicaciones)
+    if (publicacion.foto_sha256) {
+        return `${MEDIA_BASE_URL}/${publicacion.foto_sha256.toLowerCase()}${query ? '?' + query : ''}`;
+    }
+    return `${FOTO_BASE_URL}/${publicacion.idpublicacion}${query ? '?' + query : ''}`;
+}
+
 /**
  * Placeholder SVG para imágenes
  */
@@ -174,7 +194,7 @@ function renderizarNoticiaDestacada(publicacion) {
     
     if (!contenedor || !publicacion) return;
     
-    const imagenUrl = `${FOTO_BASE_URL}/${publicacion.idpublicacion}`;
+    const imagenUrl = urlFotoPublicacion(publicacion, 1280);
     const placeholder = getPlaceholderImage(800, 450, 'Sin Imagen');
     
     contenedor.innerHTML = `
@@ -197,7 +217,7 @@ function renderizarNoticiaDestacada(publicacion) {
  * Renderizar una tarjeta de noticia
  */
 function crearTarjetaNoticia(publicacion) {
-    const imagenUrl = `${FOTO_BASE_URL}/${publicacion.idpublicacion}`;
+    const imagenUrl = urlFotoPublicacion(publicacion, 800);
     const placeholder = getPlaceholderImage(400, 250, 'Sin Imagen');
     const titulo = publicacion.titulo || 'Noticia';
     // El SP de búsqueda devuelve "resumen", los demás devuelven "contenido"
@@ -274,7 +294,7 @@ function renderizarNoticiasRecientes(publicaciones) {
     if (!lista || !publicaciones) return;
     
     lista.innerHTML = publicaciones.map(pub => {
-        const imagenUrl = `${FOTO_BASE_URL}/${pub.idpublicacion}`;
+        const imagenUrl = urlFotoPublicacion(pub, 160);
         const placeholder = getPlaceholderImage(80, 60, 'Noticia');
         const titulo = pub.titulo || pub.contenido.substring(0, 50) + '...';
         